@@ -0,0 +1,201 @@
+# app/biomechanics.py
+"""
+Ângulos articulares a partir do esqueleto inteiro (COCO-17).
+
+Entra o tensor [T, 17, 2] (+ scores [T, 17]) de uma vez e sai, sem loop
+por frame:
+
+  - flexão de joelho (quadril-joelho-tornozelo), quadril (ombro-quadril-
+    joelho) e cotovelo (ombro-cotovelo-punho), esquerdo e direito, em
+    graus: 0 = segmento reto, cresce com a flexão;
+  - inclinação do tronco (meio do quadril -> meio dos ombros) em relação à
+    vertical, positiva pra FRENTE no sentido da corrida;
+  - velocidade angular (graus/s) pela derivada do Savitzky-Golay, mesma
+    janela em segundos da cinemática do quadril;
+  - valores nos eventos: decolagem / aterrissagem de cada salto e média
+    no toque de cada passo.
+
+Junta com score < METRICS_CFG.kpt_score_thr vira NaN; ângulo que depende
+dela também (nada é inventado, só a derivada interpola buracos curtos).
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy.signal import savgol_filter
+
+from .config import METRICS_CFG, POSE_IDXS
+from .kinematics import _savgol_window
+from .metrics import _interp_nans, _nan_to_none
+
+N_JOINTS = 17
+
+# nome -> (articulação proximal, vértice, distal)
+ANGLE_TRIPLETS = {
+    "left_knee": (POSE_IDXS.LEFT_HIP, POSE_IDXS.LEFT_KNEE, POSE_IDXS.LEFT_ANKLE),
+    "right_knee": (POSE_IDXS.RIGHT_HIP, POSE_IDXS.RIGHT_KNEE, POSE_IDXS.RIGHT_ANKLE),
+    "left_hip": (POSE_IDXS.LEFT_SHOULDER, POSE_IDXS.LEFT_HIP, POSE_IDXS.LEFT_KNEE),
+    "right_hip": (POSE_IDXS.RIGHT_SHOULDER, POSE_IDXS.RIGHT_HIP, POSE_IDXS.RIGHT_KNEE),
+    "left_elbow": (POSE_IDXS.LEFT_SHOULDER, POSE_IDXS.LEFT_ELBOW, POSE_IDXS.LEFT_WRIST),
+    "right_elbow": (POSE_IDXS.RIGHT_SHOULDER, POSE_IDXS.RIGHT_ELBOW, POSE_IDXS.RIGHT_WRIST),
+}
+TRUNK_LEAN = "trunk_lean"
+ANGLE_NAMES = tuple(ANGLE_TRIPLETS) + (TRUNK_LEAN,)
+
+
+def stack_keypoints(
+    keypoints: Sequence[Optional[np.ndarray]],
+    scores: Optional[Sequence[Optional[np.ndarray]]] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Lista por frame (None = sem pose) -> xy [T, 17, 2] e scores [T, 17]
+    com NaN onde não há pose. Sem scores: 1.0 onde há ponto.
+    """
+    n = len(keypoints)
+    xy = np.full((n, N_JOINTS, 2), np.nan)
+    sc = np.full((n, N_JOINTS), np.nan)
+    has = np.fromiter((k is not None and len(k) >= N_JOINTS for k in keypoints), bool, n)
+    idx = np.flatnonzero(has)
+    if len(idx):
+        xy[idx] = np.stack([np.asarray(keypoints[i], dtype=float)[:N_JOINTS, :2] for i in idx])
+        if scores is None:
+            sc[idx] = 1.0
+        else:
+            blank = np.full(N_JOINTS, np.nan)
+            sc[idx] = np.stack([
+                blank if scores[i] is None or len(scores[i]) < N_JOINTS
+                else np.asarray(scores[i], dtype=float)[:N_JOINTS]
+                for i in idx
+            ])
+    return xy, sc
+
+
+def _interior_angle_deg(a: np.ndarray, b: np.ndarray, c: np.ndarray) -> np.ndarray:
+    """Ângulo em b entre (a - b) e (c - b), graus, para arrays [..., 2]."""
+    u = a - b
+    v = c - b
+    dot = np.einsum("...i,...i->...", u, v)
+    cross = u[..., 0] * v[..., 1] - u[..., 1] * v[..., 0]
+    return np.degrees(np.abs(np.arctan2(cross, dot)))
+
+
+def _running_direction(hip_x: np.ndarray) -> float:
+    """+1 correndo pra direita na imagem, -1 pra esquerda."""
+    hip_x = np.asarray(hip_x, dtype=float)
+    ok = np.isfinite(hip_x)
+    if ok.sum() < 2:
+        return 1.0
+    xs = hip_x[ok]
+    return 1.0 if xs[-1] >= xs[0] else -1.0
+
+
+def joint_angles(
+    xy: np.ndarray,
+    scores: np.ndarray,
+    hip_x: Optional[np.ndarray] = None,
+    score_thr: Optional[float] = None,
+) -> Dict[str, np.ndarray]:
+    """Série [T] de cada ângulo (graus, NaN sem junta confiável)."""
+    thr = METRICS_CFG.kpt_score_thr if score_thr is None else float(score_thr)
+    xy = np.where((scores >= thr)[..., None], xy, np.nan)
+
+    tri = np.asarray(list(ANGLE_TRIPLETS.values()), dtype=np.intp)   # [A, 3]
+    inner = _interior_angle_deg(xy[:, tri[:, 0]], xy[:, tri[:, 1]], xy[:, tri[:, 2]])
+    flexion = 180.0 - inner                                          # [T, A]
+    out = {name: flexion[:, k] for k, name in enumerate(ANGLE_TRIPLETS)}
+
+    # tronco: vetor quadril -> ombros contra a vertical (y da imagem pra baixo)
+    mid_hip = 0.5 * (xy[:, POSE_IDXS.LEFT_HIP] + xy[:, POSE_IDXS.RIGHT_HIP])
+    mid_sh = 0.5 * (xy[:, POSE_IDXS.LEFT_SHOULDER] + xy[:, POSE_IDXS.RIGHT_SHOULDER])
+    d = mid_sh - mid_hip
+    direction = _running_direction(mid_hip[:, 0] if hip_x is None else hip_x)
+    out[TRUNK_LEAN] = np.degrees(np.arctan2(direction * d[:, 0], -d[:, 1]))
+    return out
+
+
+def angular_velocities(angles: Dict[str, np.ndarray], fps: float) -> Dict[str, np.ndarray]:
+    """Derivada suavizada (graus/s); NaN onde o ângulo é NaN."""
+    out = {}
+    for name, a in angles.items():
+        n = len(a)
+        valid = np.isfinite(a)
+        polyorder = 2
+        w = _savgol_window(fps, n, polyorder)
+        if valid.sum() < max(2, polyorder + 1) or w <= polyorder or fps <= 0:
+            out[name] = np.full(n, np.nan)
+            continue
+        filled = _interp_nans(a.copy())
+        vel = savgol_filter(filled, w, polyorder, deriv=1, delta=1.0 / float(fps), mode="interp")
+        out[name] = np.where(valid, vel, np.nan)
+    return out
+
+
+def _table_at(angles: Dict[str, np.ndarray], frames: np.ndarray) -> np.ndarray:
+    """Ângulos nos frames pedidos: [len(frames), A] (NaN fora do vídeo)."""
+    table = np.stack([angles[name] for name in ANGLE_NAMES], axis=-1)   # [T, A]
+    frames = np.asarray(frames, dtype=np.intp)
+    ok = (frames >= 0) & (frames < len(table))
+    vals = np.full((len(frames), len(ANGLE_NAMES)), np.nan)
+    vals[ok] = table[frames[ok]]
+    return vals
+
+
+def _rows(vals: np.ndarray) -> List[Dict[str, Optional[float]]]:
+    rows = np.where(np.isnan(vals), None, np.round(vals, 2)).tolist()
+    return [dict(zip(ANGLE_NAMES, r)) for r in rows]
+
+
+def _summary(a: np.ndarray) -> Dict[str, Optional[float]]:
+    ok = a[np.isfinite(a)]
+    if len(ok) == 0:
+        return {"mean_deg": None, "min_deg": None, "max_deg": None, "range_deg": None}
+    return {
+        "mean_deg": float(np.mean(ok)),
+        "min_deg": float(np.min(ok)),
+        "max_deg": float(np.max(ok)),
+        "range_deg": float(np.ptp(ok)),
+    }
+
+
+def compute_biomechanics(
+    xy: np.ndarray,
+    scores: np.ndarray,
+    fps: float,
+    hip_x: Optional[np.ndarray] = None,
+    jumps: Sequence[Dict[str, Any]] = (),
+    step_events: Sequence[int] = (),
+) -> Dict[str, Any]:
+    """
+    Ângulos + velocidades angulares do clipe e valores nos eventos.
+
+    Retorna séries (listas com None no lugar de NaN, prontas pro JSON) e
+    resumo por ângulo.
+    """
+    angles = joint_angles(xy, scores, hip_x=hip_x)
+    ang_vel = angular_velocities(angles, fps)
+
+    takeoffs = np.array([j["jump_takeoff_frame"] for j in jumps], dtype=np.intp)
+    landings = np.array([j["jump_landing_frame"] for j in jumps], dtype=np.intp)
+    touchdown = _table_at(angles, np.asarray(step_events, dtype=np.intp))
+    td_n = np.isfinite(touchdown).sum(axis=0)
+    td_mean = np.nansum(touchdown, axis=0) / np.maximum(td_n, 1)
+
+    summary = {}
+    for k, name in enumerate(ANGLE_NAMES):
+        s = _summary(angles[name])
+        v = ang_vel[name]
+        v = v[np.isfinite(v)]
+        s["peak_angular_velocity_deg_s"] = float(np.max(np.abs(v))) if len(v) else None
+        s["mean_at_touchdown_deg"] = float(td_mean[k]) if td_n[k] else None
+        summary[name] = s
+
+    return {
+        "angles": summary,
+        "events": {
+            "takeoff": _rows(_table_at(angles, takeoffs)),
+            "landing": _rows(_table_at(angles, landings)),
+            "touchdown": _rows(touchdown),
+        },
+        "angle_series_deg": {name: _nan_to_none(a) for name, a in angles.items()},
+        "angular_velocity_series_deg_s": {name: _nan_to_none(v) for name, v in ang_vel.items()},
+    }
@@ -0,0 +1,172 @@
+# app/calibration.py
+"""
+Calibração por homografia do plano do chão (opcional).
+
+Além do formato antigo de 2 pontos ({point1, point2, real_distance_m}, um
+único m/px pro vídeo inteiro), o `calib` pode trazer 4+ correspondências
+imagem -> chão em metros:
+
+    {
+        "image_points": [[u, v], ...],       # px no frame (>= 4)
+        "world_points_m": [[X, Y], ...],     # metros no chão, X = sentido da pista
+    }
+
+Com isso cada ponto vira coordenada métrica no plano do chão e a
+perspectiva deixa de distorcer distância / velocidade ao longo da pista.
+A projeção da trajetória inteira é UMA multiplicação de matriz em lote.
+
+Pontos que não estão no chão (quadril) são projetados pelo ponto do chão
+logo abaixo deles (ver `ground_trajectory`); a altura (salto) usa a escala
+LOCAL da homografia naquele ponto.
+"""
+
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+from scipy.ndimage import percentile_filter
+
+from .metrics import _interp_nans, compute_scale_m_per_px
+
+
+def has_homography(calib: Optional[Dict[str, Any]]) -> bool:
+    return bool(calib) and "image_points" in calib and "world_points_m" in calib
+
+
+@lru_cache(maxsize=32)
+def _homography_cached(img_pts: Tuple, world_pts: Tuple) -> np.ndarray:
+    src = np.asarray(img_pts, dtype=np.float32).reshape(-1, 2)
+    dst = np.asarray(world_pts, dtype=np.float32).reshape(-1, 2)
+    if len(src) != len(dst) or len(src) < 4:
+        raise ValueError("Homografia precisa de >= 4 pares image_points / world_points_m.")
+    if len(src) == 4:
+        H = cv2.getPerspectiveTransform(src, dst)
+    else:
+        H, _ = cv2.findHomography(src, dst, method=0)
+    if H is None or not np.all(np.isfinite(H)):
+        raise ValueError("Pontos de calibração degenerados (colineares?).")
+    return H.astype(np.float64)
+
+
+def homography_from_calib(calib: Dict[str, Any]) -> Optional[np.ndarray]:
+    """Matriz 3x3 imagem -> chão (m), ou None se o calib é o de 2 pontos."""
+    if not has_homography(calib):
+        return None
+    key = lambda pts: tuple(tuple(float(v) for v in p) for p in pts)  # noqa: E731
+    return _homography_cached(key(calib["image_points"]), key(calib["world_points_m"]))
+
+
+def project_points(H: np.ndarray, pts: np.ndarray) -> np.ndarray:
+    """
+    Projeta pontos [..., 2] (px) pro chão em metros com uma matmul só.
+    NaN entra, NaN sai.
+    """
+    pts = np.asarray(pts, dtype=np.float64)
+    flat = pts.reshape(-1, 2)
+    hom = flat @ H[:, :2].T + H[:, 2]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = hom[:, :2] / hom[:, 2:3]
+    return out.reshape(pts.shape)
+
+
+def local_scale_m_per_px(H: np.ndarray, pts: np.ndarray) -> np.ndarray:
+    """
+    m/px LOCAL na direção horizontal da imagem em cada ponto do chão
+    (norma da coluna du do Jacobiano da homografia). É a escala de um
+    objeto de pé naquele ponto, usada pra alturas (salto).
+    """
+    pts = np.asarray(pts, dtype=np.float64).reshape(-1, 2)
+    u, v = pts[:, 0], pts[:, 1]
+    w = H[2, 0] * u + H[2, 1] * v + H[2, 2]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        X = (H[0, 0] * u + H[0, 1] * v + H[0, 2]) / w
+        Y = (H[1, 0] * u + H[1, 1] * v + H[1, 2]) / w
+        dX_du = (H[0, 0] - X * H[2, 0]) / w
+        dY_du = (H[1, 0] - Y * H[2, 0]) / w
+    return np.hypot(dX_du, dY_du)
+
+
+def scale_from_calib(calib: Dict[str, Any], ground_px: Optional[np.ndarray] = None) -> float:
+    """
+    m/px escalar (campo "scale_m_per_px" da resposta): o de 2 pontos, ou a
+    mediana da escala local da homografia na trajetória do atleta.
+    """
+    H = homography_from_calib(calib)
+    if H is None:
+        return compute_scale_m_per_px(calib)
+    if ground_px is None:
+        ground_px = np.asarray(calib["image_points"], dtype=float)
+    s = local_scale_m_per_px(H, ground_px)
+    s = s[np.isfinite(s)]
+    if len(s) == 0:
+        raise ValueError("Escala da homografia inválida na trajetória.")
+    return float(np.median(s))
+
+
+def ground_trajectory(
+    H: np.ndarray,
+    fps: float,
+    hip_filt_x: np.ndarray,
+    hip_filt_y: np.ndarray,
+    hip_raw_x: np.ndarray,
+    hip_raw_y: np.ndarray,
+    LA_x: np.ndarray,
+    LA_y: np.ndarray,
+    RA_x: np.ndarray,
+    RA_y: np.ndarray,
+) -> Dict[str, np.ndarray]:
+    """
+    Séries em metros no chão pra todas as métricas (escala = 1.0):
+
+      - "linha do chão" na imagem sob o atleta: percentil alto móvel (~2 s)
+        do y do pé mais baixo, que varia devagar (perspectiva) e não segue
+        passos nem voos;
+      - quadril: projetado pelo ponto (x do quadril, linha do chão);
+      - tornozelos: projetados direto (estão no chão no apoio);
+      - *_height_y: (y na imagem - linha do chão) * escala local -> altura
+        em metros (negativa pra cima, mesmo sentido do y da imagem) pro
+        detector de salto e pro apoio dos pés.
+
+    Todos os pontos vão numa única matmul.
+    """
+    n = len(hip_raw_x)
+    hip_raw_y = np.asarray(hip_raw_y, dtype=float)
+    LA_y = np.asarray(LA_y, dtype=float)
+    RA_y = np.asarray(RA_y, dtype=float)
+
+    foot_y = np.fmax(LA_y, RA_y)
+    if np.all(np.isnan(foot_y)):
+        # sem tornozelos: chão fixo no ponto mais baixo do quadril
+        floor_v = np.full(n, np.nanmax(hip_raw_y))
+    else:
+        w = max(3, int(round(2.0 * fps)) | 1)
+        w = min(w, n if n % 2 else max(1, n - 1))
+        floor_v = percentile_filter(_interp_nans(foot_y.copy()), 90, size=w, mode="nearest")
+
+    pts = np.stack(
+        [
+            np.stack([hip_filt_x, floor_v], axis=-1),
+            np.stack([hip_raw_x, floor_v], axis=-1),
+            np.stack([LA_x, LA_y], axis=-1),
+            np.stack([RA_x, RA_y], axis=-1),
+        ]
+    ).astype(np.float64)                                   # [4, T, 2]
+    world = project_points(H, pts)
+    local = local_scale_m_per_px(H, pts[1]).reshape(n)
+
+    return {
+        "hip_filt_x": world[0, :, 0],
+        "hip_filt_y": world[0, :, 1],
+        "hip_raw_x": world[1, :, 0],
+        "hip_raw_y": world[1, :, 1],
+        "LA_x": world[2, :, 0],
+        "LA_y": world[2, :, 1],
+        "RA_x": world[3, :, 0],
+        "RA_y": world[3, :, 1],
+        # vertical em metros relativa ao chão (pra salto / apoio dos pés)
+        "hip_height_y": (hip_raw_y - floor_v) * local,
+        "LA_height_y": (LA_y - floor_v) * local,
+        "RA_height_y": (RA_y - floor_v) * local,
+        "ground_px": pts[1],
+    }
@@ -1,5 +1,7 @@
 # app/config.py
+import os
 from dataclasses import dataclass
+from typing import List, Optional
 
 
 @dataclass
@@ -29,9 +31,13 @@ class MetricsConfig:
     # score mínimo do keypoint pra considerar válido
     kpt_score_thr: float = 0.4
     
-    # parâmetros do Savitzky-Golay
-    smoothing_window: int = 9
+    # suavização por polinômio local (app/smoothing.py): mínimos quadrados
+    # ponderados pela confiança; sem pesos, o Savitzky-Golay de sempre
+    smoothing_window: int = 9             # janela fixa quando o fps não é conhecido
     smoothing_polyorder: int = 2
+    smoothing_window_s: float = 0.15      # janela em segundos (9 frames a 60 fps)
+    stride_smoothing_s: float = 0.2       # janela dos tornozelos na tesoura (~11-13 frames a 60 fps)
+    smoothing_robust_iters: int = 2       # iterações bisquare nos tornozelos
     
     # =========================================================
     # AJUSTE AQUI: Aumentando a altura mínima do salto
@@ -41,13 +47,147 @@ class MetricsConfig:
     
     jump_hip_delta_m: float = 0.03
 
+    # segmentação de vários saltos (ver detect_jumps)
+    jump_baseline_window_s: float = 2.0   # janela do "nível do chão" do quadril
+    jump_min_separation_s: float = 0.15   # ápices mais próximos que isso = mesmo voo
+    ankle_contact_speed_m_s: float = 0.5  # tornozelo parado (vertical) = apoio
+    ankle_floor_tol_m: float = 0.05       # tornozelo a até X do chão = apoio
+
+    # contato com o solo por pé (ver app/contacts.py)
+    contact_min_s: float = 0.03           # apoio mais curto que isso = ruído
+    contact_gap_s: float = 0.02           # buraco mais curto que isso no apoio = ruído
+    contact_smoothing_s: float = 0.04     # janela da suavização do tornozelo (apoio é curto)
+
+    # cinemática (ver app/kinematics.py)
+    kinematics_window_s: float = 0.25     # janela da derivada Savitzky-Golay
+    split_distance_m: float = 10.0        # parciais de 10 m
+
+
+# RTMPose body7 (zips oficiais da OpenMMLab, os mesmos que a rtmlib usa)
+RTMPOSE_X_URL = (
+    "https://download.openmmlab.com/mmpose/v1/projects/rtmposev1/"
+    "onnx_sdk/rtmpose-x_simcc-body7_pt-body7_700e-384x288-71d7b7e9_20230629.zip"
+)
+RTMPOSE_M_URL = (
+    "https://download.openmmlab.com/mmpose/v1/projects/rtmposev1/"
+    "onnx_sdk/rtmpose-m_simcc-body7_pt-body7_700e-256x192-e48f03d0_20230504.zip"
+)
+
+# variante de pose -> (zip ONNX, entrada (W, H) como no rtmlib)
+POSE_VARIANTS = {
+    "rtmpose-x": (RTMPOSE_X_URL, (288, 384)),
+    "rtmpose-m": (RTMPOSE_M_URL, (192, 256)),
+}
+
 
 @dataclass
 class ModelConfig:
     device: str = "cuda"
     backend: str = "onnxruntime"
 
+    # variantes dos modelos (padrão; o registro aceita outras por request)
+    yolo_weights: str = "yolo11x.pt"
+    yolo_precision: str = "fp32"     # "fp16" só faz sentido em cuda
+    pose_variant: str = "rtmpose-x"  # chave de POSE_VARIANTS
+
+    # backend do encoder de ReID: "torch" | "onnx" | "onnx-int8"
+    # (onnx-int8 = quantização dinâmica, roda só em CPU; só vale se passar
+    # no gate de paridade / latência contra o fp32, senão "onnx": app/reid.py)
+    reid_backend: str = "torch"
+    # onde ficam os .onnx exportados do encoder de ReID
+    reid_onnx_dir: str = "~/.cache/athlete_reid"
+
+    # threads (0 = padrão da biblioteca) e afinidade de CPU (None = não fixa)
+    intra_op_threads: int = 0
+    inter_op_threads: int = 0
+    cpu_affinity: Optional[List[int]] = None
+
+    # memória máxima dos modelos carregados no registro (0 = sem limite);
+    # acima disso os menos usados recentemente são descartados
+    model_budget_mb: float = 0.0
+
+    # workers do pool de shards (teto fixo, cada um carrega todos os
+    # modelos); > 1 = aquecidos na subida do servidor; 0 = núcleos do
+    # processo até 4, subidos no primeiro request com shards > 1 (ver
+    # app/sharding.py)
+    shard_workers: int = 0
+
+
+def _parse_cores(spec: str) -> List[int]:
+    """'0-3,8,10-11' -> [0, 1, 2, 3, 8, 10, 11]"""
+    cores: List[int] = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            a, b = part.split("-", 1)
+            cores.extend(range(int(a), int(b) + 1))
+        else:
+            cores.append(int(part))
+    return cores
+
+
+def cpu_model_config(
+    threads: Optional[int] = None,
+    cores: Optional[List[int]] = None,
+) -> ModelConfig:
+    """
+    Perfil só-CPU (workers baratos de processamento em lote):
+      - YOLO11n + RTMPose-m 256x192 no lugar de YOLO11x + RTMPose-X,
+      - ReID em ONNX fp32 (int8 é opt-in: ATHLETE_REID_BACKEND=onnx-int8,
+        e ainda passa pelo gate de paridade / latência de app/reid.py),
+      - `threads` threads intra-op, 1 inter-op, fixadas nos `cores`.
+
+    Sem argumentos usa todos os cores que o processo pode usar.
+    """
+    if cores is None:
+        if hasattr(os, "sched_getaffinity"):
+            cores = sorted(os.sched_getaffinity(0))
+        else:
+            cores = list(range(os.cpu_count() or 1))
+        if threads:
+            cores = cores[:threads]
+    threads = threads or len(cores)
+
+    return ModelConfig(
+        device="cpu",
+        yolo_weights="yolo11n.pt",
+        pose_variant="rtmpose-m",
+        reid_backend="onnx",
+        intra_op_threads=threads,
+        inter_op_threads=1,
+        cpu_affinity=cores,
+    )
+
+
+def model_config_from_env() -> ModelConfig:
+    """
+    ATHLETE_PROFILE=cpu   -> cpu_model_config()
+    ATHLETE_THREADS=8     -> nº de threads intra-op do perfil CPU
+    ATHLETE_CPU_CORES=0-7 -> cores pra fixar a afinidade
+    ATHLETE_MODEL_BUDGET_MB=4096 -> orçamento de memória do registro de modelos
+    ATHLETE_SHARD_WORKERS=4 -> pool de shards (4 workers) aquecido na subida
+    ATHLETE_REID_BACKEND=onnx-int8 -> troca o backend do ReID do perfil
+    """
+    if os.environ.get("ATHLETE_PROFILE", "gpu").lower() != "cpu":
+        cfg = ModelConfig()
+    else:
+        threads = int(os.environ.get("ATHLETE_THREADS", "0")) or None
+        cores_spec = os.environ.get("ATHLETE_CPU_CORES")
+        cores = _parse_cores(cores_spec) if cores_spec else None
+        cfg = cpu_model_config(threads=threads, cores=cores)
+
+    cfg.model_budget_mb = float(os.environ.get("ATHLETE_MODEL_BUDGET_MB", "0") or 0)
+    cfg.shard_workers = int(os.environ.get("ATHLETE_SHARD_WORKERS", "0") or 0)
+    cfg.reid_backend = os.environ.get("ATHLETE_REID_BACKEND") or cfg.reid_backend
+    return cfg
+
+
+# trechos paralelos aceitos num request (acima disso é erro do cliente; os
+# trechos a mais que workers do pool esperam na fila dele)
+MAX_SHARDS = 16
 
 POSE_IDXS = PoseKeypointIndices()
 METRICS_CFG = MetricsConfig()
-MODEL_CFG = ModelConfig()
+MODEL_CFG = model_config_from_env()
@@ -0,0 +1,176 @@
+# app/contacts.py
+"""
+Tempo de contato com o solo e tempo de voo por passo.
+
+A partir das séries de tornozelo (LA_* / RA_*) já montadas, sem passar de
+novo pelo vídeo:
+
+  1) apoio por pé = tornozelo parado na vertical e perto do "chão" móvel
+     (`foot_contact_masks`, o mesmo critério do refinamento de salto);
+  2) limpeza das máscaras por comprimento de trecho (apoios curtos demais
+     saem, buracos curtos dentro do apoio são fechados);
+  3) cada trecho de apoio = um passo daquele pé: toque (início) e saída
+     (fim); o voo do passo é o intervalo até o PRÓXIMO toque de qualquer
+     pé.
+
+Fator de carga (duty factor) por passo = contato / duração da passada
+(2 passos): tc / (2 * (tc + tv)). Corrida fica < 0.5, caminhada > 0.5.
+
+Tudo por trechos (run-length) em NumPy, sem loop por frame.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .config import METRICS_CFG
+from .metrics import (
+    STEP_SIDE_LEFT,
+    STEP_SIDE_RIGHT,
+    _asymmetry_pct,
+    _side_mean,
+    foot_contact_masks,
+)
+
+
+def _runs(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Início e fim (inclusive) de cada trecho True."""
+    m = np.concatenate(([0], np.asarray(mask, dtype=np.int8), [0]))
+    d = np.diff(m)
+    return np.flatnonzero(d == 1), np.flatnonzero(d == -1) - 1
+
+
+def _clean_mask(mask: np.ndarray, min_len: int, max_gap: int) -> np.ndarray:
+    """Fecha buracos <= max_gap frames e tira trechos < min_len frames."""
+    mask = np.asarray(mask, dtype=bool).copy()
+    n = len(mask)
+    if max_gap > 0:
+        gs, ge = _runs(~mask)
+        inner = (gs > 0) & (ge < n - 1) & (ge - gs + 1 <= max_gap)
+        if inner.any():
+            delta = np.zeros(n + 1, dtype=np.int32)
+            np.add.at(delta, gs[inner], 1)
+            np.add.at(delta, ge[inner] + 1, -1)
+            mask |= np.cumsum(delta[:-1]) > 0
+    if min_len > 1:
+        s, e = _runs(mask)
+        short = e - s + 1 < min_len
+        if short.any():
+            delta = np.zeros(n + 1, dtype=np.int32)
+            np.add.at(delta, s[short], 1)
+            np.add.at(delta, e[short] + 1, -1)
+            mask &= ~(np.cumsum(delta[:-1]) > 0)
+    return mask
+
+
+def _mean_or_none(v: np.ndarray) -> Optional[float]:
+    v = v[np.isfinite(v)]
+    return float(np.mean(v)) if len(v) else None
+
+
+def compute_ground_contacts(
+    LA_y: np.ndarray,
+    RA_y: np.ndarray,
+    scale_m_per_px: float,
+    fps: float,
+    jump_mask: Optional[np.ndarray] = None,
+) -> Dict[str, Any]:
+    """
+    Contato / voo por passo a partir da vertical dos dois tornozelos.
+
+    `jump_mask` (voos de salto já detectados): o intervalo entre dois
+    apoios que atravessa um salto não é contado como voo de passo.
+    """
+    n = len(LA_y)
+    empty = {
+        "contacts": [],
+        "contact_time_mean_s": None,
+        "flight_time_mean_s": None,
+        "duty_factor_mean": None,
+        "contact_time_left_mean_s": None,
+        "contact_time_right_mean_s": None,
+        "contact_time_asymmetry_pct": None,
+        "contact_left": np.zeros(n, dtype=bool),
+        "contact_right": np.zeros(n, dtype=bool),
+    }
+    if n < 5 or fps <= 0:
+        return empty
+
+    min_len = max(1, int(round(METRICS_CFG.contact_min_s * fps)))
+    max_gap = int(round(METRICS_CFG.contact_gap_s * fps))
+    # janela curta em segundos: a de 9 frames do resto das métricas come
+    # um apoio inteiro de sprint filmado a 60 fps
+    window = max(3, int(round(METRICS_CFG.contact_smoothing_s * fps)) | 1)
+    masks = [
+        None if m is None else _clean_mask(m, min_len, max_gap)
+        for m in foot_contact_masks([LA_y, RA_y], scale_m_per_px, fps, window=window)
+    ]
+    if masks[0] is None and masks[1] is None:
+        return empty
+
+    # trechos de apoio dos dois pés numa lista só, em ordem de toque
+    starts, ends, sides = [], [], []
+    for m, side in zip(masks, (STEP_SIDE_LEFT, STEP_SIDE_RIGHT)):
+        if m is None:
+            continue
+        s, e = _runs(m)
+        # apoio cortado pela borda do vídeo não tem duração confiável
+        ok = (s > 0) & (e < n - 1)
+        starts.append(s[ok])
+        ends.append(e[ok])
+        sides.append(np.full(int(ok.sum()), side, dtype=object))
+    starts = np.concatenate(starts)
+    ends = np.concatenate(ends)
+    sides = np.concatenate(sides)
+    order = np.argsort(starts, kind="stable")
+    starts, ends, sides = starts[order], ends[order], sides[order]
+
+    contact_s = (ends - starts + 1) / float(fps)
+
+    # voo = da saída até o próximo toque (de qualquer pé); sobreposição = 0
+    nxt = np.append(starts[1:], -1)
+    has_next = nxt >= 0
+    flight_frames = np.where(has_next, nxt - ends - 1, -1)
+    if jump_mask is not None and len(starts):
+        jm = np.concatenate(([0], np.cumsum(np.asarray(jump_mask, dtype=np.int32)[:n])))
+        # algum frame de salto entre a saída e o próximo toque
+        lo = np.clip(ends + 1, 0, n)
+        hi = np.clip(np.where(has_next, nxt, lo), 0, n)
+        has_next &= (jm[hi] - jm[lo]) == 0
+    flight_s = np.where(has_next, np.maximum(flight_frames, 0) / float(fps), np.nan)
+    step_s = np.where(has_next, (nxt - starts) / float(fps), np.nan)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        duty = np.where(has_next, contact_s / (2.0 * (contact_s + flight_s)), np.nan)
+
+    def _f(v):
+        return None if not np.isfinite(v) else round(float(v), 4)
+
+    contacts: List[Dict[str, Any]] = [
+        {
+            "side": side,
+            "touchdown_frame": int(s),
+            "toe_off_frame": int(e),
+            "contact_time_s": _f(tc),
+            "flight_time_s": _f(tf),
+            "step_time_s": _f(ts),
+            "duty_factor": _f(df),
+        }
+        for side, s, e, tc, tf, ts, df in zip(
+            sides, starts, ends, contact_s, flight_s, step_s, duty
+        )
+    ]
+
+    left_tc = _side_mean(contact_s, np.asarray(sides) == STEP_SIDE_LEFT)
+    right_tc = _side_mean(contact_s, np.asarray(sides) == STEP_SIDE_RIGHT)
+
+    return {
+        "contacts": contacts,
+        "contact_time_mean_s": _mean_or_none(contact_s),
+        "flight_time_mean_s": _mean_or_none(flight_s),
+        "duty_factor_mean": _mean_or_none(duty),
+        "contact_time_left_mean_s": left_tc,
+        "contact_time_right_mean_s": right_tc,
+        "contact_time_asymmetry_pct": _asymmetry_pct(left_tc, right_tc),
+        "contact_left": masks[0] if masks[0] is not None else np.zeros(n, dtype=bool),
+        "contact_right": masks[1] if masks[1] is not None else np.zeros(n, dtype=bool),
+    }
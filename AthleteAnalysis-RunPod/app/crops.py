@@ -0,0 +1,220 @@
+# app/crops.py
+"""
+Camada de gerenciamento de crops por frame.
+
+Antes, a mesma região do atleta era recortada várias vezes por frame:
+  - um crop por candidato pro ReID (PIL -> Resize -> ToTensor),
+  - outro crop expandido (`_expand_bbox`) pra pose,
+  - um upscale bicúbico em PIL (`_upscale_for_pose`),
+  - e o RTMPose ainda redimensionava pra 384x288 internamente.
+
+Aqui cada região é extraída UMA vez por frame e redimensionada direto pro
+tamanho que o modelo precisa, com uma única chamada OpenCV, escrevendo em
+buffers pré-alocados que são reaproveitados entre frames.
+
+A pose não precisa de crop nenhum: o RTMPose recebe o frame inteiro + a bbox
+expandida e faz um único `warpAffine` até 384x288 (coordenadas de saída já
+vêm no sistema do frame).
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+# (H, W) de entrada do encoder de ReID
+REID_INPUT_HW: Tuple[int, int] = (256, 128)
+
+# capacidade inicial do buffer de candidatos (cresce se precisar)
+DEFAULT_MAX_CANDIDATES = 16
+
+IntBox = Tuple[int, int, int, int]
+
+
+def clip_box(box: np.ndarray, img_w: int, img_h: int) -> Optional[IntBox]:
+    """
+    Converte uma bbox [x1,y1,x2,y2] float pra inteiros dentro do frame.
+    Retorna None se a região for vazia.
+    """
+    x1, y1, x2, y2 = map(int, box[:4])
+    x1 = max(0, min(x1, img_w - 1))
+    x2 = max(0, min(x2, img_w - 1))
+    y1 = max(0, min(y1, img_h - 1))
+    y2 = max(0, min(y2, img_h - 1))
+    if x2 <= x1 or y2 <= y1:
+        return None
+    return x1, y1, x2, y2
+
+
+class FrameCrops:
+    """
+    Crops do frame corrente, compartilhados entre ReID e pose.
+
+    Uso no pipeline:
+      - Antes do loop: crops = FrameCrops()
+      - A cada frame: crops.set_frame(frame)
+      - ReID: batch, valid = crops.reid_batch(boxes)
+      - Pose: region = crops.pose_region(bbox, scale) -> rtmpose(frame, [region])
+
+    Os arrays devolvidos são VIEWS dos buffers internos: valem só até o
+    próximo `set_frame` (copie se precisar guardar).
+    """
+
+    def __init__(self, max_candidates: int = DEFAULT_MAX_CANDIDATES):
+        h, w = REID_INPUT_HW
+        self._reid_buf = np.empty((max_candidates, h, w, 3), dtype=np.uint8)
+        self._frame: Optional[np.ndarray] = None
+        self._img_w = 0
+        self._img_h = 0
+
+        # cache por região inteira -> slot do buffer
+        self._slots: Dict[IntBox, int] = {}
+        self._next_slot = 0
+
+        # estatísticas (pra benchmark / debug)
+        self.resize_calls = 0
+        self.buffer_grows = 0
+
+    # ---------------------------
+    #   FRAME CORRENTE
+    # ---------------------------
+    def set_frame(self, frame: np.ndarray) -> None:
+        """Troca o frame corrente e invalida os slots do frame anterior."""
+        self._frame = frame
+        self._img_h, self._img_w = frame.shape[:2]
+        self._slots.clear()
+        self._next_slot = 0
+
+    @property
+    def frame(self) -> Optional[np.ndarray]:
+        return self._frame
+
+    # ---------------------------
+    #   ReID
+    # ---------------------------
+    def _ensure_capacity(self, n: int) -> None:
+        cap = self._reid_buf.shape[0]
+        if n <= cap:
+            return
+        new_cap = max(n, cap * 2)
+        new_buf = np.empty((new_cap,) + self._reid_buf.shape[1:], dtype=np.uint8)
+        new_buf[: self._next_slot] = self._reid_buf[: self._next_slot]
+        self._reid_buf = new_buf
+        self.buffer_grows += 1
+
+    def _slot_for(self, box: np.ndarray) -> Optional[int]:
+        """Slot do buffer com a região da bbox (redimensiona só na 1ª vez)."""
+        if self._frame is None:
+            return None
+        region = clip_box(box, self._img_w, self._img_h)
+        if region is None:
+            return None
+
+        slot = self._slots.get(region)
+        if slot is not None:
+            return slot
+
+        self._ensure_capacity(self._next_slot + 1)
+        slot = self._next_slot
+        self._next_slot += 1
+
+        x1, y1, x2, y2 = region
+        src = self._frame[y1:y2, x1:x2]
+        h, w = REID_INPUT_HW
+        # INTER_AREA ao reduzir (equivalente ao antialias do PIL), LINEAR ao ampliar
+        interp = cv2.INTER_AREA if (y2 - y1) > h else cv2.INTER_LINEAR
+        dst = self._reid_buf[slot]
+        cv2.resize(src, (w, h), dst=dst, interpolation=interp)
+        cv2.cvtColor(dst, cv2.COLOR_BGR2RGB, dst=dst)
+        self.resize_calls += 1
+
+        self._slots[region] = slot
+        return slot
+
+    def reid_input(self, box: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Região da bbox redimensionada para REID_INPUT_HW, em RGB uint8.
+        Cada região é redimensionada no máximo uma vez por frame.
+        """
+        slot = self._slot_for(box)
+        if slot is None:
+            return None
+        return self._reid_buf[slot]
+
+    def reid_batch(self, boxes: np.ndarray) -> Tuple[Optional[np.ndarray], List[int]]:
+        """
+        Prepara o batch de ReID de todos os candidatos de uma vez.
+
+        Retorna (batch [M, H, W, 3] RGB uint8, índices válidos em `boxes`).
+        Candidatos com região vazia ficam de fora do batch.
+        """
+        self._ensure_capacity(self._next_slot + len(boxes))
+
+        slots: List[int] = []
+        valid: List[int] = []
+        for i, b in enumerate(boxes):
+            slot = self._slot_for(b)
+            if slot is None:
+                continue
+            slots.append(slot)
+            valid.append(i)
+
+        if not valid:
+            return None, []
+
+        # slots consecutivos -> view sem cópia; repetidos -> fancy indexing
+        first = slots[0]
+        if slots == list(range(first, first + len(slots))):
+            batch = self._reid_buf[first: first + len(slots)]
+        else:
+            batch = self._reid_buf[slots]
+        return batch, valid
+
+    # ---------------------------
+    #   POSE
+    # ---------------------------
+    def pose_region(self, box: np.ndarray, scale: float) -> IntBox:
+        """
+        Região expandida (cabeça -> pé) que o RTMPose deve ler do frame.
+        O próprio RTMPose faz o único resize (warpAffine) até a entrada do modelo.
+        """
+        return expand_bbox(box, self._img_w, self._img_h, scale=scale)
+
+
+def expand_bbox(
+    box: np.ndarray,
+    img_w: int,
+    img_h: int,
+    scale: float = 1.6,
+) -> IntBox:
+    """
+    Expande bbox original por um fator de scale (zoom adaptativo).
+    A ideia aqui é garantir pegar cabeça → pé do atleta.
+    """
+    x1, y1, x2, y2 = box[:4]
+    cx = 0.5 * (x1 + x2)
+    cy = 0.5 * (y1 + y2)
+    w = (x2 - x1) * scale
+    h = (y2 - y1) * scale
+
+    # levemente mais alto que largo (pra pegar o corpo)
+    if h < w * 1.2:
+        h = w * 1.2
+
+    x1n = int(max(0, cx - w / 2))
+    x2n = int(min(img_w - 1, cx + w / 2))
+    y1n = int(max(0, cy - h / 2))
+    y2n = int(min(img_h - 1, cy + h / 2))
+    return x1n, y1n, x2n, y2n
+
+
+def pose_scale_for_height(bbox_h: float) -> float:
+    """Escala adaptativa da bbox de pose baseada na altura do atleta."""
+    if bbox_h < 80:
+        return 2.8
+    if bbox_h < 140:
+        return 2.2
+    if bbox_h < 220:
+        return 1.8
+    return 1.6
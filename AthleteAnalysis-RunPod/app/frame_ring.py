@@ -0,0 +1,335 @@
+# app/frame_ring.py
+"""
+Ring buffer de frames em memória compartilhada entre processos.
+
+Um processo decodificador escreve cada frame num slot pré-alocado de um
+único bloco de shared memory; os processos consumidores (detecção, pose,
+ReID...) recebem só (slot, frame_idx) pela fila e leem uma VIEW NumPy do
+slot, sem copiar nem serializar o frame.
+
+Cada slot publicado tem um contador de referências = nº de consumidores.
+Quando o último consumidor libera, o slot volta pra fila de livres e o
+decodificador pode reescrevê-lo. Com o ring cheio o decodificador espera
+(backpressure), então a memória é fixa: n_slots * H * W * 3 bytes.
+
+    ring = FrameRing.create(n_slots=8, frame_shape=(h, w, 3), n_consumers=2)
+    ... Process(target=decode_to_ring, args=(path, ring.spec(), ring.sync(), queues))
+    ... no consumidor:
+    ring = FrameRing.attach(spec, sync)
+    for frame_idx, frame in iter_ring_frames(ring, queue):
+        ...
+"""
+
+import multiprocessing as mp
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from queue import Empty
+from typing import Any, Dict, Generator, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+
+# meta por slot: [refcount, frame_idx]
+_META_REFCOUNT = 0
+_META_FRAME = 1
+# contadores globais: frames escritos, decodificados direto no slot,
+# escritos com cópia, liberações
+_STAT_WRITTEN = 0
+_STAT_DIRECT = 1
+_STAT_COPIED = 2
+_STAT_RELEASED = 3
+_N_STATS = 4
+
+# intervalo pra checar se o decodificador ainda está vivo
+_POLL_S = 1.0
+
+
+@dataclass(frozen=True)
+class RingSpec:
+    """Descrição serializável do ring (vai pros processos filhos)."""
+    frames_name: str
+    meta_name: str
+    n_slots: int
+    frame_shape: Tuple[int, int, int]
+    n_consumers: int
+
+
+class FrameRing:
+    """
+    Slots de frames BGR uint8 em shared memory + refcounts por slot.
+
+    `create` aloca (processo dono); `attach` abre o mesmo bloco em outro
+    processo. Os objetos de sincronização (lock + fila de slots livres)
+    vêm de `sync()` e têm que ser passados na criação do processo filho.
+    """
+
+    def __init__(self, spec: RingSpec, sync: Dict[str, Any], owner: bool):
+        self._spec = spec
+        self._sync = sync
+        self._owner = owner
+
+        self._shm_frames = shared_memory.SharedMemory(name=spec.frames_name)
+        self._shm_meta = shared_memory.SharedMemory(name=spec.meta_name)
+
+        self.frames = np.ndarray(
+            (spec.n_slots,) + tuple(spec.frame_shape),
+            dtype=np.uint8,
+            buffer=self._shm_frames.buf,
+        )
+        meta = np.ndarray(
+            (spec.n_slots * 2 + _N_STATS,), dtype=np.int64, buffer=self._shm_meta.buf
+        )
+        self._meta = meta[: spec.n_slots * 2].reshape(spec.n_slots, 2)
+        self._stats = meta[spec.n_slots * 2:]
+
+    # ---------------------------------------------------------
+    # criação / abertura
+    # ---------------------------------------------------------
+    @classmethod
+    def create(
+        cls,
+        n_slots: int,
+        frame_shape: Tuple[int, int, int],
+        n_consumers: int = 1,
+        ctx=None,
+    ) -> "FrameRing":
+        ctx = ctx or mp.get_context("spawn")
+        frame_shape = tuple(int(v) for v in frame_shape)
+        frame_bytes = int(np.prod(frame_shape))
+
+        shm_frames = shared_memory.SharedMemory(create=True, size=n_slots * frame_bytes)
+        shm_meta = shared_memory.SharedMemory(
+            create=True, size=(n_slots * 2 + _N_STATS) * 8
+        )
+        spec = RingSpec(
+            frames_name=shm_frames.name,
+            meta_name=shm_meta.name,
+            n_slots=int(n_slots),
+            frame_shape=frame_shape,
+            n_consumers=int(n_consumers),
+        )
+
+        free = ctx.Queue()
+        for s in range(n_slots):
+            free.put(s)
+        sync = {"lock": ctx.Lock(), "free": free}
+
+        ring = cls(spec, sync, owner=True)
+        # o próprio objeto já abriu os blocos; solta os handles de criação
+        shm_frames.close()
+        shm_meta.close()
+        ring._meta[:] = 0
+        ring._meta[:, _META_FRAME] = -1
+        ring._stats[:] = 0
+        return ring
+
+    @classmethod
+    def attach(cls, spec: RingSpec, sync: Dict[str, Any]) -> "FrameRing":
+        return cls(spec, sync, owner=False)
+
+    def spec(self) -> RingSpec:
+        return self._spec
+
+    def sync(self) -> Dict[str, Any]:
+        return self._sync
+
+    @property
+    def n_slots(self) -> int:
+        return self._spec.n_slots
+
+    # ---------------------------------------------------------
+    # lado do produtor
+    # ---------------------------------------------------------
+    def acquire(self, timeout: Optional[float] = None) -> int:
+        """Próximo slot livre (bloqueia enquanto o ring estiver cheio)."""
+        return int(self._sync["free"].get(timeout=timeout))
+
+    def slot(self, slot: int) -> np.ndarray:
+        """View gravável do slot (só o produtor escreve)."""
+        return self.frames[slot]
+
+    def publish(self, slot: int, frame_idx: int, copied: bool) -> None:
+        """Marca o slot com o frame e o nº de leitores pendentes."""
+        with self._sync["lock"]:
+            self._meta[slot, _META_REFCOUNT] = self._spec.n_consumers
+            self._meta[slot, _META_FRAME] = frame_idx
+            self._stats[_STAT_WRITTEN] += 1
+            self._stats[_STAT_COPIED if copied else _STAT_DIRECT] += 1
+
+    # ---------------------------------------------------------
+    # lado do consumidor
+    # ---------------------------------------------------------
+    def view(self, slot: int) -> np.ndarray:
+        """View SOMENTE LEITURA do slot (zero cópia)."""
+        v = self.frames[slot]
+        v.flags.writeable = False
+        return v
+
+    def frame_index(self, slot: int) -> int:
+        return int(self._meta[slot, _META_FRAME])
+
+    def release(self, slot: int) -> None:
+        """Consumidor terminou com o slot; o último devolve pro produtor."""
+        with self._sync["lock"]:
+            self._meta[slot, _META_REFCOUNT] -= 1
+            self._stats[_STAT_RELEASED] += 1
+            free = self._meta[slot, _META_REFCOUNT] <= 0
+        if free:
+            self._sync["free"].put(slot)
+
+    def stats(self) -> Dict[str, int]:
+        with self._sync["lock"]:
+            s = self._stats.copy()
+        return {
+            "frames_written": int(s[_STAT_WRITTEN]),
+            "decoded_in_place": int(s[_STAT_DIRECT]),
+            "copied_writes": int(s[_STAT_COPIED]),
+            "releases": int(s[_STAT_RELEASED]),
+            "slot_bytes": int(np.prod(self._spec.frame_shape)),
+            "n_slots": self._spec.n_slots,
+        }
+
+    # ---------------------------------------------------------
+    # limpeza
+    # ---------------------------------------------------------
+    def close(self) -> None:
+        # views NumPy seguram o buffer; solta antes de fechar
+        self.frames = None
+        self._meta = None
+        self._stats = None
+        for shm in (self._shm_frames, self._shm_meta):
+            try:
+                shm.close()
+            except BufferError:
+                # ainda há view viva fora daqui (ex.: variável do loop do
+                # consumidor); o mapeamento some quando ela for coletada
+                pass
+        if self._owner:
+            self._shm_frames.unlink()
+            self._shm_meta.unlink()
+
+
+# ============================================================
+#                 DECODIFICADOR / CONSUMIDOR
+# ============================================================
+
+def decode_to_ring(
+    video_path: str,
+    spec: RingSpec,
+    sync: Dict[str, Any],
+    queues: Sequence[Any],
+    start: int = 0,
+    end: Optional[int] = None,
+) -> None:
+    """
+    Alvo do processo decodificador: lê [start, end) direto nos slots e
+    avisa cada consumidor com (slot, frame_idx). Termina com None.
+    """
+    ring = FrameRing.attach(spec, sync)
+    cap = cv2.VideoCapture(video_path)
+    try:
+        if start > 0:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, int(start))
+        frame_idx = int(start)
+        while end is None or frame_idx < end:
+            slot = ring.acquire()
+            buf = ring.slot(slot)
+
+            # cap.read(image=buf) decodifica direto no slot quando o
+            # tamanho bate; senão o OpenCV aloca e copiamos uma vez
+            ret, frame = cap.read(buf)
+            if not ret:
+                sync["free"].put(slot)
+                break
+            copied = frame is not buf and not np.shares_memory(frame, buf)
+            if copied:
+                buf[...] = frame
+
+            ring.publish(slot, frame_idx, copied=copied)
+            for q in queues:
+                q.put((slot, frame_idx))
+            frame_idx += 1
+    finally:
+        cap.release()
+        for q in queues:
+            q.put(None)
+        ring.close()
+
+
+def iter_ring_frames(
+    ring: FrameRing, queue: Any, producer=None
+) -> Generator[Tuple[int, np.ndarray], None, None]:
+    """
+    (frame_idx, view) na ordem publicada. O slot do frame anterior só é
+    liberado quando o próximo é pedido: a view vale até a próxima iteração.
+
+    `producer` (Process opcional): se ele morrer sem mandar o fim, levanta
+    erro em vez de esperar pra sempre.
+    """
+    prev = None
+    try:
+        while True:
+            try:
+                msg = queue.get(timeout=_POLL_S)
+            except Empty:
+                if producer is not None and not producer.is_alive():
+                    raise RuntimeError(
+                        f"Decodificador terminou sem finalizar (exitcode={producer.exitcode})."
+                    )
+                continue
+            if prev is not None:
+                ring.release(prev)
+                prev = None
+            if msg is None:
+                return
+            slot, frame_idx = msg
+            prev = slot
+            yield frame_idx, ring.view(slot)
+    finally:
+        if prev is not None:
+            ring.release(prev)
+
+
+def ring_video_frames(
+    video_path: str,
+    n_slots: int = 8,
+    start: int = 0,
+    end: Optional[int] = None,
+) -> Tuple[Generator, float, int, Tuple[int, int]]:
+    """
+    Mesmo contrato de `read_video_frames`, mas a decodificação roda num
+    processo separado escrevendo no ring: o loop de inferência só recebe
+    views. Cada frame vale até o próximo ser pedido.
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise RuntimeError(f"Não foi possível abrir o vídeo: {video_path}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH) or 0)
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT) or 0)
+    cap.release()
+
+    ctx = mp.get_context("spawn")
+    ring = FrameRing.create(n_slots, (height, width, 3), n_consumers=1, ctx=ctx)
+    queue = ctx.Queue()
+    decoder = ctx.Process(
+        target=decode_to_ring,
+        args=(video_path, ring.spec(), ring.sync(), [queue], start, end),
+        daemon=True,
+    )
+    decoder.start()
+
+    def _frames() -> Generator[np.ndarray, None, None]:
+        try:
+            for _, frame in iter_ring_frames(ring, queue, producer=decoder):
+                yield frame
+        finally:
+            # consumidor parou antes do fim: libera slots pro decoder terminar
+            if decoder.is_alive():
+                decoder.terminate()
+            decoder.join()
+            ring.close()
+
+    return _frames(), fps, frame_count, (width, height)
@@ -0,0 +1,135 @@
+# app/jobs.py
+"""
+Jobs em memória pro servidor FastAPI (submit + status por polling).
+
+Um job é um generator de etapas (ver app/progressive.py): cada `yield`
+fica visível no status assim que sai. Estados com os mesmos nomes do
+RunPod: IN_QUEUE, IN_PROGRESS, COMPLETED, FAILED.
+
+Um worker só (a GPU é uma) e fila com prioridade por etapa: a PRIMEIRA
+etapa de um job novo passa na frente das etapas seguintes de jobs já
+começados. Assim a prévia de quem acabou de enviar não espera a análise
+completa dos outros.
+O /analyze-video roda fora desta fila: os dois se revezam no lock de
+inferência do `process_video` (ver app/pipeline.py).
+
+Jobs terminados somem depois de `ttl_s`. Nada pesado é importado aqui.
+"""
+
+import itertools
+import queue
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+IN_QUEUE = "IN_QUEUE"
+IN_PROGRESS = "IN_PROGRESS"
+COMPLETED = "COMPLETED"
+FAILED = "FAILED"
+
+DEFAULT_JOB_TTL_S = 3600.0
+
+
+@dataclass
+class Job:
+    id: str
+    submitted: float
+    status: str = IN_QUEUE
+    stages: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    order: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+    finished: Optional[float] = None
+    steps: Optional[Iterator[Dict[str, Any]]] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        last = self.stages[self.order[-1]] if self.order else None
+        return {
+            "id": self.id,
+            "status": self.status,
+            "stage": self.order[-1] if self.order else None,
+            "stages": {name: self.stages[name] for name in self.order},
+            "output": last,
+            "error": self.error,
+        }
+
+
+class JobStore:
+    def __init__(self, ttl_s: float = DEFAULT_JOB_TTL_S):
+        self.ttl_s = float(ttl_s)
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._queue: "queue.PriorityQueue" = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._worker: Optional[threading.Thread] = None
+
+    def submit(self, make_steps: Callable[[], Iterator[Dict[str, Any]]]) -> str:
+        """Enfileira um job; `make_steps()` é chamado já no worker."""
+        job = Job(id=uuid.uuid4().hex, submitted=time.perf_counter())
+        with self._lock:
+            self._purge()
+            self._jobs[job.id] = job
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="job-worker", daemon=True)
+                self._worker.start()
+        self._queue.put((0, next(self._seq), job.id, make_steps))
+        return job.id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._purge()
+            job = self._jobs.get(job_id)
+            return job.as_dict() if job is not None else None
+
+    def _purge(self) -> None:
+        """Esquece jobs terminados há mais de ttl_s (chamar com o lock)."""
+        now = time.perf_counter()
+        old = [
+            k for k, j in self._jobs.items()
+            if j.finished is not None and now - j.finished > self.ttl_s
+        ]
+        for k in old:
+            del self._jobs[k]
+
+    def _run(self) -> None:
+        while True:
+            n_stage, _, job_id, make_steps = self._queue.get()
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is None:
+                    continue
+                job.status = IN_PROGRESS
+            try:
+                if job.steps is None:
+                    job.steps = make_steps()
+                stage = next(job.steps)
+            except StopIteration:
+                self._finish(job, COMPLETED)
+                continue
+            except Exception as e:
+                self._finish(job, FAILED, error=str(e))
+                continue
+
+            name = str(stage.get("stage", n_stage))
+            # latência vista pelo cliente: desde o submit (inclui fila)
+            stage = dict(stage, latency_s=round(time.perf_counter() - job.submitted, 3))
+            with self._lock:
+                job.stages[name] = stage
+                job.order.append(name)
+            if stage.get("final"):
+                self._finish(job, COMPLETED)
+            else:
+                self._queue.put((n_stage + 1, next(self._seq), job_id, make_steps))
+
+    def _finish(self, job: Job, status: str, error: Optional[str] = None) -> None:
+        if job.steps is not None:
+            job.steps.close()
+        with self._lock:
+            job.status = status
+            job.error = error
+            job.finished = time.perf_counter()
+            job.steps = None
+
+
+JOB_STORE = JobStore()
@@ -0,0 +1,215 @@
+# app/keyframes.py
+"""
+Miniaturas do atleta nos eventos (decolagem / ápice / aterrissagem de
+cada salto e cada contato de passo) + sprite sheet, sem decodificar o
+vídeo de novo.
+
+Os eventos só existem depois das métricas, então durante a percepção o
+`KeyframeBuffer` (gancho `on_frame` do `run_perception`, como o overlay)
+guarda CANDIDATOS: cada frame com atleta vira um recorte em volta da bbox
+já no tamanho da miniatura (um warpAffine) e codificado em JPEG. O
+buffer tem teto de memória (`max_buffer_mb`, bytes de JPEG): estourou,
+o passo entre candidatos dobra e metade sai (cobertura uniforme no
+tempo), então o erro máximo de um evento é metade do passo. Cada
+miniatura diz o frame do evento e o frame realmente usado.
+
+Depois das métricas, `extract(result)` escolhe o candidato mais perto de
+cada evento (o JPEG guardado É a miniatura, sem recodificar) e monta o
+sprite sheet em ordem cronológica. Tudo volta em base64 no JSON.
+"""
+
+import base64
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+# margem em volta da bbox (fração do lado maior)
+KEYFRAME_MARGIN = 0.2
+# campos aceitos no request
+_FIELDS = ("thumb_width", "thumb_height", "max_buffer_mb", "jpeg_quality", "sprite_columns")
+
+
+@dataclass(frozen=True)
+class KeyframeOptions:
+    """Tamanho das miniaturas, teto do buffer e layout do sprite."""
+    thumb_width: int = 192
+    thumb_height: int = 256
+    max_buffer_mb: float = 16.0
+    jpeg_quality: int = 85
+    sprite_columns: int = 6
+
+    @classmethod
+    def from_request(cls, spec: Union[bool, Dict[str, Any], "KeyframeOptions", None]) -> Optional["KeyframeOptions"]:
+        """True / {campos} / KeyframeOptions -> opções; falsy -> None."""
+        if isinstance(spec, KeyframeOptions):
+            opts = spec
+        elif spec is True:
+            opts = cls()
+        elif isinstance(spec, dict):
+            unknown = set(spec) - set(_FIELDS)
+            if unknown:
+                raise ValueError(f"keyframes: campos desconhecidos {sorted(unknown)}.")
+            base = cls()
+            opts = cls(
+                thumb_width=int(spec.get("thumb_width") or base.thumb_width),
+                thumb_height=int(spec.get("thumb_height") or base.thumb_height),
+                max_buffer_mb=float(spec.get("max_buffer_mb") or base.max_buffer_mb),
+                jpeg_quality=int(spec.get("jpeg_quality") or base.jpeg_quality),
+                sprite_columns=int(spec.get("sprite_columns") or base.sprite_columns),
+            )
+        elif not spec:
+            return None
+        else:
+            raise ValueError("keyframes deve ser true ou {thumb_width, thumb_height, max_buffer_mb, ...}.")
+
+        if not (16 <= opts.thumb_width <= 1024 and 16 <= opts.thumb_height <= 1024):
+            raise ValueError("keyframes: thumb_width / thumb_height entre 16 e 1024.")
+        if opts.max_buffer_mb <= 0:
+            raise ValueError("keyframes.max_buffer_mb deve ser > 0.")
+        if not 1 <= opts.jpeg_quality <= 100:
+            raise ValueError("keyframes.jpeg_quality entre 1 e 100.")
+        if opts.sprite_columns < 1:
+            raise ValueError("keyframes.sprite_columns deve ser >= 1.")
+        return opts
+
+
+def event_frames(result: Dict[str, Any]) -> List[Tuple[str, int, int]]:
+    """(evento, índice do salto / passo, frame) de um resultado, em ordem de frame."""
+    events: List[Tuple[str, int, int]] = []
+    for k, jump in enumerate(result.get("jumps") or []):
+        for name in ("takeoff", "apex", "landing"):
+            f = jump.get(f"jump_{name}_frame")
+            if f is not None:
+                events.append((name, k, int(f)))
+    for k, f in enumerate((result.get("stride") or {}).get("step_events") or []):
+        events.append(("step_contact", k, int(f)))
+    events.sort(key=lambda e: e[2])
+    return events
+
+
+class KeyframeBuffer:
+    """
+    Chamado como `buffer(frame, track)` depois de cada frame analisado;
+    guarda o recorte JPEG do atleta a cada `stride` frames, dentro do teto.
+    """
+
+    def __init__(self, options: KeyframeOptions):
+        self.options = options
+        self.max_bytes = int(options.max_buffer_mb * 2**20)
+        self.stride = 1
+        self._jpegs: Dict[int, bytes] = {}
+        self._bytes = 0
+        self.peak_bytes = 0
+        self.dropped = 0
+        self.capture_s = 0.0
+        self.extract_s = 0.0
+        self._encode = [int(cv2.IMWRITE_JPEG_QUALITY), int(options.jpeg_quality)]
+
+    def _crop(self, frame: np.ndarray, bbox: Tuple[float, float, float, float]) -> np.ndarray:
+        """Recorte da bbox + margem no aspecto da miniatura, direto no tamanho final."""
+        tw, th = self.options.thumb_width, self.options.thumb_height
+        x1, y1, x2, y2 = bbox
+        cx, cy = 0.5 * (x1 + x2), 0.5 * (y1 + y2)
+        grow = 1.0 + 2.0 * KEYFRAME_MARGIN
+        crop_h = max((y2 - y1) * grow, (x2 - x1) * grow * th / tw, 1.0)
+        s = th / crop_h
+        M = np.array([[s, 0.0, 0.5 * tw - s * cx], [0.0, s, 0.5 * th - s * cy]], dtype=np.float64)
+        return cv2.warpAffine(frame, M, (tw, th), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_CONSTANT)
+
+    def _decimate(self) -> None:
+        """Dobra o passo e descarta os candidatos fora dele."""
+        self.stride *= 2
+        for f in [f for f in self._jpegs if f % self.stride]:
+            self._bytes -= len(self._jpegs.pop(f))
+            self.dropped += 1
+
+    def __call__(self, frame: np.ndarray, track: Any) -> None:
+        i = len(track) - 1
+        box = track.bbox[i]
+        if i % self.stride or box is None:
+            return
+        t0 = time.perf_counter()
+        ok, buf = cv2.imencode(".jpg", self._crop(frame, box), self._encode)
+        if ok:
+            data = buf.tobytes()
+            self._jpegs[i] = data
+            self._bytes += len(data)
+            self.peak_bytes = max(self.peak_bytes, self._bytes)
+            while self._bytes > self.max_bytes and len(self._jpegs) > 1:
+                self._decimate()
+        self.capture_s += time.perf_counter() - t0
+
+    def __len__(self) -> int:
+        return len(self._jpegs)
+
+    def nearest(self, frame: int) -> Optional[int]:
+        """Candidato guardado mais perto do frame (empate: o anterior)."""
+        if not self._jpegs:
+            return None
+        frames = np.fromiter(self._jpegs, dtype=int, count=len(self._jpegs))
+        return int(frames[np.argmin(np.abs(frames - frame))])
+
+    def _sprite(self, cells: List[Tuple[str, int, int]]) -> Dict[str, Any]:
+        """Grade cronológica das miniaturas, com o evento escrito em cada célula."""
+        tw, th = self.options.thumb_width, self.options.thumb_height
+        cols = min(self.options.sprite_columns, len(cells))
+        rows = -(-len(cells) // cols)
+        sheet = np.zeros((rows * th, cols * tw, 3), dtype=np.uint8)
+        fs = max(0.3, th / 512.0)
+        for k, (name, idx, f) in enumerate(cells):
+            r, c = divmod(k, cols)
+            tile = cv2.imdecode(np.frombuffer(self._jpegs[f], dtype=np.uint8), cv2.IMREAD_COLOR)
+            sheet[r * th:(r + 1) * th, c * tw:(c + 1) * tw] = tile
+            label = f"{name} {idx + 1} #{f}"
+            org = (c * tw + 4, (r + 1) * th - 6)
+            cv2.putText(sheet, label, org, cv2.FONT_HERSHEY_SIMPLEX, fs, (0, 0, 0), 3, cv2.LINE_AA)
+            cv2.putText(sheet, label, org, cv2.FONT_HERSHEY_SIMPLEX, fs, (255, 255, 255), 1, cv2.LINE_AA)
+        _, buf = cv2.imencode(".jpg", sheet, self._encode)
+        return {
+            "jpeg_base64": base64.b64encode(buf.tobytes()).decode("ascii"),
+            "columns": cols,
+            "rows": rows,
+            "tile_width": tw,
+            "tile_height": th,
+        }
+
+    def extract(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Miniaturas + sprite dos eventos do resultado (vai em result["keyframes"])."""
+        t0 = time.perf_counter()
+        tw, th = self.options.thumb_width, self.options.thumb_height
+        cols = self.options.sprite_columns
+        thumbnails: List[Dict[str, Any]] = []
+        cells: List[Tuple[str, int, int]] = []
+        for name, idx, f in event_frames(result):
+            used = self.nearest(f)
+            if used is None:
+                continue
+            r, c = divmod(len(cells), cols)
+            cells.append((name, idx, used))
+            thumbnails.append({
+                "event": name,
+                "index": idx,
+                "event_frame": f,
+                "frame": used,
+                "jpeg_base64": base64.b64encode(self._jpegs[used]).decode("ascii"),
+                "sprite_cell": [c * tw, r * th, tw, th],
+            })
+        sprite = self._sprite(cells) if cells else None
+        self.extract_s = time.perf_counter() - t0
+        return {
+            "thumbnails": thumbnails,
+            "sprite": sprite,
+            "buffer": {
+                "max_bytes": self.max_bytes,
+                "peak_bytes": self.peak_bytes,
+                "frames": len(self._jpegs),
+                "dropped_frames": self.dropped,
+                "stride": self.stride,
+            },
+            "capture_s": round(self.capture_s, 3),
+            "extract_s": round(self.extract_s, 3),
+            "seconds": round(self.capture_s + self.extract_s, 3),
+        }
@@ -0,0 +1,139 @@
+# app/kinematics.py
+"""
+Cinemática por frame do quadril (filtrado):
+
+  - velocidade e aceleração instantâneas pela DERIVADA do Savitzky-Golay
+    (suaviza e deriva no mesmo filtro, janela em segundos -> adapta ao fps);
+  - distância acumulada = integral (trapézio) da velocidade;
+  - tempos de passagem a cada `split_distance_m` com interpolação linear
+    dentro do frame (sub-frame);
+  - velocidade máxima com o instante refinado por parábola nos 3 frames.
+
+Tudo em NumPy vetorizado (sem loop por frame).
+"""
+
+from typing import Any, Dict, Optional
+
+import numpy as np
+from scipy.signal import savgol_filter
+
+from .config import METRICS_CFG
+from .metrics import _interp_nans
+from .subframe import parabolic_offsets
+
+
+def _savgol_window(fps: float, n: int, polyorder: int) -> int:
+    """Janela ímpar de ~kinematics_window_s segundos que cabe na série."""
+    w = int(round(METRICS_CFG.kinematics_window_s * fps))
+    w = max(w, polyorder + 2)
+    if w % 2 == 0:
+        w += 1
+    if w > n:
+        w = n if n % 2 == 1 else n - 1
+    return w
+
+
+def crossing_times(cum: np.ndarray, targets: np.ndarray, fps: float) -> np.ndarray:
+    """
+    Instante (s) em que a série crescente `cum` passa por cada alvo, com
+    interpolação linear entre os dois frames vizinhos. NaN se não passa.
+    """
+    cum = np.asarray(cum, dtype=float)
+    targets = np.asarray(targets, dtype=float)
+    out = np.full(len(targets), np.nan)
+    if len(cum) < 2 or len(targets) == 0:
+        return out
+
+    # a distância integrada nunca diminui, então searchsorted serve
+    idx = np.searchsorted(cum, targets, side="left")
+    ok = (idx >= 1) & (idx < len(cum))
+    i1 = idx[ok]
+    i0 = i1 - 1
+    span = cum[i1] - cum[i0]
+    frac = np.where(span > 0, (targets[ok] - cum[i0]) / np.where(span > 0, span, 1.0), 0.0)
+    out[ok] = (i0 + frac) / float(fps)
+    return out
+
+
+def compute_kinematics(
+    hip_x: np.ndarray,
+    hip_y: np.ndarray,
+    scale_m_per_px: float,
+    fps: float,
+    split_distance_m: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Perfil de velocidade / aceleração + parciais a partir do quadril
+    FILTRADO (px) e da escala da calibração.
+    """
+    hip_x = np.asarray(hip_x, dtype=float)
+    hip_y = np.asarray(hip_y, dtype=float)
+    n = len(hip_x)
+    split_distance_m = float(split_distance_m or METRICS_CFG.split_distance_m)
+
+    empty = {
+        "velocity_series_m_s": [0.0] * n,
+        "acceleration_series_m_s2": [0.0] * n,
+        "distance_series_m": [0.0] * n,
+        "peak_speed_m_s": None,
+        "time_to_peak_speed_s": None,
+        "peak_acceleration_m_s2": None,
+        "split_distance_m": split_distance_m,
+        "splits": [],
+    }
+    if n < 5 or fps <= 0 or np.all(np.isnan(hip_x)) or np.all(np.isnan(hip_y)):
+        return empty
+
+    dt = 1.0 / float(fps)
+    x_m = _interp_nans(hip_x.copy()) * scale_m_per_px
+    y_m = _interp_nans(hip_y.copy()) * scale_m_per_px
+
+    polyorder = 3
+    w = _savgol_window(fps, n, polyorder)
+    if w <= polyorder:
+        return empty
+
+    # derivadas suavizadas (1ª e 2ª) direto do filtro
+    vx = savgol_filter(x_m, w, polyorder, deriv=1, delta=dt, mode="interp")
+    vy = savgol_filter(y_m, w, polyorder, deriv=1, delta=dt, mode="interp")
+    ax = savgol_filter(x_m, w, polyorder, deriv=2, delta=dt, mode="interp")
+    ay = savgol_filter(y_m, w, polyorder, deriv=2, delta=dt, mode="interp")
+
+    speed = np.hypot(vx, vy)
+    # aceleração tangencial (variação do módulo da velocidade)
+    accel = np.where(speed > 1e-6, (vx * ax + vy * ay) / np.maximum(speed, 1e-6), 0.0)
+
+    dist = np.concatenate(([0.0], np.cumsum(0.5 * (speed[1:] + speed[:-1]) * dt)))
+
+    # pico de velocidade (instante sub-frame)
+    i_pk = int(np.argmax(speed))
+    t_pk = (i_pk + float(parabolic_offsets(speed, [i_pk])[0])) * dt
+
+    # parciais
+    n_splits = int(np.floor(dist[-1] / split_distance_m + 1e-9))
+    targets = split_distance_m * np.arange(1, n_splits + 1)
+    t_cross = crossing_times(dist, targets, fps)
+    split_times = np.diff(np.concatenate(([0.0], t_cross)))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        split_speed = np.where(split_times > 0, split_distance_m / split_times, np.nan)
+
+    splits = [
+        {
+            "distance_m": float(d),
+            "time_s": float(t),
+            "split_time_s": float(st),
+            "split_mean_speed_m_s": float(sv),
+        }
+        for d, t, st, sv in zip(targets, t_cross, split_times, split_speed)
+    ]
+
+    return {
+        "velocity_series_m_s": speed.tolist(),
+        "acceleration_series_m_s2": accel.tolist(),
+        "distance_series_m": dist.tolist(),
+        "peak_speed_m_s": float(speed[i_pk]),
+        "time_to_peak_speed_s": float(t_pk),
+        "peak_acceleration_m_s2": float(np.max(accel)),
+        "split_distance_m": split_distance_m,
+        "splits": splits,
+    }
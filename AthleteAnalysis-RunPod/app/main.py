@@ -1,16 +1,54 @@
 # app/main.py
+# threads de OpenMP / BLAS ANTES de qualquer import numérico (app.runtime e
+# app.config são leves; ver set_thread_env)
+from .runtime import set_thread_env
+
+set_thread_env()
+
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse
+from contextlib import asynccontextmanager
 import tempfile
+import threading
+import time
 import os
 import json
+import uuid
 from typing import Optional, Tuple
 import uvicorn
 
-from .pipeline import process_video
+# NADA pesado aqui: app.models só importa ultralytics / rtmlib / torch
+# dentro dos loaders, e o pipeline (scipy, cv2, ...) é importado no
+# primeiro request ou pelo warmup em background.
+from .config import MAX_SHARDS, MODEL_CFG
+from .jobs import DEFAULT_JOB_TTL_S, JOB_STORE
+from .models import readiness, warmup_models
+from .quality import PERCEPTION_BACKENDS, QUALITY_TIERS
+
+
+def _warmup():
+    try:
+        from . import pipeline  # noqa: F401
+        warmup_models()
+        if MODEL_CFG.shard_workers > 1:
+            # workers dos shards com os modelos já carregados (vivem entre requests)
+            from .sharding import get_shard_pool
+
+            get_shard_pool()
+    except Exception as e:
+        print(f"❌ Falha ao carregar modelos: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # carrega em thread: o servidor já responde /health (liveness) e o
+    # /ready (readiness) só vira 200 quando os modelos estiverem prontos
+    threading.Thread(target=_warmup, name="model-warmup", daemon=True).start()
+    yield
 
 
-app = FastAPI(title="Athlete AI Server", version="0.1.0")
+app = FastAPI(title="Athlete AI Server", version="0.1.0", lifespan=lifespan)
 
 
 # ---------------------------------------------------------
@@ -51,25 +89,29 @@ def to_jsonable(x):
 # ---------------------------------------------------------
 @app.get("/health")
 def health():
+    """Liveness: o processo está de pé (não depende dos modelos)."""
     return {"status": "ok"}
 
 
+@app.get("/ready")
+def ready():
+    """Readiness: 200 só com os modelos carregados; 503 enquanto carrega / se falhou."""
+    state = readiness()
+    return JSONResponse(state, status_code=200 if state["ready"] else 503)
+
+
 # ---------------------------------------------------------
-#  ENDPOINT PRINCIPAL
+#  PARÂMETROS DO REQUEST (comuns aos dois endpoints)
 # ---------------------------------------------------------
-@app.post("/analyze-video")
-async def analyze_video(
-    video: UploadFile = File(...),
-    calib_json: str = Form(...),
-    ref_point_json: Optional[str] = Form(None),
-):
-    """
-    POST /analyze-video
-
-    - video: vídeo enviado pelo cliente
-    - calib_json: JSON com point1, point2 e real_distance_m
-    - ref_point_json: ponto aproximado do atleta no frame inicial (opcional)
-    """
+def _parse_params(
+    calib_json: str,
+    ref_point_json: Optional[str],
+    intrinsics_json: Optional[str],
+    quality: Optional[str],
+    perception: Optional[str] = None,
+    shards: int = 1,
+) -> Tuple[dict, Optional[Tuple[float, float]], Optional[dict]]:
+    """calib, ref_point e intrínsecos já lidos; HTTP 400 se algo for inválido."""
     # -----------------------------------------------------
     # 1. Ler calibração
     # -----------------------------------------------------
@@ -90,28 +132,173 @@ async def analyze_video(
         except json.JSONDecodeError:
             raise HTTPException(status_code=400, detail="ref_point_json inválido.")
 
-    # -----------------------------------------------------
-    # 3. Salvar vídeo temporário
-    # -----------------------------------------------------
+    intrinsics: Optional[dict] = None
+    if intrinsics_json:
+        try:
+            intrinsics = json.loads(intrinsics_json)
+        except json.JSONDecodeError:
+            raise HTTPException(status_code=400, detail="intrinsics_json inválido.")
+
+    if quality and quality.strip().lower() not in QUALITY_TIERS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"quality inválido (use {', '.join(QUALITY_TIERS)}).",
+        )
+    if perception and perception.strip().lower() not in PERCEPTION_BACKENDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"perception inválido (use {', '.join(PERCEPTION_BACKENDS)}).",
+        )
+    if not 1 <= shards <= MAX_SHARDS:
+        raise HTTPException(status_code=400, detail=f"shards deve estar entre 1 e {MAX_SHARDS}.")
+    return calib, ref_point, intrinsics
+
+
+# vídeos anotados (overlay) ficam aqui até expirar, servidos em /overlays/{nome}
+OVERLAY_DIR = os.path.join(tempfile.gettempdir(), "athlete_overlays")
+OVERLAY_TTL_S = DEFAULT_JOB_TTL_S
+
+
+def _overlay_spec(
+    overlay: bool,
+    overlay_width: Optional[int],
+    overlay_fps: Optional[float],
+) -> Optional[dict]:
+    """Opções do vídeo anotado (ver app/overlay.py) num arquivo novo do OVERLAY_DIR."""
+    if not overlay:
+        return None
+    if overlay_width is not None and overlay_width < 64:
+        raise HTTPException(status_code=400, detail="overlay_width deve ser >= 64.")
+    if overlay_fps is not None and overlay_fps <= 0:
+        raise HTTPException(status_code=400, detail="overlay_fps deve ser > 0.")
+
+    # limpa os vencidos antes de gravar mais um
+    os.makedirs(OVERLAY_DIR, exist_ok=True)
+    now = time.time()
+    for name in os.listdir(OVERLAY_DIR):
+        path = os.path.join(OVERLAY_DIR, name)
+        try:
+            if now - os.path.getmtime(path) > OVERLAY_TTL_S:
+                os.remove(path)
+        except OSError:
+            pass
+    return {
+        "width": overlay_width,
+        "fps": overlay_fps,
+        "path": os.path.join(OVERLAY_DIR, f"{uuid.uuid4().hex}.mp4"),
+    }
+
+
+def _keyframes_spec(keyframes_json: Optional[str]):
+    """true / {thumb_width, thumb_height, max_buffer_mb, ...} (ver app/keyframes.py); HTTP 400 se inválido."""
+    if not keyframes_json:
+        return None
+    try:
+        spec = json.loads(keyframes_json)
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="keyframes_json inválido.")
+    from .keyframes import KeyframeOptions
+
+    try:
+        return KeyframeOptions.from_request(spec)
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _publish_overlay(result: dict) -> None:
+    """Troca o caminho local do vídeo anotado pela URL de download."""
+    info = result.get("overlay")
+    if info and info.get("path"):
+        info["url"] = f"/overlays/{os.path.basename(info.pop('path'))}"
+
+
+async def _save_upload(video: UploadFile) -> str:
+    """Salva o vídeo enviado num arquivo temporário e devolve o caminho."""
     suffix = os.path.splitext(video.filename)[1] or ".mp4"
     with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
         tmp.write(await video.read())
-        tmp_path = tmp.name
+        return tmp.name
+
+
+# ---------------------------------------------------------
+#  ENDPOINT PRINCIPAL
+# ---------------------------------------------------------
+@app.post("/analyze-video")
+async def analyze_video(
+    video: UploadFile = File(...),
+    calib_json: str = Form(...),
+    ref_point_json: Optional[str] = Form(None),
+    shards: int = Form(1),
+    intrinsics_json: Optional[str] = Form(None),
+    quality: Optional[str] = Form(None),
+    perception: Optional[str] = Form(None),
+    overlay: bool = Form(False),
+    overlay_width: Optional[int] = Form(None),
+    overlay_fps: Optional[float] = Form(None),
+    keyframes_json: Optional[str] = Form(None),
+):
+    """
+    POST /analyze-video
+
+    - video: vídeo enviado pelo cliente
+    - calib_json: JSON com point1, point2 e real_distance_m
+      (ou image_points + world_points_m, 4+ pontos, pra homografia do chão)
+    - ref_point_json: ponto aproximado do atleta no frame inicial (opcional)
+    - shards: nº de trechos processados em paralelo (1 = sequencial, até
+      MAX_SHARDS; com mais trechos que workers do pool, os de sobra esperam)
+    - intrinsics_json: intrínsecos da câmera pra corrigir distorção de
+      lente (fx, fy, cx, cy, dist, opcional)
+    - quality: "preview" | "standard" | "precise" (padrão); custo
+      estimado e medido voltam em result["quality"]["cost"]
+    - perception: "topdown" (padrão, YOLO + ReID + RTMPose) | "yolo-pose"
+      (um modelo só pra bbox + pose + ReID)
+    - overlay: true -> vídeo anotado (esqueleto, bbox, velocidade, passos)
+      gravado durante a análise; baixar em result["overlay"]["url"].
+      overlay_width / overlay_fps: resolução e fps da saída (padrão: os
+      do vídeo / os de análise)
+    - keyframes_json: true ou {thumb_width, thumb_height, max_buffer_mb,
+      jpeg_quality, sprite_columns} -> miniaturas JPEG (base64) de
+      decolagem / ápice / aterrissagem / contatos de passo + sprite sheet
+      em result["keyframes"]
+    """
+    calib, ref_point, intrinsics = _parse_params(
+        calib_json, ref_point_json, intrinsics_json, quality, perception, shards
+    )
+    overlay_spec = _overlay_spec(overlay, overlay_width, overlay_fps)
+    keyframes = _keyframes_spec(keyframes_json)
 
     # -----------------------------------------------------
-    # 4. Processar vídeo
+    # 3. Salvar vídeo temporário
+    # -----------------------------------------------------
+    tmp_path = await _save_upload(video)
+
+    # -----------------------------------------------------
+    # 4. Processar vídeo (fora do event loop: /health e /ready seguem
+    #    respondendo durante a análise)
     # -----------------------------------------------------
     try:
-        result = process_video(
+        from .pipeline import process_video
+
+        result = await run_in_threadpool(
+            process_video,
             video_path=tmp_path,
             calib=calib,
             ref_point=ref_point,
+            shards=shards,
+            intrinsics=intrinsics,
+            quality=quality,
+            perception=perception,
+            overlay=overlay_spec,
+            keyframes=keyframes,
         )
     except Exception as e:
+        if overlay_spec and os.path.exists(overlay_spec["path"]):
+            os.remove(overlay_spec["path"])
         raise HTTPException(status_code=500, detail=str(e))
     finally:
         if os.path.exists(tmp_path):
             os.remove(tmp_path)
+    _publish_overlay(result)
 
     # -----------------------------------------------------
     # 5. Converter para JSON safe (ESSENCIAL)
@@ -121,6 +308,89 @@ async def analyze_video(
     return JSONResponse(safe)
 
 
+# ---------------------------------------------------------
+#  RESULTADO PROGRESSIVO (job + status)
+# ---------------------------------------------------------
+@app.post("/analyze-video/progressive")
+async def analyze_video_progressive(
+    video: UploadFile = File(...),
+    calib_json: str = Form(...),
+    ref_point_json: Optional[str] = Form(None),
+    shards: int = Form(1),
+    intrinsics_json: Optional[str] = Form(None),
+    quality: Optional[str] = Form(None),
+    perception: Optional[str] = Form(None),
+    overlay: bool = Form(False),
+    overlay_width: Optional[int] = Form(None),
+    overlay_fps: Optional[float] = Form(None),
+    keyframes_json: Optional[str] = Form(None),
+):
+    """
+    POST /analyze-video/progressive -> 202 {"id", "status"}
+
+    Mesmos campos do /analyze-video. Roda uma prévia rápida (nível
+    "preview", sem séries por frame) e depois a análise completa no nível
+    `quality` usando a trilha da prévia (ver app/progressive.py). As duas
+    aparecem em GET /jobs/{id} assim que ficam prontas, cada uma com sua
+    latência. O vídeo anotado (overlay) e as miniaturas (keyframes_json)
+    só vêm na etapa final.
+    """
+    calib, ref_point, intrinsics = _parse_params(
+        calib_json, ref_point_json, intrinsics_json, quality, perception, shards
+    )
+    overlay_spec = _overlay_spec(overlay, overlay_width, overlay_fps)
+    keyframes = _keyframes_spec(keyframes_json)
+    tmp_path = await _save_upload(video)
+
+    def _steps():
+        from .progressive import iter_progressive
+
+        done = False
+        try:
+            for stage in iter_progressive(
+                tmp_path,
+                calib,
+                ref_point=ref_point,
+                shards=shards,
+                intrinsics=intrinsics,
+                quality=quality,
+                perception=perception,
+                overlay=overlay_spec,
+                keyframes=keyframes,
+            ):
+                if stage["final"]:
+                    _publish_overlay(stage["result"])
+                    done = True
+                yield stage
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            # job falhou / cancelado antes da etapa final: vídeo anotado pela metade
+            if overlay_spec and not done and os.path.exists(overlay_spec["path"]):
+                os.remove(overlay_spec["path"])
+
+    job_id = JOB_STORE.submit(_steps)
+    return JSONResponse({"id": job_id, "status": "IN_QUEUE"}, status_code=202)
+
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    """Status do job: etapas prontas em "stages", a mais recente em "output"."""
+    state = JOB_STORE.get(job_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail="job não encontrado.")
+    return JSONResponse(to_jsonable(state))
+
+
+@app.get("/overlays/{name}")
+def overlay_video(name: str):
+    """Vídeo anotado gerado com overlay=true (some depois de OVERLAY_TTL_S)."""
+    path = os.path.join(OVERLAY_DIR, os.path.basename(name))
+    if not name.endswith(".mp4") or not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="overlay não encontrado.")
+    return FileResponse(path, media_type="video/mp4")
+
+
 # ---------------------------------------------------------
 #  RODAR DIRETO
 # ---------------------------------------------------------
@@ -1,11 +1,27 @@
 # app/metrics.py
 
+import warnings
 from typing import List, Dict, Any, Optional
 
 import numpy as np
-from scipy.signal import savgol_filter, find_peaks
+from scipy.ndimage import maximum_filter1d, percentile_filter
+from scipy.signal import find_peaks
 
 from .config import METRICS_CFG
+from .smoothing import local_poly_smooth, window_for_fps
+from .subframe import ballistic_roots, crossing_offsets, parabolic_offsets
+
+
+# lado do passo = pé que está NA FRENTE no impacto
+STEP_SIDE_LEFT = "L"
+STEP_SIDE_RIGHT = "R"
+
+# vale do quadril mais raso que isso (px) é arredondamento, não passo
+HIP_MIN_PROMINENCE_PX = 1e-6
+
+# zero da parábola de voo mais que isso (s) antes do cruzamento do limiar
+# do quadril = ajuste ruim (salto não balístico, quadril ocluído)
+JUMP_ROOT_MAX_LEAD_S = 0.1
 
 
 # ============================================================
@@ -31,19 +47,31 @@ def _interp_nans(arr: np.ndarray) -> np.ndarray:
     return arr
 
 
-def _smooth_series(x: np.ndarray, window: Optional[int] = None) -> np.ndarray:
+def _smooth_series(
+    x: np.ndarray,
+    window: Optional[int] = None,
+    weights: Optional[np.ndarray] = None,
+    fps: Optional[float] = None,
+    robust_iters: int = 0,
+) -> np.ndarray:
     """
-    Suaviza uma série 1D usando Savitzky–Golay.
+    Suaviza uma série 1D com polinômio local (app/smoothing.py).
+
+    `weights` = confiança por amostra (0 = ignora, ex.: frame sem pose):
+    ajuste por mínimos quadrados PONDERADOS em cada janela; NaN também vale
+    peso 0, sem interpolar antes. Sem pesos, sem NaN e sem iterações
+    robustas é o Savitzky-Golay (núcleo fixo, bordas com a janela cortada).
+    Sem `window`, a janela sai do fps (METRICS_CFG.smoothing_window_s) ou
+    da janela fixa antiga.
     """
     x = np.asarray(x, dtype=float)
-    x = _interp_nans(x)
 
     n = len(x)
     if n < 3:
-        return x
+        return _interp_nans(x.copy())
 
     if window is None:
-        window = getattr(METRICS_CFG, "smoothing_window", 9)
+        window = window_for_fps(fps)
 
     # janela ímpar
     if window % 2 == 0:
@@ -51,13 +79,13 @@ def _smooth_series(x: np.ndarray, window: Optional[int] = None) -> np.ndarray:
     if window >= n:
         window = n - 1 if (n - 1) % 2 == 1 else n - 2
     if window < 3:
-        return x
+        return _interp_nans(x.copy())
 
     poly = getattr(METRICS_CFG, "smoothing_polyorder", 2)
     if poly >= window:
         poly = window - 1
 
-    return savgol_filter(x, window_length=window, polyorder=poly)
+    return local_poly_smooth(x, weights, window=window, polyorder=poly, robust_iters=robust_iters)
 
 
 def compute_scale_m_per_px(calib: Dict[str, Any]) -> float:
@@ -100,8 +128,8 @@ def compute_speed_distance_from_hip(
     hip_x = np.asarray(hip_x, dtype=float)
     hip_y = np.asarray(hip_y, dtype=float)
 
-    hip_x_s = _smooth_series(hip_x)
-    hip_y_s = _smooth_series(hip_y)
+    hip_x_s = _smooth_series(hip_x, fps=fps)
+    hip_y_s = _smooth_series(hip_y, fps=fps)
 
     dx = np.diff(hip_x_s)
     dy = np.diff(hip_y_s)
@@ -170,22 +198,34 @@ def compute_stride_from_ankles_scissoring(
     LA_x, LA_y, RA_x, RA_y,
     scale_m_per_px: float,
     fps: float,
+    LA_w=None,
+    RA_w=None,
 ) -> Optional[Dict[str, Any]]:
     """
     Detecta passos calculando a distância relativa X (Left - Right).
     Quando essa distância é MÁXIMA (positiva ou negativa), temos um passo (Stance).
+
+    LA_w / RA_w: confiança por frame de cada tornozelo (0 = não observado,
+    ex.: valor repetido do frame anterior): ajuste ponderado + iterações
+    robustas. Sem eles, ajuste sem pesos (NaN = buraco) e sem iterações.
     """
-    LA_x = _interp_nans(np.asarray(LA_x, dtype=float))
-    RA_x = _interp_nans(np.asarray(RA_x, dtype=float))
+    LA_x = np.asarray(LA_x, dtype=float)
+    RA_x = np.asarray(RA_x, dtype=float)
     
     # Se não tiver dados suficientes dos tornozelos, aborta
     if np.all(np.isnan(LA_x)) or np.all(np.isnan(RA_x)) or len(LA_x) < 10:
         return None
+    if LA_w is not None and RA_w is not None and (
+        not np.any(np.asarray(LA_w) > 0) or not np.any(np.asarray(RA_w) > 0)
+    ):
+        return None
 
-    # Suaviza as trajetórias X dos tornozelos
-    window_stride = min(11, getattr(METRICS_CFG, "smoothing_window", 9) + 2)
-    LA_x_s = _smooth_series(LA_x, window=window_stride)
-    RA_x_s = _smooth_series(RA_x, window=window_stride)
+    # Suaviza as trajetórias X dos tornozelos (ponderado + robusto: trechos
+    # repetidos e trocas esquerda/direita não viram picos falsos)
+    window_stride = window_for_fps(fps, METRICS_CFG.stride_smoothing_s)
+    robust = METRICS_CFG.smoothing_robust_iters if LA_w is not None and RA_w is not None else 0
+    LA_x_s = _smooth_series(LA_x, window=window_stride, weights=LA_w, robust_iters=robust)
+    RA_x_s = _smooth_series(RA_x, window=window_stride, weights=RA_w, robust_iters=robust)
 
     # --- A LÓGICA MÁGICA: SINAL DA TESOURA ---
     # delta_x positivo = Pé Esquerdo na frente
@@ -210,31 +250,26 @@ def compute_stride_from_ankles_scissoring(
     # Invertemos o sinal para usar find_peaks
     peaks_right, _ = find_peaks(-delta_x_m, distance=min_dist_frames, height=min_stride_width_m)
 
-    # Combina e ordena os eventos
-    all_steps = np.concatenate([peaks_left, peaks_right])
-    all_steps = np.sort(all_steps).astype(int)
+    # Combina e ordena os eventos (lado = pé que está na frente)
+    all_steps = np.concatenate([peaks_left, peaks_right]).astype(int)
+    sides = np.concatenate([
+        np.full(len(peaks_left), STEP_SIDE_LEFT),
+        np.full(len(peaks_right), STEP_SIDE_RIGHT),
+    ])
+    order = np.argsort(all_steps, kind="stable")
+    all_steps = all_steps[order]
+    sides = sides[order]
 
     if len(all_steps) < 2:
         return None
 
     # Cálculo do comprimento da passada (Stride Length)
     # Stride Length = Distância entre o pé da frente e o de trás no momento do impacto
-    stride_lengths = []
-    step_times = []
-
-    for i in range(len(all_steps)):
-        idx = all_steps[i]
-        # A "largura" do passo é exatamente o valor absoluto do delta_x naquele pico
-        # stride_width = abs(x_left - x_right)
-        s_len = abs(delta_x_m[idx])
-        stride_lengths.append(s_len)
-        
-        if i > 0:
-            dt = (all_steps[i] - all_steps[i-1]) / fps
-            step_times.append(dt)
-
-    if not stride_lengths:
-        return None
+    # A "largura" do passo é exatamente o valor absoluto do delta_x naquele pico
+    stride_lengths = np.abs(delta_x_m[all_steps])
+    # instante sub-frame de cada passo: parábola no pico de |delta_x|
+    step_offsets = parabolic_offsets(delta_x_m, all_steps)
+    step_times = np.diff(all_steps + step_offsets) / fps
 
     step_length_mean = float(np.mean(stride_lengths))
     # Stride (passada completa) é tecnicamente 2 passos (L->R + R->L)
@@ -243,7 +278,7 @@ def compute_stride_from_ankles_scissoring(
     # Vou manter a convenção de passo simples * 2 para consistência com o anterior.
     stride_length_mean_cycle = step_length_mean * 2.0
 
-    mean_step_time = float(np.mean(step_times)) if step_times else 0.0
+    mean_step_time = float(np.mean(step_times)) if len(step_times) else 0.0
     cadence = 1.0 / mean_step_time if mean_step_time > 0 else None
 
     return {
@@ -251,6 +286,9 @@ def compute_stride_from_ankles_scissoring(
         "stride_cadence_hz": cadence,
         "stride_count": len(all_steps),
         "step_events": all_steps.tolist(), # Lista de frames exatos do impacto
+        "step_offsets": step_offsets.tolist(),
+        "step_lengths_m": stride_lengths.tolist(),
+        "step_sides": sides.tolist(),
         "peaks": all_steps.tolist() # Mantendo compatibilidade
     }
 
@@ -280,7 +318,7 @@ def compute_stride_from_hip(
             "peaks": [],
         }
 
-    window_stride = min(7, getattr(METRICS_CFG, "smoothing_window", 9))
+    window_stride = max(3, window_for_fps(fps) - 2)
     hip_x_s = _smooth_series(hip_x, window=window_stride)
     hip_y_s = _smooth_series(hip_y, window=window_stride)
 
@@ -288,9 +326,10 @@ def compute_stride_from_hip(
     signal = -hip_y_s
     
     # Fallback params
-    prominence = (np.nanmax(signal) - np.nanmin(signal)) * 0.15
+    prominence = max((np.nanmax(signal) - np.nanmin(signal)) * 0.15, HIP_MIN_PROMINENCE_PX)
     peaks, _ = find_peaks(signal, distance=int(fps*0.25), prominence=prominence)
     peaks_list = [int(p) for p in peaks]
+    offsets = parabolic_offsets(signal, peaks)
 
     # Lógica simplificada de fallback
     if len(peaks) < 2:
@@ -299,27 +338,21 @@ def compute_stride_from_hip(
             "stride_cadence_hz": None,
             "stride_count": len(peaks),
             "peaks": peaks_list,
+            "step_offsets": offsets.tolist(),
         }
     
-    # Calcula média simples
+    # Calcula média simples (deslocamento do quadril entre vales consecutivos;
+    # o primeiro vale não tem passo anterior)
     x_m = hip_x_s * scale_m_per_px
-    steps = []
-    for i in range(len(peaks)-1):
-        steps.append(abs(x_m[peaks[i+1]] - x_m[peaks[i]]))
-    
-    if not steps:
-         return {
-            "stride_length_mean_m": None,
-            "stride_cadence_hz": None,
-            "stride_count": len(peaks),
-            "peaks": peaks_list,
-        }
-        
+    steps = np.abs(np.diff(x_m[peaks]))
+
     return {
         "stride_length_mean_m": float(np.mean(steps)) * 2.0,
-        "stride_cadence_hz": 1.0 / (float(np.mean(np.diff(peaks))) / fps),
+        "stride_cadence_hz": 1.0 / (float(np.mean(np.diff(peaks + offsets))) / fps),
         "stride_count": len(peaks),
         "peaks": peaks_list,
+        "step_offsets": offsets.tolist(),
+        "step_lengths_m": [None] + steps.tolist(),
     }
 
 
@@ -332,6 +365,8 @@ def compute_stride_hybrid(
     LA_x, LA_y, RA_x, RA_y,
     scale_m_per_px: float,
     fps: float,
+    LA_w=None,
+    RA_w=None,
 ) -> Dict[str, Any]:
     """
     Usa a NOVA lógica de tesoura (ankle scissoring) como principal.
@@ -340,6 +375,7 @@ def compute_stride_hybrid(
     ankle_res = compute_stride_from_ankles_scissoring(
         LA_x, LA_y, RA_x, RA_y,
         scale_m_per_px, fps,
+        LA_w=LA_w, RA_w=RA_w,
     )
 
     if ankle_res is not None:
@@ -348,6 +384,9 @@ def compute_stride_hybrid(
             "stride_cadence_hz": ankle_res["stride_cadence_hz"],
             "stride_count": ankle_res["stride_count"],
             "step_events": ankle_res["step_events"], # Lista de frames
+            "step_offsets": ankle_res["step_offsets"],
+            "step_lengths_m": ankle_res["step_lengths_m"],
+            "step_sides": ankle_res["step_sides"],
         }
 
     # Fallback para o quadril se os tornozelos estiverem ocultos
@@ -360,107 +399,439 @@ def compute_stride_hybrid(
         "stride_cadence_hz": hip_res["stride_cadence_hz"],
         "stride_count": hip_res["stride_count"],
         "step_events": hip_res.get("peaks", []),
+        "step_offsets": hip_res.get("step_offsets", [0.0] * len(hip_res.get("peaks", []))),
+        "step_lengths_m": hip_res.get("step_lengths_m", [None] * len(hip_res.get("peaks", []))),
+        # pelo quadril não dá pra saber qual pé
+        "step_sides": [None] * len(hip_res.get("peaks", [])),
     }
 
 
 # ============================================================
-#                      JUMP (SALTO PRO)
+#        ESTATÍSTICAS POR PASSO (VETORIZADO, SEM LOOP)
 # ============================================================
 
-def detect_jump_from_hip(
+def _asymmetry_pct(left: Optional[float], right: Optional[float]) -> Optional[float]:
+    """|E - D| / média(E, D) em %. None se faltar um dos lados."""
+    if left is None or right is None:
+        return None
+    mean = 0.5 * (left + right)
+    if mean <= 0:
+        return None
+    return float(100.0 * abs(left - right) / mean)
+
+
+def _side_mean(values: np.ndarray, mask: np.ndarray) -> Optional[float]:
+    v = values[mask & np.isfinite(values)]
+    return float(np.mean(v)) if len(v) else None
+
+
+def _nan_to_none(arr: np.ndarray) -> List[Optional[float]]:
+    arr = np.asarray(arr, dtype=float)
+    return np.where(np.isnan(arr), None, arr).tolist()
+
+
+def compute_step_stats(
+    step_events,
+    fps: float,
+    n_frames: int,
+    step_lengths_m=None,
+    step_sides=None,
+    step_offsets=None,
+) -> Dict[str, Any]:
+    """
+    Estatísticas por passo a partir dos frames de impacto (só operações de array).
+
+    Entradas alinhadas por passo: `step_events` (frame), `step_lengths_m`
+    (None/NaN = sem medida), `step_sides` ("L" / "R" / None) e
+    `step_offsets` (deslocamento sub-frame do impacto, -0.5..0.5; tempos e
+    durações usam frame + deslocamento, as séries por frame usam o frame).
+
+    Saída:
+      - por passo: tempo, comprimento, duração (desde o passo anterior),
+        cadência instantânea (passos/min);
+      - médias por lado + assimetria E/D de comprimento e duração;
+      - séries por frame (np.ndarray): contagem acumulada e cadência do
+        último passo.
+    """
+    events = np.asarray(step_events, dtype=int).reshape(-1)
+    k = len(events)
+    n_frames = int(n_frames)
+
+    lengths = np.full(k, np.nan)
+    if step_lengths_m is not None and k:
+        lengths = np.array(step_lengths_m, dtype=float)  # None -> NaN
+    sides = np.full(k, None, dtype=object)
+    if step_sides is not None and k:
+        sides = np.asarray(step_sides, dtype=object)
+    offsets = np.zeros(k)
+    if step_offsets is not None and k:
+        offsets = np.nan_to_num(np.asarray(step_offsets, dtype=float).reshape(-1))
+
+    # garante ordem temporal (normalmente já vem ordenado)
+    if k > 1 and np.any(np.diff(events) < 0):
+        order = np.argsort(events, kind="stable")
+        events, lengths, sides, offsets = events[order], lengths[order], sides[order], offsets[order]
+    frames_sub = events + offsets
+
+    # duração de cada passo = intervalo desde o impacto anterior (sub-frame)
+    durations = np.full(k, np.nan)
+    if k > 1:
+        durations[1:] = np.diff(frames_sub) / float(fps)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cadence_spm = np.where(durations > 0, 60.0 / durations, np.nan)
+
+    # séries por frame: constantes entre impactos, então o valor sai por
+    # trecho (k + 1 trechos) e o np.repeat espalha (eventos fora do vídeo
+    # não contam na contagem)
+    in_range = events[(events >= 0) & (events < n_frames)]
+    seg_len = np.diff(np.concatenate(([0], in_range, [n_frames])))
+    seg = np.arange(len(in_range) + 1)
+    count_series = np.repeat(seg, seg_len)
+
+    # cadência do último passo já completo em cada frame (0 antes do 2º passo)
+    cad_series = np.zeros(n_frames, dtype=float)
+    if k > 1:
+        last = seg + int(np.count_nonzero(events < 0)) - 1
+        vals = cadence_spm[np.clip(last, 0, k - 1)]
+        cad_series = np.repeat(np.where((last >= 1) & np.isfinite(vals), vals, 0.0), seg_len)
+
+    is_left = sides == STEP_SIDE_LEFT
+    is_right = sides == STEP_SIDE_RIGHT
+    left_len = _side_mean(lengths, is_left)
+    right_len = _side_mean(lengths, is_right)
+    left_dur = _side_mean(durations, is_left)
+    right_dur = _side_mean(durations, is_right)
+
+    return {
+        "step_events": events.tolist(),
+        "step_frames_subframe": frames_sub.tolist(),
+        "step_times_s": (frames_sub / float(fps)).tolist(),
+        "step_lengths_m": _nan_to_none(lengths),
+        "step_durations_s": _nan_to_none(durations),
+        "step_cadence_spm": _nan_to_none(cadence_spm),
+        "step_sides": sides.tolist(),
+        "left_step_length_mean_m": left_len,
+        "right_step_length_mean_m": right_len,
+        "step_length_asymmetry_pct": _asymmetry_pct(left_len, right_len),
+        "left_step_duration_mean_s": left_dur,
+        "right_step_duration_mean_s": right_dur,
+        "step_duration_asymmetry_pct": _asymmetry_pct(left_dur, right_dur),
+        # séries por frame ficam em array (quem monta o JSON converte)
+        "step_count_series": count_series,
+        "cadence_series_spm": cad_series,
+    }
+
+
+# ============================================================
+#        SEGMENTAÇÃO DE SALTOS (VÁRIOS VOOS, VETORIZADO)
+# ============================================================
+
+def _odd_window(frames: float, n: int) -> int:
+    w = max(3, int(round(frames)))
+    w = w if w % 2 == 1 else w + 1
+    return max(1, min(w, n if n % 2 == 1 else n - 1))
+
+
+def _prev_true_index(mask: np.ndarray) -> np.ndarray:
+    """Para cada frame, índice do último True em [0, i] (-1 se nenhum)."""
+    idx = np.where(mask, np.arange(len(mask)), -1)
+    return np.maximum.accumulate(idx) if len(idx) else idx
+
+
+def _next_true_index(mask: np.ndarray) -> np.ndarray:
+    """Para cada frame, índice do primeiro True em [i, n) (n se nenhum)."""
+    n = len(mask)
+    idx = np.where(mask, np.arange(n), n)
+    return np.minimum.accumulate(idx[::-1])[::-1] if n else idx
+
+
+def foot_contact_margins(
+    ankle_ys,
+    scale_m_per_px: float,
+    fps: float,
+    window: Optional[int] = None,
+) -> List[Optional[np.ndarray]]:
+    """
+    Margem contínua de apoio por frame de CADA pé (<= 0 = apoio): o pior
+    dos dois critérios normalizado pela tolerância, altura acima do "chão"
+    (máximo móvel de y na imagem, ~1 s) e velocidade vertical. Contínua pra
+    dar o instante sub-frame de toque / saída por cruzamento do zero.
+    None pro pé sem tornozelo utilizável.
+    """
+    margins: List[Optional[np.ndarray]] = []
+    for y in ankle_ys:
+        if y is None:
+            margins.append(None)
+            continue
+        y = np.asarray(y, dtype=float)
+        if len(y) < 5 or np.all(np.isnan(y)):
+            margins.append(None)
+            continue
+        y_s = _smooth_series(y, window=window, fps=fps)
+        vy_m_s = np.gradient(y_s) * fps * scale_m_per_px
+        floor = maximum_filter1d(y_s, size=_odd_window(fps, len(y_s)), mode="nearest")
+        height = (floor - y_s) * scale_m_per_px / METRICS_CFG.ankle_floor_tol_m - 1.0
+        speed = np.abs(vy_m_s) / METRICS_CFG.ankle_contact_speed_m_s - 1.0
+        margins.append(np.maximum(height, speed))
+    return margins
+
+
+def foot_contact_masks(
+    ankle_ys,
+    scale_m_per_px: float,
+    fps: float,
+    window: Optional[int] = None,
+) -> List[Optional[np.ndarray]]:
+    """
+    Apoio por frame de CADA pé: tornozelo PARADO na vertical e perto do
+    "chão" (ver `foot_contact_margins`). None pro pé sem tornozelo
+    utilizável. `window` = janela da suavização (padrão da config).
+    """
+    return [
+        None if g is None else g <= 0
+        for g in foot_contact_margins(ankle_ys, scale_m_per_px, fps, window=window)
+    ]
+
+
+def ankle_contact_margin(
+    ankle_ys,
+    scale_m_per_px: float,
+    fps: float,
+) -> Optional[np.ndarray]:
+    """
+    Margem de apoio de ALGUM pé (mínimo das margens por pé; <= 0 = apoio).
+    None se não houver tornozelo utilizável.
+    """
+    margin = None
+    for g in foot_contact_margins(ankle_ys, scale_m_per_px, fps):
+        if g is not None:
+            margin = g if margin is None else np.minimum(margin, g)
+    return margin
+
+
+def ankle_contact_mask(
+    ankle_ys,
+    scale_m_per_px: float,
+    fps: float,
+) -> Optional[np.ndarray]:
+    """
+    Apoio por frame a partir dos tornozelos: ALGUM pé em apoio (ver
+    `foot_contact_masks`). None se não houver tornozelo utilizável.
+    """
+    margin = ankle_contact_margin(ankle_ys, scale_m_per_px, fps)
+    return None if margin is None else margin <= 0
+
+
+def detect_jumps(
     hip_y: np.ndarray,
     scale_m_per_px: float,
     fps: float,
     hip_x: Optional[np.ndarray] = None,
     distance_cum: Optional[np.ndarray] = None,
+    ankle_ys=None,
 ) -> Dict[str, Any]:
     """
-    Detecta salto a partir da trajetória vertical do quadril.
+    Encontra TODOS os voos do clipe numa passada só (custo linear):
+
+      1) ápices = picos de -y do quadril suavizado com proeminência mínima
+         (altura mínima de salto em px);
+      2) altura de cada ápice contra um "nível do chão" MÓVEL (percentil 70
+         numa janela de ~2 s), então câmera/perspectiva podem variar;
+      3) takeoff / landing = último / primeiro frame com o quadril de volta
+         ao nível (tolerância por salto, como no detector antigo), buscados
+         com índices acumulados em vez de varredura por salto;
+      4) se houver tornozelos, takeoff / landing são refinados pelo último /
+         primeiro frame de APOIO (tornozelo parado perto do chão);
+      5) instantes sub-frame: ápice pela parábola no pico; takeoff / landing
+         pelos zeros da parábola balística ajustada ao afastamento CRU do
+         quadril acima do chão (os cruzamentos do limiar do quadril / da
+         margem de apoio suavizada erram cada ponta em ~0.8 frame, um pra
+         dentro e o outro pra fora do voo); sem ajuste válido, cruzamento
+         linear do zero do critério que definiu o frame.
+
+    Retorna a lista de saltos (ordem temporal), a máscara de voo por frame
+    e os candidatos descartados por altura.
     """
     hip_y = np.asarray(hip_y, dtype=float)
-    if len(hip_y) < 10:
-        return {
-            "has_jump": False,
-            "jump_height_m": None,
-            "jump_distance_m": None,
-            "jump_start_distance_m": None,
-            "jump_end_distance_m": None,
-            "jump_apex_frame": None,
-        }
+    n = len(hip_y)
+    empty = {"jumps": [], "jump_mask": np.zeros(n, dtype=bool), "max_candidate_height_m": None}
+    if n < 10:
+        return empty
 
-    window_jump = min(9, getattr(METRICS_CFG, "smoothing_window", 9))
+    window_jump = window_for_fps(fps)
     hip_y_s = _smooth_series(hip_y, window=window_jump)
 
-    apex_idx = int(np.argmin(hip_y_s))
-    apex_y = float(hip_y_s[apex_idx])
-
-    baseline_y = float(np.nanpercentile(hip_y_s, 70))
-    height_px = baseline_y - apex_y
-
-    if height_px <= 0:
-        return {"has_jump": False, "jump_height_m": None}
-
-    jump_height_m = float(height_px * scale_m_per_px)
-
-    # Filtra saltos muito pequenos (lê do config, deve ser 0.10 para evitar andar)
-    if jump_height_m < getattr(METRICS_CFG, "min_jump_height_m", 0.05):
-        return {
-            "has_jump": False,
-            "jump_height_m": jump_height_m,
-            "jump_distance_m": None,
-            "jump_start_distance_m": None,
-            "jump_end_distance_m": None,
-            "jump_apex_frame": apex_idx,
+    min_h_m = getattr(METRICS_CFG, "min_jump_height_m", 0.05)
+    min_h_px = min_h_m / scale_m_per_px
+
+    # nível do chão do quadril (percentil móvel = O(n) pra janela fixa)
+    base_w = _odd_window(METRICS_CFG.jump_baseline_window_s * fps, n)
+    baseline = percentile_filter(hip_y_s, 70, size=base_w, mode="nearest")
+
+    # 1) ápices: picos de -y com proeminência (wlen limita o custo por pico).
+    #    Com wlen, platôs mais largos que a janela têm proeminência 0 e o
+    #    scipy avisa a cada chamada; eles são descartados aqui explicitamente.
+    with warnings.catch_warnings():
+        # PeakPropertyWarning (RuntimeWarning) não é exportado pelo scipy.signal
+        warnings.filterwarnings(
+            "ignore", message="some peaks have a prominence of 0", category=RuntimeWarning
+        )
+        peaks, props = find_peaks(
+            -hip_y_s,
+            prominence=0.5 * min_h_px,
+            distance=max(1, int(METRICS_CFG.jump_min_separation_s * fps)),
+            wlen=base_w,
+        )
+    peaks = peaks[props["prominences"] > 0]
+    if len(peaks) == 0:
+        return empty
+
+    heights_px = baseline[peaks] - hip_y_s[peaks]
+    max_cand = float(np.max(heights_px) * scale_m_per_px)
+    apex = peaks[heights_px >= min_h_px]
+    heights_px = heights_px[heights_px >= min_h_px]
+    if len(apex) == 0:
+        empty["max_candidate_height_m"] = max_cand
+        return empty
+
+    # 2) tolerância de "voltou ao nível" por salto, aplicada na região de
+    #    cada ápice (fronteiras no meio entre ápices vizinhos)
+    tol = np.maximum(5.0, 0.25 * heights_px)
+    bounds = (apex[:-1] + apex[1:]) // 2
+    region = np.searchsorted(bounds, np.arange(n), side="right")
+    near_margin = np.abs(hip_y_s - baseline) - tol[region]
+    near = near_margin < 0
+
+    prev_near = _prev_true_index(near)
+    next_near = _next_true_index(near)
+    takeoff = prev_near[np.maximum(apex - 1, 0)]
+    landing = next_near[np.minimum(apex + 1, n - 1)]
+    hip_takeoff, hip_landing = takeoff, landing
+
+    # 3) refinamento pelos tornozelos (apoio real do pé)
+    source = np.full(len(apex), "hip", dtype=object)
+    contact_margin = ankle_contact_margin(ankle_ys or [], scale_m_per_px, fps)
+    contact = None if contact_margin is None else contact_margin <= 0
+    if contact is not None and contact.any():
+        margin = max(1, int(0.3 * fps))
+        t_ank = _prev_true_index(contact)[apex]
+        l_ank = _next_true_index(contact)[apex]
+        ok = (
+            (t_ank >= 0) & (l_ank < n) & (t_ank < apex) & (l_ank > apex)
+            & (t_ank >= takeoff - margin) & (l_ank <= landing + margin)
+            & (takeoff >= 0) & (landing < n)
+        )
+        takeoff = np.where(ok, t_ank, takeoff)
+        landing = np.where(ok, l_ank, landing)
+        source[ok] = "ankle"
+
+    # saltos válidos: achou os dois lados, sem invadir o ápice vizinho
+    prev_apex = np.concatenate(([-1], apex[:-1]))
+    next_apex = np.concatenate((apex[1:], [n]))
+    valid = (takeoff > prev_apex) & (landing < next_apex) & (takeoff >= 0) & (landing < n)
+    apex, heights_px, takeoff, landing, source = (
+        apex[valid], heights_px[valid], takeoff[valid], landing[valid], source[valid]
+    )
+    hip_takeoff, hip_landing = hip_takeoff[valid], hip_landing[valid]
+
+    # 4) sub-frame (todos os saltos de uma vez): takeoff = último frame "no
+    #    chão", então o cruzamento fica em [takeoff, takeoff + 1]; landing =
+    #    primeiro frame no chão, cruzamento em [landing - 1, landing]...
+    apex_t = apex + parabolic_offsets(hip_y_s, apex)
+    takeoff_t = takeoff + crossing_offsets(near_margin, takeoff)
+    landing_t = landing - 1 + crossing_offsets(near_margin, landing - 1)
+    by_ankle = source == "ankle"
+    if by_ankle.any():
+        takeoff_t[by_ankle] = takeoff[by_ankle] + crossing_offsets(contact_margin, takeoff[by_ankle])
+        landing_t[by_ankle] = landing[by_ankle] - 1 + crossing_offsets(
+            contact_margin, landing[by_ankle] - 1
+        )
+
+    # ...e sem o atraso do limiar: zeros da parábola de voo no afastamento
+    # cru, ajustada aos frames bem no ar (entre os cruzamentos do quadril);
+    # vale se cair por fora do trecho ajustado e a até JUMP_ROOT_MAX_LEAD_S
+    root_to, root_ld = ballistic_roots(baseline - hip_y, hip_takeoff + 1, hip_landing - 1, apex)
+    lead = JUMP_ROOT_MAX_LEAD_S * fps
+    fit_to = (root_to <= hip_takeoff + 1) & (root_to >= hip_takeoff - lead)
+    fit_ld = (root_ld >= hip_landing - 1) & (root_ld <= hip_landing + lead)
+    takeoff_t = np.where(fit_to, root_to, takeoff_t)
+    landing_t = np.where(fit_ld, root_ld, landing_t)
+
+    # máscara de voo (união dos intervalos, sem loop)
+    marks = np.zeros(n + 1, dtype=int)
+    np.add.at(marks, takeoff, 1)
+    np.add.at(marks, landing + 1, -1)
+    jump_mask = np.cumsum(marks[:n]) > 0
+
+    # distâncias
+    start_m = end_m = dist_m = None
+    if distance_cum is not None and len(distance_cum) == n:
+        dc = np.asarray(distance_cum, dtype=float)
+        start_m, end_m = dc[takeoff], dc[landing]
+        dist_m = end_m - start_m
+    elif hip_x is not None:
+        hip_x_s = _smooth_series(np.asarray(hip_x, dtype=float), window=window_jump)
+        dist_m = np.abs(hip_x_s[landing] - hip_x_s[takeoff]) * scale_m_per_px
+
+    def _at(arr, i):
+        return None if arr is None else float(arr[i])
+
+    jumps = [
+        {
+            "jump_height_m": float(heights_px[i] * scale_m_per_px),
+            "jump_distance_m": _at(dist_m, i),
+            "jump_start_distance_m": _at(start_m, i),
+            "jump_end_distance_m": _at(end_m, i),
+            "jump_apex_frame": int(apex[i]),
+            "jump_takeoff_frame": int(takeoff[i]),
+            "jump_landing_frame": int(landing[i]),
+            "jump_duration_s": float((landing[i] - takeoff[i]) / fps),
+            "jump_apex_time_s": float(apex_t[i] / fps),
+            "jump_takeoff_time_s": float(takeoff_t[i] / fps),
+            "jump_landing_time_s": float(landing_t[i] / fps),
+            "jump_flight_time_s": float((landing_t[i] - takeoff_t[i]) / fps),
+            "phase_source": source[i],
         }
+        for i in range(len(apex))
+    ]
+    return {"jumps": jumps, "jump_mask": jump_mask, "max_candidate_height_m": max_cand}
 
-    tol = max(5.0, 0.25 * height_px)
 
-    takeoff_idx = None
-    for i in range(apex_idx - 1, -1, -1):
-        if abs(hip_y_s[i] - baseline_y) < tol:
-            takeoff_idx = i
-            break
+# ============================================================
+#                      JUMP (SALTO PRO)
+# ============================================================
 
-    landing_idx = None
-    for i in range(apex_idx + 1, len(hip_y_s)):
-        if abs(hip_y_s[i] - baseline_y) < tol:
-            landing_idx = i
-            break
+def detect_jump_from_hip(
+    hip_y: np.ndarray,
+    scale_m_per_px: float,
+    fps: float,
+    hip_x: Optional[np.ndarray] = None,
+    distance_cum: Optional[np.ndarray] = None,
+    segmentation: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Salto PRINCIPAL (o mais alto) no formato antigo do campo "jump".
+
+    A detecção é a de `detect_jumps` (todos os voos); passe `segmentation`
+    se ela já foi calculada pra não repetir o trabalho.
+    """
+    if segmentation is None:
+        segmentation = detect_jumps(
+            hip_y, scale_m_per_px, fps, hip_x=hip_x, distance_cum=distance_cum
+        )
 
-    if takeoff_idx is None or landing_idx is None:
+    jumps = segmentation["jumps"]
+    if not jumps:
         return {
             "has_jump": False,
-            "jump_height_m": jump_height_m,
+            "jump_height_m": segmentation.get("max_candidate_height_m"),
             "jump_distance_m": None,
             "jump_start_distance_m": None,
             "jump_end_distance_m": None,
-            "jump_apex_frame": apex_idx,
+            "jump_apex_frame": None,
         }
 
-    jump_distance_m = None
-    jump_start_dist_m = None
-    jump_end_dist_m = None
-
-    if distance_cum is not None and len(distance_cum) == len(hip_y):
-        start_m = float(distance_cum[takeoff_idx])
-        end_m = float(distance_cum[landing_idx])
-        jump_start_dist_m = start_m
-        jump_end_dist_m = end_m
-        jump_distance_m = end_m - start_m
-    elif hip_x is not None:
-        hip_x = np.asarray(hip_x, dtype=float)
-        hip_x_s = _smooth_series(hip_x, window=window_jump)
-        dx_px = hip_x_s[landing_idx] - hip_x_s[takeoff_idx]
-        jump_distance_m = float(abs(dx_px) * scale_m_per_px)
-
-    return {
-        "has_jump": True,
-        "jump_height_m": jump_height_m,
-        "jump_distance_m": jump_distance_m,
-        "jump_start_distance_m": jump_start_dist_m,
-        "jump_end_distance_m": jump_end_dist_m,
-        "jump_apex_frame": apex_idx,
-        "jump_takeoff_frame": takeoff_idx,
-        "jump_landing_frame": landing_idx,
-        "jump_duration_s": (landing_idx - takeoff_idx) / fps,
-    }
\ No newline at end of file
+    best = max(jumps, key=lambda j: j["jump_height_m"])
+    out = {"has_jump": True}
+    out.update({k: v for k, v in best.items() if k != "phase_source"})
+    return out
@@ -1,38 +1,159 @@
 # app/models.py
-from functools import lru_cache
+"""
+Loaders dos modelos + estado de prontidão (readiness) do processo.
 
-from ultralytics import YOLO
-from rtmlib import RTMPose
+ultralytics / rtmlib (e com eles torch, torchvision e onnxruntime) só são
+importados DENTRO dos loaders: importar este módulo (ou o app.main) custa
+milissegundos, e o servidor responde /health antes de qualquer modelo.
+"""
 
-from .config import MODEL_CFG
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, Optional
 
+from .config import MODEL_CFG, POSE_VARIANTS
+from .registry import ModelKey, ModelRegistry
+from .runtime import configure_runtime, rebuild_ort_session
 
-@lru_cache(maxsize=1)
-def get_yolo_detector() -> YOLO:
+if TYPE_CHECKING:
+    from rtmlib import RTMPose
+    from ultralytics import YOLO
+
+
+# um registro por processo (workers de sharding têm o deles)
+MODEL_REGISTRY = ModelRegistry(budget_mb=MODEL_CFG.model_budget_mb)
+
+
+def detector_key(
+    weights: Optional[str] = None,
+    device: Optional[str] = None,
+    precision: Optional[str] = None,
+) -> ModelKey:
+    return ModelKey(
+        "detector",
+        weights or MODEL_CFG.yolo_weights,
+        device or MODEL_CFG.device,
+        precision or MODEL_CFG.yolo_precision,
+    )
+
+
+def pose_key(variant: Optional[str] = None, device: Optional[str] = None) -> ModelKey:
+    variant = variant or MODEL_CFG.pose_variant
+    if variant not in POSE_VARIANTS:
+        raise ValueError(f"pose_variant inválido: {variant} (use {tuple(POSE_VARIANTS)})")
+    return ModelKey("pose", variant, device or MODEL_CFG.device, "fp32")
+
+
+def get_yolo_detector(
+    weights: Optional[str] = None,
+    device: Optional[str] = None,
+    precision: Optional[str] = None,
+) -> "YOLO":
     """
-    Carrega YOLOv8-L detector pré-treinado em COCO (pessoas).
-    O Ultralytics baixa automaticamente 'yolov8l.pt' na primeira vez que usar.
+    Detector YOLO pré-treinado em COCO (pessoas), pelo registro.
+    Padrão em MODEL_CFG.yolo_weights: yolo11x.pt (GPU) ou yolo11n.pt (perfil CPU);
+    `weights` escolhe outra variante (yolo11n/s/m/l/x.pt) sem reiniciar.
+    O Ultralytics baixa os pesos automaticamente na primeira vez que usar.
     """
-    model = YOLO("yolo11x.pt")  # detector (não pose)
-    model.to(MODEL_CFG.device)
-    model.fuse()  # pequena otimização
-    return model
+    key = detector_key(weights, device, precision)
+
+    def _load():
+        from ultralytics import YOLO
+
+        configure_runtime()
+        model = YOLO(key.variant)  # detector (não pose)
+        model.to(key.device)
+        model.fuse()  # pequena otimização
+        if key.precision == "fp16":
+            # vale pra todo predict deste modelo
+            model.overrides["half"] = True
+        return model
+
+    return MODEL_REGISTRY.get(key, _load)
 
 
-@lru_cache(maxsize=1)
-def get_rtmpose_model() -> RTMPose:
+def get_rtmpose_model(variant: Optional[str] = None, device: Optional[str] = None) -> "RTMPose":
     """
-    Carrega RTMPose-X (body7, 384x288) via rtmlib + ONNX Runtime GPU.
+    RTMPose body7 via rtmlib + ONNX Runtime, pelo registro.
+    RTMPose-X 384x288 por padrão, RTMPose-m 256x192 no perfil CPU
+    (`variant` = chave de POSE_VARIANTS).
 
     Usamos o zip oficial da OpenMMLab (mesmo que a rtmlib usa internamente).
     """
-    pose_url = (
-        "https://download.openmmlab.com/mmpose/v1/projects/rtmposev1/"
-        "onnx_sdk/rtmpose-x_simcc-body7_pt-body7_700e-384x288-71d7b7e9_20230629.zip"
-    )
-    model = RTMPose(
-        onnx_model=pose_url,
-        backend=MODEL_CFG.backend,
-        device=MODEL_CFG.device,
-    )
-    return model
+    key = pose_key(variant, device)
+    url, input_size = POSE_VARIANTS[key.variant]
+
+    def _load():
+        from rtmlib import RTMPose
+
+        configure_runtime()
+        model = RTMPose(
+            onnx_model=url,
+            model_input_size=tuple(input_size),
+            backend=MODEL_CFG.backend,
+            device=key.device,
+        )
+        if MODEL_CFG.intra_op_threads > 0:
+            rebuild_ort_session(model)
+        return model
+
+    return MODEL_REGISTRY.get(key, _load)
+
+
+# ============================================================
+#        PRONTIDÃO (readiness != liveness)
+# ============================================================
+#   liveness:  o processo está de pé (GET /health, sempre 200)
+#   readiness: os modelos já estão carregados e o próximo request não
+#              paga cold start (GET /ready, 503 até warmup_models terminar)
+
+_warmup_lock = threading.Lock()
+_ready = threading.Event()
+_readiness: Dict[str, Any] = {"state": "cold", "error": None, "load_s": None}
+
+
+def warmup_models() -> Dict[str, Any]:
+    """
+    Carrega detector, pose e o encoder de ReID do backend configurado.
+    Idempotente e thread-safe (chamadas concorrentes esperam a primeira).
+    Em caso de erro o estado fica "failed" e a exceção sobe.
+    """
+    with _warmup_lock:
+        if _ready.is_set():
+            return readiness()
+        _readiness.update(state="loading", error=None)
+        t0 = time.perf_counter()
+        try:
+            from .reid import get_reid_encoder, get_reid_onnx_session, int8_parity, resolve_reid_backend
+
+            get_yolo_detector()
+            get_rtmpose_model()
+            # int8 só se passar na paridade com o fp32 (senão "onnx")
+            reid_backend = resolve_reid_backend()
+            if reid_backend == "torch":
+                get_reid_encoder()
+            else:
+                get_reid_onnx_session(reid_backend == "onnx-int8")
+            _readiness["reid_backend"] = reid_backend
+            if MODEL_CFG.reid_backend == "onnx-int8":
+                _readiness["reid_int8_parity"] = int8_parity()
+        except Exception as e:
+            _readiness.update(state="failed", error=str(e))
+            raise
+        _readiness.update(state="ready", load_s=time.perf_counter() - t0)
+        _ready.set()
+        return readiness()
+
+
+def models_ready() -> bool:
+    return _ready.is_set()
+
+
+def readiness() -> Dict[str, Any]:
+    """Cópia do estado: state (cold/loading/ready/failed), error, load_s + registro."""
+    return {
+        "ready": _ready.is_set(),
+        "device": MODEL_CFG.device,
+        **_readiness,
+        "registry": MODEL_REGISTRY.stats(),
+    }
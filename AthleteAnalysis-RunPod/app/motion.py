@@ -0,0 +1,92 @@
+# app/motion.py
+"""
+Gate de movimento: pula YOLO / ReID / RTMPose em frames quase parados.
+
+Clipes costumam começar e terminar com o atleta parado. Em vez de rodar os
+três modelos em todo frame igual, compara a região em volta da bbox do
+atleta (com margem) contra a mesma região no último frame PROCESSADO:
+
+  - a região é reduzida com INTER_AREA pra uma grade pequena (cada célula
+    é a média de um bloco de pixels -> ruído de compressão some);
+  - em cinza, diferença absoluta por célula; o frame é "parado" se a
+    MAIOR diferença ficar abaixo do limiar (um braço mexendo já passa);
+  - frame parado repete a última bbox / pose (marcado como interpolado);
+  - no máximo `max_skip` frames seguidos sem processar, pra não acumular
+    deriva lenta.
+
+Comparar com o último frame processado (e não com o anterior) impede que
+um movimento lento passe despercebido frame a frame.
+"""
+
+import time
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+# grade (W, H) da região reduzida
+MOTION_GRID: Tuple[int, int] = (16, 32)
+# margem em volta da bbox (fração de largura / altura)
+MOTION_MARGIN = 0.25
+# maior diferença por célula (níveis de cinza) ainda considerada parada
+MOTION_THRESHOLD = 6.0
+# frames seguidos pulados antes de forçar um frame processado
+MOTION_MAX_SKIP = 30
+
+
+class MotionGate:
+    def __init__(
+        self,
+        threshold: float = MOTION_THRESHOLD,
+        max_skip: int = MOTION_MAX_SKIP,
+        margin: float = MOTION_MARGIN,
+        grid: Tuple[int, int] = MOTION_GRID,
+    ):
+        self.threshold = float(threshold)
+        self.max_skip = int(max_skip)
+        self.margin = float(margin)
+        self.grid = grid
+
+        self._region: Optional[Tuple[int, int, int, int]] = None
+        self._ref: Optional[np.ndarray] = None
+        self._run = 0
+
+        # estatísticas (custo medido)
+        self.skipped = 0
+        self.gate_s = 0.0
+
+    def _patch(self, frame: np.ndarray) -> np.ndarray:
+        x1, y1, x2, y2 = self._region
+        small = cv2.resize(frame[y1:y2, x1:x2], self.grid, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return small.astype(np.int16)
+
+    def keyframe(self, frame: np.ndarray, bbox: Optional[np.ndarray]) -> None:
+        """Frame processado: vira a referência (região em volta de `bbox`)."""
+        t0 = time.perf_counter()
+        self._run = 0
+        self._ref = None
+        if bbox is not None:
+            h, w = frame.shape[:2]
+            bw, bh = bbox[2] - bbox[0], bbox[3] - bbox[1]
+            mx, my = self.margin * bw, self.margin * bh
+            x1, y1 = int(max(0, bbox[0] - mx)), int(max(0, bbox[1] - my))
+            x2, y2 = int(min(w, bbox[2] + mx)), int(min(h, bbox[3] + my))
+            if x2 - x1 >= 4 and y2 - y1 >= 4:
+                self._region = (x1, y1, x2, y2)
+                self._ref = self._patch(frame)
+        self.gate_s += time.perf_counter() - t0
+
+    def is_static(self, frame: np.ndarray) -> bool:
+        """True = pode repetir o último resultado (e conta como pulado)."""
+        if self._ref is None or self._run >= self.max_skip:
+            return False
+        t0 = time.perf_counter()
+        diff = np.abs(self._patch(frame) - self._ref)
+        static = bool(diff.max() < self.threshold)
+        self.gate_s += time.perf_counter() - t0
+        if static:
+            self._run += 1
+            self.skipped += 1
+        return static
@@ -0,0 +1,395 @@
+# app/overlay.py
+"""
+Vídeo anotado renderizado no servidor (opcional), em streaming.
+
+Cada frame analisado passa pelo `OverlayRenderer` logo depois da
+percepção daquele frame (gancho `on_frame` do `run_perception`): reduz
+pra resolução de saída, desenha bbox + esqueleto do atleta + velocidade e
+contador de passos, e manda direto pro encoder. Nenhum frame fica
+guardado: a memória é a de um frame de saída.
+
+Encoders (`writer`):
+  - "ffmpeg": pipe rawvideo BGR -> libx264 yuv420p (toca em celular /
+    navegador); precisa do binário `ffmpeg` no PATH;
+  - "opencv": cv2.VideoWriter mp4v (sempre disponível);
+  - "auto" (padrão): ffmpeg se existir, senão OpenCV.
+
+Velocidade e passos do vídeo são AO VIVO (`LiveKinematics`): só usam os
+frames já vistos - quadril projetado no chão (homografia ou m/px), média
+móvel exponencial, e passos pela troca de lado dos tornozelos
+(tesoura com histerese). Sem Kalman, Savitzky-Golay nem correção de
+lente: os números finais continuam sendo os do resultado JSON.
+
+Custo medido à parte (desenho / encode) em result["overlay"] e
+result["quality"]["cost"]["measured"]["overlay_s"].
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+from .calibration import homography_from_calib, project_points
+from .config import METRICS_CFG, POSE_IDXS
+from .metrics import compute_scale_m_per_px
+
+OVERLAY_WRITERS = ("auto", "opencv", "ffmpeg")
+
+# média móvel exponencial da velocidade ao vivo (constante de tempo, s)
+LIVE_SPEED_TAU_S = 0.3
+# velocidade instantânea acima disso = salto de detecção (mesmo corte das métricas)
+LIVE_MAX_SPEED_M_S = 12.5
+# histerese da tesoura: tornozelos precisam passar X m do outro lado
+LIVE_STEP_HYST_M = 0.08
+# menor largura de saída aceita (px)
+OVERLAY_MIN_WIDTH = 64
+
+# esqueleto COCO-17 (pares de índices)
+SKELETON = (
+    (POSE_IDXS.LEFT_SHOULDER, POSE_IDXS.RIGHT_SHOULDER),
+    (POSE_IDXS.LEFT_SHOULDER, POSE_IDXS.LEFT_ELBOW),
+    (POSE_IDXS.LEFT_ELBOW, POSE_IDXS.LEFT_WRIST),
+    (POSE_IDXS.RIGHT_SHOULDER, POSE_IDXS.RIGHT_ELBOW),
+    (POSE_IDXS.RIGHT_ELBOW, POSE_IDXS.RIGHT_WRIST),
+    (POSE_IDXS.LEFT_SHOULDER, POSE_IDXS.LEFT_HIP),
+    (POSE_IDXS.RIGHT_SHOULDER, POSE_IDXS.RIGHT_HIP),
+    (POSE_IDXS.LEFT_HIP, POSE_IDXS.RIGHT_HIP),
+    (POSE_IDXS.LEFT_HIP, POSE_IDXS.LEFT_KNEE),
+    (POSE_IDXS.LEFT_KNEE, POSE_IDXS.LEFT_ANKLE),
+    (POSE_IDXS.RIGHT_HIP, POSE_IDXS.RIGHT_KNEE),
+    (POSE_IDXS.RIGHT_KNEE, POSE_IDXS.RIGHT_ANKLE),
+    (POSE_IDXS.NOSE, POSE_IDXS.LEFT_EYE),
+    (POSE_IDXS.NOSE, POSE_IDXS.RIGHT_EYE),
+)
+_LEFT = {POSE_IDXS.LEFT_SHOULDER, POSE_IDXS.LEFT_ELBOW, POSE_IDXS.LEFT_WRIST,
+         POSE_IDXS.LEFT_HIP, POSE_IDXS.LEFT_KNEE, POSE_IDXS.LEFT_ANKLE}
+_RIGHT = {POSE_IDXS.RIGHT_SHOULDER, POSE_IDXS.RIGHT_ELBOW, POSE_IDXS.RIGHT_WRIST,
+          POSE_IDXS.RIGHT_HIP, POSE_IDXS.RIGHT_KNEE, POSE_IDXS.RIGHT_ANKLE}
+
+# cores BGR (lado esquerdo / direito / centro do corpo)
+COLOR_BOX = (0, 215, 255)
+COLOR_LEFT = (255, 160, 0)
+COLOR_RIGHT = (0, 90, 255)
+COLOR_CENTER = (230, 230, 230)
+COLOR_LOST = (60, 60, 230)
+
+
+@dataclass(frozen=True)
+class OverlayOptions:
+    """Saída do vídeo anotado."""
+    width: Optional[int] = None         # largura (px); None = a do vídeo
+    fps: Optional[float] = None         # fps de saída; None = fps de análise
+    writer: str = "auto"                # "auto" | "opencv" | "ffmpeg"
+    path: Optional[str] = None          # None = arquivo temporário .mp4
+
+    @classmethod
+    def from_request(cls, spec: Union[bool, Dict[str, Any], "OverlayOptions", None]) -> Optional["OverlayOptions"]:
+        """True / {"width", "fps", "writer", "path"} / OverlayOptions -> opções; falsy -> None."""
+        if isinstance(spec, OverlayOptions):
+            opts = spec
+        elif spec is True:
+            opts = cls()
+        elif isinstance(spec, dict):
+            unknown = set(spec) - {"width", "fps", "writer", "path"}
+            if unknown:
+                raise ValueError(f"overlay: campos desconhecidos {sorted(unknown)}.")
+            opts = cls(
+                width=int(spec["width"]) if spec.get("width") else None,
+                fps=float(spec["fps"]) if spec.get("fps") else None,
+                writer=str(spec.get("writer") or "auto").strip().lower(),
+                path=spec.get("path"),
+            )
+        elif not spec:
+            return None
+        else:
+            raise ValueError("overlay deve ser true ou {width, fps, writer}.")
+
+        if opts.width is not None and opts.width < OVERLAY_MIN_WIDTH:
+            raise ValueError(f"overlay.width deve ser >= {OVERLAY_MIN_WIDTH}.")
+        if opts.fps is not None and opts.fps <= 0:
+            raise ValueError("overlay.fps deve ser > 0.")
+        if opts.writer not in OVERLAY_WRITERS:
+            raise ValueError(f"overlay.writer inválido (use {', '.join(OVERLAY_WRITERS)}).")
+        return opts
+
+
+# ============================================================
+#       VELOCIDADE / PASSOS AO VIVO (só frames já vistos)
+# ============================================================
+
+class LiveKinematics:
+    """Velocidade (EMA) e contagem de passos incrementais, frame a frame."""
+
+    def __init__(self, calib: Dict[str, Any], fps: float):
+        self.H = homography_from_calib(calib)
+        self.scale = None if self.H is not None else compute_scale_m_per_px(calib)
+        self.fps = float(fps) if fps and fps > 0 else 30.0
+        self.speed = 0.0
+        self.steps = 0
+        self._speed_sum = 0.0
+        self._speed_n = 0
+        self._last_pos: Optional[np.ndarray] = None
+        self._last_i = 0
+        self._floor_v: Optional[float] = None
+        self._side = 0
+
+    def _to_ground(self, pts: np.ndarray) -> np.ndarray:
+        """[N, 2] px -> metros (homografia) ou px * m/px."""
+        if self.H is not None:
+            return project_points(self.H, pts)
+        return pts * self.scale
+
+    def update(self, i: int, hip: Tuple[float, float], la: Tuple[float, float],
+               ra: Tuple[float, float], interpolated: bool = False) -> None:
+        """Observação do frame analisado `i` (NaN = não visto)."""
+        feet = [p for p in (la, ra) if np.isfinite(p[1])]
+        if feet:
+            self._floor_v = max(p[1] for p in feet)
+
+        if np.isfinite(hip[0]):
+            # quadril projetado pelo ponto do chão logo abaixo (como nas métricas)
+            v = self._floor_v if self.H is not None and self._floor_v is not None else hip[1]
+            pos = self._to_ground(np.array([[hip[0], v]], dtype=float))[0]
+            if self._last_pos is not None and i > self._last_i:
+                dt = (i - self._last_i) / self.fps
+                inst = float(np.hypot(*(pos - self._last_pos))) / dt
+                if inst <= LIVE_MAX_SPEED_M_S:
+                    a = 1.0 - np.exp(-dt / LIVE_SPEED_TAU_S)
+                    self.speed += a * (inst - self.speed)
+                    self._speed_sum += self.speed
+                    self._speed_n += 1
+            self._last_pos, self._last_i = pos, i
+
+        # tesoura: tornozelo da frente troca de lado = um passo
+        if interpolated or not (np.isfinite(la[0]) and np.isfinite(ra[0])):
+            return
+        g = self._to_ground(np.array([la, ra], dtype=float))
+        sep = float(g[0, 0] - g[1, 0])
+        side = 1 if sep > LIVE_STEP_HYST_M else -1 if sep < -LIVE_STEP_HYST_M else 0
+        if side != 0 and side != self._side:
+            if self._side != 0:
+                self.steps += 1
+            self._side = side
+
+    @property
+    def speed_mean(self) -> Optional[float]:
+        return self._speed_sum / self._speed_n if self._speed_n else None
+
+
+# ============================================================
+#                   ENCODERS EM STREAMING
+# ============================================================
+
+class _OpenCVWriter:
+    name = "opencv"
+
+    def __init__(self, path: str, size: Tuple[int, int], fps: float):
+        self._w = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, size)
+        if not self._w.isOpened():
+            raise RuntimeError(f"Não foi possível abrir o VideoWriter em {path}.")
+
+    def write(self, img: np.ndarray) -> None:
+        self._w.write(img)
+
+    def close(self) -> None:
+        self._w.release()
+
+
+class _FFmpegWriter:
+    name = "ffmpeg"
+
+    def __init__(self, path: str, size: Tuple[int, int], fps: float, binary: str):
+        w, h = size
+        cmd = [
+            binary, "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "bgr24", "-s", f"{w}x{h}", "-r", f"{fps:.6g}",
+            "-i", "-",
+            "-an", "-c:v", "libx264", "-preset", "veryfast", "-pix_fmt", "yuv420p",
+            "-movflags", "+faststart",
+            path,
+        ]
+        self._proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    def write(self, img: np.ndarray) -> None:
+        self._proc.stdin.write(np.ascontiguousarray(img).data)
+
+    def close(self) -> None:
+        if self._proc.stdin and not self._proc.stdin.closed:
+            self._proc.stdin.close()
+        err = self._proc.stderr.read() if self._proc.stderr else b""
+        if self._proc.wait() != 0:
+            raise RuntimeError(f"ffmpeg falhou: {err.decode(errors='replace').strip()}")
+
+
+def open_writer(kind: str, path: str, size: Tuple[int, int], fps: float):
+    """Encoder pedido ("auto" = ffmpeg se existir no PATH)."""
+    binary = shutil.which("ffmpeg")
+    if kind == "ffmpeg" and binary is None:
+        raise RuntimeError("overlay.writer = ffmpeg, mas o binário não está no PATH.")
+    if kind in ("ffmpeg", "auto") and binary is not None:
+        return _FFmpegWriter(path, size, fps, binary)
+    return _OpenCVWriter(path, size, fps)
+
+
+# ============================================================
+#                         RENDERER
+# ============================================================
+
+def _side_color(joints: set) -> Tuple[int, int, int]:
+    if joints <= _LEFT:
+        return COLOR_LEFT
+    if joints <= _RIGHT:
+        return COLOR_RIGHT
+    return COLOR_CENTER
+
+
+def _even(v: float) -> int:
+    """yuv420p pede largura / altura pares."""
+    return max(2, int(round(v / 2.0)) * 2)
+
+
+class OverlayRenderer:
+    """
+    Chamado como `renderer(frame, track)` depois de cada frame analisado
+    (a última entrada do `track` é a do frame). `close()` fecha o encoder;
+    `summary()` dá o custo e a saída.
+    """
+
+    def __init__(
+        self,
+        options: OverlayOptions,
+        calib: Dict[str, Any],
+        fps: float,
+        frame_size: Tuple[int, int],
+    ):
+        src_w, src_h = frame_size
+        self.options = options
+        self.src_fps = float(fps) if fps and fps > 0 else 30.0
+        self.fps = min(options.fps, self.src_fps) if options.fps else self.src_fps
+        self.scale = min(1.0, options.width / float(src_w)) if options.width else 1.0
+        self.size = (_even(src_w * self.scale), _even(src_h * self.scale))
+        self.live = LiveKinematics(calib, self.src_fps)
+
+        if options.path:
+            self.path = options.path
+        else:
+            fd, self.path = tempfile.mkstemp(prefix="overlay_", suffix=".mp4")
+            os.close(fd)
+        self._writer = open_writer(options.writer, self.path, self.size, self.fps)
+        self.writer = self._writer.name
+
+        # frame de entrada k vai pra saída quando k >= próximo instante
+        self._every = self.src_fps / self.fps
+        self._next = 0.0
+        self._seen = 0
+        self.frames_written = 0
+        self.draw_s = 0.0
+        self.encode_s = 0.0
+        self._closed = False
+
+    # ---------------- desenho ----------------
+    def _draw_pose(self, img: np.ndarray, kpts: np.ndarray, scores: Optional[np.ndarray]) -> None:
+        pts = kpts * self.scale
+        ok = np.isfinite(pts).all(axis=1)
+        if scores is not None:
+            ok &= np.asarray(scores) >= METRICS_CFG.kpt_score_thr
+        thick = max(1, int(round(img.shape[0] / 240)))
+        xy = np.round(np.nan_to_num(pts)).astype(int)
+        for a, b in SKELETON:
+            if ok[a] and ok[b]:
+                cv2.line(img, tuple(xy[a]), tuple(xy[b]), _side_color({a, b}), thick, cv2.LINE_AA)
+        for j in np.nonzero(ok)[0]:
+            cv2.circle(img, tuple(xy[j]), thick + 1, _side_color({j}), -1, cv2.LINE_AA)
+
+    def _draw_hud(self, img: np.ndarray, detected: bool) -> None:
+        h = img.shape[0]
+        fs = max(0.4, h / 720.0)
+        th = max(1, int(round(fs * 2)))
+        lines = [f"{self.live.speed:5.2f} m/s", f"passos {self.live.steps}"]
+        if not detected:
+            lines.append("atleta perdido")
+        y = int(34 * fs)
+        for k, text in enumerate(lines):
+            color = COLOR_LOST if k == 2 else (255, 255, 255)
+            cv2.putText(img, text, (int(12 * fs), y), cv2.FONT_HERSHEY_SIMPLEX, fs, (0, 0, 0), th + 2, cv2.LINE_AA)
+            cv2.putText(img, text, (int(12 * fs), y), cv2.FONT_HERSHEY_SIMPLEX, fs, color, th, cv2.LINE_AA)
+            y += int(32 * fs)
+
+    def __call__(self, frame: np.ndarray, track: Any) -> None:
+        t0 = time.perf_counter()
+        i = len(track) - 1
+        self.live.update(
+            i,
+            (track.hip_x[i], track.hip_y[i]),
+            (track.la_x[i], track.la_y[i]),
+            (track.ra_x[i], track.ra_y[i]),
+            interpolated=track.interpolated[i],
+        )
+        self._seen += 1
+        if i + 1e-9 < self._next:
+            self.draw_s += time.perf_counter() - t0
+            return
+        self._next += self._every
+
+        if self.scale < 1.0:
+            img = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        else:
+            img = frame.copy()
+        box = track.bbox[i]
+        if box is not None:
+            p = np.round(np.asarray(box) * self.scale).astype(int)
+            cv2.rectangle(img, (p[0], p[1]), (p[2], p[3]), COLOR_BOX, max(2, img.shape[0] // 360))
+        if track.keypoints[i] is not None:
+            self._draw_pose(img, np.asarray(track.keypoints[i], dtype=float), track.keypoint_scores[i])
+        self._draw_hud(img, track.detected[i])
+        t1 = time.perf_counter()
+        self._writer.write(img)
+        t2 = time.perf_counter()
+        self.frames_written += 1
+        self.draw_s += t1 - t0
+        self.encode_s += t2 - t1
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        t0 = time.perf_counter()
+        self._writer.close()
+        self.encode_s += time.perf_counter() - t0
+
+    def discard(self) -> None:
+        """Falha no meio: fecha o encoder sem reclamar e apaga o arquivo parcial."""
+        try:
+            self.close()
+        except Exception:
+            pass
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def summary(self) -> Dict[str, Any]:
+        """Saída e custo do estágio (vai em result["overlay"])."""
+        seconds = self.draw_s + self.encode_s
+        mean = self.live.speed_mean
+        return {
+            "path": self.path,
+            "writer": self.writer,
+            "width": self.size[0],
+            "height": self.size[1],
+            "fps": round(self.fps, 3),
+            "frames_in": self._seen,
+            "frames_written": self.frames_written,
+            "draw_s": round(self.draw_s, 3),
+            "encode_s": round(self.encode_s, 3),
+            "seconds": round(seconds, 3),
+            "ms_per_frame": round(1000.0 * seconds / max(1, self.frames_written), 2),
+            "live": {
+                "speed_mean_m_s": round(mean, 3) if mean is not None else None,
+                "steps": self.live.steps,
+            },
+        }
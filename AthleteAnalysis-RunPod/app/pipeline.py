@@ -1,597 +1,667 @@
 # app/pipeline.py
-from typing import Dict, Any, List, Optional, Tuple
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import partial, wraps
+from typing import TYPE_CHECKING, Callable, Dict, Any, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 
 import numpy as np
-from PIL import Image  # upscaling sem cv2
 
 from .models import get_yolo_detector, get_rtmpose_model
-from .video_utils import read_video_frames
+from .video_utils import read_video_frames, video_info
 from .metrics import (
     compute_scale_m_per_px,
     compute_speed_distance_from_hip,
     compute_stride_hybrid,
+    compute_step_stats,
     detect_jump_from_hip,
+    detect_jumps,
 )
-from .config import POSE_IDXS, METRICS_CFG
+from .config import POSE_IDXS, METRICS_CFG, MODEL_CFG
+from .calibration import ground_trajectory, homography_from_calib, scale_from_calib
 from .filters import KalmanBBox
-from .reid import compute_reid_embedding
+from .kinematics import compute_kinematics
+from .reid import compute_reid_embeddings
+from .crops import FrameCrops, pose_scale_for_height
+from .biomechanics import compute_biomechanics, stack_keypoints
+from .contacts import compute_ground_contacts
+from .target_selection import ReIDStats, TargetSelector
+from .undistort import CameraIntrinsics, undistort_calib, undistort_points
+from .motion import MotionGate
+from .single_pass import get_single_pass_model
+from .tiling import TILE_SMALL_BOX_PX, TileScheduler, merge_detections
+from .quality import REID_POLICIES, QualityTier, estimate_cost, get_quality_tier
 
+if TYPE_CHECKING:
+    from .keyframes import KeyframeOptions
+    from .overlay import OverlayOptions
+    from .progressive import TrackPrior
 
-# ============================================================
-#                 CONSTANTES / AJUDANTES
-# ============================================================
-
-REID_IOU_STRONG = 0.5          # IOU "forte" pra manter continuidade
-REID_SIM_THRESHOLD = 0.55      # similaridade mínima pra confiar no ReID
-REID_SIM_UPDATE_MIN = 0.40     # mínimo de similaridade pra atualizar buffer
-REID_BUFFER_SIZE = 10          # quantos embeddings recentes guardar
-
-
-def _iou(box_a: np.ndarray, box_b: np.ndarray) -> float:
-    """Calcula IOU entre duas bboxes [x1,y1,x2,y2]."""
-    x1 = max(box_a[0], box_b[0])
-    y1 = max(box_a[1], box_b[1])
-    x2 = min(box_a[2], box_b[2])
-    y2 = min(box_a[3], box_b[3])
-
-    inter_w = max(0.0, x2 - x1)
-    inter_h = max(0.0, y2 - y1)
-    inter = inter_w * inter_h
-
-    if inter <= 0:
-        return 0.0
-
-    area_a = max(0.0, (box_a[2] - box_a[0]) * (box_a[3] - box_a[1]))
-    area_b = max(0.0, (box_b[2] - box_b[0]) * (box_b[3] - box_b[1]))
-    union = area_a + area_b - inter
-    if union <= 0:
-        return 0.0
-
-    return float(inter / union)
-
-
-def _cosine_sim(a: Optional[np.ndarray], b: Optional[np.ndarray]) -> float:
-    """Similaridade cosseno entre dois vetores L2-normalizados. Retorna -1 se inválido."""
-    if a is None or b is None:
-        return -1.0
-    a = np.asarray(a, dtype=float).ravel()
-    b = np.asarray(b, dtype=float).ravel()
-    denom = (np.linalg.norm(a) * np.linalg.norm(b)) + 1e-12
-    if denom <= 0:
-        return -1.0
-    return float(np.dot(a, b) / denom)
-
-
-def update_embedding_buffer(
-    buffer: List[np.ndarray],
-    new_emb: Optional[np.ndarray],
-) -> List[np.ndarray]:
-    """Mantém um buffer FIFO de embeddings válidos."""
-    if new_emb is None:
-        return buffer
-    if not isinstance(new_emb, np.ndarray) or new_emb.size == 0:
-        return buffer
-
-    if len(buffer) >= REID_BUFFER_SIZE:
-        buffer.pop(0)
-    buffer.append(new_emb)
-    return buffer
-
-
-def get_reference_embedding(buffer: List[np.ndarray]) -> Optional[np.ndarray]:
-    """Retorna embedding médio L2-normalizado do buffer, ou None se vazio."""
-    if len(buffer) == 0:
-        return None
-    mean_emb = np.mean(buffer, axis=0)
-    norm = np.linalg.norm(mean_emb) + 1e-12
-    return (mean_emb / norm).astype("float32")
 
+BBoxTuple = Tuple[float, float, float, float]
 
-def _expand_bbox(
-    box: np.ndarray,
-    img_w: int,
-    img_h: int,
-    scale: float = 1.6,
-) -> Tuple[int, int, int, int]:
-    """
-    Expande bbox original por um fator de scale (zoom adaptativo).
-    A ideia aqui é garantir pegar cabeça → pé do atleta.
-    """
-    x1, y1, x2, y2 = box
-    cx = 0.5 * (x1 + x2)
-    cy = 0.5 * (y1 + y2)
-    w = (x2 - x1) * scale
-    h = (y2 - y1) * scale
+# score mínimo pra aceitar um tornozelo (mais permissivo que o do quadril)
+ANKLE_SCORE_THR = 0.2
 
-    # levemente mais alto que largo (pra pegar o corpo)
-    if h < w * 1.2:
-        h = w * 1.2
-
-    x1n = int(max(0, cx - w / 2))
-    x2n = int(min(img_w - 1, cx + w / 2))
-    y1n = int(max(0, cy - h / 2))
-    y2n = int(min(img_h - 1, cy + h / 2))
-    return x1n, y1n, x2n, y2n
 
+# ============================================================
+#          ESTÁGIO 1: PERCEPÇÃO (YOLO + ReID + RTMPose)
+# ============================================================
 
-def _upscale_for_pose(crop: np.ndarray) -> Tuple[np.ndarray, float]:
+@dataclass
+class PerceptionTrack:
     """
-    Aumenta a resolução do crop antes de mandar pro RTMPose.
+    Observações CRUAS do atleta escolhido, uma entrada por frame.
 
-    - Se o atleta estiver pequeno, sobe pra pelo menos ~320px de altura.
-    - Retorna (crop_upscaled, scale_factor).
+    NaN = sem observação naquele frame (sem detecção, pose falhou ou
+    tornozelo com score baixo). Nada aqui é preenchido nem filtrado: o
+    "repete o último valor" e o Kalman ficam em `assemble_series`, o que
+    permite juntar trechos processados separadamente (ver app/sharding.py)
+    antes de montar as séries.
     """
-    h, w = crop.shape[:2]
-
-    target_min_h = 320
-    max_scale = 3.0
-
-    if h >= target_min_h:
-        return crop, 1.0
-
-    scale = min(max_scale, target_min_h / float(h))
-    new_h = int(round(h * scale))
-    new_w = int(round(w * scale))
-
-    pil_img = Image.fromarray(crop)
-    pil_resized = pil_img.resize((new_w, new_h), Image.BICUBIC)
-    crop_up = np.array(pil_resized)
-
-    return crop_up, scale
+    start_frame: int = 0
+    detected: List[bool] = field(default_factory=list)
+    # True = frame parado, repete a última observação (gate de movimento)
+    interpolated: List[bool] = field(default_factory=list)
+    hip_x: List[float] = field(default_factory=list)
+    hip_y: List[float] = field(default_factory=list)
+    la_x: List[float] = field(default_factory=list)
+    la_y: List[float] = field(default_factory=list)
+    ra_x: List[float] = field(default_factory=list)
+    ra_y: List[float] = field(default_factory=list)
+    bbox: List[Optional[BBoxTuple]] = field(default_factory=list)
+    keypoints: List[Optional[np.ndarray]] = field(default_factory=list)
+    keypoint_scores: List[Optional[np.ndarray]] = field(default_factory=list)
+    reid_stats: ReIDStats = field(default_factory=ReIDStats)
+    # inferências realmente feitas (custo medido)
+    detector_calls: int = 0
+    pose_calls: int = 0
+    # detecções só na região do prior (passada rápida) / que caíram pro frame inteiro
+    region_detections: int = 0
+    region_fallbacks: int = 0
+    # detecção em tiles (atleta pequeno / perdido)
+    tiled_frames: int = 0
+    tile_calls: int = 0
+    # gate de movimento: tempo dos frames processados / do próprio gate
+    processed_s: float = 0.0
+    motion_gate_s: float = 0.0
+    # estado do seletor capturado no início de frames pedidos (frame -> estado)
+    snapshots: Dict[int, Dict[str, Any]] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.detected)
+
+    @property
+    def motion_skipped(self) -> int:
+        return int(sum(self.interpolated))
+
+    def motion_saved_s(self) -> float:
+        """Tempo economizado pelo gate: pulados x custo médio de um frame processado - gate."""
+        processed = len(self) - self.motion_skipped
+        if processed <= 0:
+            return 0.0
+        return self.motion_skipped * self.processed_s / processed - self.motion_gate_s
+
+    def repeat_last(self) -> None:
+        """Repete a última observação como frame interpolado (atleta parado)."""
+        self.append(
+            detected=self.detected[-1],
+            hip=(self.hip_x[-1], self.hip_y[-1]),
+            la=(self.la_x[-1], self.la_y[-1]),
+            ra=(self.ra_x[-1], self.ra_y[-1]),
+            bbox=self.bbox[-1],
+            keypoints=self.keypoints[-1],
+            keypoint_scores=self.keypoint_scores[-1],
+            interpolated=True,
+        )
 
+    def append(
+        self,
+        detected: bool,
+        hip: Tuple[float, float] = (np.nan, np.nan),
+        la: Tuple[float, float] = (np.nan, np.nan),
+        ra: Tuple[float, float] = (np.nan, np.nan),
+        bbox: Optional[BBoxTuple] = None,
+        keypoints: Optional[np.ndarray] = None,
+        keypoint_scores: Optional[np.ndarray] = None,
+        interpolated: bool = False,
+    ) -> None:
+        self.detected.append(bool(detected))
+        self.interpolated.append(bool(interpolated))
+        self.hip_x.append(float(hip[0]))
+        self.hip_y.append(float(hip[1]))
+        self.la_x.append(float(la[0]))
+        self.la_y.append(float(la[1]))
+        self.ra_x.append(float(ra[0]))
+        self.ra_y.append(float(ra[1]))
+        self.bbox.append(bbox)
+        self.keypoints.append(keypoints)
+        self.keypoint_scores.append(keypoint_scores)
+
+    def slice(self, a: int, b: int) -> "PerceptionTrack":
+        """Sub-trecho [a, b) em índices RELATIVOS ao início do trecho."""
+        return PerceptionTrack(
+            start_frame=self.start_frame + a,
+            detected=self.detected[a:b],
+            interpolated=self.interpolated[a:b],
+            hip_x=self.hip_x[a:b],
+            hip_y=self.hip_y[a:b],
+            la_x=self.la_x[a:b],
+            la_y=self.la_y[a:b],
+            ra_x=self.ra_x[a:b],
+            ra_y=self.ra_y[a:b],
+            bbox=self.bbox[a:b],
+            keypoints=self.keypoints[a:b],
+            keypoint_scores=self.keypoint_scores[a:b],
+        )
 
-def _pick_target_person(
-    boxes: np.ndarray,
-    scores: np.ndarray,
-    ref_point: Optional[Tuple[float, float]],
-    last_box: Optional[np.ndarray],
-    embedding_ref: Optional[np.ndarray],
-    candidates_embeddings: List[Optional[np.ndarray]],
-) -> int:
+    def extend(self, other: "PerceptionTrack") -> None:
+        self.detected += other.detected
+        self.interpolated += other.interpolated
+        self.hip_x += other.hip_x
+        self.hip_y += other.hip_y
+        self.la_x += other.la_x
+        self.la_y += other.la_y
+        self.ra_x += other.ra_x
+        self.ra_y += other.ra_y
+        self.bbox += other.bbox
+        self.keypoints += other.keypoints
+        self.keypoint_scores += other.keypoint_scores
+
+
+def _run_pose(rtmpose, frame: np.ndarray, region: Tuple[int, int, int, int]):
+    """RTMPose numa região do frame -> (kpts [K,2] globais, scores [K]) ou (None, None)."""
+    try:
+        k, s = rtmpose(frame, bboxes=[list(region)])  # [1,K,2], [1,K]
+        kpts = np.asarray(k, dtype=float)
+        scores = np.asarray(s, dtype=float)
+
+        # compatibilidade com saída batched [1,K,2]
+        if kpts.ndim == 3 and kpts.shape[0] == 1:
+            kpts = kpts[0]
+        if scores.ndim == 2 and scores.shape[0] == 1:
+            scores = scores[0]
+    except Exception:
+        return None, None
+
+    if kpts.ndim != 2 or kpts.shape[1] < 2:
+        return None, None
+    return kpts, scores
+
+
+def _observe_joints(
+    bbox: np.ndarray,
+    kpts: Optional[np.ndarray],
+    scores: Optional[np.ndarray],
+) -> Tuple[Tuple[float, float], Tuple[float, float], Tuple[float, float]]:
     """
-    Escolhe índice da pessoa-alvo usando, em ordem de prioridade:
-
-      1) IOU forte com a bbox do frame anterior (continuidade espacial)
-      2) Similaridade de embedding (Re-ID temporal)
-      3) Ponto de referência (ref_point), se existir
-      4) Maior score de detecção (fallback)
+    Quadril e tornozelos observados neste frame.
+      - quadril: média dos dois quadris se confiáveis, senão centro da bbox;
+      - tornozelo: posição se score >= ANKLE_SCORE_THR, senão NaN.
     """
-    if boxes is None or len(boxes) == 0:
-        return -1
-
-    boxes = np.asarray(boxes, dtype=float)
-    scores = np.asarray(scores, dtype=float)
-
-    # -------------------------------------------------------
-    # 1) Continuidade via IOU forte com a última bbox
-    # -------------------------------------------------------
-    if last_box is not None:
-        ious = np.array([_iou(b, last_box) for b in boxes], dtype=float)
-        best_iou_idx = int(np.argmax(ious))
-        best_iou = float(ious[best_iou_idx])
-
-        if best_iou >= REID_IOU_STRONG:
-            return best_iou_idx
-
-    # -------------------------------------------------------
-    # 2) ReID temporal: comparar com embedding_ref médio
-    # -------------------------------------------------------
-    if embedding_ref is not None and candidates_embeddings:
-        sims = np.array(
-            [_cosine_sim(e, embedding_ref) for e in candidates_embeddings],
-            dtype=float,
-        )
-
-        if np.isfinite(sims).any():
-            best_reid_idx = int(np.nanargmax(sims))
-            best_sim = float(sims[best_reid_idx])
-
-            if best_sim >= REID_SIM_THRESHOLD:
-                return best_reid_idx
-
-    # -------------------------------------------------------
-    # 3) Mais perto do ponto de referência (caso inicial)
-    # -------------------------------------------------------
-    if ref_point is not None:
-        cx = 0.5 * (boxes[:, 0] + boxes[:, 2])
-        cy = 0.5 * (boxes[:, 1] + boxes[:, 3])
-        d = np.sqrt((cx - ref_point[0]) ** 2 + (cy - ref_point[1]) ** 2)
-        return int(np.argmin(d))
+    x1, y1, x2, y2 = bbox[:4]
+    hip = (float(0.5 * (x1 + x2)), float(0.5 * (y1 + y2)))
+    la = (np.nan, np.nan)
+    ra = (np.nan, np.nan)
+    if kpts is None or scores is None:
+        return hip, la, ra
+
+    lh = POSE_IDXS.LEFT_HIP
+    rh = POSE_IDXS.RIGHT_HIP
+    max_idx_hip = max(lh, rh)
+    if len(scores) > max_idx_hip and kpts.shape[0] > max_idx_hip:
+        if (
+            scores[lh] >= METRICS_CFG.kpt_score_thr
+            and scores[rh] >= METRICS_CFG.kpt_score_thr
+        ):
+            mid = 0.5 * (kpts[lh] + kpts[rh])
+            hip = (float(mid[0]), float(mid[1]))
+
+    la_idx = POSE_IDXS.LEFT_ANKLE
+    ra_idx = POSE_IDXS.RIGHT_ANKLE
+    max_idx_ank = max(la_idx, ra_idx)
+    if len(scores) > max_idx_ank and kpts.shape[0] > max_idx_ank:
+        if scores[la_idx] >= ANKLE_SCORE_THR:
+            la = (float(kpts[la_idx, 0]), float(kpts[la_idx, 1]))
+        if scores[ra_idx] >= ANKLE_SCORE_THR:
+            ra = (float(kpts[ra_idx, 0]), float(kpts[ra_idx, 1]))
+    return hip, la, ra
+
+
+def make_selector(
+    tier: QualityTier,
+    ref_point: Optional[Tuple[float, float]] = None,
+) -> TargetSelector:
+    """Seletor do atleta com a política de ReID do nível de qualidade."""
+    if tier.reid not in REID_POLICIES:
+        raise ValueError(f"política de ReID inválida: {tier.reid} (use {REID_POLICIES})")
+    if tier.reid == "off" or tier.perception == "yolo-pose":
+        # yolo-pose: embeddings vêm prontos do detector (select(..., embeddings))
+        return TargetSelector(None, ref_point=ref_point)
+    kwargs = {}
+    if tier.reid_refresh_interval:
+        kwargs["refresh_interval"] = tier.reid_refresh_interval
+    return TargetSelector(
+        compute_reid_embeddings, ref_point=ref_point, lazy=(tier.reid == "lazy"), **kwargs
+    )
 
-    # -------------------------------------------------------
-    # 4) Fallback: maior score de detecção
-    # -------------------------------------------------------
-    return int(np.argmax(scores))
 
+def _keypoint_center(kpts: Optional[np.ndarray], scores: Optional[np.ndarray]) -> Optional[np.ndarray]:
+    """Centro dos keypoints confiáveis (None com menos de 4)."""
+    if kpts is None or scores is None:
+        return None
+    ok = np.asarray(scores) >= METRICS_CFG.kpt_score_thr
+    if ok.sum() < 4:
+        return None
+    return kpts[ok, :2].mean(axis=0)
 
-# ============================================================
-#                      PIPELINE PRINCIPAL
-# ============================================================
 
-def process_video(
-    video_path: str,
-    calib: Dict[str, Any],
-    ref_point: Optional[Tuple[float, float]] = None,
-) -> Dict[str, Any]:
+def _detect_people(
+    yolo,
+    frame: np.ndarray,
+    imgsz: int,
+    region: Optional[Tuple[int, int, int, int]] = None,
+    zoom: bool = False,
+) -> Optional[Tuple[np.ndarray, np.ndarray]]:
     """
-    Pipeline completo:
-      - lê frames
-      - YOLO detecta pessoas
-      - ReID temporal + IOU + ref_point para manter o mesmo atleta
-      - RTMPose extrai pose do crop (com upscaling)
-      - Kalman suaviza trajetória do quadril (pra velocidade/distância)
-      - constrói trajetória do quadril (hip) + tornozelos
-      - calcula distância, velocidade, passada (stride) e salto
-
-    Observação:
-      - speed/dist usam quadril FILTRADO (Kalman).
-      - stride/jump usam quadril CRU + tornozelos.
+    YOLO (classe 0) no frame inteiro ou só em `region` -> (bboxes xyxy
+    globais, scores), ou None sem detecção. Na região a entrada do YOLO
+    encolhe na mesma proporção (mesma resolução em px do atleta, custo
+    ~ área da região); com `zoom` (tiles) a entrada fica em `imgsz`.
     """
-    yolo = get_yolo_detector()
-    rtmpose = get_rtmpose_model()
-
-    frame_gen, fps, frame_count, (img_w, img_h) = read_video_frames(video_path)
-
-    keypoints_series: List[Optional[np.ndarray]] = []
-
-    # quadril cru (pra stride/jump)
-    hip_raw_x_list: List[float] = []
-    hip_raw_y_list: List[float] = []
-
-    # quadril filtrado (pra velocidade/distância)
-    hip_filt_x_list: List[float] = []
-    hip_filt_y_list: List[float] = []
-
-    LAx_list: List[float] = []
-    LAy_list: List[float] = []
-    RAx_list: List[float] = []
-    RAy_list: List[float] = []
-
-    bbox_series: List[Optional[Tuple[float, float, float, float]]] = []
-
-    last_box: Optional[np.ndarray] = None
-    last_hip_raw: Optional[Tuple[float, float]] = None
+    x0 = y0 = 0
+    img = frame
+    if region is not None:
+        x0, y0, x1, y1 = region
+        img = frame[y0:y1, x0:x1]
+    if region is not None and not zoom:
+        scale = imgsz / float(max(frame.shape[:2]))
+        imgsz = min(imgsz, max(64, 32 * int(np.ceil(scale * max(img.shape[:2]) / 32.0))))
+
+    results = yolo.predict(
+        img,
+        conf=0.25,
+        classes=[0],
+        device=MODEL_CFG.device,
+        imgsz=imgsz,
+        verbose=False,
+    )
+    if not results or results[0].boxes is None or len(results[0].boxes) == 0:
+        return None
 
-    # últimos tornozelos válidos
-    last_LA: Optional[Tuple[float, float]] = None
-    last_RA: Optional[Tuple[float, float]] = None
+    boxes_xyxy = results[0].boxes.xyxy.cpu().numpy()
+    if x0 or y0:
+        boxes_xyxy = boxes_xyxy + np.array([x0, y0, x0, y0], dtype=boxes_xyxy.dtype)
+    return boxes_xyxy, results[0].boxes.conf.cpu().numpy()
 
-    # Kalman pro quadril
-    kalman_hip: Optional[KalmanBBox] = None
-    dt = 1.0 / float(fps) if fps and fps > 0 else 1.0 / 30.0
 
-    # Buffer de embeddings ReID
-    embedding_buffer: List[np.ndarray] = []
+def _observed_frames(
+    frames: Iterable[np.ndarray],
+    track: PerceptionTrack,
+    on_frame: Callable[[np.ndarray, PerceptionTrack], None],
+) -> Iterator[np.ndarray]:
+    """
+    Repassa os frames e chama `on_frame(frame, track)` quando o loop pede o
+    próximo, ou seja, com o frame já processado (última entrada do track)
+    e antes do decodificador reaproveitar o buffer.
+    """
+    for frame in frames:
+        yield frame
+        on_frame(frame, track)
+
+
+def run_perception(
+    frames: Iterable[np.ndarray],
+    selector: TargetSelector,
+    start_frame: int = 0,
+    snapshot_at: Sequence[int] = (),
+    tier: Optional[QualityTier] = None,
+    prior: Optional["TrackPrior"] = None,
+    frame_step: int = 1,
+    on_frame: Optional[Callable[[np.ndarray, PerceptionTrack], None]] = None,
+) -> PerceptionTrack:
+    """
+    Roda detecção, escolha do atleta e pose em cada frame.
+
+    `start_frame` é o índice global do primeiro frame (trechos de vídeo);
+    `snapshot_at` lista frames globais em que o estado do seletor deve ser
+    guardado (antes de processar o frame) pra costura entre trechos.
+    `tier` (padrão: get_quality_tier()) escolhe modelos e passo de
+    detecção: com detect_stride > 1 o YOLO roda nos frames múltiplos do
+    passo (e sempre depois de perder o atleta); nos outros a bbox anterior
+    é deslocada pelo movimento do centro dos keypoints.
+    `prior` (trilha de uma passada anterior, ver app/progressive.py)
+    limita o YOLO à região onde o atleta deve estar; sem detecção lá, o
+    frame inteiro é usado. `frame_step` converte o índice analisado pro
+    frame do vídeo (escala do prior).
+    Com `tier.motion_gate`, frames em que a região do atleta não mudou
+    desde o último frame processado repetem a última observação
+    (interpolated=True) sem rodar nenhum modelo (ver app/motion.py).
+    Com `tier.tile_budget` > 0, atleta pequeno (bbox < TILE_SMALL_BOX_PX)
+    ou perdido também é procurado em até N tiles em resolução nativa,
+    juntados ao frame inteiro por NMS (ver app/tiling.py).
+    Com `tier.perception == "yolo-pose"` um modelo só dá bboxes, pose e
+    embeddings de todas as pessoas em todo frame analisado (sem passo de
+    detecção, RTMPose, encoder de ReID nem tiles; ver app/single_pass.py).
+    `on_frame(frame, track)` roda depois de cada frame (inclusive os
+    pulados pelo gate), com a observação dele já no track - usado pelo
+    vídeo anotado (app/overlay.py).
+    """
+    tier = tier or get_quality_tier()
+    single = tier.perception == "yolo-pose"
+    if single:
+        yolo = get_single_pass_model(tier.detector_weights)
+        rtmpose = None
+        detect_fn = yolo
+    else:
+        yolo = get_yolo_detector(tier.detector_weights)
+        rtmpose = get_rtmpose_model(tier.pose_variant)
+        detect_fn = partial(_detect_people, yolo)
+    stride = 1 if single else max(1, int(tier.detect_stride))
+    use_embeddings = single and tier.reid != "off"
+
+    track = PerceptionTrack(start_frame=start_frame, reid_stats=selector.stats)
+    snapshot_at = set(snapshot_at)
+
+    # Crops compartilhados entre ReID e pose (buffers reaproveitados)
+    crops = FrameCrops()
+    # estado do rastreio entre detecções (passo > 1)
+    bbox: Optional[np.ndarray] = None
+    center: Optional[np.ndarray] = None
+    gate = MotionGate() if tier.motion_gate else None
+    tiler = TileScheduler(tier.tile_budget, tier.detector_imgsz) if tier.tile_budget > 0 and not single else None
+    if on_frame is not None:
+        frames = _observed_frames(frames, track, on_frame)
 
     # Loop de frames
-    for frame_idx, frame in enumerate(frame_gen):
-        frame_h, frame_w = frame.shape[:2]
-
-        # -----------------------------------------
-        # YOLO: detecção de pessoas (classe 0)
-        # -----------------------------------------
-        results = yolo.predict(
-            frame,
-            conf=0.25,
-            classes=[0],
-            verbose=False,
-        )
-
-        if not results or results[0].boxes is None or len(results[0].boxes) == 0:
-            # Sem detecção -> reaproveita última posição + Kalman predict
-
-            if last_hip_raw is not None:
-                hip_raw_x, hip_raw_y = last_hip_raw
-            else:
-                hip_raw_x, hip_raw_y = np.nan, np.nan
-
-            if kalman_hip is not None and not np.isnan(hip_raw_x) and not np.isnan(hip_raw_y):
-                hip_filt_x, hip_filt_y = kalman_hip.predict()
-            else:
-                hip_filt_x, hip_filt_y = hip_raw_x, hip_raw_y
-
-            # tornozelos
-            if last_LA is not None:
-                la_x, la_y = last_LA
-            else:
-                la_x, la_y = np.nan, np.nan
-
-            if last_RA is not None:
-                ra_x, ra_y = last_RA
-            else:
-                ra_x, ra_y = np.nan, np.nan
-
-            hip_raw_x_list.append(float(hip_raw_x))
-            hip_raw_y_list.append(float(hip_raw_y))
-            hip_filt_x_list.append(float(hip_filt_x))
-            hip_filt_y_list.append(float(hip_filt_y))
-
-            LAx_list.append(float(la_x))
-            LAy_list.append(float(la_y))
-            RAx_list.append(float(ra_x))
-            RAy_list.append(float(ra_y))
-
-            bbox_series.append(None)
-            keypoints_series.append(None)
+    for i, frame in enumerate(frames):
+        frame_idx = start_frame + i
+        if frame_idx in snapshot_at:
+            track.snapshots[frame_idx] = selector.snapshot()
+
+        # atleta parado -> repete o último resultado, sem modelos
+        if gate is not None and bbox is not None and gate.is_static(frame):
+            track.repeat_last()
             continue
-
-        # -----------------------------------------
-        # Há detecções
-        # -----------------------------------------
-        boxes_xyxy = results[0].boxes.xyxy.cpu().numpy()
-        det_scores = results[0].boxes.conf.cpu().numpy()
-
-        # Embeddings de cada candidato
-        candidates_embeddings: List[Optional[np.ndarray]] = []
-        for b in boxes_xyxy:
-            x1, y1, x2, y2 = map(int, b)
-            x1 = max(0, min(x1, frame_w - 1))
-            x2 = max(0, min(x2, frame_w - 1))
-            y1 = max(0, min(y1, frame_h - 1))
-            y2 = max(0, min(y2, frame_h - 1))
-            if x2 <= x1 or y2 <= y1:
-                candidates_embeddings.append(None)
+        t_frame = time.perf_counter()
+
+        detect = bbox is None or center is None or frame_idx % stride == 0
+        crops.set_frame(frame)
+        if detect:
+            # -----------------------------------------
+            # YOLO: detecção de pessoas (classe 0)
+            # -----------------------------------------
+            region = prior.region(frame_idx * frame_step, frame.shape) if prior is not None else None
+            out = None
+            if region is not None:
+                out = detect_fn(frame, tier.detector_imgsz, region)
+                track.detector_calls += 1
+                track.region_detections += 1
+                if out is None:
+                    track.region_fallbacks += 1
+            if out is None:
+                out = detect_fn(frame, tier.detector_imgsz)
+                track.detector_calls += 1
+            dets = (out.boxes, out.scores) if single and out is not None else out
+
+            # atleta pequeno / perdido: procura também em tiles (zoom)
+            small = bbox is None or (bbox[3] - bbox[1]) < TILE_SMALL_BOX_PX
+            tiles = tiler.tiles_for(frame.shape, bbox) if tiler is not None and small else []
+            if tiles:
+                found = [dets] if dets is not None else []
+                for tile in tiles:
+                    d = _detect_people(yolo, frame, tier.detector_imgsz, tile, zoom=True)
+                    if d is not None:
+                        found.append(d)
+                track.detector_calls += len(tiles)
+                track.tile_calls += len(tiles)
+                track.tiled_frames += 1
+                if found:
+                    dets = merge_detections(
+                        np.concatenate([f[0] for f in found]),
+                        np.concatenate([f[1] for f in found]),
+                    )
+
+            if dets is None:
+                # Sem detecção -> nada observado neste frame
+                bbox = None
+                track.append(detected=False)
+                track.processed_s += time.perf_counter() - t_frame
                 continue
-            crop_person = frame[y1:y2, x1:x2]
-            emb = compute_reid_embedding(crop_person)
-            candidates_embeddings.append(emb)
-
-        # Embedding de referência (média)
-        embedding_ref = get_reference_embedding(embedding_buffer)
-
-        # Escolher atleta
-        idx = _pick_target_person(
-            boxes=boxes_xyxy,
-            scores=det_scores,
-            ref_point=ref_point,
-            last_box=last_box,
-            embedding_ref=embedding_ref,
-            candidates_embeddings=candidates_embeddings,
-        )
-
-        if idx < 0:
-            # Fallback similar ao "sem detecção"
-            if last_hip_raw is not None:
-                hip_raw_x, hip_raw_y = last_hip_raw
-            else:
-                hip_raw_x, hip_raw_y = np.nan, np.nan
-
-            if kalman_hip is not None and not np.isnan(hip_raw_x) and not np.isnan(hip_raw_y):
-                hip_filt_x, hip_filt_y = kalman_hip.predict()
-            else:
-                hip_filt_x, hip_filt_y = hip_raw_x, hip_raw_y
-
-            if last_LA is not None:
-                la_x, la_y = last_LA
-            else:
-                la_x, la_y = np.nan, np.nan
 
-            if last_RA is not None:
-                ra_x, ra_y = last_RA
-            else:
-                ra_x, ra_y = np.nan, np.nan
-
-            hip_raw_x_list.append(float(hip_raw_x))
-            hip_raw_y_list.append(float(hip_raw_y))
-            hip_filt_x_list.append(float(hip_filt_x))
-            hip_filt_y_list.append(float(hip_filt_y))
-
-            LAx_list.append(float(la_x))
-            LAy_list.append(float(la_y))
-            RAx_list.append(float(ra_x))
-            RAy_list.append(float(ra_y))
-
-            bbox_series.append(None)
-            keypoints_series.append(None)
-            continue
-
-        bbox = boxes_xyxy[idx]
-        last_box = bbox.copy()
-        bbox_series.append(
-            (float(bbox[0]), float(bbox[1]), float(bbox[2]), float(bbox[3]))
-        )
+            boxes_xyxy, det_scores = dets
+
+            # Escolher atleta (embeddings só se o IOU não decidir)
+            idx = selector.select(
+                crops, boxes_xyxy, det_scores,
+                embeddings=out.embeddings if use_embeddings else None,
+            )
+            if idx < 0:
+                bbox = None
+                track.append(detected=False)
+                track.processed_s += time.perf_counter() - t_frame
+                continue
 
-        # Atualiza buffer de embeddings com o atleta escolhido
-        chosen_emb = candidates_embeddings[idx]
-        if chosen_emb is not None:
-            # Se já tem referência, só atualiza se for razoavelmente parecido
-            if embedding_ref is not None:
-                sim = _cosine_sim(chosen_emb, embedding_ref)
-                if sim >= REID_SIM_UPDATE_MIN:
-                    embedding_buffer = update_embedding_buffer(embedding_buffer, chosen_emb)
-            else:
-                embedding_buffer = update_embedding_buffer(embedding_buffer, chosen_emb)
+            bbox = boxes_xyxy[idx]
 
         # -----------------------------------------
-        # CROP + UPSCALING PARA RTMPOSE
+        # REGIÃO EXPANDIDA PARA RTMPOSE
         # -----------------------------------------
-        x1, y1, x2, y2 = bbox
-        bbox_h = y2 - y1
-
-        # escala adaptativa baseada na altura
-        if bbox_h < 80:
-            scale = 2.8
-        elif bbox_h < 140:
-            scale = 2.2
-        elif bbox_h < 220:
-            scale = 1.8
+        # Sem crop/upscale intermediário: o RTMPose lê a região direto do
+        # frame com um único warpAffine até a entrada do modelo e devolve
+        # coordenadas globais.
+        if single:
+            # a pose já veio no mesmo passe
+            kpts, scores = out.keypoints[idx], out.keypoint_scores[idx]
         else:
-            scale = 1.6
+            pose_region = crops.pose_region(bbox, pose_scale_for_height(bbox[3] - bbox[1]))
+            kpts, scores = _run_pose(rtmpose, frame, pose_region)
+            track.pose_calls += 1
+
+        # entre detecções a bbox acompanha o centro dos keypoints
+        new_center = _keypoint_center(kpts, scores)
+        if not detect and new_center is not None:
+            bbox = bbox + np.tile(new_center - center, 2)
+            selector.last_box = bbox.copy()
+        center = new_center
+
+        hip, la, ra = _observe_joints(bbox, kpts, scores)
+        track.append(
+            detected=True,
+            hip=hip,
+            la=la,
+            ra=ra,
+            bbox=(float(bbox[0]), float(bbox[1]), float(bbox[2]), float(bbox[3])),
+            keypoints=kpts,
+            keypoint_scores=scores,
+        )
+        track.processed_s += time.perf_counter() - t_frame
+        if gate is not None:
+            gate.keyframe(frame, bbox)
 
-        xe1, ye1, xe2, ye2 = _expand_bbox(bbox, frame_w, frame_h, scale=scale)
-        crop = frame[ye1:ye2, xe1:xe2]
+    if gate is not None:
+        track.motion_gate_s = gate.gate_s
+    return track
 
-        # Super-res simples (resize)
-        crop_for_pose, scale_factor = _upscale_for_pose(crop)
 
-        # RTMPose
-        kpts = None
-        scores = None
-        try:
-            k, s = rtmpose(crop_for_pose)  # esperado: [K,2], [K] ou batched
-            kpts = np.asarray(k, dtype=float)
-            scores = np.asarray(s, dtype=float)
-
-            # compatibilidade com saída batched [1,K,2]
-            if kpts.ndim == 3 and kpts.shape[0] == 1:
-                kpts = kpts[0]
-            if scores.ndim == 2 and scores.shape[0] == 1:
-                scores = scores[0]
-        except Exception:
-            kpts = None
-            scores = None
+# ============================================================
+#      ESTÁGIO 2: SÉRIES (repete último valor + Kalman)
+# ============================================================
 
-        # -----------------------------------------
-        # POSE OK
-        # -----------------------------------------
-        if (
-            kpts is not None
-            and scores is not None
-            and kpts.ndim == 2
-            and kpts.shape[1] >= 2
-        ):
-            # desfaz o upscaling pra voltar ao tamanho do crop original
-            if scale_factor != 1.0:
-                kpts[:, 0] /= scale_factor
-                kpts[:, 1] /= scale_factor
-
-            # converter para coordenadas globais
-            kpts_global = kpts.copy()
-            kpts_global[:, 0] += xe1
-            kpts_global[:, 1] += ye1
-
-            keypoints_series.append(kpts_global)
-
-            # quadril cru
-            lh = POSE_IDXS.LEFT_HIP
-            rh = POSE_IDXS.RIGHT_HIP
-            max_idx_hip = max(lh, rh)
-
-            if len(scores) > max_idx_hip and kpts_global.shape[0] > max_idx_hip:
-                if (
-                    scores[lh] >= METRICS_CFG.kpt_score_thr
-                    and scores[rh] >= METRICS_CFG.kpt_score_thr
-                ):
-                    hip = 0.5 * (kpts_global[lh] + kpts_global[rh])
-                    hip_raw_x = float(hip[0])
-                    hip_raw_y = float(hip[1])
-                else:
-                    hip_raw_x = float(0.5 * (x1 + x2))
-                    hip_raw_y = float(0.5 * (y1 + y2))
-            else:
-                hip_raw_x = float(0.5 * (x1 + x2))
-                hip_raw_y = float(0.5 * (y1 + y2))
-
-            # tornozelos
-            la_idx = POSE_IDXS.LEFT_ANKLE
-            ra_idx = POSE_IDXS.RIGHT_ANKLE
-            max_idx_ank = max(la_idx, ra_idx)
-
-            if len(scores) > max_idx_ank and kpts_global.shape[0] > max_idx_ank:
-                # LEFT ANKLE
-                if scores[la_idx] >= 0.2:
-                    la_x = float(kpts_global[la_idx, 0])
-                    la_y = float(kpts_global[la_idx, 1])
-                    last_LA = (la_x, la_y)
-                else:
-                    if last_LA is not None:
-                        la_x, la_y = last_LA
-                    else:
-                        la_x, la_y = np.nan, np.nan
-
-                # RIGHT ANKLE
-                if scores[ra_idx] >= 0.2:
-                    ra_x = float(kpts_global[ra_idx, 0])
-                    ra_y = float(kpts_global[ra_idx, 1])
-                    last_RA = (ra_x, ra_y)
-                else:
-                    if last_RA is not None:
-                        ra_x, ra_y = last_RA
-                    else:
-                        ra_x, ra_y = np.nan, np.nan
-            else:
-                if last_LA is not None:
-                    la_x, la_y = last_LA
-                else:
-                    la_x, la_y = np.nan, np.nan
+def _ffill(arr: np.ndarray) -> np.ndarray:
+    """Repete o último valor válido sobre os NaN (NaN iniciais ficam NaN)."""
+    arr = np.asarray(arr, dtype=float)
+    valid = ~np.isnan(arr)
+    idx = np.where(valid, np.arange(len(arr)), 0)
+    np.maximum.accumulate(idx, out=idx)
+    return arr[idx]
 
-                if last_RA is not None:
-                    ra_x, ra_y = last_RA
-                else:
-                    ra_x, ra_y = np.nan, np.nan
 
-        # -----------------------------------------
-        # FALHA NA POSE
-        # -----------------------------------------
-        else:
-            keypoints_series.append(None)
+def _ankle_weights(track: PerceptionTrack, joint: int, observed_x: List[float]) -> np.ndarray:
+    """
+    Confiança por frame de um tornozelo: score da pose onde ele foi
+    observado, 0 onde o valor é repetido (pra suavização ponderada).
+    """
+    observed = np.isfinite(np.asarray(observed_x, dtype=float))
+    scores = np.fromiter(
+        (
+            s[joint] if s is not None and len(s) > joint else 1.0
+            for s in track.keypoint_scores
+        ),
+        dtype=float,
+        count=len(track.keypoint_scores),
+    ) if len(track.keypoint_scores) == len(observed) else np.ones(len(observed))
+    return np.where(observed, scores, 0.0)
+
+
+def assemble_series(track: PerceptionTrack, fps: float) -> Dict[str, np.ndarray]:
+    """
+    Constrói as séries por frame a partir das observações cruas:
+      - quadril / tornozelos sem observação repetem o último valor válido;
+      - Kalman no quadril: update nos frames com atleta, predict nos demais;
+      - LA_w / RA_w: confiança de cada tornozelo (0 nos frames repetidos),
+        pra que o valor copiado não crie platôs na suavização da passada.
+    """
+    detected = np.asarray(track.detected, dtype=bool)
 
-            hip_raw_x = float(0.5 * (x1 + x2))
-            hip_raw_y = float(0.5 * (y1 + y2))
+    hip_raw_x = _ffill(track.hip_x)
+    hip_raw_y = _ffill(track.hip_y)
 
-            if last_LA is not None:
-                la_x, la_y = last_LA
-            else:
-                la_x, la_y = np.nan, np.nan
+    # Kalman pro quadril
+    dt = 1.0 / float(fps) if fps and fps > 0 else 1.0 / 30.0
+    kalman_hip: Optional[KalmanBBox] = None
+    n = len(detected)
+    hip_filt_x = np.empty(n, dtype=float)
+    hip_filt_y = np.empty(n, dtype=float)
 
-            if last_RA is not None:
-                ra_x, ra_y = last_RA
-            else:
-                ra_x, ra_y = np.nan, np.nan
+    for i in range(n):
+        hx, hy = hip_raw_x[i], hip_raw_y[i]
 
-        # -----------------------------------------
-        # ATUALIZA KALMAN DO QUADRIL
-        # -----------------------------------------
-        if not np.isnan(hip_raw_x) and not np.isnan(hip_raw_y):
+        if detected[i]:
             if kalman_hip is None:
-                kalman_hip = KalmanBBox(hip_raw_x, hip_raw_y, dt=dt)
-                hip_filt_x, hip_filt_y = hip_raw_x, hip_raw_y
+                kalman_hip = KalmanBBox(hx, hy, dt=dt)
+                fx, fy = hx, hy
             else:
-                hip_filt_x, hip_filt_y = kalman_hip.update((hip_raw_x, hip_raw_y))
+                fx, fy = kalman_hip.update((hx, hy))
+        elif kalman_hip is not None:
+            # sem atleta -> último quadril + Kalman predict
+            fx, fy = kalman_hip.predict()
         else:
-            if kalman_hip is not None:
-                hip_filt_x, hip_filt_y = kalman_hip.predict()
-            else:
-                hip_filt_x, hip_filt_y = hip_raw_x, hip_raw_y
+            fx, fy = hx, hy
 
-        # -----------------------------------------
-        # ACUMULA SÉRIES
-        # -----------------------------------------
-        hip_raw_x_list.append(float(hip_raw_x))
-        hip_raw_y_list.append(float(hip_raw_y))
-        hip_filt_x_list.append(float(hip_filt_x))
-        hip_filt_y_list.append(float(hip_filt_y))
+        hip_filt_x[i] = fx
+        hip_filt_y[i] = fy
 
-        LAx_list.append(float(la_x))
-        LAy_list.append(float(la_y))
-        RAx_list.append(float(ra_x))
-        RAy_list.append(float(ra_y))
+    return {
+        "hip_raw_x": hip_raw_x,
+        "hip_raw_y": hip_raw_y,
+        "hip_filt_x": hip_filt_x,
+        "hip_filt_y": hip_filt_y,
+        "LA_x": _ffill(track.la_x),
+        "LA_y": _ffill(track.la_y),
+        "RA_x": _ffill(track.ra_x),
+        "RA_y": _ffill(track.ra_y),
+        "LA_w": _ankle_weights(track, POSE_IDXS.LEFT_ANKLE, track.la_x),
+        "RA_w": _ankle_weights(track, POSE_IDXS.RIGHT_ANKLE, track.ra_x),
+    }
 
-        last_hip_raw = (hip_raw_x, hip_raw_y)
 
-    # =======================================================
-    #                 MÉTRICAS FINAIS
-    # =======================================================
-    if len(hip_raw_x_list) == 0:
+# ============================================================
+#                 ESTÁGIO 3: MÉTRICAS FINAIS
+# ============================================================
+
+def compute_video_metrics(
+    track: PerceptionTrack,
+    fps: float,
+    frame_count: int,
+    calib: Dict[str, Any],
+    intrinsics: Optional[CameraIntrinsics] = None,
+) -> Dict[str, Any]:
+    """
+    Séries + métricas (distância, velocidade, passada, salto) do trecho
+    inteiro já montado.
+
+    Observação:
+      - speed/dist usam quadril FILTRADO (Kalman).
+      - stride/jump usam quadril CRU + tornozelos.
+      - com `intrinsics`, quadril / tornozelos / pontos do calib são
+        corrigidos da distorção de lente antes da escala (o "skeleton" da
+        resposta continua em px do vídeo original, pra desenhar por cima).
+    """
+    if len(track) == 0:
         raise RuntimeError("Nenhum atleta rastreado no vídeo.")
 
-    # Converte listas para numpy arrays
-    hip_raw_x_arr = np.array(hip_raw_x_list, dtype=float)
-    hip_raw_y_arr = np.array(hip_raw_y_list, dtype=float)
+    arrs = assemble_series(track, fps)
+    hip_raw_x_arr = arrs["hip_raw_x"]
+    hip_raw_y_arr = arrs["hip_raw_y"]
+    hip_filt_x_arr = arrs["hip_filt_x"]
+    hip_filt_y_arr = arrs["hip_filt_y"]
+    LAx_arr = arrs["LA_x"]
+    LAy_arr = arrs["LA_y"]
+    RAx_arr = arrs["RA_x"]
+    RAy_arr = arrs["RA_y"]
 
-    hip_filt_x_arr = np.array(hip_filt_x_list, dtype=float)
-    hip_filt_y_arr = np.array(hip_filt_y_list, dtype=float)
+    # -------------------------------------------------------
+    # DISTORÇÃO DE LENTE (opcional): só os pontos, num lote só,
+    # com a tabela cacheada por (intrínsecos, resolução)
+    # -------------------------------------------------------
+    undistorted = intrinsics is not None and intrinsics.has_distortion
+    if undistorted:
+        pts = undistort_points(
+            intrinsics,
+            np.stack(
+                [
+                    np.stack([hip_raw_x_arr, hip_raw_y_arr], axis=-1),
+                    np.stack([hip_filt_x_arr, hip_filt_y_arr], axis=-1),
+                    np.stack([LAx_arr, LAy_arr], axis=-1),
+                    np.stack([RAx_arr, RAy_arr], axis=-1),
+                ]
+            ),
+        )
+        hip_raw_x_arr, hip_raw_y_arr = pts[0, :, 0], pts[0, :, 1]
+        hip_filt_x_arr, hip_filt_y_arr = pts[1, :, 0], pts[1, :, 1]
+        LAx_arr, LAy_arr = pts[2, :, 0], pts[2, :, 1]
+        RAx_arr, RAy_arr = pts[3, :, 0], pts[3, :, 1]
+        calib = undistort_calib(intrinsics, calib)
 
-    LAx_arr = np.array(LAx_list, dtype=float)
-    LAy_arr = np.array(LAy_list, dtype=float)
-    RAx_arr = np.array(RAx_list, dtype=float)
-    RAy_arr = np.array(RAy_list, dtype=float)
+    bbox_series = track.bbox
+    keypoints_series = track.keypoints
 
-    scale = compute_scale_m_per_px(calib)
+    # -------------------------------------------------------
+    # GEOMETRIA MÉTRICA
+    # 2 pontos: séries em px + escala única.
+    # Homografia: séries projetadas no chão em metros (escala = 1.0).
+    # -------------------------------------------------------
+    H = homography_from_calib(calib)
+    if H is None:
+        scale = compute_scale_m_per_px(calib)
+        metric_scale = scale
+        geo = {
+            "hip_filt_x": hip_filt_x_arr,
+            "hip_filt_y": hip_filt_y_arr,
+            "hip_raw_x": hip_raw_x_arr,
+            "hip_raw_y": hip_raw_y_arr,
+            "LA_x": LAx_arr,
+            "LA_y": LAy_arr,
+            "RA_x": RAx_arr,
+            "RA_y": RAy_arr,
+            "hip_height_y": hip_raw_y_arr,
+            "LA_height_y": LAy_arr,
+            "RA_height_y": RAy_arr,
+        }
+    else:
+        geo = ground_trajectory(
+            H, fps,
+            hip_filt_x_arr, hip_filt_y_arr,
+            hip_raw_x_arr, hip_raw_y_arr,
+            LAx_arr, LAy_arr, RAx_arr, RAy_arr,
+        )
+        scale = scale_from_calib(calib, geo.pop("ground_px"))
+        metric_scale = 1.0
 
     # 1. Calcula VELOCIDADE e DISTÂNCIA (Global)
     speed_data = compute_speed_distance_from_hip(
-        hip_filt_x_arr, hip_filt_y_arr, scale, fps
+        geo["hip_filt_x"], geo["hip_filt_y"], metric_scale, fps
     )
     
     # Recupera séries originais
@@ -608,86 +678,130 @@ def process_video(
             dist_cum_arr = dist_cum_arr[:len(hip_raw_y_arr)]
             raw_speed_series = raw_speed_series[:len(hip_raw_y_arr)]
 
+    # 1b. Cinemática instantânea (velocidade / aceleração / parciais)
+    kinematics = compute_kinematics(geo["hip_filt_x"], geo["hip_filt_y"], metric_scale, fps)
+    velocity_series = kinematics.pop("velocity_series_m_s")
+    acceleration_series = kinematics.pop("acceleration_series_m_s2")
+    kinematics.pop("distance_series_m")
+
     # 2. Calcula STRIDE (Passadas) - Usando distância relativa (Tesoura)
     stride = compute_stride_hybrid(
-        hip_raw_x_arr,
-        hip_raw_y_arr,
-        LAx_arr,
-        LAy_arr,
-        RAx_arr,
-        RAy_arr,
-        scale,
+        geo["hip_raw_x"],
+        geo["hip_height_y"],
+        geo["LA_x"],
+        geo["LA_y"],
+        geo["RA_x"],
+        geo["RA_y"],
+        metric_scale,
         fps,
+        LA_w=arrs["LA_w"],
+        RA_w=arrs["RA_w"],
     )
 
-    # 3. Calcula JUMP (Salto) - Passando a dist_cum_arr
-    jump = detect_jump_from_hip(
-        hip_raw_y_arr,
-        scale,
+    # 3. Calcula JUMP (Salto) - todos os voos + o principal no formato antigo
+    jump_seg = detect_jumps(
+        geo["hip_height_y"],
+        metric_scale,
         fps,
-        hip_x=hip_raw_x_arr,
+        hip_x=geo["hip_raw_x"],
         distance_cum=dist_cum_arr,
+        ankle_ys=[geo["LA_height_y"], geo["RA_height_y"]],
+    )
+    jump = detect_jump_from_hip(
+        geo["hip_height_y"], metric_scale, fps, segmentation=jump_seg
+    )
+    jumps = jump_seg["jumps"]
+
+    # 3b. Contato com o solo / voo por passo (vertical dos tornozelos)
+    contacts = compute_ground_contacts(
+        geo["LA_height_y"],
+        geo["RA_height_y"],
+        metric_scale,
+        fps,
+        jump_mask=jump_seg["jump_mask"],
     )
+    contact_left = contacts.pop("contact_left")
+    contact_right = contacts.pop("contact_right")
 
     # =======================================================
     #      LÓGICA DE SEPARAÇÃO: CORRIDA vs SALTO
     # =======================================================
-    
-    # Inicializa séries separadas
-    run_speed_series = raw_speed_series.copy()
-    jump_speed_series = np.zeros_like(raw_speed_series)
-    
-    # Filtra passos que ocorrem DURANTE o salto (para contagem parar)
-    filtered_step_events = []
-    step_events_raw = stride.get("step_events", [])
 
-    if jump["has_jump"]:
-        takeoff = jump["jump_takeoff_frame"]
-        landing = jump["jump_landing_frame"]
-        
-        # 1. Separar Velocidades
-        # Durante o salto (takeoff -> landing), a velocidade de corrida vira 0
-        # e a velocidade de salto assume o valor real.
-        if takeoff is not None and landing is not None:
-            # Máscara para o intervalo do salto
-            jump_mask = np.zeros_like(raw_speed_series, dtype=bool)
-            jump_mask[takeoff:landing+1] = True
-            
-            jump_speed_series[jump_mask] = raw_speed_series[jump_mask]
-            run_speed_series[jump_mask] = 0.0 # Zera corrida durante o salto
-            
-        # 2. Parar contagem de passos após o início do salto
-        if takeoff is not None:
-            for ev in step_events_raw:
-                if ev <= takeoff:
-                    filtered_step_events.append(ev)
-        else:
-            filtered_step_events = step_events_raw
-    else:
-        # Sem salto, tudo é corrida
-        filtered_step_events = step_events_raw
+    # 1. Separar Velocidades
+    # Durante cada voo (takeoff -> landing), a velocidade de corrida vira 0
+    # e a velocidade de salto assume o valor real.
+    jump_mask = jump_seg["jump_mask"][: len(raw_speed_series)]
+    run_speed_series = np.where(jump_mask, 0.0, raw_speed_series)
+    jump_speed_series = np.where(jump_mask, raw_speed_series, 0.0)
+
+    # 2. Contagem de passos: nada dentro de um voo e nada depois da
+    #    decolagem do ÚLTIMO salto (fim da corrida de aproximação)
+    step_events_raw = np.asarray(stride.get("step_events", []), dtype=int)
+    keep = np.ones(len(step_events_raw), dtype=bool)
+    if jumps:
+        in_video = (step_events_raw >= 0) & (step_events_raw < len(jump_mask))
+        in_flight = np.zeros(len(step_events_raw), dtype=bool)
+        in_flight[in_video] = jump_mask[step_events_raw[in_video]]
+        # o passo da própria decolagem ainda conta
+        takeoffs = np.array([j["jump_takeoff_frame"] for j in jumps], dtype=int)
+        in_flight &= ~np.isin(step_events_raw, takeoffs)
+        keep = ~in_flight & (step_events_raw <= takeoffs[-1])
 
-    # Atualiza o objeto stride com os eventos filtrados
-    stride["step_events"] = filtered_step_events
+    # =======================================================
+    # ESTATÍSTICAS POR PASSO + SÉRIE DE PASSOS (Step Count)
+    # =======================================================
+    n = len(hip_raw_x_arr)
+    n_raw = len(step_events_raw)
+    step_lengths = np.asarray(stride.get("step_lengths_m", [None] * n_raw), dtype=float)
+    step_sides = np.asarray(stride.get("step_sides", [None] * n_raw), dtype=object)
+    step_offsets = np.asarray(stride.pop("step_offsets", [0.0] * n_raw), dtype=float)
+    step_stats = compute_step_stats(
+        step_events_raw[keep],
+        fps,
+        n,
+        step_lengths_m=step_lengths[keep],
+        step_sides=step_sides[keep],
+        step_offsets=step_offsets[keep],
+    )
+    filtered_step_events = step_stats["step_events"]
+
+    # Série acumulada: [0, 0, 1, 1, 2, 2, 3...]
+    step_count_series = step_stats.pop("step_count_series").tolist()
+    cadence_series = step_stats.pop("cadence_series_spm").tolist()
+
+    # Atualiza o objeto stride com os eventos filtrados + dados por passo
+    stride.update(step_stats)
     stride["stride_count"] = len(filtered_step_events)
 
     # =======================================================
-    # CRIAÇÃO DA SÉRIE TEMPORAL DE PASSOS (Step Count)
+    # ÂNGULOS ARTICULARES (esqueleto inteiro, [T, 17, 2])
     # =======================================================
-    n = len(hip_raw_x_arr)
-    step_mask = np.zeros(n, dtype=int)
-    
-    # Marca 1 apenas nos frames onde o passo ocorre (usando lista filtrada)
-    for idx in filtered_step_events:
-        if 0 <= idx < n:
-            step_mask[idx] += 1
-            
-    # Cria a série acumulada: [0, 0, 1, 1, 2, 2, 3...]
-    step_count_series = np.cumsum(step_mask).tolist()
+    kpt_xy, kpt_scores = stack_keypoints(keypoints_series, track.keypoint_scores)
+    if undistorted:
+        kpt_xy = undistort_points(intrinsics, kpt_xy)
+    biomechanics = compute_biomechanics(
+        kpt_xy,
+        kpt_scores,
+        fps,
+        hip_x=hip_raw_x_arr,
+        jumps=jumps,
+        step_events=filtered_step_events,
+    )
+    angle_series = biomechanics.pop("angle_series_deg")
+    angular_velocity_series = biomechanics.pop("angular_velocity_series_deg_s")
 
     # -------------------------------------------------------
     # BLOCO series NO JSON (compatível com overlay)
     # -------------------------------------------------------
+    if H is not None:
+        # trajetória no chão em metros (pra mapa da pista)
+        geo_series = {
+            "ground_hip_x_m": geo["hip_filt_x"].tolist(),
+            "ground_hip_y_m": geo["hip_filt_y"].tolist(),
+        }
+    else:
+        geo_series = {}
+
     series = {
         "frames": list(range(n)),
         "hip_x": hip_filt_x_arr.tolist(),
@@ -699,25 +813,225 @@ def process_video(
         "RA_x": RAx_arr.tolist(),
         "RA_y": RAy_arr.tolist(),
         "bbox": bbox_series,
+        "interpolated": list(track.interpolated),
         
         # --- NOVAS SÉRIES DE VELOCIDADE ---
         "speed_m_s": run_speed_series.tolist(),       # Velocidade de Corrida (para no salto)
         "jump_speed_m_s": jump_speed_series.tolist(), # Velocidade do Salto (só existe no salto)
+        "in_flight": jump_mask.tolist(),
+        "ground_contact_left": contact_left.tolist(),
+        "ground_contact_right": contact_right.tolist(),
+        "velocity_m_s": velocity_series,              # derivada suavizada (sem média móvel)
+        "acceleration_m_s2": acceleration_series,
         
         "distance_cum_m": dist_cum_arr.tolist(),
         "distance_per_frame_m": speed_data.get("distance_per_frame_m", []),
         "step_count": step_count_series,
+        "cadence_spm": cadence_series,
         "step_events": filtered_step_events,
         "skeleton": keypoints_series,
+        "joint_angles_deg": angle_series,
+        "angular_velocity_deg_s": angular_velocity_series,
+        **geo_series,
     }
 
     return {
         "fps": float(fps),
         "frame_count": int(frame_count),
         "scale_m_per_px": float(scale),
+        "calibration": "homography" if H is not None else "two_point",
+        "lens_undistortion": bool(undistorted),
         "step_count_total": int(step_count_series[-1] if step_count_series else 0),
         "speed": speed_data,
+        "kinematics": kinematics,
         "stride": stride,
         "jump": jump,
+        "jumps": jumps,
+        "contacts": contacts,
+        "biomechanics": biomechanics,
         "series": series,
-    }
\ No newline at end of file
+    }
+
+
+# ============================================================
+#                      PIPELINE PRINCIPAL
+# ============================================================
+
+# uma análise por vez no processo: o predictor do Ultralytics e o buffer do
+# hook do SinglePassPerception são estado compartilhado dos modelos do
+# registro (não são thread-safe). Quem chama de threads diferentes (worker
+# dos jobs, threadpool do FastAPI) espera aqui.
+_INFERENCE_LOCK = threading.Lock()
+
+
+def _one_at_a_time(fn):
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        with _INFERENCE_LOCK:
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+@_one_at_a_time
+def process_video(
+    video_path: str,
+    calib: Dict[str, Any],
+    ref_point: Optional[Tuple[float, float]] = None,
+    shards: int = 1,
+    background_decode: bool = False,
+    intrinsics: Optional[Dict[str, Any]] = None,
+    quality: Union[str, QualityTier, None] = None,
+    prior: Optional["TrackPrior"] = None,
+    perception: Optional[str] = None,
+    overlay: Union[bool, Dict[str, Any], "OverlayOptions", None] = None,
+    keyframes: Union[bool, Dict[str, Any], "KeyframeOptions", None] = None,
+) -> Dict[str, Any]:
+    """
+    Pipeline completo:
+      - lê frames
+      - YOLO detecta pessoas
+      - ReID temporal (lazy) + IOU + ref_point para manter o mesmo atleta
+      - RTMPose extrai pose da região expandida (resize único, sem crop)
+      - Kalman suaviza trajetória do quadril (pra velocidade/distância)
+      - constrói trajetória do quadril (hip) + tornozelos
+      - calcula distância, velocidade, passada (stride) e salto
+
+    shards > 1: percepção em trechos paralelos (processos separados), costurados
+    antes das métricas (ver app/sharding.py).
+    background_decode: decodifica num processo separado direto num ring de
+    shared memory (ver app/frame_ring.py), o loop só recebe views.
+    intrinsics: intrínsecos da câmera (ver app/undistort.py); corrige a
+    distorção de lente nos pontos antes das métricas.
+    quality: "preview" / "standard" / "precise" (padrão), ver app/quality.py.
+    Com fps de análise menor que o do vídeo, frames / séries / eventos do
+    resultado ficam na escala dos frames ANALISADOS (quality.frame_step).
+    prior: trilha da passada rápida (ver app/progressive.py) pra limitar
+    a região de detecção.
+    perception: "topdown" (padrão) ou "yolo-pose" (um modelo só, ver
+    app/single_pass.py).
+    overlay: True ou {"width", "fps", "writer", "path"} -> grava o vídeo
+    anotado em streaming durante a percepção (ver app/overlay.py); saída
+    e custo em result["overlay"]. Precisa dos frames em ordem, então a
+    percepção roda sem shards.
+    keyframes: True ou {"thumb_width", "thumb_height", "max_buffer_mb",
+    ...} -> miniaturas JPEG + sprite sheet nos saltos e contatos de passo,
+    de candidatos guardados durante a percepção (ver app/keyframes.py), em
+    result["keyframes"]. Também roda sem shards.
+    """
+    t_start = time.perf_counter()
+    tier = get_quality_tier(quality, perception=perception)
+    overlay_opts = keyframe_opts = None
+    if overlay:
+        from .overlay import OverlayOptions
+
+        overlay_opts = OverlayOptions.from_request(overlay)
+        shards = 1
+    if keyframes:
+        from .keyframes import KeyframeOptions
+
+        keyframe_opts = KeyframeOptions.from_request(keyframes)
+        shards = 1
+
+    # fps nativo só pra decidir o passo (abrir o vídeo é barato)
+    native_fps, native_count, native_size = video_info(video_path)
+    step = tier.frame_step(native_fps)
+    estimated = estimate_cost(tier, native_count, native_fps, frame_size=native_size)
+
+    if background_decode and step == 1 and not (shards and shards > 1):
+        from .frame_ring import ring_video_frames
+
+        frame_gen, fps, frame_count, (img_w, img_h) = ring_video_frames(video_path)
+    else:
+        frame_gen, fps, frame_count, (img_w, img_h) = read_video_frames(video_path, step=step)
+
+    camera = CameraIntrinsics.from_request(intrinsics, (img_w, img_h)) if intrinsics else None
+
+    sharding = None
+    renderer = keyframe_buffer = None
+    if shards and shards > 1:
+        from .sharding import perceive_sharded
+
+        frame_gen.close()
+        track, sharding = perceive_sharded(
+            video_path, frame_count, ref_point=ref_point, n_shards=shards,
+            tier=tier, frame_step=step, prior=prior,
+        )
+    else:
+        # Escolha do atleta (IOU + ReID conforme o nível + ref_point)
+        selector = make_selector(tier, ref_point)
+        # estágios de saída que consomem os frames dentro do loop
+        stages = []
+        if overlay_opts is not None:
+            from .overlay import OverlayRenderer
+
+            renderer = OverlayRenderer(overlay_opts, calib, fps, (img_w, img_h))
+            stages.append(renderer)
+        if keyframe_opts is not None:
+            from .keyframes import KeyframeBuffer
+
+            keyframe_buffer = KeyframeBuffer(keyframe_opts)
+            stages.append(keyframe_buffer)
+
+        def _on_frame(frame: np.ndarray, tr: PerceptionTrack) -> None:
+            for stage in stages:
+                stage(frame, tr)
+
+        try:
+            track = run_perception(
+                frame_gen, selector, tier=tier, prior=prior, frame_step=step,
+                on_frame=_on_frame if stages else None,
+            )
+        except BaseException:
+            if renderer is not None:
+                renderer.discard()
+            raise
+        if renderer is not None:
+            renderer.close()
+    t_perception = time.perf_counter() - t_start
+    # os estágios de saída rodam dentro do loop: saem do tempo da percepção
+    overlay_s = renderer.draw_s + renderer.encode_s if renderer is not None else 0.0
+    capture_s = keyframe_buffer.capture_s if keyframe_buffer is not None else 0.0
+    t_perception -= overlay_s + capture_s
+
+    result = compute_video_metrics(track, fps, frame_count, calib, intrinsics=camera)
+    t_metrics = time.perf_counter() - t_start - t_perception - overlay_s - capture_s
+    result["reid"] = track.reid_stats.as_dict()
+    if sharding is not None:
+        result["sharding"] = sharding
+    if renderer is not None:
+        result["overlay"] = renderer.summary()
+    keyframes_s = 0.0
+    if keyframe_buffer is not None:
+        result["keyframes"] = keyframe_buffer.extract(result)
+        keyframes_s = keyframe_buffer.capture_s + keyframe_buffer.extract_s
+
+    total = time.perf_counter() - t_start
+    n = max(1, len(track))
+    result["quality"] = {
+        "tier": tier.name,
+        "perception": tier.perception,
+        "settings": tier.as_dict(),
+        "frame_step": step,
+        "cost": {
+            "estimated": estimated,
+            "measured": {
+                "frames_analyzed": len(track),
+                "detector_calls": track.detector_calls,
+                "region_detections": track.region_detections,
+                "region_fallbacks": track.region_fallbacks,
+                "tiled_frames": track.tiled_frames,
+                "tile_calls": track.tile_calls,
+                "pose_calls": track.pose_calls,
+                "motion_skipped_frames": track.motion_skipped,
+                "motion_saved_s": round(track.motion_saved_s(), 3),
+                "reid_encoder_calls": track.reid_stats.encoder_calls,
+                "perception_s": round(t_perception, 3),
+                "overlay_s": round(overlay_s, 3),
+                "keyframes_s": round(keyframes_s, 3),
+                "metrics_s": round(t_metrics, 3),
+                "seconds": round(total, 3),
+                "ms_per_frame": round(1000.0 * total / n, 2),
+            },
+        },
+    }
+    return result
@@ -0,0 +1,183 @@
+# app/progressive.py
+"""
+Resultado progressivo: prévia rápida e depois a análise completa.
+
+  1) passada rápida (nível "preview": fps de análise baixo, modelos
+     pequenos) -> velocidade / distância / saltos preliminares, sem as
+     séries por frame (payload leve pro app);
+  2) passada completa (nível pedido, padrão "precise") usando a trilha da
+     primeira como prior: o YOLO só olha a região em volta de onde o
+     atleta estava (bbox interpolada entre os frames da prévia + margem).
+     Onde a prévia não viu o atleta, ou a região não acha ninguém, o frame
+     inteiro é usado - o prior só corta custo, não decide o atleta.
+
+`iter_progressive` é um generator: cada `yield` é uma etapa pronta, com a
+latência da própria passada (`pass_s`) e desde o início (`latency_s`).
+Quem entrega pro cliente é o app/jobs.py (FastAPI) ou o progress_update
+do RunPod (handler.py).
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+from .pipeline import process_video
+from .quality import get_quality_tier
+
+PREVIEW_QUALITY = "preview"
+
+# margem em volta da bbox prevista (fração da largura / altura) + mínimo em px
+PRIOR_MARGIN_X = 0.6
+PRIOR_MARGIN_Y = 0.3
+PRIOR_MIN_PAD_PX = 24
+# sem observação da prévia a mais que isso (frames do vídeo) -> frame inteiro
+PRIOR_MAX_GAP_FRAMES = 12
+# região maior que essa fração do frame não compensa o recorte
+PRIOR_MAX_AREA_FRAC = 0.6
+
+
+@dataclass
+class TrackPrior:
+    """
+    Bboxes do atleta numa passada anterior, indexadas por frame do VÍDEO
+    (a prévia analisa 1 a cada k frames). Picklável (vai pros shards).
+    """
+    frames: np.ndarray                  # [N] frame do vídeo de cada bbox
+    boxes: np.ndarray                   # [N, 4] xyxy
+    max_gap: int = PRIOR_MAX_GAP_FRAMES
+
+    @classmethod
+    def from_result(cls, result: Dict[str, Any]) -> "TrackPrior":
+        """Prior a partir do resultado de `process_video` (série bbox + passo)."""
+        step = int(result.get("quality", {}).get("frame_step", 1) or 1)
+        bboxes = result["series"]["bbox"]
+        idx = [i for i, b in enumerate(bboxes) if b is not None]
+        boxes = np.asarray([bboxes[i] for i in idx], dtype=float).reshape(-1, 4)
+        # o vão máximo cresce com o passo da prévia (2 observações perdidas)
+        return cls(
+            frames=np.asarray(idx, dtype=float) * step,
+            boxes=boxes,
+            max_gap=max(PRIOR_MAX_GAP_FRAMES, 3 * step),
+        )
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    def box_at(self, frame: int) -> Optional[np.ndarray]:
+        """Bbox interpolada no frame do vídeo, ou None longe de observações."""
+        if len(self.frames) == 0:
+            return None
+        j = int(np.searchsorted(self.frames, frame))
+        if j < len(self.frames) and self.frames[j] == frame:
+            return self.boxes[j]
+        if j == 0:
+            return self.boxes[0] if self.frames[0] - frame <= self.max_gap else None
+        if j == len(self.frames):
+            return self.boxes[-1] if frame - self.frames[-1] <= self.max_gap else None
+        f0, f1 = self.frames[j - 1], self.frames[j]
+        if f1 - f0 > self.max_gap:
+            return None
+        a = (frame - f0) / (f1 - f0)
+        return (1.0 - a) * self.boxes[j - 1] + a * self.boxes[j]
+
+    def region(self, frame: int, shape: Tuple[int, ...]) -> Optional[Tuple[int, int, int, int]]:
+        """Região de busca (x1, y1, x2, y2) inteira no frame, ou None (frame inteiro)."""
+        box = self.box_at(frame)
+        if box is None:
+            return None
+        h, w = shape[:2]
+        bw, bh = box[2] - box[0], box[3] - box[1]
+        px = max(PRIOR_MIN_PAD_PX, PRIOR_MARGIN_X * bw)
+        py = max(PRIOR_MIN_PAD_PX, PRIOR_MARGIN_Y * bh)
+        x1 = int(max(0, np.floor(box[0] - px)))
+        y1 = int(max(0, np.floor(box[1] - py)))
+        x2 = int(min(w, np.ceil(box[2] + px)))
+        y2 = int(min(h, np.ceil(box[3] + py)))
+        if x2 - x1 < 8 or y2 - y1 < 8:
+            return None
+        if (x2 - x1) * (y2 - y1) > PRIOR_MAX_AREA_FRAC * w * h:
+            return None
+        return x1, y1, x2, y2
+
+
+def preview_payload(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Resultado da prévia sem as séries por frame (só os números)."""
+    return {k: v for k, v in result.items() if k != "series"}
+
+
+def iter_progressive(
+    video_path: str,
+    calib: Dict[str, Any],
+    ref_point: Optional[Tuple[float, float]] = None,
+    shards: int = 1,
+    intrinsics: Optional[Dict[str, Any]] = None,
+    quality: Optional[str] = None,
+    preview_quality: str = PREVIEW_QUALITY,
+    use_prior: bool = True,
+    perception: Optional[str] = None,
+    overlay: Any = None,
+    keyframes: Any = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Etapas {"stage", "final", "pass_s", "latency_s", "result"}: primeiro a
+    prévia ("preview"), depois a completa ("full"). Se o nível pedido for o
+    mesmo da prévia, só uma etapa (já final). `perception` vale pras duas;
+    o vídeo anotado (`overlay`, ver app/overlay.py) e as miniaturas dos
+    eventos (`keyframes`, ver app/keyframes.py) só saem na etapa final.
+    """
+    t0 = time.perf_counter()
+    full_tier = get_quality_tier(quality)
+    preview_tier = get_quality_tier(preview_quality)
+    single = full_tier.name == preview_tier.name
+
+    preview = process_video(
+        video_path,
+        calib,
+        ref_point=ref_point,
+        intrinsics=intrinsics,
+        quality=preview_tier.name,
+        perception=perception,
+        overlay=overlay if single else None,
+        keyframes=keyframes if single else None,
+    )
+    t_preview = time.perf_counter() - t0
+    yield {
+        "stage": "preview",
+        "final": single,
+        "pass_s": round(t_preview, 3),
+        "latency_s": round(t_preview, 3),
+        "result": preview if single else preview_payload(preview),
+    }
+    if single:
+        return
+
+    prior = TrackPrior.from_result(preview) if use_prior else None
+    t1 = time.perf_counter()
+    full = process_video(
+        video_path,
+        calib,
+        ref_point=ref_point,
+        shards=shards,
+        intrinsics=intrinsics,
+        quality=full_tier.name,
+        prior=prior,
+        perception=perception,
+        overlay=overlay,
+        keyframes=keyframes,
+    )
+    t_full = time.perf_counter()
+    full["progressive"] = {
+        "preview_quality": preview_tier.name,
+        "preview_s": round(t_preview, 3),
+        "full_s": round(t_full - t1, 3),
+        "prior_observations": len(prior) if prior is not None else 0,
+    }
+    yield {
+        "stage": "full",
+        "final": True,
+        "pass_s": round(t_full - t1, 3),
+        "latency_s": round(t_full - t0, 3),
+        "result": full,
+    }
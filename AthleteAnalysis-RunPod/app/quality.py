@@ -0,0 +1,285 @@
+# app/quality.py
+"""
+Níveis de qualidade por request: "preview" / "standard" / "precise".
+
+Cada nível é um pacote coerente de escolhas de custo:
+
+  - detector (variante YOLO + tamanho de entrada);
+  - modelo de pose (chave de POSE_VARIANTS);
+  - passo de detecção: YOLO a cada N frames analisados; entre eles a bbox
+    do atleta segue o deslocamento dos keypoints (a pose roda em todo
+    frame analisado);
+  - fps de análise: vídeo de 120/240 fps é analisado a cada k frames
+    (o decode pula os outros sem converter);
+  - política de ReID: "off" (só IOU / ref_point), "lazy" (padrão) ou
+    "eager" (embedding de todos os candidatos em todo frame);
+  - gate de movimento: frames com o atleta parado repetem o último
+    resultado sem rodar os modelos (ver app/motion.py);
+  - orçamento de tiles: com o atleta pequeno ou perdido, até N tiles por
+    frame detectados em resolução nativa (ver app/tiling.py);
+  - backend de percepção: "topdown" (YOLO + ReID + RTMPose, padrão) ou
+    "yolo-pose" (um modelo só, ver app/single_pass.py); escolhido por
+    request, independente do nível.
+
+"precise" (padrão) usa os modelos do MODEL_CFG em todo frame nativo, mas
+NÃO é mais o caminho de antes: o gate de movimento repete o último
+resultado nos frames com o atleta parado (até MOTION_MAX_SKIP seguidos) e,
+com o atleta pequeno / perdido, até 4 tiles por frame entram na detecção.
+Pra reproduzir o comportamento antigo: replace(tier, motion_gate=False,
+tile_budget=0).
+Os níveis mais baratos nunca usam detector MAIOR que o do perfil (no
+perfil CPU o YOLO11n continua sendo o teto).
+
+A estimativa de custo soma os estágios que pesam de verdade: decode de
+TODO frame nativo (o passo de análise só pula a conversão), chamadas de
+detector / pose / ReID (custo fixo de pré/pós-processamento por chamada
++ GFLOPs publicados na vazão do device), os tiles (fração esperada de
+frames com atleta pequeno / perdido) e o custo por frame analisado do
+loop. Ordem de grandeza pra escolher o nível, não promessa; o custo medido
+vem junto na resposta (bench_quality_tiers confere o fator entre os dois).
+"seconds_max" é o teto com tiles em TODO frame (atleta pequeno o vídeo
+inteiro ou fora de quadro: detector em todo frame + o orçamento de tiles).
+"""
+
+import math
+from dataclasses import asdict, dataclass, replace
+from typing import Any, Dict, Optional, Tuple, Union
+
+from .config import MODEL_CFG, ModelConfig
+
+REID_POLICIES = ("off", "lazy", "eager")
+PERCEPTION_BACKENDS = ("topdown", "yolo-pose")
+
+
+@dataclass(frozen=True)
+class QualityTier:
+    name: str
+    detector_weights: Optional[str]     # None = MODEL_CFG.yolo_weights
+    detector_imgsz: int                 # lado da entrada do YOLO
+    pose_variant: Optional[str]         # None = MODEL_CFG.pose_variant
+    detect_stride: int                  # YOLO a cada N frames analisados
+    analysis_fps: Optional[float]       # None = fps nativo do vídeo
+    reid: str = "lazy"                  # "off" | "lazy" | "eager"
+    reid_refresh_interval: Optional[int] = None   # None = padrão do seletor
+    motion_gate: bool = True            # pula frames parados (app/motion.py)
+    tile_budget: int = 0                # tiles por frame com atleta pequeno (0 = off)
+    perception: str = "topdown"         # "topdown" | "yolo-pose"
+
+    def resolved(self, cfg: ModelConfig = MODEL_CFG) -> "QualityTier":
+        """Preenche os padrões do perfil e limita o detector ao do perfil."""
+        weights = self.detector_weights or cfg.yolo_weights
+        if _yolo_rank(weights) > _yolo_rank(cfg.yolo_weights):
+            weights = cfg.yolo_weights
+        return replace(
+            self,
+            detector_weights=weights,
+            pose_variant=self.pose_variant or cfg.pose_variant,
+        )
+
+    def frame_step(self, fps: float) -> int:
+        """De quantos em quantos frames do vídeo analisar."""
+        if not self.analysis_fps or not fps or fps <= self.analysis_fps:
+            return 1
+        return max(1, int(round(fps / self.analysis_fps)))
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+QUALITY_TIERS: Dict[str, QualityTier] = {
+    "preview": QualityTier(
+        name="preview",
+        detector_weights="yolo11n.pt",
+        detector_imgsz=480,
+        pose_variant="rtmpose-m",
+        detect_stride=3,
+        analysis_fps=30.0,
+        reid="off",
+        tile_budget=0,
+    ),
+    "standard": QualityTier(
+        name="standard",
+        detector_weights="yolo11s.pt",
+        detector_imgsz=640,
+        pose_variant="rtmpose-m",
+        detect_stride=2,
+        analysis_fps=60.0,
+        reid="lazy",
+        tile_budget=2,
+    ),
+    "precise": QualityTier(
+        name="precise",
+        detector_weights=None,
+        detector_imgsz=640,
+        pose_variant=None,
+        detect_stride=1,
+        analysis_fps=None,
+        reid="lazy",
+        tile_budget=4,
+    ),
+}
+
+DEFAULT_QUALITY = "precise"
+
+
+def get_quality_tier(
+    name: Union[str, QualityTier, None] = None,
+    cfg: ModelConfig = MODEL_CFG,
+    perception: Optional[str] = None,
+) -> QualityTier:
+    """
+    Nível pelo nome (None = DEFAULT_QUALITY) ou já montado, resolvido pro
+    perfil; `perception` troca o backend de percepção do nível.
+    """
+    if isinstance(name, QualityTier):
+        tier = name
+    else:
+        key = (name or DEFAULT_QUALITY).strip().lower()
+        if key not in QUALITY_TIERS:
+            raise ValueError(f"quality inválido: {name} (use {tuple(QUALITY_TIERS)})")
+        tier = QUALITY_TIERS[key]
+    if perception:
+        backend = perception.strip().lower()
+        if backend not in PERCEPTION_BACKENDS:
+            raise ValueError(f"perception inválido: {perception} (use {PERCEPTION_BACKENDS})")
+        tier = replace(tier, perception=backend)
+    return tier.resolved(cfg)
+
+
+# ============================================================
+#                 ESTIMATIVA DE CUSTO
+# ============================================================
+
+_YOLO_SIZES = "nsmlx"
+
+# GFLOPs por inferência (entrada 640 pro YOLO11; RTMPose na entrada nativa)
+DETECTOR_GFLOPS = {"n": 6.5, "s": 21.5, "m": 68.0, "l": 86.9, "x": 194.9}
+POSE_DETECTOR_GFLOPS = {"n": 7.6, "s": 23.2, "m": 71.7, "l": 90.7, "x": 203.3}
+POSE_GFLOPS = {"rtmpose-m": 2.2, "rtmpose-x": 17.3}
+REID_GFLOPS = 1.2   # ResNet-18 em 256x128
+
+# crops de ReID esperados por frame analisado (lazy: agenda + IOU ambíguo)
+REID_CROPS_PER_FRAME = {"off": 0.0, "lazy": 0.35, "eager": 3.0}
+
+# detector chamado a mais por frame analisado no nível sem passo (fallback
+# de região); medido no bench_quality_tiers
+DETECTOR_EXTRA_CALLS = 0.01
+
+# fração esperada dos frames analisados com tiles (atleta entrando em quadro,
+# oclusão); o teto ("seconds_max") supõe todos
+TILED_FRAME_SHARE = 0.02
+
+# tamanho assumido quando o vídeo não informa (celular em 1080p)
+DEFAULT_FRAME_SIZE = (1920, 1080)
+
+
+@dataclass(frozen=True)
+class DeviceCost:
+    """Custo unitário de cada estágio num device (ms; decode por megapixel)."""
+
+    gflops_per_s: float         # vazão dos modelos (só a inferência)
+    decode_ms_per_mpx: float    # grab de cada frame NATIVO (inclusive os pulados)
+    convert_ms_per_mpx: float   # retrieve + BGR de cada frame analisado
+    detector_call_ms: float     # letterbox, cópia pro device, NMS
+    pose_call_ms: float         # afim do crop, decode SimCC
+    reid_crop_ms: float         # recorte + resize + normalização por crop
+    frame_ms: float             # seletor, filtros, gate de movimento
+
+
+# decode / conversão: OpenCV (FFmpeg) num core, mp4 H.264/mp4v; no perfil
+# CUDA o decode continua na CPU
+DEVICE_COSTS = {
+    "cuda": DeviceCost(2500.0, 0.45, 1.3, 2.0, 1.5, 0.2, 0.3),
+    "cpu": DeviceCost(120.0, 0.45, 1.3, 4.0, 2.5, 0.4, 0.3),
+}
+
+# só a vazão dos modelos (benches que simulam o custo dos modelos)
+DEVICE_GFLOPS_PER_S = {k: c.gflops_per_s for k, c in DEVICE_COSTS.items()}
+
+
+def _yolo_rank(weights: str) -> int:
+    """Posição do tamanho (n < s < m < l < x) no nome dos pesos; -1 se não reconhece."""
+    stem = weights.rsplit("/", 1)[-1].split(".", 1)[0]
+    return _YOLO_SIZES.find(stem[-1]) if stem else -1
+
+
+def estimate_cost(
+    tier: QualityTier,
+    frame_count: int,
+    fps: float,
+    device: Optional[str] = None,
+    frame_size: Optional[Tuple[int, int]] = None,
+    costs: Optional[DeviceCost] = None,
+) -> Dict[str, Any]:
+    """
+    Custo previsto do request (antes de rodar): GFLOPs, chamadas e
+    segundos por estágio, mais o teto com tiles em todo frame.
+    `frame_size` = (largura, altura) nativa; `costs` troca o perfil do
+    device (calibração).
+    """
+    from .tiling import plan_tiles
+
+    step = tier.frame_step(fps)
+    native = max(0, int(frame_count))
+    frames = int(math.ceil(native / step))
+    dev = (device or MODEL_CFG.device).split(":")[0]
+    c = costs or DEVICE_COSTS.get(dev, DEVICE_COSTS["cpu"])
+    w, h = frame_size if frame_size and frame_size[0] > 0 and frame_size[1] > 0 else DEFAULT_FRAME_SIZE
+    mpx = w * h / 1e6
+
+    rank = _yolo_rank(tier.detector_weights or "")
+    size = _YOLO_SIZES[rank] if rank >= 0 else "x"
+    scale = (tier.detector_imgsz / 640.0) ** 2
+    tiles = 0
+    if tier.perception == "yolo-pose":
+        # um passe por frame analisado; ReID sai do mapa de features (grátis)
+        det_calls, pose_calls, crops = 1.0, 0.0, 0.0
+        det_gflops, pose_gflops = POSE_DETECTOR_GFLOPS[size] * scale, 0.0
+    else:
+        # tiles por frame com atleta pequeno / perdido (ver app/tiling.py)
+        grid = len(plan_tiles(w, h, tier.detector_imgsz)) if tier.tile_budget > 0 else 0
+        tiles = min(tier.tile_budget, grid) if grid > 1 else 0
+        det_calls = 1.0 / max(1, tier.detect_stride) + DETECTOR_EXTRA_CALLS
+        pose_calls = 1.0
+        crops = REID_CROPS_PER_FRAME.get(tier.reid, 0.0)
+        det_gflops = DETECTOR_GFLOPS[size] * scale
+        pose_gflops = POSE_GFLOPS.get(tier.pose_variant or "", POSE_GFLOPS["rtmpose-x"])
+    per_frame = det_gflops * det_calls + pose_gflops * pose_calls + REID_GFLOPS * crops
+
+    def _ms(calls: float, call_ms: float, gflops: float) -> float:
+        return calls * (call_ms + 1000.0 * gflops / c.gflops_per_s)
+
+    # tile: mesmo detector na mesma entrada (imgsz do nível)
+    tile_calls = frames * TILED_FRAME_SHARE * tiles
+    tile_gflops = DETECTOR_GFLOPS[size] * scale
+    per_frame += tile_gflops * tiles * TILED_FRAME_SHARE
+
+    stages = {
+        "decode_s": (native * c.decode_ms_per_mpx + frames * c.convert_ms_per_mpx) * mpx / 1000.0,
+        "detector_s": frames * _ms(det_calls, c.detector_call_ms, det_gflops) / 1000.0,
+        "tiles_s": _ms(tile_calls, c.detector_call_ms, tile_gflops) / 1000.0,
+        "pose_s": frames * _ms(pose_calls, c.pose_call_ms, pose_gflops) / 1000.0,
+        "reid_s": frames * _ms(crops, c.reid_crop_ms, REID_GFLOPS) / 1000.0,
+        "frame_s": frames * c.frame_ms / 1000.0,
+    }
+    # teto: atleta pequeno / perdido em todo frame -> detector em todo
+    # frame (sem passo) + o orçamento de tiles
+    worst = dict(
+        stages,
+        detector_s=frames * _ms(max(det_calls, 1.0), c.detector_call_ms, det_gflops) / 1000.0,
+        tiles_s=frames * _ms(tiles, c.detector_call_ms, tile_gflops) / 1000.0,
+    )
+    return {
+        "frames_analyzed": frames,
+        "frame_step": step,
+        "gflops_per_frame": round(per_frame, 2),
+        "gflops_total": round(per_frame * frames, 1),
+        "calls": {
+            "detector": round(frames * det_calls + tile_calls, 1),
+            "detector_max": int(round(frames * (max(det_calls, 1.0) + tiles))),
+            "tiles_per_frame": tiles,
+        },
+        "stages": {k: round(v, 3) for k, v in stages.items()},
+        "seconds": round(sum(stages.values()), 2),
+        "seconds_max": round(sum(worst.values()), 2),
+    }
@@ -0,0 +1,190 @@
+# app/registry.py
+"""
+Registro de modelos carregados (substitui os singletons com lru_cache).
+
+Cada modelo é identificado por (nome, variante, device, precisão), ex.:
+
+    ("detector", "yolo11n.pt",  "cuda", "fp16")
+    ("pose",     "rtmpose-m",   "cpu",  "fp32")
+    ("reid",     "resnet18-onnx", "cpu", "int8")
+
+  - carrega sob demanda (o loader é passado no `get`);
+  - mede a memória de cada modelo (parâmetros / tamanho do .onnx; sem
+    isso, a variação de RSS durante o load);
+  - com orçamento (`budget_mb` > 0), descarta os menos usados
+    recentemente (LRU) até caber - o modelo recém-pedido nunca sai;
+  - thread-safe: dois requests pedindo o mesmo modelo esperam UM load, e
+    loads de modelos diferentes não se bloqueiam.
+
+Quem já pegou a referência de um modelo descartado continua usando
+normalmente (o Python só libera quando ninguém mais segura).
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from .runtime import release_device_memory
+
+
+@dataclass(frozen=True)
+class ModelKey:
+    name: str
+    variant: str
+    device: str
+    precision: str = "fp32"
+
+    def __str__(self) -> str:
+        return f"{self.name}:{self.variant}@{self.device}/{self.precision}"
+
+
+@dataclass
+class _Entry:
+    model: Any
+    nbytes: int
+    load_s: float
+    last_used: float
+    hits: int = 0
+
+
+def _rss_bytes() -> int:
+    """RSS atual do processo (Linux, /proc); 0 onde não houver."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def estimate_model_bytes(model: Any) -> int:
+    """
+    Memória dos pesos: nn.Module (parâmetros + buffers), wrapper com
+    `.model` (Ultralytics) ou arquivo .onnx (`onnx_model`, rtmlib). 0 se
+    não souber - aí o registro usa a variação de RSS do load.
+    """
+    params = getattr(model, "parameters", None)
+    if callable(params):
+        try:
+            n = sum(p.numel() * p.element_size() for p in model.parameters())
+            n += sum(b.numel() * b.element_size() for b in model.buffers())
+            return int(n)
+        except (AttributeError, TypeError):
+            pass
+    inner = getattr(model, "model", None)
+    if inner is not None and inner is not model:
+        n = estimate_model_bytes(inner)
+        if n:
+            return n
+    path = getattr(model, "onnx_model", None)
+    if isinstance(path, str) and os.path.exists(path):
+        return os.path.getsize(path)
+    return 0
+
+
+class ModelRegistry:
+    def __init__(self, budget_mb: float = 0.0):
+        self.budget_bytes = int(max(0.0, budget_mb) * 1024 * 1024)
+        self._entries: "OrderedDict[ModelKey, _Entry]" = OrderedDict()
+        self._key_locks: Dict[ModelKey, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def _hit(self, key: ModelKey) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        entry.hits += 1
+        entry.last_used = time.monotonic()
+        return entry.model
+
+    def get(
+        self,
+        key: ModelKey,
+        loader: Callable[[], Any],
+        sizer: Optional[Callable[[Any], int]] = None,
+    ) -> Any:
+        """Modelo de `key`, carregando com `loader()` se ainda não estiver aqui."""
+        with self._lock:
+            model = self._hit(key)
+            if model is not None:
+                return model
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # outro thread pode ter carregado enquanto esperávamos
+            with self._lock:
+                model = self._hit(key)
+                if model is not None:
+                    return model
+
+            rss0 = _rss_bytes()
+            t0 = time.perf_counter()
+            model = loader()
+            load_s = time.perf_counter() - t0
+            nbytes = (sizer or estimate_model_bytes)(model)
+            if not nbytes:
+                nbytes = max(0, _rss_bytes() - rss0)
+
+            with self._lock:
+                self._entries[key] = _Entry(model, int(nbytes), load_s, time.monotonic())
+                evicted = self._evict_over_budget(keep=key)
+        if evicted:
+            release_device_memory()
+        return model
+
+    def _evict_over_budget(self, keep: ModelKey) -> int:
+        """Descarta LRU até caber no orçamento (chamar com o lock). Retorna quantos saíram."""
+        if self.budget_bytes <= 0:
+            return 0
+        evicted = 0
+        while self.total_bytes() > self.budget_bytes:
+            victim = next((k for k in self._entries if k != keep), None)
+            if victim is None:
+                break
+            del self._entries[victim]
+            evicted += 1
+        self.evictions += evicted
+        return evicted
+
+    def evict(self, key: ModelKey) -> bool:
+        with self._lock:
+            found = self._entries.pop(key, None) is not None
+        if found:
+            release_device_memory()
+        return found
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        release_device_memory()
+
+    def __contains__(self, key: ModelKey) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def total_bytes(self) -> int:
+        return sum(e.nbytes for e in self._entries.values())
+
+    def stats(self) -> Dict[str, Any]:
+        """Modelos carregados (do menos pro mais recente) + totais, pra /ready e logs."""
+        with self._lock:
+            models: List[Dict[str, Any]] = [
+                {
+                    "key": str(k),
+                    "memory_mb": round(e.nbytes / (1024 * 1024), 1),
+                    "load_s": round(e.load_s, 3),
+                    "hits": e.hits,
+                }
+                for k, e in self._entries.items()
+            ]
+            total = self.total_bytes()
+        return {
+            "models": models,
+            "memory_mb": round(total / (1024 * 1024), 1),
+            "budget_mb": round(self.budget_bytes / (1024 * 1024), 1) if self.budget_bytes else None,
+            "evictions": self.evictions,
+        }
@@ -12,19 +12,26 @@ Ideia principal:
 
 from __future__ import annotations
 
-from functools import lru_cache
-from typing import Optional, Deque, List
+import os
+import tempfile
+import time
+import traceback
+from contextlib import contextmanager
+from typing import Iterator, Optional, Deque, List
 
 from collections import deque
 
+import cv2
 import numpy as np
-from PIL import Image
-
-import torch
-import torch.nn as nn
-from torchvision import models, transforms
 
 from .config import MODEL_CFG
+from .crops import REID_INPUT_HW
+from .models import MODEL_REGISTRY
+from .registry import ModelKey
+from .runtime import configure_runtime, ort_providers, ort_session_options
+
+# torch / torchvision só são importados pelo backend "torch" (e pelo export
+# pra ONNX): com reid_backend="onnx*" o ReID roda sem torch nem CUDA.
 
 
 # ==============================
@@ -39,39 +46,316 @@ DEFAULT_HISTORY = 10
 REID_STRONG_SIM = 0.75   # acima disso consideramos "mesma pessoa" com segurança
 REID_WEAK_SIM   = 0.60   # abaixo disso, combinado com IOU fraco, preferimos NÃO trocar de alvo
 
+# backends suportados (MODEL_CFG.reid_backend)
+REID_BACKENDS = ("torch", "onnx", "onnx-int8")
+
+# onnx-int8 é opt-in (ATHLETE_REID_BACKEND=onnx-int8) e só vale se os
+# embeddings ficarem perto do fp32: cosseno MÍNIMO int8 vs fp32 no batch de
+# calibração (ver `int8_parity`); abaixo disso cai pro "onnx" fp32 (o desvio
+# já mexeria nas decisões perto de REID_WEAK_SIM / REID_STRONG_SIM)
+REID_INT8_MIN_COSINE = 0.98
+# ...e se não for mais lento que o fp32 na mesma máquina (ConvInteger do
+# int8 dinâmico não tem kernel rápido em toda CPU: no host de teste do
+# bench_reid_backends o int8 saiu 6.6x mais lento)
+REID_INT8_MAX_SLOWDOWN = 1.0
+REID_PARITY_BATCH = 8
+# latência do gate: melhor de N chamadas de cada backend (uma só oscila demais)
+REID_PARITY_REPEATS = 5
+
+# falhas do encoder já avisadas: uma vez por (backend, erro), não por frame
+_REID_ERRORS_SEEN: set = set()
+
 
 # ==============================
 #   PREPROCESSAMENTO
 # ==============================
 
-_REID_TRANSFORM = transforms.Compose(
-    [
-        transforms.Resize((256, 128)),  # formato típico de ReID (H, W)
-        transforms.ToTensor(),
-        transforms.Normalize(
-            mean=[0.485, 0.456, 0.406],
-            std=[0.229, 0.224, 0.225],
-        ),
-    ]
-)
+# normalização ImageNet, já no layout [1, 3, 1, 1] pro batch NCHW
+_REID_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32).reshape(1, 3, 1, 1)
+_REID_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32).reshape(1, 3, 1, 1)
 
 
-@lru_cache(maxsize=1)
-def get_reid_encoder() -> nn.Module:
+def _preprocess_reid_batch(batch_rgb: np.ndarray) -> np.ndarray:
     """
-    Usa ResNet-18 pré-treinado em ImageNet como extrator de features.
-    Não é um modelo de ReID dedicado, mas funciona bem como embedding
-    de aparência (cor, textura, forma).
+    [N, H, W, 3] RGB uint8 (já em REID_INPUT_HW) -> [N, 3, H, W] float32 normalizado.
+    Equivalente ao antigo ToTensor + Normalize, mas sem PIL e numa única passada.
     """
+    x = np.ascontiguousarray(batch_rgb.transpose(0, 3, 1, 2), dtype=np.float32)
+    x *= 1.0 / 255.0
+    x -= _REID_MEAN
+    x /= _REID_STD
+    return x
+
+
+def _build_torch_encoder(device: str) -> "nn.Module":
+    import torch.nn as nn
+    from torchvision import models
+
     backbone = models.resnet18(weights=models.ResNet18_Weights.IMAGENET1K_V1)
     # Remove a FC final -> deixa só o extractor [B, 512, 1, 1]
     modules = list(backbone.children())[:-1]
     encoder = nn.Sequential(*modules)
     encoder.eval()
-    encoder.to(MODEL_CFG.device)
+    encoder.to(device)
     return encoder
 
 
+def get_reid_encoder() -> "nn.Module":
+    """
+    Usa ResNet-18 pré-treinado em ImageNet como extrator de features.
+    Não é um modelo de ReID dedicado, mas funciona bem como embedding
+    de aparência (cor, textura, forma). Carregado pelo registro de modelos.
+    """
+    def _load():
+        import torch  # noqa: F401  (garante o torch carregado antes de configurar threads)
+
+        configure_runtime()
+        return _build_torch_encoder(MODEL_CFG.device)
+
+    return MODEL_REGISTRY.get(ModelKey("reid", "resnet18", MODEL_CFG.device, "fp32"), _load)
+
+
+# ==============================
+#   BACKEND ONNX RUNTIME
+# ==============================
+
+def reid_onnx_path(quantized: bool = False) -> str:
+    """Caminho do encoder exportado (fp32 ou int8) em MODEL_CFG.reid_onnx_dir."""
+    name = "reid_resnet18_int8.onnx" if quantized else "reid_resnet18.onnx"
+    return os.path.join(os.path.expanduser(MODEL_CFG.reid_onnx_dir), name)
+
+
+@contextmanager
+def _atomic_path(path: str) -> Iterator[str]:
+    """
+    Arquivo temporário no mesmo diretório, movido pra `path` (os.replace) só
+    no fim: workers aquecendo juntos nunca leem um .onnx pela metade.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".onnx.tmp")
+    os.close(fd)
+    try:
+        yield tmp
+        os.replace(tmp, path)
+    finally:
+        for leftover in (tmp, tmp + ".data"):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+
+
+def export_reid_onnx(path: Optional[str] = None, opset: int = 17, encoder=None) -> str:
+    """
+    Exporta o encoder ResNet-18 (sem a FC) pra ONNX com batch dinâmico.
+    Entrada "input" [N, 3, 256, 128] já normalizada, saída "embedding" [N, 512, 1, 1].
+    `encoder`: módulo já montado (padrão: o ImageNet de `_build_torch_encoder`).
+    """
+    import torch
+
+    path = path or reid_onnx_path(quantized=False)
+
+    encoder = encoder if encoder is not None else _build_torch_encoder("cpu")
+    h, w = REID_INPUT_HW
+    dummy = torch.zeros(1, 3, h, w, dtype=torch.float32)
+    with torch.no_grad(), _atomic_path(path) as tmp:
+        torch.onnx.export(
+            encoder,
+            dummy,
+            tmp,
+            input_names=["input"],
+            output_names=["embedding"],
+            dynamic_axes={"input": {0: "batch"}, "embedding": {0: "batch"}},
+            opset_version=opset,
+        )
+        if os.path.exists(tmp + ".data"):
+            # o exportador novo põe os pesos num .data ao lado, referenciado
+            # pelo nome do temporário: junta tudo num arquivo só
+            import onnx
+
+            onnx.save_model(onnx.load(tmp), tmp)
+    return path
+
+
+def quantize_reid_onnx(src: Optional[str] = None, dst: Optional[str] = None) -> str:
+    """
+    Quantização dinâmica int8 (pesos int8, ativações quantizadas em runtime).
+    Pensada pros workers só-CPU; o resultado roda no CPUExecutionProvider.
+    """
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    src = src or reid_onnx_path(quantized=False)
+    dst = dst or reid_onnx_path(quantized=True)
+    if not os.path.exists(src):
+        export_reid_onnx(src)
+    with _atomic_path(dst) as tmp:
+        quantize_dynamic(src, tmp, weight_type=QuantType.QInt8)
+    return dst
+
+
+def get_reid_onnx_session(quantized: bool = False):
+    """
+    Sessão ONNX Runtime do encoder, pelo registro de modelos. Exporta /
+    quantiza na primeira vez se o arquivo ainda não existir (o builder.py
+    já deixa os dois prontos na imagem).
+    """
+    path = reid_onnx_path(quantized)
+    # int8 dinâmico (ConvInteger/MatMulInteger) só tem kernel em CPU
+    device = "cpu" if quantized else MODEL_CFG.device
+    key = ModelKey("reid", "resnet18-onnx", device, "int8" if quantized else "fp32")
+
+    def _load():
+        import onnxruntime as ort
+
+        configure_runtime()
+        if not os.path.exists(path):
+            if quantized:
+                quantize_reid_onnx(dst=path)
+            else:
+                export_reid_onnx(path)
+        return ort.InferenceSession(
+            path,
+            sess_options=ort_session_options(),
+            providers=ort_providers(allow_cuda=not quantized),
+        )
+
+    return MODEL_REGISTRY.get(key, _load, sizer=lambda _: os.path.getsize(path))
+
+
+def _encode_torch(x: np.ndarray) -> np.ndarray:
+    import torch
+
+    encoder = get_reid_encoder()
+    tensor = torch.from_numpy(x).to(MODEL_CFG.device)
+    with torch.no_grad():
+        feat = encoder(tensor)  # [N, 512, 1, 1]
+    return feat.flatten(1).cpu().numpy()
+
+
+def _encode_onnx(x: np.ndarray, quantized: bool) -> np.ndarray:
+    session = get_reid_onnx_session(quantized)
+    (feat,) = session.run(["embedding"], {"input": x})  # [N, 512, 1, 1]
+    return feat.reshape(len(x), -1)
+
+
+def _parity_batch(n: int = REID_PARITY_BATCH, seed: int = 0) -> np.ndarray:
+    """
+    Batch fixo de calibração [n, H, W, 3] RGB uint8: manchas de cor em baixa
+    resolução ampliadas + textura fina (ativações parecidas com as de um
+    crop de pessoa, sem depender de imagem no disco).
+    """
+    rng = np.random.default_rng(seed)
+    h, w = REID_INPUT_HW
+    out = np.empty((n, h, w, 3), dtype=np.uint8)
+    for i in range(n):
+        blobs = rng.integers(0, 256, size=(8, 4, 3), dtype=np.uint8)
+        img = cv2.resize(blobs, (w, h), interpolation=cv2.INTER_CUBIC).astype(np.int16)
+        img += rng.integers(-20, 21, size=img.shape, dtype=np.int16)
+        out[i] = np.clip(img, 0, 255)
+    return out
+
+
+_INT8_PARITY: dict = {}
+
+
+def _timed_embeddings(batch: np.ndarray, backend: str, repeats: int = REID_PARITY_REPEATS):
+    """(embeddings, melhor tempo de `repeats` chamadas): a 1ª, fora da conta, carrega / exporta o modelo."""
+    feats = compute_reid_embeddings(batch, backend=backend)
+    if feats is None:
+        return None, None
+    best = float("inf")
+    for _ in range(max(1, repeats)):
+        t0 = time.perf_counter()
+        compute_reid_embeddings(batch, backend=backend)
+        best = min(best, time.perf_counter() - t0)
+    return feats, best
+
+
+def int8_parity(force: bool = False) -> dict:
+    """
+    Cosseno int8 vs fp32 (média / mínimo) e latência relativa (melhor de
+    REID_PARITY_REPEATS) no batch de calibração, uma vez por processo. "ok" = mínimo >= REID_INT8_MIN_COSINE
+    e int8 / fp32 <= REID_INT8_MAX_SLOWDOWN; erro (export / quantização /
+    onnxruntime ausente) = não ok.
+    """
+    if _INT8_PARITY and not force:
+        return dict(_INT8_PARITY)
+    batch = _parity_batch()
+    ref, ref_s = _timed_embeddings(batch, "onnx")
+    feats, feats_s = _timed_embeddings(batch, "onnx-int8")
+    if ref is None or feats is None:
+        result = {
+            "ok": False, "mean_cosine": None, "min_cosine": None, "int8_vs_fp32_time": None,
+            "error": "backend ONNX indisponível",
+        }
+    else:
+        cos = np.sum(ref * feats, axis=1)
+        slowdown = feats_s / max(ref_s, 1e-9)
+        result = {
+            "ok": bool(cos.min() >= REID_INT8_MIN_COSINE and slowdown <= REID_INT8_MAX_SLOWDOWN),
+            "mean_cosine": round(float(cos.mean()), 5),
+            "min_cosine": round(float(cos.min()), 5),
+            "int8_vs_fp32_time": round(float(slowdown), 3),
+            "error": None,
+        }
+    _INT8_PARITY.clear()
+    _INT8_PARITY.update(result)
+    return dict(result)
+
+
+def resolve_reid_backend(backend: Optional[str] = None) -> str:
+    """
+    Backend efetivo: o pedido (ou MODEL_CFG.reid_backend); "onnx-int8" que
+    não passa na paridade (`int8_parity`) vira "onnx" (avisado uma vez).
+    """
+    backend = backend or MODEL_CFG.reid_backend
+    if backend == "onnx-int8":
+        first = not _INT8_PARITY
+        parity = int8_parity()
+        if not parity["ok"]:
+            if first:
+                print(f"⚠️ ReID onnx-int8 reprovado no gate ({parity}); usando onnx fp32")
+            return "onnx"
+    return backend
+
+
+def compute_reid_embeddings(
+    batch_rgb: Optional[np.ndarray],
+    backend: Optional[str] = None,
+) -> Optional[np.ndarray]:
+    """
+    Recebe um batch [N, H, W, 3] RGB uint8 já no tamanho REID_INPUT_HW
+    (ver `FrameCrops.reid_batch`) e roda o encoder UMA vez pra todos.
+    `backend` sobrescreve MODEL_CFG.reid_backend ("torch", "onnx", "onnx-int8");
+    o padrão passa pela checagem de paridade do int8 (`resolve_reid_backend`).
+    Retorna [N, 512] L2-normalizado ou None se algo falhar (export,
+    quantização, sessão, inferência), com o erro impresso na primeira vez.
+    """
+    if batch_rgb is None or batch_rgb.size == 0:
+        return None
+
+    backend = backend or resolve_reid_backend()
+    if backend not in REID_BACKENDS:
+        raise ValueError(f"reid_backend inválido: {backend} (use {REID_BACKENDS})")
+
+    try:
+        x = _preprocess_reid_batch(batch_rgb)
+        if backend == "torch":
+            feat = _encode_torch(x)
+        else:
+            feat = _encode_onnx(x, quantized=(backend == "onnx-int8"))
+        feat = feat.astype("float32")  # [N, 512]
+
+        # L2 normalize
+        feat /= np.linalg.norm(feat, axis=1, keepdims=True) + 1e-12
+        return feat
+    except Exception as e:
+        key = (backend, type(e).__name__, str(e))
+        if key not in _REID_ERRORS_SEEN:
+            _REID_ERRORS_SEEN.add(key)
+            print(f"❌ ReID ({backend}) falhou, seguindo sem embedding: {e!r}")
+            traceback.print_exc()
+        return None
+
+
 def compute_reid_embedding(crop_bgr: np.ndarray) -> Optional[np.ndarray]:
     """
     Recebe um crop BGR (np.ndarray) do frame original (OpenCV / YOLO).
@@ -82,31 +366,18 @@ def compute_reid_embedding(crop_bgr: np.ndarray) -> Optional[np.ndarray]:
     if not isinstance(crop_bgr, np.ndarray) or crop_bgr.size == 0:
         return None
 
-    # BGR -> RGB
-    crop_rgb = crop_bgr[..., ::-1]
-
+    h, w = REID_INPUT_HW
     try:
-        img = Image.fromarray(crop_rgb.astype("uint8"))
+        interp = cv2.INTER_AREA if crop_bgr.shape[0] > h else cv2.INTER_LINEAR
+        resized = cv2.resize(crop_bgr.astype("uint8"), (w, h), interpolation=interp)
+        rgb = cv2.cvtColor(resized, cv2.COLOR_BGR2RGB)
     except Exception:
         return None
 
-    tensor = _REID_TRANSFORM(img).unsqueeze(0)  # [1, 3, H, W]
-
-    device = MODEL_CFG.device
-    try:
-        encoder = get_reid_encoder()
-        tensor = tensor.to(device)
-
-        with torch.no_grad():
-            feat = encoder(tensor)  # [1, 512, 1, 1]
-        feat = feat.view(-1).cpu().numpy().astype("float32")  # [512]
-
-        # L2 normalize
-        norm = np.linalg.norm(feat) + 1e-12
-        feat /= norm
-        return feat
-    except Exception:
+    feats = compute_reid_embeddings(rgb[None])
+    if feats is None:
         return None
+    return feats[0]
 
 
 def cosine_similarity(a: Optional[np.ndarray], b: Optional[np.ndarray]) -> float:
@@ -0,0 +1,180 @@
+# app/runtime.py
+"""
+Configuração de execução compartilhada pelos três modelos.
+
+- Threads intra/inter-op (torch, OpenCV, BLAS e ONNX Runtime) e afinidade
+  de CPU, lidas do MODEL_CFG (ver `cpu_model_config`).
+- SessionOptions do ONNX Runtime com otimização de grafo completa.
+
+Nada aqui importa torch ou toca em CUDA: o torch só é configurado se já
+tiver sido importado por quem carrega o modelo (ultralytics / reid torch);
+enquanto não for, cada loader que chama `configure_runtime` tenta de novo.
+
+As variáveis OMP_/MKL_/OPENBLAS_NUM_THREADS só valem se definidas ANTES do
+primeiro import de numpy / cv2 / torch (os pools leem o ambiente na carga):
+`set_thread_env` roda no topo dos pontos de entrada (handler.py,
+app/main.py), antes de qualquer import numérico. Este módulo (e o
+app.config) não importam nada pesado pra poder ser o primeiro.
+"""
+
+import gc
+import os
+import sys
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Sequence
+
+from .config import MODEL_CFG, ModelConfig
+
+
+_THREAD_ENV_VARS = (
+    "OMP_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+)
+
+_configured = False          # afinidade + ambiente + OpenCV aplicados
+_torch_configured = False    # threads do torch aplicadas (torch já importado)
+
+
+def pin_cpu_affinity(cores: Optional[Sequence[int]]) -> Optional[List[int]]:
+    """Fixa o processo (e as threads criadas depois) nos `cores`. Só Linux."""
+    if not cores or not hasattr(os, "sched_setaffinity"):
+        return None
+    os.sched_setaffinity(0, set(cores))
+    return sorted(os.sched_getaffinity(0))
+
+
+def set_thread_env(cfg: ModelConfig = MODEL_CFG, override: bool = False) -> Optional[int]:
+    """
+    Exporta o nº de threads intra-op do perfil pra OpenMP / MKL / OpenBLAS /
+    numexpr. Sem `override` não pisa em valor já definido (ENV do Dockerfile
+    ou do shell). Retorna o nº de threads (None = perfil sem limite).
+    """
+    intra = int(cfg.intra_op_threads or 0)
+    if intra <= 0:
+        return None
+    for var in _THREAD_ENV_VARS:
+        if override:
+            os.environ[var] = str(intra)
+        else:
+            os.environ.setdefault(var, str(intra))
+    return intra
+
+
+@contextmanager
+def thread_env(threads: Optional[int]) -> Iterator[None]:
+    """
+    Ambiente de threads só dentro do bloco: processos filhos criados ali
+    (spawn herda o os.environ) já sobem com o OpenMP / BLAS do tamanho da
+    sua fatia de núcleos. None = não mexe.
+    """
+    if not threads:
+        yield
+        return
+    saved = {var: os.environ.get(var) for var in _THREAD_ENV_VARS}
+    for var in _THREAD_ENV_VARS:
+        os.environ[var] = str(int(threads))
+    try:
+        yield
+    finally:
+        for var, value in saved.items():
+            if value is None:
+                os.environ.pop(var, None)
+            else:
+                os.environ[var] = value
+
+
+def configure_runtime(cfg: ModelConfig = MODEL_CFG, force: bool = False) -> None:
+    """
+    Aplica afinidade e nº de threads. Idempotente: os loaders de modelo
+    chamam antes de carregar; cada parte só é marcada como feita depois de
+    aplicada (as threads do torch esperam o torch ser importado).
+    force=True reaplica tudo (perfil trocado no processo).
+    """
+    global _configured, _torch_configured
+    if force:
+        _configured = _torch_configured = False
+
+    intra = int(cfg.intra_op_threads or 0)
+    inter = int(cfg.inter_op_threads or 0)
+    if not _configured:
+        pin_cpu_affinity(cfg.cpu_affinity)
+        if intra > 0:
+            # tarde demais pro OpenMP / BLAS deste processo se numpy já foi
+            # importado (ver set_thread_env), mas vale pros filhos
+            set_thread_env(cfg, override=force)
+            try:
+                import cv2
+
+                cv2.setNumThreads(intra)
+            except ImportError:
+                pass
+        _configured = True
+
+    if _torch_configured:
+        return
+    if intra <= 0:
+        _torch_configured = True
+        return
+    torch = sys.modules.get("torch")
+    if torch is None:
+        return
+    torch.set_num_threads(intra)
+    if inter > 0:
+        try:
+            torch.set_num_interop_threads(inter)
+        except RuntimeError:
+            # só pode ser chamado antes do primeiro trabalho paralelo
+            pass
+    _torch_configured = True
+
+
+def release_device_memory() -> None:
+    """
+    Entre jobs: coleta de lixo + cache do allocator CUDA. Nunca importa
+    torch (no perfil CPU / ReID ONNX ele nem foi carregado).
+    """
+    gc.collect()
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.cuda.is_available() and torch.cuda.is_initialized():
+        torch.cuda.empty_cache()
+
+
+def ort_session_options(cfg: ModelConfig = MODEL_CFG):
+    """SessionOptions com otimização de grafo total + threads do perfil."""
+    import onnxruntime as ort
+
+    opts = ort.SessionOptions()
+    opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if cfg.intra_op_threads > 0:
+        opts.intra_op_num_threads = int(cfg.intra_op_threads)
+    if cfg.inter_op_threads > 0:
+        opts.inter_op_num_threads = int(cfg.inter_op_threads)
+        if cfg.inter_op_threads > 1:
+            opts.execution_mode = ort.ExecutionMode.ORT_PARALLEL
+    return opts
+
+
+def ort_providers(cfg: ModelConfig = MODEL_CFG, allow_cuda: bool = True) -> List[str]:
+    """Providers do ONNX Runtime pro device configurado (CPU nunca pede CUDA)."""
+    if allow_cuda and cfg.device.startswith("cuda"):
+        return ["CUDAExecutionProvider", "CPUExecutionProvider"]
+    return ["CPUExecutionProvider"]
+
+
+def rebuild_ort_session(tool, cfg: ModelConfig = MODEL_CFG) -> None:
+    """
+    A rtmlib cria a própria InferenceSession sem SessionOptions. Recria a
+    sessão do mesmo .onnx com as opções do perfil (threads + otimização).
+    """
+    import onnxruntime as ort
+
+    path = getattr(tool, "onnx_model", None)
+    if not isinstance(path, str) or not os.path.exists(path):
+        return
+    tool.session = ort.InferenceSession(
+        path,
+        sess_options=ort_session_options(cfg),
+        providers=ort_providers(cfg),
+    )
@@ -0,0 +1,525 @@
+# app/sharding.py
+"""
+Processamento do vídeo em trechos (shards) paralelos.
+
+O vídeo é dividido em trechos de tempo com SOBREPOSIÇÃO. Cada trecho roda a
+percepção (YOLO + ReID + RTMPose) num processo de um pool LONGO (`ShardPool`,
+um por processo do servidor): cada worker pega uma fatia dos núcleos e
+carrega os modelos uma vez, na subida, e serve todos os requests seguintes.
+O tamanho do pool é fixo (`shard_worker_limit`): trechos a mais que workers
+esperam na fila do pool, e o pool nunca é derrubado com trabalho de outro
+request dentro.
+
+Todo trecho depois do primeiro começa SEMEADO com o atleta (sem semente o
+seletor pegaria quem estivesse mais alto no score do detector):
+  - posição: bbox do atleta no início da leitura, pela trilha da passada
+    rápida (`prior`, ver app/progressive.py) quando houver;
+  - aparência: buffer ReID de uma passada curta de semente (os primeiros
+    SEED_FRAMES frames a partir do ref_point) que o próprio worker roda
+    antes do trecho quando o nível usa ReID -> todos os trechos saem juntos,
+    sem esperar uma semente em série.
+
+Depois, no processo principal:
+
+  1) Costura: na sobreposição, o atleta escolhido pelo trecho i precisa ser
+     o mesmo do trecho i-1 (IOU das bboxes frame a frame; se não houver
+     frames em comum com atleta, similaridade do embedding ReID médio).
+  2) Se a costura falha mesmo assim (semente sem ReID / sem prior), o trecho
+     i é reprocessado partindo do estado do seletor do trecho i-1 (última
+     bbox + buffer ReID) no início da sobreposição -> mesma escolha que o
+     processamento sequencial faria.
+  3) Junta as observações cruas num único PerceptionTrack e só então monta
+     as séries (Kalman, repete último valor) e as métricas, exatamente como
+     no caminho sequencial.
+"""
+
+import atexit
+import multiprocessing as mp
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .config import MODEL_CFG
+from .runtime import thread_env
+from .target_selection import REID_SIM_THRESHOLD, ReIDStats, _cosine_sim, _iou
+
+
+# sobreposição entre trechos (frames processados pelos dois lados)
+DEFAULT_OVERLAP_FRAMES = 30
+# trecho menor que isso não compensa subir mais um processo com modelos
+MIN_SHARD_FRAMES = 120
+# costura: IOU pra considerar a mesma bbox e fração mínima de frames concordando
+STITCH_IOU = 0.5
+STITCH_MIN_AGREEMENT = 0.5
+# passada de semente: frames a partir do ref_point pra encher o buffer ReID
+SEED_FRAMES = 15
+# teto de workers sem ATHLETE_SHARD_WORKERS (cada um carrega todos os modelos)
+DEFAULT_MAX_SHARD_WORKERS = 4
+
+
+@dataclass
+class Shard:
+    """Trecho [start, end) do vídeo; a leitura começa `overlap` frames antes."""
+    index: int
+    start: int
+    end: int
+    overlap: int
+    last: bool = False
+
+    @property
+    def read_start(self) -> int:
+        return self.start - self.overlap
+
+    @property
+    def read_end(self) -> Optional[int]:
+        # o último lê até o fim do arquivo (CAP_PROP_FRAME_COUNT é estimativa)
+        return None if self.last else self.end
+
+
+def plan_shards(
+    frame_count: int,
+    n_shards: int,
+    overlap: int = DEFAULT_OVERLAP_FRAMES,
+    min_shard_frames: int = MIN_SHARD_FRAMES,
+) -> List[Shard]:
+    """
+    Divide [0, frame_count) em até `n_shards` trechos contíguos de tamanho
+    parecido. Todo trecho depois do primeiro relê `overlap` frames do anterior.
+    """
+    frame_count = int(frame_count)
+    overlap = max(0, int(overlap))
+    n = max(1, min(int(n_shards), frame_count // max(1, min_shard_frames)))
+
+    bounds = np.linspace(0, frame_count, n + 1).round().astype(int)
+    shards = []
+    for i in range(n):
+        start, end = int(bounds[i]), int(bounds[i + 1])
+        ov = 0 if i == 0 else min(overlap, start)
+        shards.append(Shard(index=i, start=start, end=end, overlap=ov, last=(i == n - 1)))
+    return shards
+
+
+# ============================================================
+#                 PROCESSO WORKER
+# ============================================================
+
+def shard_worker_limit() -> int:
+    """Tamanho do pool: ATHLETE_SHARD_WORKERS ou os núcleos do processo (até DEFAULT_MAX_SHARD_WORKERS)."""
+    if MODEL_CFG.shard_workers > 0:
+        return int(MODEL_CFG.shard_workers)
+    if hasattr(os, "sched_getaffinity"):
+        cores = len(os.sched_getaffinity(0))
+    else:
+        cores = os.cpu_count() or 1
+    return max(1, min(cores, DEFAULT_MAX_SHARD_WORKERS))
+
+
+def _core_groups(n_workers: int) -> List[Optional[List[int]]]:
+    """Reparte os núcleos disponíveis entre os workers (sem sobreposição)."""
+    if not hasattr(os, "sched_getaffinity"):
+        return [None] * n_workers
+    cores = sorted(os.sched_getaffinity(0))
+    if len(cores) < n_workers:
+        return [None] * n_workers
+    return [list(g) for g in np.array_split(cores, n_workers)]
+
+
+def _init_worker(core_groups, counter, setup: Optional[Callable[[], None]] = None) -> None:
+    """
+    Roda uma vez em cada processo: pega sua fatia de núcleos, ajusta as
+    threads ANTES de carregar os modelos (os loaders chamam configure_runtime)
+    e carrega os modelos do perfil (`setup` substitui o warmup: benches
+    instalam stubs no registro).
+    """
+    from .runtime import configure_runtime
+
+    with counter.get_lock():
+        slot = counter.value
+        counter.value += 1
+
+    cores = core_groups[slot % len(core_groups)]
+    if cores:
+        MODEL_CFG.cpu_affinity = cores
+        MODEL_CFG.intra_op_threads = len(cores)
+        MODEL_CFG.inter_op_threads = 1
+    configure_runtime(force=True)
+
+    if setup is not None:
+        setup()
+    else:
+        from .models import warmup_models
+
+        warmup_models()
+
+
+def _worker_pid() -> int:
+    return os.getpid()
+
+
+class ShardPool:
+    """
+    Pool de processos de percepção que vive entre requests: cada worker
+    sobe (spawn: CUDA / ORT não sobrevivem a fork) com sua fatia de núcleos
+    e os modelos carregados; `warm()` sobe todos de uma vez. `active`
+    conta os requests usando o pool (ver `shard_pool`).
+    """
+
+    def __init__(self, n_workers: int, setup: Optional[Callable[[], None]] = None):
+        self.n_workers = max(1, int(n_workers))
+        ctx = mp.get_context("spawn")
+        groups = _core_groups(self.n_workers)
+        # o worker importa numpy antes do initializer: OpenMP / BLAS do
+        # tamanho da fatia têm de vir no ambiente herdado (ver warm)
+        self._threads = len(groups[0]) if groups[0] else None
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.n_workers,
+            mp_context=ctx,
+            initializer=_init_worker,
+            initargs=(groups, ctx.Value("i", 0), setup),
+        )
+        self.setup = setup
+        self.active = 0
+
+    def warm(self) -> List[int]:
+        """Sobe todos os workers (modelos carregados) e devolve os pids."""
+        with thread_env(self._threads):
+            futures = [self.executor.submit(_worker_pid) for _ in range(self.n_workers)]
+            return sorted({f.result() for f in futures})
+
+    def pids(self) -> List[int]:
+        """Processos vivos do pool agora."""
+        return sorted(self.executor._processes or ())
+
+    def submit(self, fn, *args):
+        # workers mortos são repostos sob demanda: mesmo ambiente de threads
+        with thread_env(self._threads):
+            return self.executor.submit(fn, *args)
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+_POOL: Optional[ShardPool] = None
+_POOL_LOCK = threading.Lock()
+
+
+def _get_pool(setup: Optional[Callable[[], None]], acquire: bool) -> ShardPool:
+    global _POOL
+    with _POOL_LOCK:
+        pool = _POOL
+        if pool is not None and setup is not None and pool.setup is not setup:
+            if pool.active:
+                raise RuntimeError("pool de shards em uso com outro setup.")
+            pool.shutdown()
+            pool = None
+        if pool is None:
+            pool = ShardPool(shard_worker_limit(), setup=setup)
+            pool.warm()
+            _POOL = pool
+        if acquire:
+            pool.active += 1
+        return pool
+
+
+def get_shard_pool(setup: Optional[Callable[[], None]] = None) -> ShardPool:
+    """
+    Pool compartilhado do processo (`shard_worker_limit()` workers), criado
+    e aquecido no primeiro uso e reaproveitado nos requests seguintes. Outro
+    `setup` (None = o que já estiver lá) só troca o pool se ninguém estiver
+    usando.
+    """
+    return _get_pool(setup, acquire=False)
+
+
+@contextmanager
+def shard_pool(setup: Optional[Callable[[], None]] = None) -> Iterator[ShardPool]:
+    """Pool compartilhado marcado como em uso durante o request."""
+    pool = _get_pool(setup, acquire=True)
+    try:
+        yield pool
+    finally:
+        with _POOL_LOCK:
+            pool.active -= 1
+
+
+def _discard_pool(pool: ShardPool) -> None:
+    """Tira do ar um pool quebrado (o próximo request sobe outro)."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is pool:
+            _POOL = None
+    pool.shutdown()
+
+
+def shutdown_shard_pool() -> None:
+    """Derruba o pool compartilhado (fim do processo)."""
+    global _POOL
+    with _POOL_LOCK:
+        pool, _POOL = _POOL, None
+    if pool is not None:
+        pool.shutdown()
+
+
+atexit.register(shutdown_shard_pool)
+
+
+def _perceive_shard(
+    video_path: str,
+    read_start: int,
+    end: Optional[int],
+    ref_point: Optional[Tuple[float, float]],
+    seed_state: Optional[Dict[str, Any]],
+    snapshot_at: Tuple[int, ...],
+    tier=None,
+    frame_step: int = 1,
+    prior=None,
+    seed_ref_point: Optional[Tuple[float, float]] = None,
+    seed_frames: int = 0,
+):
+    """
+    Percepção de um trecho dentro do worker. Com `seed_frames`, antes roda a
+    passada de semente (frames [0, seed_frames] a partir do `seed_ref_point`)
+    e põe o buffer ReID dela no estado inicial do seletor (junto com a bbox
+    de `seed_state`). Devolve (PerceptionTrack, segundos, pid, (frames de
+    semente, se começou semeado)).
+    """
+    from .pipeline import make_selector, run_perception
+    from .quality import get_quality_tier
+    from .video_utils import read_video_frames
+
+    t0 = time.perf_counter()
+    tier = tier or get_quality_tier()
+
+    seed_track = None
+    if seed_frames > 0:
+        seed_gen, _, _, _ = read_video_frames(video_path, start=0, end=seed_frames + 1, step=frame_step)
+        seed_track = run_perception(
+            seed_gen, make_selector(tier, seed_ref_point), start_frame=0, snapshot_at=(seed_frames,),
+            tier=tier, prior=prior, frame_step=frame_step,
+        )
+        snap = seed_track.snapshots.get(seed_frames)
+        if snap and snap["embedding_buffer"]:
+            seed_state = dict(
+                seed_state or {"last_box": None, "frames_since_refresh": 0},
+                embedding_buffer=[np.asarray(e).copy() for e in snap["embedding_buffer"]],
+            )
+
+    frame_gen, _, _, _ = read_video_frames(video_path, start=read_start, end=end, step=frame_step)
+    selector = make_selector(tier, ref_point)
+    if seed_state is not None:
+        selector.restore(seed_state)
+
+    track = run_perception(
+        frame_gen, selector, start_frame=read_start, snapshot_at=snapshot_at, tier=tier,
+        prior=prior, frame_step=frame_step,
+    )
+    if seed_track is not None:
+        # a passada de semente também rodou os modelos
+        track.reid_stats.merge(seed_track.reid_stats)
+        track.detector_calls += seed_track.detector_calls
+        track.pose_calls += seed_track.pose_calls
+    seeded = seed_state is not None and (seed_state["last_box"] is not None or bool(seed_state["embedding_buffer"]))
+    return track, time.perf_counter() - t0, os.getpid(), (len(seed_track) if seed_track is not None else 0, seeded)
+
+
+# ============================================================
+#                 COSTURA ENTRE TRECHOS
+# ============================================================
+
+def stitch_score(prev, cur, overlap: int) -> Dict[str, Any]:
+    """
+    Compara o atleta do trecho anterior (`prev`) com o do trecho atual
+    (`cur`) nos `overlap` primeiros frames de `cur`.
+    """
+    off = cur.start_frame - prev.start_frame
+    ious = []
+    for j in range(overlap):
+        a = prev.bbox[off + j] if off + j < len(prev) else None
+        b = cur.bbox[j] if j < len(cur) else None
+        if a is not None and b is not None:
+            ious.append(_iou(np.asarray(a), np.asarray(b)))
+
+    agreement = None
+    if ious:
+        agreement = float(np.mean(np.asarray(ious) >= STITCH_IOU))
+
+    # referência ReID de cada lado no fim da sobreposição
+    boundary = cur.start_frame + overlap
+    sim = None
+    s_prev = prev.snapshots.get(boundary)
+    s_cur = cur.snapshots.get(boundary)
+    if s_prev and s_cur and s_prev["embedding_buffer"] and s_cur["embedding_buffer"]:
+        ref_prev = np.mean(s_prev["embedding_buffer"], axis=0)
+        ref_cur = np.mean(s_cur["embedding_buffer"], axis=0)
+        sim = float(_cosine_sim(ref_prev, ref_cur))
+
+    if agreement is not None:
+        same = agreement >= STITCH_MIN_AGREEMENT
+    elif sim is not None:
+        same = sim >= REID_SIM_THRESHOLD
+    else:
+        # nada pra comparar (atleta sumido nos dois lados): aceita
+        same = True
+
+    return {
+        "boundary_frame": int(boundary),
+        "common_frames": len(ious),
+        "iou_agreement": agreement,
+        "reid_similarity": sim,
+        "same_athlete": bool(same),
+    }
+
+
+# ============================================================
+#                 ORQUESTRAÇÃO
+# ============================================================
+
+def _seed_states(
+    shards: List[Shard],
+    prior,
+    frame_step: int,
+) -> List[Optional[Dict[str, Any]]]:
+    """
+    Estado inicial do seletor de cada trecho depois do primeiro: bbox do
+    prior no início da leitura (o buffer ReID vem da passada de semente,
+    no worker).
+    """
+    seeds: List[Optional[Dict[str, Any]]] = [None]
+    for sh in shards[1:]:
+        box = prior.box_at(sh.read_start * frame_step) if prior is not None else None
+        seeds.append(None if box is None else {
+            "last_box": np.asarray(box, dtype=float).copy(),
+            "embedding_buffer": [],
+            "frames_since_refresh": 0,
+        })
+    return seeds
+
+
+def _run_shards(pool, video_path, shards, ref_point, use_reid, snapshots_for, tier, frame_step, prior):
+    """Todos os trechos de uma vez no pool + costura (e reprocessos) em série."""
+    seeds = _seed_states(shards, prior, frame_step)
+    seed_frames = min(SEED_FRAMES, shards[0].end) if use_reid else 0
+    futures = [
+        pool.submit(
+            _perceive_shard, video_path, sh.read_start, sh.read_end,
+            ref_point if sh.index == 0 else None, seeds[sh.index], snapshots_for(sh.index),
+            tier, frame_step, prior, ref_point, 0 if sh.index == 0 else seed_frames,
+        )
+        for sh in shards
+    ]
+    results = [f.result() for f in futures]
+
+    # Costura sequencial (um reprocesso muda a referência do próximo)
+    tracks = [r[0] for r in results]
+    shard_secs = [r[1] for r in results]
+    pids = {r[2] for r in results}
+    seed_info = [r[3] for r in results]
+    boundaries = []
+    reruns = 0
+    for i in range(1, len(shards)):
+        prev, sh = tracks[i - 1], shards[i]
+        score = stitch_score(prev, tracks[i], sh.overlap)
+        score["seeded"] = seed_info[i][1]
+        score["rerun"] = False
+
+        seed = prev.snapshots.get(sh.read_start)
+        if not score["same_athlete"] and seed is not None:
+            track, secs, pid, _ = pool.submit(
+                _perceive_shard, video_path, sh.read_start, sh.read_end,
+                None, seed, snapshots_for(i), tier, frame_step, prior,
+            ).result()
+            tracks[i] = track
+            shard_secs[i] += secs
+            pids.add(pid)
+            reruns += 1
+            score["rerun"] = True
+        boundaries.append(score)
+    return tracks, shard_secs, pids, seed_info, boundaries, reruns
+
+
+def perceive_sharded(
+    video_path: str,
+    frame_count: int,
+    ref_point: Optional[Tuple[float, float]] = None,
+    n_shards: int = 2,
+    overlap: int = DEFAULT_OVERLAP_FRAMES,
+    tier=None,
+    frame_step: int = 1,
+    prior=None,
+    worker_setup: Optional[Callable[[], None]] = None,
+):
+    """
+    Roda a percepção em trechos paralelos e devolve (track único, relatório).
+    `tier` / `frame_step`: nível de qualidade e passo de análise (ver
+    app/quality.py); `frame_count` e os trechos ficam em frames analisados.
+    `prior`: trilha da passada rápida (ver app/progressive.py), vai pra
+    todos os trechos e semeia a posição do atleta no início de cada um.
+    `worker_setup`: ver `get_shard_pool`. Os trechos rodam no pool
+    compartilhado; com mais trechos que workers, os de sobra esperam na fila.
+    """
+    from .pipeline import PerceptionTrack
+    from .quality import get_quality_tier
+
+    shards = plan_shards(frame_count, n_shards, overlap)
+    use_reid = (tier or get_quality_tier()).reid != "off"
+
+    def _snapshots_for(i: int) -> Tuple[int, ...]:
+        # fim da própria sobreposição (comparação ReID com o anterior) e, pro
+        # próximo trecho, início da leitura (seed de reprocesso) + fim da
+        # sobreposição dele
+        at = (shards[i].start,) if i > 0 else ()
+        if i + 1 < len(shards):
+            nxt = shards[i + 1]
+            at += (nxt.read_start, nxt.start)
+        return at
+
+    t0 = time.perf_counter()
+    with shard_pool(worker_setup) as pool:
+        t_pool = time.perf_counter() - t0
+        try:
+            tracks, shard_secs, pids, seeds, boundaries, reruns = _run_shards(
+                pool, video_path, shards, ref_point, use_reid, _snapshots_for, tier, frame_step, prior,
+            )
+        except BrokenProcessPool:
+            # worker morreu (OOM, segfault do runtime): o próximo request sobe outro pool
+            _discard_pool(pool)
+            raise
+        t_parallel = time.perf_counter() - t0
+        n_workers = min(pool.n_workers, len(shards))
+
+    # Junta: na sobreposição vale o trecho anterior (tem mais histórico)
+    merged = PerceptionTrack(start_frame=0, reid_stats=ReIDStats())
+    for sh, track in zip(shards, tracks):
+        merged.extend(track.slice(sh.overlap, len(track)))
+        merged.reid_stats.merge(track.reid_stats)
+        merged.detector_calls += track.detector_calls
+        merged.pose_calls += track.pose_calls
+        merged.region_detections += track.region_detections
+        merged.region_fallbacks += track.region_fallbacks
+        merged.processed_s += track.processed_s
+        merged.tiled_frames += track.tiled_frames
+        merged.tile_calls += track.tile_calls
+        merged.motion_gate_s += track.motion_gate_s
+
+    report = {
+        "shards": len(shards),
+        "workers": n_workers,
+        "overlap_frames": int(overlap),
+        "ranges": [[sh.start, sh.end] for sh in shards],
+        "boundaries": boundaries,
+        "reruns": reruns,
+        "seed_frames": int(sum(n for n, _ in seeds)),
+        "shard_seconds": [float(s) for s in shard_secs],
+        "pool_seconds": float(t_pool),
+        "worker_pids": sorted(pids),
+        "parallel_seconds": float(t_parallel),
+        "total_seconds": float(time.perf_counter() - t0),
+    }
+    return merged, report
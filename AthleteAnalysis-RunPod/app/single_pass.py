@@ -0,0 +1,190 @@
+# app/single_pass.py
+"""
+Percepção em um passe só: YOLO-pose (Ultralytics) no lugar de
+YOLO + ResNet-18 (ReID) + RTMPose.
+
+Um único forward por frame devolve, pra TODAS as pessoas:
+
+  - bboxes + scores (cabeça de detecção);
+  - 17 keypoints COCO + confiança (cabeça de pose, mesmo layout do RTMPose
+    body7 nos índices que o pipeline usa);
+  - embedding de ReID tirado do mapa de features intermediário que a
+    própria cabeça consome (P3, stride 8): um forward hook guarda o mapa
+    e cada bbox vira um RoIAlign 2x1 (metade de cima / de baixo do corpo)
+    -> vetor L2-normalizado. Nenhuma segunda CNN.
+
+O modelo é carregado pelo mesmo wrapper `YOLO` (pesos "-pose" da mesma
+variante do detector do nível) e fica no registro de modelos como o
+wrapper inteiro (modelo + hook).
+
+Troca custo por qualidade da pose: o RTMPose top-down é mais preciso em
+atleta pequeno; aqui não há tiles nem região expandida pra pose.
+"""
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Optional, Tuple
+
+import numpy as np
+
+from .config import MODEL_CFG
+from .models import MODEL_REGISTRY
+from .registry import ModelKey, estimate_model_bytes
+from .runtime import configure_runtime
+
+if TYPE_CHECKING:
+    from ultralytics import YOLO
+
+
+# grade do RoIAlign por pessoa (linhas, colunas): cima / baixo do corpo
+REID_POOL_GRID: Tuple[int, int] = (2, 1)
+
+
+def pose_weights_for(detector_weights: str) -> str:
+    """'yolo11x.pt' -> 'yolo11x-pose.pt' (mesma variante do detector)."""
+    if "-pose" in detector_weights:
+        return detector_weights
+    stem, dot, ext = detector_weights.rpartition(".")
+    return f"{stem}-pose.{ext}" if dot else f"{detector_weights}-pose"
+
+
+@dataclass
+class PoseDetections:
+    """Saída de um frame: N pessoas, coordenadas globais do frame."""
+    boxes: np.ndarray                   # [N, 4] xyxy
+    scores: np.ndarray                  # [N]
+    keypoints: np.ndarray               # [N, 17, 2]
+    keypoint_scores: np.ndarray         # [N, 17]
+    embeddings: Optional[np.ndarray]    # [N, D] L2-normalizado (None sem hook)
+
+    def __len__(self) -> int:
+        return len(self.boxes)
+
+
+class SinglePassPerception:
+    def __init__(self, yolo: "YOLO"):
+        self.yolo = yolo
+        self._feat = None
+        self.stride = 8.0
+        self._hook = None
+
+        # mapa de maior resolução que a cabeça (Pose) consome
+        net = getattr(yolo, "model", None)
+        layers = getattr(net, "model", None)
+        if layers is not None and len(layers):
+            head = layers[-1]
+            src = getattr(head, "f", None)
+            idx = src[0] if isinstance(src, (list, tuple)) and src else len(layers) - 2
+            strides = getattr(head, "stride", None)
+            if strides is not None and len(strides):
+                self.stride = float(strides[0])
+            self._hook = layers[idx].register_forward_hook(self._keep)
+
+    def _keep(self, _module, _inputs, output) -> None:
+        self._feat = output
+
+    def _pool(self, boxes: np.ndarray, img_hw: Tuple[int, int]) -> Optional[np.ndarray]:
+        """RoIAlign das bboxes (coords da imagem que entrou no modelo) no mapa guardado."""
+        feat = self._feat
+        if feat is None or len(boxes) == 0:
+            return None
+        import torch
+        from torchvision.ops import roi_align
+
+        # letterbox do Ultralytics: escala r + padding centralizado
+        h0, w0 = img_hw
+        hf, wf = feat.shape[-2:]
+        h_in, w_in = hf * self.stride, wf * self.stride
+        r = min(h_in / h0, w_in / w0)
+        pad_x = (w_in - round(w0 * r)) / 2.0
+        pad_y = (h_in - round(h0 * r)) / 2.0
+
+        fb = (boxes * r + np.array([pad_x, pad_y, pad_x, pad_y])) / self.stride
+        rois = torch.as_tensor(
+            np.concatenate([np.zeros((len(fb), 1)), fb], axis=1),
+            dtype=feat.dtype,
+            device=feat.device,
+        )
+        with torch.no_grad():
+            pooled = roi_align(feat[:1], rois, output_size=REID_POOL_GRID, spatial_scale=1.0, aligned=True)
+            emb = torch.nn.functional.normalize(pooled.flatten(1).float(), dim=1)
+        return emb.cpu().numpy()
+
+    def __call__(
+        self,
+        frame: np.ndarray,
+        imgsz: int,
+        region: Optional[Tuple[int, int, int, int]] = None,
+    ) -> Optional[PoseDetections]:
+        """Pessoas do frame (ou só de `region`) num passe só; None sem detecção."""
+        x0 = y0 = 0
+        img = frame
+        if region is not None:
+            x0, y0, x1, y1 = region
+            img = frame[y0:y1, x0:x1]
+            scale = imgsz / float(max(frame.shape[:2]))
+            imgsz = min(imgsz, max(64, 32 * int(np.ceil(scale * max(img.shape[:2]) / 32.0))))
+
+        self._feat = None
+        results = self.yolo.predict(
+            img,
+            conf=0.25,
+            classes=[0],
+            device=MODEL_CFG.device,
+            imgsz=imgsz,
+            verbose=False,
+        )
+        if not results or results[0].boxes is None or len(results[0].boxes) == 0:
+            return None
+        res = results[0]
+        off = np.array([x0, y0], dtype=float)
+
+        boxes = res.boxes.xyxy.cpu().numpy().astype(float)
+        kp = res.keypoints
+        kpts = kp.xy.cpu().numpy().astype(float) + off
+        kconf = kp.conf.cpu().numpy().astype(float) if kp.conf is not None else np.ones(kpts.shape[:2])
+        emb = self._pool(boxes, img.shape[:2])
+        return PoseDetections(
+            boxes=boxes + np.concatenate([off, off]),
+            scores=res.boxes.conf.cpu().numpy().astype(float),
+            keypoints=kpts,
+            keypoint_scores=kconf,
+            embeddings=emb,
+        )
+
+
+def single_pass_key(
+    weights: Optional[str] = None,
+    device: Optional[str] = None,
+    precision: Optional[str] = None,
+) -> ModelKey:
+    return ModelKey(
+        "pose-detector",
+        pose_weights_for(weights or MODEL_CFG.yolo_weights),
+        device or MODEL_CFG.device,
+        precision or MODEL_CFG.yolo_precision,
+    )
+
+
+def get_single_pass_model(
+    weights: Optional[str] = None,
+    device: Optional[str] = None,
+    precision: Optional[str] = None,
+) -> SinglePassPerception:
+    """
+    YOLO-pose da mesma variante de `weights` (padrão MODEL_CFG.yolo_weights)
+    + hook de features, pelo registro.
+    """
+    key = single_pass_key(weights, device, precision)
+
+    def _load() -> Any:
+        from ultralytics import YOLO
+
+        configure_runtime()
+        model = YOLO(key.variant)
+        model.to(key.device)
+        model.fuse()
+        if key.precision == "fp16":
+            model.overrides["half"] = True
+        return SinglePassPerception(model)
+
+    return MODEL_REGISTRY.get(key, _load, sizer=lambda m: estimate_model_bytes(m.yolo))
@@ -0,0 +1,259 @@
+# app/smoothing.py
+"""
+Suavização por polinômio local com PESOS (mínimos quadrados ponderados
+por janela, estilo LOESS de janela fixa).
+
+O Savitzky-Golay clássico trata todo frame igual: um tornozelo de score
+0.2 (ou um valor repetido porque a pose falhou) puxa a curva tanto quanto
+um de score 0.9. Aqui cada amostra tem um peso (a confiança do keypoint,
+0 = sem observação) e em cada frame se ajusta um polinômio de grau p por
+mínimos quadrados ponderados na janela centrada:
+
+    min_c  sum_m  w[i+m] * (y[i+m] - c0 - c1 m - ... - cp m^p)^2
+
+É outro estimador: o núcleo muda de frame pra frame com os pesos. Só com
+pesos iguais e sem buracos ele coincide com o Savitzky-Golay no miolo da
+série (nas bordas a janela só encolhe) - e nesse caso nem se monta o
+sistema: o resultado é uma convolução com núcleos pré-calculados por
+(janela, grau) (o do miolo + uma linha por frame de borda).
+
+Com pesos, custo O(n): os momentos sum w m^k e sum w y m^k de todos os
+frames saem de 2p+1 convoluções com núcleos fixos do tamanho da janela
+(a matriz do sistema é de Hankel), e os n sistemas (p+1)x(p+1) são
+resolvidos em lote (grau <= 2 em fórmula fechada). Opcionalmente,
+iterações robustas (bisquare, como no LOWESS) tiram o peso de outliers
+(troca esquerda/direita, pose pulando pro vizinho).
+"""
+
+from functools import lru_cache
+from typing import Optional
+
+import numpy as np
+
+from .config import METRICS_CFG
+
+# maior núcleo que o np.correlate faz no laço desenrolado
+_CORRELATE_TAPS = 11
+# frames por bloco no ajuste ponderado (momentos do bloco cabem no cache)
+_CHUNK = 1 << 14
+
+
+def window_for_fps(fps: Optional[float], seconds: Optional[float] = None, min_window: int = 5) -> int:
+    """
+    Janela ímpar de ~`seconds` (padrão METRICS_CFG.smoothing_window_s).
+    Sem fps: a janela fixa antiga (METRICS_CFG.smoothing_window).
+    """
+    if not fps or fps <= 0:
+        w = int(getattr(METRICS_CFG, "smoothing_window", 9))
+    else:
+        seconds = METRICS_CFG.smoothing_window_s if seconds is None else seconds
+        w = int(round(seconds * float(fps)))
+    w = max(w, min_window)
+    return w if w % 2 == 1 else w + 1
+
+
+def _bisquare(resid: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    """Pesos robustos de Tukey a partir dos resíduos (6 * MAD)."""
+    r = np.abs(resid[valid])
+    s = np.median(r) if len(r) else 0.0
+    if s <= 0:
+        return np.ones_like(resid)
+    u = np.abs(resid) / (6.0 * s)
+    return np.where(u < 1.0, (1.0 - u * u) ** 2, 0.0)
+
+
+def _correlate(x: np.ndarray, kernels) -> list:
+    """
+    sum_m kernel[h + m] * x[i + m] pra cada núcleo (mesmo tamanho ímpar W),
+    zeros fora da série.
+
+    np.correlate só tem o laço desenrolado até _CORRELATE_TAPS coeficientes
+    (acima disso cai num dot por amostra, 3-5x mais lento): núcleos
+    maiores viram somas de pedaços de tamanho parecido.
+    """
+    W, n = len(kernels[0]), len(x)
+    h = W // 2
+    xp = np.zeros(n + W - 1)
+    xp[h:h + n] = x
+    pieces = -(-W // _CORRELATE_TAPS)
+    step = -(-W // pieces)
+    out = []
+    for kernel in kernels:
+        acc = None
+        for a in range(0, W, step):
+            k = kernel[a:a + step]
+            part = np.correlate(xp[a:a + n + len(k) - 1], k, mode="valid")
+            acc = part if acc is None else acc + part
+        out.append(acc)
+    return out
+
+
+def _box_count(mask: np.ndarray, h: int) -> np.ndarray:
+    """Nº de True em [i - h, i + h] (soma acumulada inteira, exata)."""
+    cs = np.zeros(len(mask) + 2 * h + 1, dtype=np.int64)
+    np.cumsum(mask, out=cs[h + 1:h + 1 + len(mask)])
+    cs[h + 1 + len(mask):] = cs[h + len(mask)]
+    return cs[2 * h + 1:] - cs[:-2 * h - 1]
+
+
+@lru_cache(maxsize=32)
+def _uniform_kernels(window: int, polyorder: int):
+    """
+    Núcleos do ajuste com pesos iguais: (miolo [W], bordas [h, 2h]).
+
+    Linha i das bordas = coeficientes do valor no frame i (janela cortada
+    em 0..i+h); a borda do fim é a mesma com a série invertida.
+    """
+    h = window // 2
+
+    def row(offsets: np.ndarray) -> np.ndarray:
+        if len(offsets) < polyorder + 1:
+            return np.full(len(offsets), 1.0 / len(offsets))   # poucos pontos: média
+        V = offsets[:, None] ** np.arange(polyorder + 1)[None, :]
+        return np.linalg.pinv(V)[0]
+
+    center = row(np.arange(-h, h + 1, dtype=float))
+    edges = np.zeros((h, 2 * h))
+    for i in range(h):
+        edges[i, : i + h + 1] = row(np.arange(-i, h + 1, dtype=float))
+    center.flags.writeable = False
+    edges.flags.writeable = False
+    return center, edges
+
+
+def _uniform_smooth(y: np.ndarray, window: int, polyorder: int) -> np.ndarray:
+    """Ajuste com pesos iguais e sem buracos: convolução + bordas."""
+    center, edges = _uniform_kernels(window, polyorder)
+    h = window // 2
+    (out,) = _correlate(y, [center])
+    if h:
+        out[:h] = edges @ y[: 2 * h]
+        out[-h:] = (edges @ y[::-1][: 2 * h])[::-1]
+    return out
+
+
+def _solve_c0(S, T) -> np.ndarray:
+    """
+    Só o termo constante (valor no centro) dos n sistemas normais
+    A c = T, com A[a, b] = S[a + b] (matriz de Hankel dos momentos).
+
+    Grau <= 2: regra de Cramer em fórmula fechada direto nas linhas de S
+    e T (sem montar as n matrizes; no grau 2 os cofatores da 1a coluna
+    servem pro determinante e pro numerador); acima disso, solve em lote
+    normalizado.
+    """
+    k = len(T)
+    if k == 1:
+        det, num = S[0], T[0]
+    elif k == 2:
+        det = S[0] * S[2] - S[1] * S[1]
+        num = T[0] * S[2] - S[1] * T[1]
+    elif k == 3:
+        c0 = S[2] * S[4]
+        c0 -= S[3] * S[3]
+        c1 = S[1] * S[4]
+        c1 -= S[2] * S[3]
+        c2 = S[1] * S[3]
+        c2 -= S[2] * S[2]
+        det = S[0] * c0
+        det -= S[1] * c1
+        det += S[2] * c2
+        num = T[0] * c0
+        num -= T[1] * c1
+        num += T[2] * c2
+    else:
+        S, T = np.asarray(S), np.asarray(T)
+        idx = np.arange(k)
+        A = S[idx[:, None] + idx[None, :]].transpose(2, 0, 1)   # [n, k, k]
+        # escala pra condicionar (m^k cresce rápido)
+        d = np.sqrt(np.einsum("nii->ni", A))
+        d = np.where(d > 0, d, 1.0)
+        An = A / (d[:, :, None] * d[:, None, :])
+        # pinv: janelas com pontos de menos pro grau não quebram o lote
+        return (np.linalg.pinv(An) @ (T.T / d)[..., None])[:, 0, 0] / d[:, 0]
+    out = np.full(len(det), np.nan)
+    np.divide(num, det, out=out, where=det != 0)
+    return out
+
+
+def _weighted_fit(ww: np.ndarray, wy: np.ndarray, h: int, p: int, powers) -> np.ndarray:
+    """Uma passada do ajuste ponderado (NaN onde a janela não tem peso nenhum)."""
+    # nº de amostras com peso na janela (as robustas podem zerar algumas)
+    cnt = _box_count(ww > 0, h)
+    S = _correlate(ww, powers)                                    # 2p+1 x [n]
+    T = _correlate(wy, powers[: p + 1])
+
+    # ajuste de grau cheio onde há pontos suficientes; senão, média ponderada
+    full = (cnt >= p + 1) & (S[0] > 0)
+    if full.all():
+        return _solve_c0(S, T)
+    fit = np.full(len(ww), np.nan)
+    if full.any():
+        fit[full] = _solve_c0([a[full] for a in S], [a[full] for a in T])
+    low = ~full & (S[0] > 0)
+    fit[low] = T[0][low] / S[0][low]
+    return fit
+
+
+def local_poly_smooth(
+    y: np.ndarray,
+    weights: Optional[np.ndarray] = None,
+    window: int = 9,
+    polyorder: int = 2,
+    robust_iters: int = 0,
+) -> np.ndarray:
+    """
+    Valor suavizado em cada frame (série 1D).
+
+    NaN em `y` = peso 0. Frames sem nenhuma amostra útil na janela são
+    preenchidos por interpolação linear do resultado. Sem nenhuma amostra
+    útil na série inteira: devolve `y` como veio. Sem pesos (ou todos
+    iguais), sem NaN e sem iterações robustas: caminho de convolução.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    w = np.ones(n) if weights is None else np.clip(np.asarray(weights, dtype=float), 0.0, None)
+    valid = np.isfinite(y) & np.isfinite(w) & (w > 0)
+    if n < 3 or valid.sum() == 0:
+        return y.copy()
+
+    window = int(window) | 1
+    window = max(3, min(window, n if n % 2 == 1 else n - 1))
+    h = window // 2
+    p = int(max(0, min(polyorder, window - 1)))
+
+    uniform = weights is None or (valid.all() and np.ptp(w) == 0)
+    if uniform and valid.all() and int(robust_iters) <= 0:
+        return _uniform_smooth(y, window, p)
+
+    m = np.arange(-h, h + 1, dtype=float)
+    powers = [m ** k for k in range(2 * p + 1)]                  # 2p+1 x [W]
+
+    y0 = np.where(valid, y, 0.0)
+    w0 = np.where(valid, w, 0.0)
+
+    rw = np.ones(n)
+    out = y0
+    for it in range(int(robust_iters) + 1):
+        ww = w0 * rw
+        wy = ww * y0
+        # em blocos (+ h de cada lado): os 2p+1 momentos de um bloco cabem
+        # no cache, em vez de 2p+1 séries inteiras indo e voltando da RAM
+        fit = np.empty(n)
+        for a in range(0, n, _CHUNK):
+            b = min(n, a + _CHUNK)
+            lo, hi = max(0, a - h), min(n, b + h)
+            fit[a:b] = _weighted_fit(ww[lo:hi], wy[lo:hi], h, p, powers)[a - lo: b - lo]
+
+        if it < robust_iters:
+            rw = _bisquare(np.where(valid, y - fit, 0.0), valid & np.isfinite(fit))
+        out = fit
+
+    missing = ~np.isfinite(out)
+    if missing.any():
+        ok = ~missing
+        if ok.sum() >= 2:
+            out[missing] = np.interp(np.flatnonzero(missing), np.flatnonzero(ok), out[ok])
+        else:
+            out[missing] = out[ok][0] if ok.any() else np.nan
+    return out
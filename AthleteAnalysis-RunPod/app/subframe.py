@@ -0,0 +1,107 @@
+# app/subframe.py
+"""
+Refinamento sub-frame de eventos (vetorizado sobre todos os eventos).
+
+Eventos detectados em frames inteiros carregam até meio frame de erro de
+quantização em cada ponta (±33 ms numa duração a 30 fps). Aqui:
+
+  - picos (ápice do salto, passo da tesoura): parábola pelos 3 frames
+    em volta do pico -> deslocamento em [-0.5, 0.5];
+  - transições (decolagem / aterrissagem): cruzamento linear do zero de
+    um sinal g (g < 0 de um lado, >= 0 do outro) entre i0 e i0 + 1 ->
+    fração em [0, 1].
+
+Cada função recebe o sinal inteiro e os índices de TODOS os eventos.
+"""
+
+import numpy as np
+
+
+def parabolic_offsets(y: np.ndarray, idx) -> np.ndarray:
+    """
+    Deslocamento (-0.5..0.5) do pico de `y` em cada índice pela parábola
+    em i-1, i, i+1. Borda, NaN ou curvatura nula: 0.
+    """
+    y = np.asarray(y, dtype=float)
+    idx = np.asarray(idx, dtype=np.intp).reshape(-1)
+    out = np.zeros(len(idx))
+    inner = (idx > 0) & (idx < len(y) - 1)
+    if not inner.any():
+        return out
+    i = idx[inner]
+    a, b, c = y[i - 1], y[i], y[i + 1]
+    den = a - 2.0 * b + c
+    ok = np.isfinite(den) & (den != 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        off = np.where(ok, 0.5 * (a - c) / np.where(ok, den, 1.0), 0.0)
+    out[inner] = np.clip(off, -0.5, 0.5)
+    return out
+
+
+def crossing_offsets(g: np.ndarray, i0) -> np.ndarray:
+    """
+    Fração (0..1) entre i0 e i0 + 1 em que a reta por g[i0], g[i0 + 1]
+    cruza o zero. Sem troca de sinal (ou fora da série): 0.5, o meio do
+    intervalo, que é o palpite sem viés.
+    """
+    g = np.asarray(g, dtype=float)
+    i0 = np.asarray(i0, dtype=np.intp).reshape(-1)
+    out = np.full(len(i0), 0.5)
+    inner = (i0 >= 0) & (i0 < len(g) - 1)
+    if not inner.any():
+        return out
+    a = g[i0[inner]]
+    b = g[i0[inner] + 1]
+    ok = np.isfinite(a) & np.isfinite(b) & (np.sign(a) != np.sign(b)) & (a != b)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        frac = np.where(ok, a / np.where(ok, a - b, 1.0), 0.5)
+    out[inner] = np.clip(frac, 0.0, 1.0)
+    return out
+
+
+def ballistic_roots(d: np.ndarray, start, end, center):
+    """
+    Zeros da parábola de voo: ajusta d(t) = c0 + c1 t + c2 t² (mínimos
+    quadrados, t = frame - center) aos frames [start, end] de cada evento e
+    devolve (primeiro zero, segundo zero) em frames. `d` = afastamento do
+    "chão" (> 0 no ar), SEM suavizar: o limiar e a janela da suavização
+    atrasam o cruzamento em direções opostas nas duas pontas, a parábola
+    não. NaN onde não dá (menos de 3 frames, concavidade errada, sem zero).
+    """
+    d = np.asarray(d, dtype=float)
+    start = np.asarray(start, dtype=np.intp).reshape(-1)
+    end = np.asarray(end, dtype=np.intp).reshape(-1)
+    center = np.asarray(center, dtype=np.intp).reshape(-1)
+    m = len(start)
+    lo = np.full(m, np.nan)
+    hi = np.full(m, np.nan)
+    lens = np.maximum(end - start + 1, 0)
+    if m == 0 or lens.sum() == 0:
+        return lo, hi
+
+    # todos os frames de todos os eventos num vetor só (rótulo = evento)
+    ev = np.repeat(np.arange(m), lens)
+    frames = np.arange(lens.sum()) - np.repeat(np.cumsum(lens) - lens, lens) + start[ev]
+    y = d[frames]
+    keep = np.isfinite(y)
+    ev, t, y = ev[keep], (frames - center[ev])[keep].astype(float), y[keep]
+
+    # equações normais 3x3 por evento
+    tp = [np.bincount(ev, weights=t ** k, minlength=m) for k in range(5)]
+    ty = [np.bincount(ev, weights=y * t ** k, minlength=m) for k in range(3)]
+    A = np.stack([np.stack(tp[i:i + 3], axis=-1) for i in range(3)], axis=1)
+    b = np.stack(ty, axis=-1)
+    ok = tp[0] >= 3
+    ok[ok] &= np.abs(np.linalg.det(A[ok])) > 1e-9
+    if not ok.any():
+        return lo, hi
+    c0, c1, c2 = np.linalg.solve(A[ok], b[ok][..., None])[..., 0].T
+
+    disc = c1 * c1 - 4.0 * c2 * c0
+    good = (c2 < 0) & (disc > 0)
+    with np.errstate(invalid="ignore"):
+        r = np.sqrt(np.where(good, disc, np.nan))
+        # c2 < 0: (-c1 + r) / 2c2 é o zero da esquerda
+        lo[ok] = np.where(good, (-c1 + r) / (2.0 * c2), np.nan) + center[ok]
+        hi[ok] = np.where(good, (-c1 - r) / (2.0 * c2), np.nan) + center[ok]
+    return lo, hi
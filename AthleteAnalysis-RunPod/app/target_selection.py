@@ -0,0 +1,381 @@
+# app/target_selection.py
+"""
+Escolha do atleta-alvo a cada frame (IOU + ReID + ref_point).
+
+Os embeddings de ReID são LAZY: só são calculados quando o custo realmente
+precisa deles.
+
+  - Se a bbox escolhida tem IOU >= REID_IOU_STRONG com a anterior, ela é
+    aceita sem olhar embedding nenhum (caso da maioria dos frames).
+  - IOU ambíguo ou re-aquisição depois de perder o atleta -> calcula os
+    embeddings de todos os candidatos num único batch.
+  - O buffer de referência é renovado em agenda (a cada
+    REID_REFRESH_INTERVAL frames), calculando só o embedding do escolhido.
+
+Este módulo não importa torch: a função de embedding é injetada
+(`compute_reid_embeddings` no pipeline, stub nos benchmarks).
+"""
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .crops import FrameCrops
+
+
+# ============================================================
+#                 CONSTANTES / AJUDANTES
+# ============================================================
+
+REID_IOU_STRONG = 0.5          # IOU "forte" pra manter continuidade
+REID_SIM_THRESHOLD = 0.55      # similaridade mínima pra confiar no ReID
+REID_SIM_UPDATE_MIN = 0.40     # mínimo de similaridade pra atualizar buffer
+REID_BUFFER_SIZE = 10          # quantos embeddings recentes guardar
+REID_REFRESH_INTERVAL = 5      # a cada quantos frames renovar o buffer (modo lazy)
+
+# [N, H, W, 3] RGB uint8 -> [N, D] L2-normalizado (ou None)
+# (embed_fn=None no seletor = ReID desligado: só IOU / ref_point / score)
+EmbedFn = Callable[[Optional[np.ndarray]], Optional[np.ndarray]]
+
+
+def _iou(box_a: np.ndarray, box_b: np.ndarray) -> float:
+    """Calcula IOU entre duas bboxes [x1,y1,x2,y2]."""
+    x1 = max(box_a[0], box_b[0])
+    y1 = max(box_a[1], box_b[1])
+    x2 = min(box_a[2], box_b[2])
+    y2 = min(box_a[3], box_b[3])
+
+    inter_w = max(0.0, x2 - x1)
+    inter_h = max(0.0, y2 - y1)
+    inter = inter_w * inter_h
+
+    if inter <= 0:
+        return 0.0
+
+    area_a = max(0.0, (box_a[2] - box_a[0]) * (box_a[3] - box_a[1]))
+    area_b = max(0.0, (box_b[2] - box_b[0]) * (box_b[3] - box_b[1]))
+    union = area_a + area_b - inter
+    if union <= 0:
+        return 0.0
+
+    return float(inter / union)
+
+
+def _cosine_sim(a: Optional[np.ndarray], b: Optional[np.ndarray]) -> float:
+    """Similaridade cosseno entre dois vetores L2-normalizados. Retorna -1 se inválido."""
+    if a is None or b is None:
+        return -1.0
+    a = np.asarray(a, dtype=float).ravel()
+    b = np.asarray(b, dtype=float).ravel()
+    denom = (np.linalg.norm(a) * np.linalg.norm(b)) + 1e-12
+    if denom <= 0:
+        return -1.0
+    return float(np.dot(a, b) / denom)
+
+
+def update_embedding_buffer(
+    buffer: List[np.ndarray],
+    new_emb: Optional[np.ndarray],
+) -> List[np.ndarray]:
+    """Mantém um buffer FIFO de embeddings válidos."""
+    if new_emb is None:
+        return buffer
+    if not isinstance(new_emb, np.ndarray) or new_emb.size == 0:
+        return buffer
+
+    if len(buffer) >= REID_BUFFER_SIZE:
+        buffer.pop(0)
+    buffer.append(new_emb)
+    return buffer
+
+
+def get_reference_embedding(buffer: List[np.ndarray]) -> Optional[np.ndarray]:
+    """Retorna embedding médio L2-normalizado do buffer, ou None se vazio."""
+    if len(buffer) == 0:
+        return None
+    mean_emb = np.mean(buffer, axis=0)
+    norm = np.linalg.norm(mean_emb) + 1e-12
+    return (mean_emb / norm).astype("float32")
+
+
+def _pick_target_person(
+    boxes: np.ndarray,
+    scores: np.ndarray,
+    ref_point: Optional[Tuple[float, float]],
+    last_box: Optional[np.ndarray],
+    embedding_ref: Optional[np.ndarray],
+    candidates_embeddings: Sequence[Optional[np.ndarray]],
+) -> int:
+    """
+    Escolhe índice da pessoa-alvo usando, em ordem de prioridade:
+
+      1) IOU forte com a bbox do frame anterior (continuidade espacial)
+      2) Similaridade de embedding (Re-ID temporal)
+      3) Ponto de referência (ref_point), se existir
+      4) Maior score de detecção (fallback)
+
+    `candidates_embeddings` pode ser um `LazyCandidateEmbeddings`: ele só é
+    percorrido (e calculado) se o passo 1 não decidir.
+    """
+    if boxes is None or len(boxes) == 0:
+        return -1
+
+    boxes = np.asarray(boxes, dtype=float)
+    scores = np.asarray(scores, dtype=float)
+
+    # -------------------------------------------------------
+    # 1) Continuidade via IOU forte com a última bbox
+    # -------------------------------------------------------
+    if last_box is not None:
+        ious = np.array([_iou(b, last_box) for b in boxes], dtype=float)
+        best_iou_idx = int(np.argmax(ious))
+        best_iou = float(ious[best_iou_idx])
+
+        if best_iou >= REID_IOU_STRONG:
+            return best_iou_idx
+
+    # -------------------------------------------------------
+    # 2) ReID temporal: comparar com embedding_ref médio
+    # -------------------------------------------------------
+    if embedding_ref is not None and len(candidates_embeddings) > 0:
+        sims = np.array(
+            [_cosine_sim(e, embedding_ref) for e in candidates_embeddings],
+            dtype=float,
+        )
+
+        if np.isfinite(sims).any():
+            best_reid_idx = int(np.nanargmax(sims))
+            best_sim = float(sims[best_reid_idx])
+
+            if best_sim >= REID_SIM_THRESHOLD:
+                return best_reid_idx
+
+    # -------------------------------------------------------
+    # 3) Mais perto do ponto de referência (caso inicial)
+    # -------------------------------------------------------
+    if ref_point is not None:
+        cx = 0.5 * (boxes[:, 0] + boxes[:, 2])
+        cy = 0.5 * (boxes[:, 1] + boxes[:, 3])
+        d = np.sqrt((cx - ref_point[0]) ** 2 + (cy - ref_point[1]) ** 2)
+        return int(np.argmin(d))
+
+    # -------------------------------------------------------
+    # 4) Fallback: maior score de detecção
+    # -------------------------------------------------------
+    return int(np.argmax(scores))
+
+
+# ============================================================
+#                 EMBEDDINGS LAZY
+# ============================================================
+
+@dataclass
+class ReIDStats:
+    """Contadores de uso do ReID ao longo de um vídeo."""
+    frames_with_candidates: int = 0
+    candidates_seen: int = 0
+    embeddings_computed: int = 0
+    encoder_calls: int = 0
+    buffer_refreshes: int = 0
+
+    def merge(self, other: "ReIDStats") -> None:
+        """Soma os contadores de outro trecho (vídeo processado em shards)."""
+        self.frames_with_candidates += other.frames_with_candidates
+        self.candidates_seen += other.candidates_seen
+        self.embeddings_computed += other.embeddings_computed
+        self.encoder_calls += other.encoder_calls
+        self.buffer_refreshes += other.buffer_refreshes
+
+    def as_dict(self) -> Dict[str, Any]:
+        eager = self.candidates_seen
+        return {
+            "frames_with_candidates": self.frames_with_candidates,
+            "candidates_seen": self.candidates_seen,
+            "embeddings_computed": self.embeddings_computed,
+            "embeddings_skipped": max(0, eager - self.embeddings_computed),
+            "encoder_calls": self.encoder_calls,
+            "buffer_refreshes": self.buffer_refreshes,
+        }
+
+
+class LazyCandidateEmbeddings:
+    """
+    Sequência de embeddings dos candidatos de UM frame, calculada sob demanda.
+
+      - `get(i)` calcula só o candidato i;
+      - iterar / `all()` calcula todos os que faltam num único batch;
+      - `precomputed` ([N, D], ex.: features do próprio detector, ver
+        app/single_pass.py) já vem pronto e não passa pelo encoder.
+    """
+
+    def __init__(
+        self,
+        crops: FrameCrops,
+        boxes: np.ndarray,
+        embed_fn: Optional[EmbedFn],
+        stats: ReIDStats,
+        precomputed: Optional[np.ndarray] = None,
+    ):
+        self._crops = crops
+        self._boxes = boxes
+        self._embed_fn = embed_fn
+        self._stats = stats
+        self._embs: List[Optional[np.ndarray]] = [None] * len(boxes)
+        self._done = np.zeros(len(boxes), dtype=bool)
+        if precomputed is not None and len(precomputed) == len(boxes):
+            self._embs = list(precomputed)
+            self._done[:] = True
+            stats.embeddings_computed += len(boxes)
+
+    def __len__(self) -> int:
+        return len(self._embs)
+
+    def __getitem__(self, i: int) -> Optional[np.ndarray]:
+        return self.get(i)
+
+    def __iter__(self):
+        return iter(self.all())
+
+    def is_computed(self, i: int) -> bool:
+        return bool(self._done[i])
+
+    def _compute(self, idxs: List[int]) -> None:
+        if not idxs:
+            return
+        if self._embed_fn is None:
+            # ReID desligado: nem recorta
+            self._done[idxs] = True
+            return
+        batch, valid = self._crops.reid_batch(self._boxes[idxs])
+        self._done[idxs] = True
+        if batch is None:
+            return
+        feats = self._embed_fn(batch)
+        self._stats.encoder_calls += 1
+        if feats is None:
+            return
+        self._stats.embeddings_computed += len(valid)
+        for j, v in enumerate(valid):
+            self._embs[idxs[v]] = feats[j]
+
+    def get(self, i: int) -> Optional[np.ndarray]:
+        if not self._done[i]:
+            self._compute([i])
+        return self._embs[i]
+
+    def all(self) -> List[Optional[np.ndarray]]:
+        self._compute([int(i) for i in np.flatnonzero(~self._done)])
+        return self._embs
+
+
+# ============================================================
+#                 SELETOR DE ALVO
+# ============================================================
+
+class TargetSelector:
+    """
+    Estado da escolha do atleta ao longo do vídeo (última bbox + buffer ReID).
+
+    lazy=False reproduz o comportamento antigo (embedding de todos os
+    candidatos em todo frame, buffer atualizado em todo frame).
+    """
+
+    def __init__(
+        self,
+        embed_fn: Optional[EmbedFn],
+        ref_point: Optional[Tuple[float, float]] = None,
+        lazy: bool = True,
+        refresh_interval: int = REID_REFRESH_INTERVAL,
+    ):
+        self.embed_fn = embed_fn
+        self.ref_point = ref_point
+        self.lazy = lazy
+        self.refresh_interval = max(1, int(refresh_interval)) if lazy else 1
+
+        self.last_box: Optional[np.ndarray] = None
+        self.embedding_buffer: List[np.ndarray] = []
+        self.stats = ReIDStats()
+        self._frames_since_refresh = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Estado do rastreio (cópia) pra continuar em outro processo/trecho."""
+        return {
+            "last_box": None if self.last_box is None else self.last_box.copy(),
+            "embedding_buffer": [e.copy() for e in self.embedding_buffer],
+            "frames_since_refresh": self._frames_since_refresh,
+        }
+
+    def restore(self, state: Dict[str, Any]) -> None:
+        """Retoma de um `snapshot()` (contadores de stats não são restaurados)."""
+        last_box = state.get("last_box")
+        self.last_box = None if last_box is None else np.asarray(last_box).copy()
+        self.embedding_buffer = [np.asarray(e).copy() for e in state.get("embedding_buffer", [])]
+        self._frames_since_refresh = int(state.get("frames_since_refresh", 0))
+
+    def reference_embedding(self) -> Optional[np.ndarray]:
+        """Embedding médio atual do atleta (None se o buffer está vazio)."""
+        return get_reference_embedding(self.embedding_buffer)
+
+    def select(
+        self,
+        crops: FrameCrops,
+        boxes: np.ndarray,
+        scores: np.ndarray,
+        embeddings: Optional[np.ndarray] = None,
+    ) -> int:
+        """
+        Escolhe o índice do atleta entre `boxes` (crops já no frame corrente).
+        `embeddings` [N, D]: embeddings já prontos dos candidatos (o encoder
+        não roda). Retorna -1 se não há candidato.
+        """
+        if boxes is None or len(boxes) == 0:
+            return -1
+
+        self.stats.frames_with_candidates += 1
+        self.stats.candidates_seen += len(boxes)
+
+        cands = LazyCandidateEmbeddings(crops, boxes, self.embed_fn, self.stats, embeddings)
+        if not self.lazy:
+            cands.all()
+
+        # Embedding de referência (média)
+        embedding_ref = get_reference_embedding(self.embedding_buffer)
+
+        idx = _pick_target_person(
+            boxes=boxes,
+            scores=scores,
+            ref_point=self.ref_point,
+            last_box=self.last_box,
+            embedding_ref=embedding_ref,
+            candidates_embeddings=cands,
+        )
+        if idx < 0:
+            return idx
+
+        self.last_box = np.asarray(boxes[idx]).copy()
+        self._frames_since_refresh += 1
+
+        # Renova o buffer: de graça se o embedding já foi calculado,
+        # senão só quando vazio ou quando a agenda vence.
+        if not (
+            cands.is_computed(idx)
+            or not self.embedding_buffer
+            or self._frames_since_refresh >= self.refresh_interval
+        ):
+            return idx
+
+        chosen_emb = cands.get(idx)
+        self._frames_since_refresh = 0
+        if chosen_emb is not None:
+            # Se já tem referência, só atualiza se for razoavelmente parecido
+            if embedding_ref is not None:
+                sim = _cosine_sim(chosen_emb, embedding_ref)
+                if sim >= REID_SIM_UPDATE_MIN:
+                    self.embedding_buffer = update_embedding_buffer(self.embedding_buffer, chosen_emb)
+                    self.stats.buffer_refreshes += 1
+            else:
+                self.embedding_buffer = update_embedding_buffer(self.embedding_buffer, chosen_emb)
+                self.stats.buffer_refreshes += 1
+
+        return idx
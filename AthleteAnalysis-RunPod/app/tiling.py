@@ -0,0 +1,122 @@
+# app/tiling.py
+"""
+Detecção em tiles (fatias com sobreposição) pra atleta pequeno / perdido.
+
+Em plano aberto de estádio o atleta tem < 80 px de altura; com o frame
+inteiro reduzido pra entrada do YOLO (1920 -> 640) ele vira ~25 px e some.
+Em tiles do tamanho da entrada do YOLO, cada pedaço entra em resolução
+nativa (zoom 3x no exemplo) e o atleta volta a ser detectável.
+
+  - `plan_tiles`: grade de tiles (lado = imgsz do nível) com sobreposição,
+    cobrindo o frame inteiro;
+  - `TileScheduler`: escolhe no máximo `budget` tiles por frame:
+      * atleta pequeno rastreado -> os tiles mais perto do centro da bbox;
+      * atleta perdido -> varre a grade em rodízio (`budget` por frame,
+        o frame inteiro coberto a cada ceil(n / budget) frames);
+  - `merge_detections`: junta frame inteiro + tiles com NMS (IOU) e
+    descarta caixas cortadas na borda de um tile que estão dentro de
+    outra maior (interseção / área da menor).
+
+Só roda quando o pipeline pede (bbox pequena ou atleta perdido), então o
+custo normal não muda.
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# bbox mais baixa que isso (px do frame) = atleta pequeno -> tiles
+TILE_SMALL_BOX_PX = 80.0
+# sobreposição entre tiles vizinhos (fração do lado)
+TILE_OVERLAP = 0.2
+# NMS: IOU pra considerar a mesma pessoa; interseção / área da menor pra
+# descartar o pedaço cortado na borda do tile
+MERGE_IOU = 0.5
+MERGE_IOS = 0.7
+
+Tile = Tuple[int, int, int, int]
+
+
+def plan_tiles(img_w: int, img_h: int, tile: int, overlap: float = TILE_OVERLAP) -> List[Tile]:
+    """Tiles (x1, y1, x2, y2) de lado `tile` cobrindo o frame, em ordem de leitura."""
+    def _starts(size: int) -> List[int]:
+        if size <= tile:
+            return [0]
+        stride = max(1, int(tile * (1.0 - overlap)))
+        n = int(np.ceil((size - tile) / stride)) + 1
+        # distribui por igual e o último encosta na borda
+        return [int(round(v)) for v in np.linspace(0, size - tile, n)]
+
+    return [
+        (x, y, min(img_w, x + tile), min(img_h, y + tile))
+        for y in _starts(img_h)
+        for x in _starts(img_w)
+    ]
+
+
+class TileScheduler:
+    """Quais tiles rodar em cada frame, dentro do orçamento."""
+
+    def __init__(self, budget: int, tile: int, overlap: float = TILE_OVERLAP):
+        self.budget = int(budget)
+        self.tile = int(tile)
+        self.overlap = float(overlap)
+        self._shape: Optional[Tuple[int, int]] = None
+        self._tiles: List[Tile] = []
+        self._cursor = 0
+
+    def tiles_for(self, shape: Sequence[int], bbox: Optional[np.ndarray]) -> List[Tile]:
+        if self.budget <= 0:
+            return []
+        h, w = int(shape[0]), int(shape[1])
+        if self._shape != (h, w):
+            self._shape = (h, w)
+            self._tiles = plan_tiles(w, h, self.tile, self.overlap)
+            self._cursor = 0
+        if len(self._tiles) <= 1:
+            # o frame já cabe num tile: zoom não acrescenta nada
+            return []
+        if len(self._tiles) <= self.budget:
+            return list(self._tiles)
+
+        if bbox is not None:
+            cx, cy = 0.5 * (bbox[0] + bbox[2]), 0.5 * (bbox[1] + bbox[3])
+            centers = np.array([[0.5 * (t[0] + t[2]), 0.5 * (t[1] + t[3])] for t in self._tiles])
+            order = np.argsort(np.hypot(centers[:, 0] - cx, centers[:, 1] - cy), kind="stable")
+            return [self._tiles[i] for i in order[: self.budget]]
+
+        n = len(self._tiles)
+        picked = [self._tiles[(self._cursor + k) % n] for k in range(self.budget)]
+        self._cursor = (self._cursor + self.budget) % n
+        return picked
+
+
+def merge_detections(
+    boxes: np.ndarray,
+    scores: np.ndarray,
+    iou_thr: float = MERGE_IOU,
+    ios_thr: float = MERGE_IOS,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """NMS guloso por score (e área) com IOU e interseção / área da menor."""
+    if len(boxes) == 0:
+        return boxes, scores
+    boxes = np.asarray(boxes, dtype=float)
+    scores = np.asarray(scores, dtype=float)
+    area = np.maximum(0.0, boxes[:, 2] - boxes[:, 0]) * np.maximum(0.0, boxes[:, 3] - boxes[:, 1])
+    # empate de score: a maior primeiro (a inteira vence o pedaço cortado)
+    order = np.lexsort((-area, -scores))
+    keep: List[int] = []
+    while len(order):
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        ix1 = np.maximum(boxes[i, 0], boxes[rest, 0])
+        iy1 = np.maximum(boxes[i, 1], boxes[rest, 1])
+        ix2 = np.minimum(boxes[i, 2], boxes[rest, 2])
+        iy2 = np.minimum(boxes[i, 3], boxes[rest, 3])
+        inter = np.maximum(0.0, ix2 - ix1) * np.maximum(0.0, iy2 - iy1)
+        iou = inter / np.maximum(1e-9, area[i] + area[rest] - inter)
+        ios = inter / np.maximum(1e-9, np.minimum(area[i], area[rest]))
+        order = rest[(iou < iou_thr) & (ios < ios_thr)]
+    keep_idx = np.asarray(keep, dtype=int)
+    return boxes[keep_idx], scores[keep_idx]
@@ -0,0 +1,159 @@
+# app/undistort.py
+"""
+Correção de distorção de lente só nos PONTOS (não nos frames).
+
+Celular / action cam têm distorção de barril forte, o que entorta todas as
+distâncias em pixel usadas nas métricas. Com os intrínsecos da câmera no
+request, as coordenadas (quadril, tornozelos, pontos da calibração) são
+levadas pra imagem sem distorção antes de virar metros.
+
+Em vez de rodar o cv2.undistortPoints (iterativo) a cada chamada, uma
+tabela distorcido -> sem distorção é montada UMA vez numa grade de pixels
+e guardada em cache por (intrínsecos, resolução); depois cada ponto é só
+uma interpolação bilinear na tabela, em lote.
+
+Formato no request ("intrinsics"):
+    {"fx": ..., "fy": ..., "cx": ..., "cy": ...,
+     "dist": [k1, k2, p1, p2, k3],          # coeficientes OpenCV
+     "width": 1920, "height": 1080}        # resolução da calibração (opcional)
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+# passo da grade da tabela (px); o mapa é suave, 8 px sobra
+GRID_STEP = 8
+
+
+@dataclass(frozen=True)
+class CameraIntrinsics:
+    fx: float
+    fy: float
+    cx: float
+    cy: float
+    dist: Tuple[float, ...]
+    width: int
+    height: int
+
+    @classmethod
+    def from_request(
+        cls, data: Dict[str, Any], frame_size: Tuple[int, int]
+    ) -> "CameraIntrinsics":
+        """
+        Lê do JSON. Se a calibração foi feita em outra resolução, reescala
+        fx/fy/cx/cy pra resolução do vídeo (mesma proporção).
+        """
+        w, h = int(frame_size[0]), int(frame_size[1])
+        try:
+            fx, fy = float(data["fx"]), float(data["fy"])
+            cx, cy = float(data["cx"]), float(data["cy"])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("intrinsics precisa de fx, fy, cx, cy numéricos.")
+        dist = tuple(float(v) for v in data.get("dist", ()))
+        if len(dist) not in (0, 4, 5, 8, 12, 14):
+            raise ValueError("intrinsics.dist deve ter 4, 5, 8, 12 ou 14 coeficientes.")
+
+        cw, ch = int(data.get("width", w) or w), int(data.get("height", h) or h)
+        if (cw, ch) != (w, h) and cw > 0 and ch > 0:
+            sx, sy = w / float(cw), h / float(ch)
+            fx, cx, fy, cy = fx * sx, cx * sx, fy * sy, cy * sy
+
+        return cls(fx=fx, fy=fy, cx=cx, cy=cy, dist=dist, width=w, height=h)
+
+    @property
+    def K(self) -> np.ndarray:
+        return np.array(
+            [[self.fx, 0.0, self.cx], [0.0, self.fy, self.cy], [0.0, 0.0, 1.0]],
+            dtype=np.float64,
+        )
+
+    @property
+    def has_distortion(self) -> bool:
+        return any(abs(v) > 0 for v in self.dist)
+
+
+@lru_cache(maxsize=8)
+def undistort_table(intr: CameraIntrinsics, step: int = GRID_STEP) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Tabela (cacheada) distorcido -> sem distorção numa grade de `step` px
+    cobrindo o frame inteiro: (map_x, map_y), cada um [Gy, Gx] em px da
+    imagem corrigida (mesma K, então as unidades continuam em pixel).
+    """
+    gx = np.arange(0, intr.width + step, step, dtype=np.float64)
+    gy = np.arange(0, intr.height + step, step, dtype=np.float64)
+    xx, yy = np.meshgrid(gx, gy)
+    pts = np.stack([xx.ravel(), yy.ravel()], axis=-1).reshape(-1, 1, 2)
+
+    und = cv2.undistortPoints(
+        pts, intr.K, np.asarray(intr.dist, dtype=np.float64), P=intr.K
+    ).reshape(len(gy), len(gx), 2)
+    map_x = np.ascontiguousarray(und[..., 0])
+    map_y = np.ascontiguousarray(und[..., 1])
+    map_x.setflags(write=False)
+    map_y.setflags(write=False)
+    return map_x, map_y
+
+
+def undistort_points(intr: Optional[CameraIntrinsics], pts: np.ndarray) -> np.ndarray:
+    """
+    Pontos [..., 2] em px distorcidos -> px sem distorção (bilinear na
+    tabela cacheada). NaN entra, NaN sai. Sem intrínsecos: devolve igual.
+    """
+    pts = np.asarray(pts, dtype=np.float64)
+    if intr is None or not intr.has_distortion:
+        return pts
+
+    map_x, map_y = undistort_table(intr)
+    step = float(GRID_STEP)
+    flat = pts.reshape(-1, 2)
+
+    u = np.clip(flat[:, 0] / step, 0.0, map_x.shape[1] - 1.000001)
+    v = np.clip(flat[:, 1] / step, 0.0, map_x.shape[0] - 1.000001)
+    valid = np.isfinite(u) & np.isfinite(v)
+    u = np.where(valid, u, 0.0)
+    v = np.where(valid, v, 0.0)
+
+    i0 = v.astype(np.intp)
+    j0 = u.astype(np.intp)
+    fu = (u - j0)[:, None]
+    fv = (v - i0)[:, None]
+
+    def _bilinear(m):
+        m = m[..., None]
+        top = m[i0, j0] * (1 - fu) + m[i0, j0 + 1] * fu
+        bot = m[i0 + 1, j0] * (1 - fu) + m[i0 + 1, j0 + 1] * fu
+        return (top * (1 - fv) + bot * fv)[:, 0]
+
+    out = np.stack([_bilinear(map_x), _bilinear(map_y)], axis=-1)
+    out[~valid] = np.nan
+    return out.reshape(pts.shape)
+
+
+def undistort_xy(
+    intr: Optional[CameraIntrinsics], x: np.ndarray, y: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Atalho pra séries x / y separadas."""
+    if intr is None or not intr.has_distortion:
+        return np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    out = undistort_points(intr, np.stack([x, y], axis=-1))
+    return out[..., 0], out[..., 1]
+
+
+def undistort_calib(intr: Optional[CameraIntrinsics], calib: Dict[str, Any]) -> Dict[str, Any]:
+    """Cópia do calib com os pontos clicados na imagem já corrigidos."""
+    if intr is None or not intr.has_distortion:
+        return calib
+    out = dict(calib)
+    for key in ("point1", "point2"):
+        if key in out:
+            out[key] = undistort_points(intr, np.asarray(out[key], dtype=float)).tolist()
+    if "image_points" in out:
+        out["image_points"] = undistort_points(
+            intr, np.asarray(out["image_points"], dtype=float)
+        ).tolist()
+    return out
@@ -1,17 +1,45 @@
 # app/video_utils.py
-from typing import Generator, Tuple
+from typing import Generator, Optional, Tuple
 import cv2
 import numpy as np
 
 
-def read_video_frames(path: str) -> Tuple[Generator, float, int, Tuple[int, int]]:
+def video_info(path: str) -> Tuple[float, int, Tuple[int, int]]:
+    """fps, nº de frames e (largura, altura) sem decodificar nada."""
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise RuntimeError(f"Não foi possível abrir o vídeo: {path}")
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH) or 0), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT) or 0))
+    finally:
+        cap.release()
+    return fps, frame_count, size
+
+
+def read_video_frames(
+    path: str,
+    start: int = 0,
+    end: Optional[int] = None,
+    step: int = 1,
+) -> Tuple[Generator, float, int, Tuple[int, int]]:
     """
     Lê o vídeo e retorna:
       - generator de frames (BGR, np.ndarray)
       - fps
       - número total de frames
       - (largura, altura)
+
+    `start` / `end` limitam o generator aos frames [start, end) (usado pra
+    processar o vídeo em trechos); o frame_count continua sendo o do vídeo.
+
+    `step` > 1: só 1 a cada `step` frames (fps de análise menor). Tudo
+    passa a ser em frames ANALISADOS: fps / step, frame_count / step e
+    start / end nessa escala. Os frames pulados só são `grab`-ados (sem
+    converter pra BGR).
     """
+    step = max(1, int(step))
     cap = cv2.VideoCapture(path)
     if not cap.isOpened():
         raise RuntimeError(f"Não foi possível abrir o vídeo: {path}")
@@ -21,13 +49,25 @@ def read_video_frames(path: str) -> Tuple[Generator, float, int, Tuple[int, int]
     width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH) or 0)
     height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT) or 0)
 
+    if step > 1:
+        fps = fps / step
+        frame_count = -(-frame_count // step)
+
+    if start > 0:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, int(start) * step)
+
     def _frames() -> Generator[np.ndarray, None, None]:
+        idx = int(start)
         try:
-            while True:
+            while end is None or idx < end:
                 ret, frame = cap.read()
                 if not ret:
                     break
+                idx += 1
                 yield frame
+                for _ in range(step - 1):
+                    if not cap.grab():
+                        return
         finally:
             cap.release()
 
@@ -0,0 +1,145 @@
+# benchmarks/bench_biomechanics.py
+"""
+Ângulos articulares: engine vetorizada vs loop por frame.
+
+Monta um esqueleto COCO-17 sintético de perfil com ângulos CONHECIDOS
+(joelho, quadril, cotovelo oscilando, tronco inclinado), com ruído e
+juntas de score baixo, e mede:
+
+  - erro dos ângulos recuperados vs os verdadeiros (graus);
+  - que juntas abaixo de METRICS_CFG.kpt_score_thr viram NaN;
+  - tempo de `compute_biomechanics` vs um loop por frame equivalente
+    (só os ângulos, sem derivada).
+
+Uso (de dentro de AthleteAnalysis-RunPod/):
+    python -m benchmarks.bench_biomechanics --frames 100000
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from app.biomechanics import ANGLE_TRIPLETS, compute_biomechanics, joint_angles
+from app.config import METRICS_CFG, POSE_IDXS
+
+FPS = 60.0
+
+
+def _limb(origin, angle_rad, length):
+    """Ponto a `length` px de `origin` na direção do ângulo (0 = pra baixo)."""
+    return origin + length * np.stack([np.sin(angle_rad), np.cos(angle_rad)], axis=-1)
+
+
+def _synthetic_skeleton(n, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(n) / FPS
+    phase = 2 * np.pi * 1.6 * t
+
+    truth = {
+        "left_knee": 60.0 + 40.0 * np.sin(phase),
+        "right_knee": 60.0 - 40.0 * np.sin(phase),
+        "left_hip": 30.0 + 25.0 * np.sin(phase + 0.5),
+        "right_hip": 30.0 - 25.0 * np.sin(phase + 0.5),
+        "left_elbow": 90.0 + 10.0 * np.sin(phase),
+        "right_elbow": 90.0 - 10.0 * np.sin(phase),
+        "trunk_lean": 10.0 + 3.0 * np.sin(2 * phase),
+    }
+
+    xy = np.zeros((n, 17, 2))
+    hip = np.stack([200.0 + 4.0 * np.arange(n), np.full(n, 500.0)], axis=-1)
+    lean = np.radians(truth["trunk_lean"])
+    # tronco: ombros acima do quadril, inclinados pra frente (+x)
+    shoulder = hip + 180.0 * np.stack([np.sin(lean), -np.cos(lean)], axis=-1)
+    trunk_dir = np.arctan2(shoulder[:, 0] - hip[:, 0], shoulder[:, 1] - hip[:, 1])
+
+    for side, (s_idx, e_idx, w_idx, h_idx, k_idx, a_idx) in {
+        "left": (POSE_IDXS.LEFT_SHOULDER, POSE_IDXS.LEFT_ELBOW, POSE_IDXS.LEFT_WRIST,
+                 POSE_IDXS.LEFT_HIP, POSE_IDXS.LEFT_KNEE, POSE_IDXS.LEFT_ANKLE),
+        "right": (POSE_IDXS.RIGHT_SHOULDER, POSE_IDXS.RIGHT_ELBOW, POSE_IDXS.RIGHT_WRIST,
+                  POSE_IDXS.RIGHT_HIP, POSE_IDXS.RIGHT_KNEE, POSE_IDXS.RIGHT_ANKLE),
+    }.items():
+        # coxa: flexão do quadril = desvio do prolongamento do tronco
+        thigh = trunk_dir + np.pi + np.radians(truth[f"{side}_hip"])
+        knee = _limb(hip, thigh, 200.0)
+        # canela: flexão do joelho = desvio do prolongamento da coxa
+        shank = thigh - np.radians(truth[f"{side}_knee"])
+        ankle = _limb(knee, shank, 200.0)
+        upper = np.zeros(n)                                       # braço reto pra baixo
+        elbow = _limb(shoulder, upper, 130.0)
+        wrist = _limb(elbow, upper + np.radians(truth[f"{side}_elbow"]), 120.0)
+        xy[:, h_idx], xy[:, k_idx], xy[:, a_idx] = hip, knee, ankle
+        xy[:, s_idx], xy[:, e_idx], xy[:, w_idx] = shoulder, elbow, wrist
+
+    xy += rng.normal(0, 0.5, xy.shape)
+    scores = np.full((n, 17), 0.9)
+    low = rng.random((n, 17)) < 0.03
+    scores[low] = 0.1
+    return xy, scores, truth, low
+
+
+def _loop_angles(xy, scores, thr):
+    """Referência: um frame por vez, do jeito ingênuo."""
+    out = {name: [] for name in ANGLE_TRIPLETS}
+    for t in range(len(xy)):
+        for name, (a, b, c) in ANGLE_TRIPLETS.items():
+            if min(scores[t, a], scores[t, b], scores[t, c]) < thr:
+                out[name].append(np.nan)
+                continue
+            u = xy[t, a] - xy[t, b]
+            v = xy[t, c] - xy[t, b]
+            cos = np.dot(u, v) / (np.linalg.norm(u) * np.linalg.norm(v))
+            out[name].append(180.0 - np.degrees(np.arccos(np.clip(cos, -1, 1))))
+    return {k: np.asarray(v) for k, v in out.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=100_000)
+    parser.add_argument("--loop-frames", type=int, default=20_000,
+                        help="frames do loop de referência (é lento)")
+    args = parser.parse_args()
+
+    n = args.frames
+    xy, scores, truth, low = _synthetic_skeleton(n)
+    thr = METRICS_CFG.kpt_score_thr
+
+    t0 = time.perf_counter()
+    bio = compute_biomechanics(xy, scores, FPS, step_events=np.arange(0, n, 20))
+    t_vec = time.perf_counter() - t0
+
+    angles = joint_angles(xy, scores)
+    ok = True
+    print(f"frames={n}")
+    for name, ref in truth.items():
+        a = angles[name]
+        err = np.nanmax(np.abs(a - ref))
+        nan_frac = np.mean(np.isnan(a))
+        print(f"  {name:12s} erro máx={err:5.2f}°  NaN={100 * nan_frac:4.1f}%  "
+              f"pico vel.={bio['angles'][name]['peak_angular_velocity_deg_s']:.0f}°/s")
+        ok &= err < 3.0  # ruído de 0.5 px nos segmentos curtos (antebraço)
+
+    # mascaramento: toda junta de score baixo apaga os ângulos que a usam
+    for name, (a, b, c) in ANGLE_TRIPLETS.items():
+        must_nan = low[:, a] | low[:, b] | low[:, c]
+        ok &= bool(np.all(np.isnan(angles[name][must_nan])))
+
+    m = min(args.loop_frames, n)
+    t0 = time.perf_counter()
+    loop = _loop_angles(xy[:m], scores[:m], thr)
+    t_loop = (time.perf_counter() - t0) * n / m
+    for name in ANGLE_TRIPLETS:
+        ok &= np.allclose(loop[name], angles[name][:m], atol=1e-6, equal_nan=True)
+
+    print(f"vetorizado (ângulos + velocidades + eventos): {1000.0 * t_vec:8.1f} ms")
+    print(f"loop por frame (só ângulos, extrapolado):     {1000.0 * t_loop:8.1f} ms  "
+          f"({t_loop / max(t_vec, 1e-9):.0f}x)")
+    if not ok:
+        print("FALHA: ângulo fora da tolerância, máscara de score ou divergência do loop")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
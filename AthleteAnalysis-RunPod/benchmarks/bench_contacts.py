@@ -0,0 +1,114 @@
+# benchmarks/bench_contacts.py
+"""
+Contato com o solo / voo por passo em corrida sintética com gabarito.
+
+Gera tornozelos de um sprint com fases CONHECIDAS (apoio no chão, balanço
+em arco), ruído e falhas de detecção preenchidas como no pipeline
+(repete o último valor), e mede:
+
+  - passos encontrados vs verdadeiros;
+  - erro médio / máximo de tempo de contato e de voo por passo (ms);
+  - fator de carga médio vs o verdadeiro;
+  - tempo de `compute_ground_contacts` por 1000 frames.
+
+Uso (de dentro de AthleteAnalysis-RunPod/):
+    python -m benchmarks.bench_contacts --fps 120 --seconds 60
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from app.contacts import compute_ground_contacts
+
+SCALE = 0.005      # m/px
+FLOOR_Y = 700.0    # px
+
+
+def _ffill(y):
+    """Repete o último valor nas falhas (como assemble_series)."""
+    idx = np.where(np.isnan(y), 0, np.arange(len(y)))
+    return y[np.maximum.accumulate(idx)]
+
+
+def _synthetic_sprint(fps, seconds, tc=0.11, tf=0.12, seed=0):
+    """Tornozelos [T] (y da imagem) + gabarito dos apoios."""
+    rng = np.random.default_rng(seed)
+    n = int(seconds * fps)
+    t = np.arange(n) / fps
+    step = tc + tf
+    stride = 2 * step
+    swing = stride - tc
+    clearance_px = 0.30 / SCALE
+
+    truth = []
+    ys = []
+    for k, offset in enumerate((0.0, step)):
+        # fase dentro da passada do pé: [0, tc) apoio, [tc, stride) balanço
+        phase = np.mod(t - offset - 0.5, stride)
+        in_swing = phase >= tc
+        u = np.clip((phase - tc) / swing, 0, 1)
+        # pé sai e volta do chão com velocidade (sem "descolar" devagar)
+        y = FLOOR_Y - in_swing * clearance_px * np.sin(np.pi * u)
+        y = y + rng.normal(0, 0.8, n)
+        ys.append(y)
+        td = np.arange(offset + 0.5, seconds, stride)
+        truth += [(s, k) for s in td]
+    truth.sort()
+
+    for y in ys:
+        drop = rng.random(n) < 0.03
+        y[drop] = np.nan
+    return [_ffill(y) for y in ys], np.asarray([s for s, _ in truth]), tc, tf
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fps", type=float, default=120.0)
+    parser.add_argument("--seconds", type=float, default=60.0)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    (la_y, ra_y), td_true, tc, tf = _synthetic_sprint(args.fps, args.seconds)
+    n = len(la_y)
+
+    t0 = time.perf_counter()
+    for _ in range(args.repeats):
+        res = compute_ground_contacts(la_y, ra_y, SCALE, args.fps)
+    elapsed = (time.perf_counter() - t0) / args.repeats
+
+    contacts = res["contacts"]
+    td = np.asarray([c["touchdown_frame"] for c in contacts]) / args.fps
+    tc_est = np.asarray([c["contact_time_s"] for c in contacts], dtype=float)
+    tf_est = np.asarray([c["flight_time_s"] for c in contacts], dtype=float)
+
+    # casa cada toque detectado com o verdadeiro mais próximo
+    j = np.clip(np.searchsorted(td_true, td), 1, len(td_true) - 1)
+    nearest = np.where(np.abs(td_true[j - 1] - td) < np.abs(td_true[j] - td), j - 1, j)
+    matched = np.abs(td_true[nearest] - td) < 0.5 * (tc + tf)
+    inside = (td_true > 1.0 / args.fps) & (td_true < (n - 2) / args.fps)
+
+    err_tc = np.abs(tc_est[matched] - tc) * 1000.0
+    err_tf = np.abs(tf_est[matched] - tf)[np.isfinite(tf_est[matched])] * 1000.0
+    duty_true = tc / (2 * (tc + tf))
+
+    print(f"fps={args.fps:.0f}  frames={n}  passos verdadeiros={inside.sum()}  "
+          f"detectados={len(contacts)}  casados={matched.sum()}")
+    print(f"contato: real={1000 * tc:.0f} ms  erro médio={err_tc.mean():.1f} ms  máx={err_tc.max():.1f} ms")
+    print(f"voo:     real={1000 * tf:.0f} ms  erro médio={err_tf.mean():.1f} ms  máx={err_tf.max():.1f} ms")
+    print(f"fator de carga: real={duty_true:.3f}  estimado={res['duty_factor_mean']:.3f}")
+    print(f"tempo: {1000.0 * elapsed:.2f} ms  ({1000.0 * elapsed * 1000 / n:.3f} ms / 1000 frames)")
+
+    # tolerância: 2 frames, mas nunca abaixo de 20 ms (limiares de apoio)
+    tol_ms = max(2000.0 / args.fps, 20.0)
+    ok = matched.sum() >= 0.95 * inside.sum() and err_tc.mean() < tol_ms and err_tf.mean() < tol_ms
+    if not ok:
+        print(f"FALHA: passos perdidos ou erro de tempo acima de {tol_ms:.0f} ms")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
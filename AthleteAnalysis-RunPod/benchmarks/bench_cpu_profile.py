@@ -0,0 +1,113 @@
+# benchmarks/bench_cpu_profile.py
+"""
+Throughput do perfil só-CPU (ATHLETE_PROFILE=cpu) por nº de cores.
+
+Para cada contagem de threads sobe um processo novo (threads e afinidade
+precisam ser definidas antes de carregar os modelos) que roda o
+`process_video` completo num clipe e reporta frames/s. Também confere que
+nenhum contexto CUDA foi criado.
+
+Sem --video usa um clipe sintético (retângulos: mede custo do detector e
+do laço; passe um vídeo real pra medir pose/ReID também).
+
+OMP / MKL / OpenBLAS só leem o nº de threads no import: o processo novo já
+recebe as variáveis no ambiente (como o ENV da imagem / o set_thread_env
+dos pontos de entrada) e reporta o que valeu de fato (torch e OpenCV).
+
+Uso (de dentro de AthleteAnalysis-RunPod/):
+    python -m benchmarks.bench_cpu_profile --threads 1 2 4 8 --frames 150
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from app.runtime import _THREAD_ENV_VARS
+from benchmarks.synthetic import SYNTHETIC_CALIB, SyntheticScene, write_synthetic_clip
+
+
+def _worker(video: str) -> None:
+    from app.config import MODEL_CFG
+    from app.models import get_rtmpose_model, get_yolo_detector
+    from app.pipeline import process_video
+
+    t0 = time.perf_counter()
+    get_yolo_detector()
+    get_rtmpose_model()
+    load_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    result = process_video(video, SYNTHETIC_CALIB)
+    run_s = time.perf_counter() - t0
+
+    import cv2
+
+    torch = sys.modules.get("torch")
+    cuda_initialized = bool(torch is not None and torch.cuda.is_initialized())
+    n = len(result["series"]["frames"])
+    print(json.dumps({
+        "device": MODEL_CFG.device,
+        "threads": MODEL_CFG.intra_op_threads,
+        "cores": MODEL_CFG.cpu_affinity,
+        "frames": n,
+        "load_s": load_s,
+        "run_s": run_s,
+        "fps": n / run_s if run_s > 0 else 0.0,
+        "cuda_initialized": cuda_initialized,
+        "omp_env": os.environ.get("OMP_NUM_THREADS"),
+        "torch_threads": torch.get_num_threads() if torch is not None else None,
+        "cv2_threads": cv2.getNumThreads(),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--frames", type=int, default=150)
+    parser.add_argument("--video", type=str, default=None)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        _worker(args.video)
+        return
+
+    video = args.video
+    if video is None:
+        video = os.path.join(tempfile.mkdtemp(), "synthetic.mp4")
+        write_synthetic_clip(video, SyntheticScene(n_frames=args.frames))
+
+    failed = []
+    for n in args.threads:
+        env = dict(os.environ, ATHLETE_PROFILE="cpu", ATHLETE_THREADS=str(n))
+        env.update({var: str(n) for var in _THREAD_ENV_VARS})
+        proc = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_cpu_profile", "--worker", "--video", video],
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        if proc.returncode != 0:
+            print(f"threads={n}: FALHOU\n{proc.stderr[-2000:]}")
+            failed.append(n)
+            continue
+        r = json.loads(proc.stdout.strip().splitlines()[-1])
+        print(
+            f"threads={n:3d}  {r['fps']:7.2f} frames/s  "
+            f"({r['fps'] / n:6.2f} por core)  carga {r['load_s']:.1f}s  "
+            f"cuda_init={r['cuda_initialized']}  threads torch={r['torch_threads']} "
+            f"cv2={r['cv2_threads']} OMP={r['omp_env']}"
+        )
+
+    if failed:
+        print(f"REGRESSÃO: worker falhou com threads={failed}")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+# benchmarks/bench_crops.py
+"""
+Benchmark do pré-processamento de ReID + pose por frame.
+
+Compara o caminho antigo (crop por candidato -> PIL Resize -> ToTensor,
+crop expandido -> upscale bicúbico em PIL -> warp do RTMPose) com o
+`FrameCrops` (um resize OpenCV por região em buffer pré-alocado + warp
+único do frame pra pose).
+
+Não precisa de modelos: mede só a preparação das entradas.
+
+Uso (de dentro de AthleteAnalysis-RunPod/):
+    python -m benchmarks.bench_crops --frames 200 --candidates 6
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from app.crops import FrameCrops, REID_INPUT_HW, expand_bbox, pose_scale_for_height
+
+POSE_INPUT_WH = (288, 384)
+_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32).reshape(3, 1, 1)
+_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32).reshape(3, 1, 1)
+
+
+def _synthetic_boxes(rng, n, img_w, img_h):
+    h = rng.uniform(60, 400, size=n)
+    w = h * rng.uniform(0.3, 0.5, size=n)
+    x1 = rng.uniform(0, img_w - w)
+    y1 = rng.uniform(0, img_h - h)
+    return np.stack([x1, y1, x1 + w, y1 + h], axis=1)
+
+
+def _pose_warp(img, region):
+    # mesmo que o top_down_affine do rtmlib: região -> entrada do modelo
+    x1, y1, x2, y2 = region
+    src = np.float32([[x1, y1], [x2, y1], [x1, y2]])
+    w, h = POSE_INPUT_WH
+    dst = np.float32([[0, 0], [w, 0], [0, h]])
+    m = cv2.getAffineTransform(src, dst)
+    return cv2.warpAffine(img, m, (w, h), flags=cv2.INTER_LINEAR)
+
+
+def legacy_frame(frame, boxes):
+    img_h, img_w = frame.shape[:2]
+    pil_calls = 0
+    tensors = []
+    for b in boxes:
+        x1, y1, x2, y2 = map(int, b)
+        crop = frame[y1:y2, x1:x2][..., ::-1]
+        img = Image.fromarray(crop.astype("uint8"))
+        img = img.resize((REID_INPUT_HW[1], REID_INPUT_HW[0]), Image.BILINEAR)
+        pil_calls += 1
+        t = np.asarray(img, dtype=np.float32).transpose(2, 0, 1) / 255.0
+        tensors.append((t - _MEAN) / _STD)
+    batch = np.stack(tensors)
+
+    bbox = boxes[0]
+    xe1, ye1, xe2, ye2 = expand_bbox(bbox, img_w, img_h, pose_scale_for_height(bbox[3] - bbox[1]))
+    crop = frame[ye1:ye2, xe1:xe2]
+    h, w = crop.shape[:2]
+    if h < 320:
+        scale = min(3.0, 320 / float(h))
+        crop = np.array(
+            Image.fromarray(crop).resize((int(round(w * scale)), int(round(h * scale))), Image.BICUBIC)
+        )
+        pil_calls += 1
+    pose_in = _pose_warp(crop, (0, 0, crop.shape[1], crop.shape[0]))
+    return batch, pose_in, pil_calls
+
+
+def crops_frame(crops, frame, boxes):
+    crops.set_frame(frame)
+    batch_u8, _ = crops.reid_batch(boxes)
+    x = np.ascontiguousarray(batch_u8.transpose(0, 3, 1, 2), dtype=np.float32)
+    x *= 1.0 / 255.0
+    x -= _MEAN[None]
+    x /= _STD[None]
+
+    bbox = boxes[0]
+    region = crops.pose_region(bbox, pose_scale_for_height(bbox[3] - bbox[1]))
+    pose_in = _pose_warp(frame, region)
+    return x, pose_in, 0
+
+
+def _run(name, fn, frames, boxes_per_frame):
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    pil_calls = 0
+    t0 = time.perf_counter()
+    for frame, boxes in zip(frames, boxes_per_frame):
+        _, _, p = fn(frame, boxes)
+        pil_calls += p
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    n = len(frames)
+    print(
+        f"{name:8s} {1000.0 * elapsed / n:8.3f} ms/frame  "
+        f"pico tracemalloc {peak / 1e6:7.2f} MB  "
+        f"PIL/frame {pil_calls / n:4.1f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--candidates", type=int, default=6)
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    base = rng.integers(0, 255, size=(args.height, args.width, 3), dtype=np.uint8)
+    frames = [np.roll(base, i, axis=1) for i in range(min(args.frames, 8))]
+    frames = [frames[i % len(frames)] for i in range(args.frames)]
+    boxes = [_synthetic_boxes(rng, args.candidates, args.width, args.height) for _ in frames]
+
+    crops = FrameCrops()
+    _run("legacy", legacy_frame, frames, boxes)
+    _run("crops", lambda f, b: crops_frame(crops, f, b), frames, boxes)
+    print(f"resizes OpenCV: {crops.resize_calls}  realocações do buffer: {crops.buffer_grows}")
+
+
+if __name__ == "__main__":
+    main()
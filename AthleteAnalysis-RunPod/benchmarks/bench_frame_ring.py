@@ -0,0 +1,170 @@
+# benchmarks/bench_frame_ring.py
+"""
+Ring de frames em shared memory vs multiprocessing.Queue.
+
+Um processo decodificador lê um clipe sintético 1080p e entrega cada frame
+a N processos consumidores (detecção, pose, ReID simulados com o mesmo
+pré-processamento OpenCV de cada estágio):
+
+  - queue: o frame inteiro vai por `mp.Queue` pra cada consumidor
+    (pickle no produtor + unpickle no consumidor = 2 cópias por estágio);
+  - ring:  o decodificador escreve no slot do `FrameRing` e os consumidores
+    recebem só (slot, frame_idx) e leem uma view.
+
+As cópias são MEDIDAS: no consumidor, frame que não compartilha memória
+com o ring conta como cópia; no decodificador, `decoded_in_place` vs
+`copied_writes` vem dos contadores do ring.
+
+Não precisa de modelos.
+
+Uso (de dentro de AthleteAnalysis-RunPod/):
+    python -m benchmarks.bench_frame_ring --frames 300 --slots 8
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from app.frame_ring import FrameRing, decode_to_ring, iter_ring_frames
+from app.video_utils import read_video_frames
+from benchmarks.synthetic import SyntheticScene, write_synthetic_clip
+
+STAGES = ("detection", "pose", "reid")
+
+
+def _stage_work(stage: str, frame: np.ndarray) -> float:
+    """Pré-processamento típico de cada estágio (sem o modelo)."""
+    h, w = frame.shape[:2]
+    if stage == "detection":
+        out = cv2.resize(frame, (640, int(640 * h / w)), interpolation=cv2.INTER_LINEAR)
+    elif stage == "pose":
+        src = np.float32([[w * 0.4, h * 0.2], [w * 0.6, h * 0.2], [w * 0.4, h * 0.9]])
+        dst = np.float32([[0, 0], [288, 0], [0, 384]])
+        out = cv2.warpAffine(frame, cv2.getAffineTransform(src, dst), (288, 384))
+    else:
+        out = cv2.resize(frame[h // 4: h // 2, w // 3: w // 2], (128, 256))
+    return float(out[0, 0, 0])
+
+
+# ------------------------------------------------------------
+# baseline: mp.Queue com o frame inteiro
+# ------------------------------------------------------------
+def _queue_decoder(path, queues):
+    frame_gen, _, _, _ = read_video_frames(path)
+    for frame in frame_gen:
+        for q in queues:
+            q.put(frame)
+    for q in queues:
+        q.put(None)
+
+
+def _queue_consumer(stage, q, out):
+    n = copies = 0
+    while True:
+        frame = q.get()
+        if frame is None:
+            break
+        _stage_work(stage, frame)
+        n += 1
+        copies += 2  # pickle no produtor + array novo no unpickle
+    out.put((stage, n, copies))
+
+
+# ------------------------------------------------------------
+# ring em shared memory
+# ------------------------------------------------------------
+def _ring_consumer(stage, spec, sync, q, out):
+    ring = FrameRing.attach(spec, sync)
+    n = copies = 0
+    for _, frame in iter_ring_frames(ring, q):
+        _stage_work(stage, frame)
+        n += 1
+        if not np.shares_memory(frame, ring.frames):
+            copies += 1
+    del frame
+    out.put((stage, n, copies))
+    ring.close()
+
+
+def _run(ctx, mode, path, shape, n_slots):
+    out = ctx.Queue()
+    queues = [ctx.Queue(maxsize=n_slots) for _ in STAGES]
+    ring = None
+
+    if mode == "queue":
+        producer = ctx.Process(target=_queue_decoder, args=(path, queues))
+        consumers = [
+            ctx.Process(target=_queue_consumer, args=(st, q, out))
+            for st, q in zip(STAGES, queues)
+        ]
+    else:
+        ring = FrameRing.create(n_slots, shape, n_consumers=len(STAGES), ctx=ctx)
+        producer = ctx.Process(
+            target=decode_to_ring, args=(path, ring.spec(), ring.sync(), queues)
+        )
+        consumers = [
+            ctx.Process(target=_ring_consumer, args=(st, ring.spec(), ring.sync(), q, out))
+            for st, q in zip(STAGES, queues)
+        ]
+
+    for p in consumers:
+        p.start()
+    t0 = time.perf_counter()
+    producer.start()
+    per_stage = dict((st, (n, c)) for st, n, c in (out.get() for _ in STAGES))
+    elapsed = time.perf_counter() - t0
+    producer.join()
+    for p in consumers:
+        p.join()
+
+    ring_stats = None
+    if ring is not None:
+        ring_stats = ring.stats()
+        ring.close()
+    return elapsed, per_stage, ring_stats
+
+
+def main():
+    import multiprocessing as mp
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--slots", type=int, default=8)
+    args = parser.parse_args()
+
+    scene = SyntheticScene(n_frames=args.frames, img_w=args.width, img_h=args.height)
+    path = os.path.join(tempfile.mkdtemp(), "ring_clip.mp4")
+    write_synthetic_clip(path, scene)
+    shape = (args.height, args.width, 3)
+    frame_mb = np.prod(shape) / 1e6
+
+    ctx = mp.get_context("spawn")
+    for mode in ("queue", "ring"):
+        elapsed, per_stage, ring_stats = _run(ctx, mode, path, shape, args.slots)
+        n = max(n for n, _ in per_stage.values())
+        print(f"{mode:5s}: {n / elapsed:7.1f} frames/s  ({1000.0 * elapsed / n:.2f} ms/frame)")
+        for st in STAGES:
+            fn, copies = per_stage[st]
+            print(
+                f"   {st:9s} cópias/frame={copies / max(1, fn):.2f}  "
+                f"({copies * frame_mb / max(1, fn):.1f} MB/frame)"
+            )
+        if ring_stats is not None:
+            print(
+                f"   decoder   escritos={ring_stats['frames_written']} "
+                f"no slot={ring_stats['decoded_in_place']} "
+                f"com cópia={ring_stats['copied_writes']}  "
+                f"memória fixa={args.slots * frame_mb:.1f} MB"
+            )
+
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
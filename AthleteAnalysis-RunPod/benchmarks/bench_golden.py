@@ -0,0 +1,386 @@
+# benchmarks/bench_golden.py
+"""
+Saídas "golden": regressão das MÉTRICAS (não do tempo) do process_video.
+
+Cenários determinísticos (clipes sintéticos + modelos stub, nada de
+YOLO / RTMPose de verdade) rodam o pipeline inteiro; cada resultado vira
+um snapshot:
+
+  - campos: todo número / bool / None fora das séries (velocidade,
+    cinemática, passada, saltos, contatos, ângulos...), listas de eventos
+    achatadas ("stride.step_events[3]") com a contagem em ".count";
+  - séries: as séries por frame (quadril, tornozelos, velocidade,
+    distância, passos), fora dos campos, comparadas por RMS da diferença;
+  - custo: segundos e chamadas de modelo (stubs "custam" GFLOPs numa
+    vazão fixa), só pra mostrar o ganho.
+
+As goldens ficam em benchmarks/golden/<cenário>.json. A comparação usa
+tolerância por métrica (TOLERANCES: padrão glob -> absoluta + relativa,
+a primeira que casar vale; SERIES_RMS pras séries) e imprime, por
+métrica que mudou, o maior delta e quanto da tolerância ele usa
+(`--verbose`: cada campo). Uma otimização passa se nenhuma métrica sair da
+tolerância; o ganho aparece como speedup / chamadas vs a golden.
+`--tier-set chave=valor` troca campos do nível (ex.: detect_stride=2,
+motion_gate=false) pra julgar a otimização contra a golden do padrão.
+
+Goldens dependem do encoder mp4 do OpenCV (o clipe é gravado na hora):
+mudou a versão e tudo deslocou um pouco -> `--record` de novo, com o
+diff revisado.
+
+Uso (de dentro de AthleteAnalysis-RunPod/):
+    python -m benchmarks.bench_golden
+    python -m benchmarks.bench_golden --scenario run_precise --tier-set detect_stride=2
+    python -m benchmarks.bench_golden --record
+"""
+
+import argparse
+import fnmatch
+import json
+import math
+import os
+import re
+import sys
+import tempfile
+import time
+from dataclasses import replace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+import app.pipeline as pipeline
+from app.models import MODEL_REGISTRY, detector_key, pose_key
+from app.quality import DETECTOR_GFLOPS, POSE_GFLOPS, QUALITY_TIERS, _YOLO_SIZES, _yolo_rank, get_quality_tier
+from benchmarks.bench_keyframes import FPS as JUMP_FPS
+from benchmarks.bench_keyframes import BODY, FootPose, JumpScene, _write_clip
+from benchmarks.bench_quality_tiers import StubDetector, StubPose
+from benchmarks.synthetic import (
+    SYNTHETIC_CALIB,
+    StubReIDEncoder,
+    SyntheticScene,
+    write_synthetic_clip,
+)
+
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden")
+GFLOPS_PER_S = 20000.0
+
+# homografia com perspectiva leve (pista mais estreita no fundo da imagem)
+HOMOGRAPHY_CALIB = {
+    "image_points": [[0.0, 300.0], [1280.0, 300.0], [1280.0, 720.0], [0.0, 720.0]],
+    "world_points_m": [[0.0, 6.0], [14.0, 6.0], [12.8, 0.0], [1.2, 0.0]],
+}
+
+# (padrão glob da métrica, tolerância absoluta, relativa) - a primeira que
+# casar vale. Métrica = campo sem os índices de lista
+# ("jumps[0].jump_apex_frame" -> "jumps.jump_apex_frame").
+TOLERANCES: Tuple[Tuple[str, float, float], ...] = (
+    ("*.count", 0.0, 0.0),                 # nº de eventos: exato
+    ("step_count_total", 0.0, 0.0),
+    ("*stride_count", 0.0, 0.0),
+    ("*has_jump", 0.0, 0.0),
+    ("*_frame", 1.0, 0.0),                 # frames de evento: +-1
+    ("*step_events", 1.0, 0.0),
+    ("*frames_subframe", 1.0, 0.0),
+    ("biomechanics.events.*", 1.0, 0.0),
+    ("*angular_velocity*", 1.0, 0.05),     # velocidade angular (derivada)
+    ("*_deg*", 0.5, 0.02),                 # ângulos
+    ("*_pct", 1.0, 0.05),                  # assimetrias
+    ("*_m_s2", 0.25, 0.05),                # aceleração (derivada segunda)
+    ("*", 1e-3, 0.01),                     # resto: 1 % (ou 1 mm / 1 ms)
+)
+
+# RMS máximo da diferença por série por frame (caminho no resultado ->
+# unidade da série); séries fora dos campos, uma diferença local num
+# trecho não reprova sozinha
+SERIES_RMS: Dict[str, float] = {
+    "series.hip_x": 1.5,                   # px
+    "series.hip_y": 1.5,
+    "series.LA_x": 3.0,
+    "series.RA_x": 3.0,
+    "series.speed_m_s": 0.05,              # m/s
+    "series.distance_cum_m": 0.05,         # m
+    "series.step_count": 0.5,
+    "speed.speed_series_m_s": 0.05,
+    "speed.distance_per_frame_m": 0.002,
+    "speed.distance_series_cum_m": 0.05,
+}
+
+# blocos fora do snapshot: custo / estado interno, mudam com otimização
+_SKIP = {"series", "quality", "reid", "sharding", "overlay", "keyframes", "progressive"}
+
+
+# ============================================================
+#                        CENÁRIOS
+# ============================================================
+
+def _install(colors, pose_factory: Callable[[float], Any]) -> None:
+    """Stubs de detector / pose pra todas as variantes dos níveis (troca os anteriores)."""
+    for name in QUALITY_TIERS:
+        tier = get_quality_tier(name)
+        g = DETECTOR_GFLOPS[_YOLO_SIZES[max(0, _yolo_rank(tier.detector_weights))]]
+        MODEL_REGISTRY.evict(detector_key(tier.detector_weights))
+        MODEL_REGISTRY.evict(pose_key(tier.pose_variant))
+        MODEL_REGISTRY.get(
+            detector_key(tier.detector_weights),
+            lambda g=g: StubDetector(colors, g, GFLOPS_PER_S),
+            sizer=lambda _: 0,
+        )
+        MODEL_REGISTRY.get(
+            pose_key(tier.pose_variant),
+            lambda v=tier.pose_variant: pose_factory(POSE_GFLOPS[v]),
+            sizer=lambda _: 0,
+        )
+    pipeline.compute_reid_embeddings = StubReIDEncoder()
+
+
+def _run_clip(tmp: str) -> Tuple[str, Tuple[float, float]]:
+    scene = SyntheticScene(n_frames=240, occlusions=[(80, 95), (170, 180)])
+    _install(scene.colors, lambda g: StubPose(scene.colors[0], g, GFLOPS_PER_S))
+    b0 = scene.true_boxes(0)[0]
+    ref = (float(0.5 * (b0[0] + b0[2])), float(0.5 * (b0[1] + b0[3])))
+    return write_synthetic_clip(os.path.join(tmp, "run.mp4"), scene, fps=60.0), ref
+
+
+def _jump_clip(tmp: str) -> Tuple[str, Tuple[float, float]]:
+    scene = JumpScene(300)
+    _install(scene.colors, lambda g: FootPose(BODY, g, GFLOPS_PER_S))
+    b0 = scene.body(0)
+    ref = (float(0.5 * (b0[0] + b0[2])), float(0.5 * (b0[1] + b0[3])))
+    return _write_clip(os.path.join(tmp, "jump.mp4"), scene), ref
+
+
+# nome -> (clipe, calibração, nível)
+SCENARIOS: Dict[str, Tuple[Callable[[str], Tuple[str, Tuple[float, float]]], Dict[str, Any], str]] = {
+    "run_precise": (_run_clip, SYNTHETIC_CALIB, "precise"),
+    "run_preview": (_run_clip, SYNTHETIC_CALIB, "preview"),
+    "jump_standard": (_jump_clip, SYNTHETIC_CALIB, "standard"),
+    "jump_homography": (_jump_clip, HOMOGRAPHY_CALIB, "precise"),
+}
+assert JUMP_FPS == 60.0
+
+
+def run_scenario(name: str, tier_set: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, Any], float]:
+    """process_video do cenário (com campos do nível trocados) -> (resultado, segundos)."""
+    make_clip, calib, quality = SCENARIOS[name]
+    tier = get_quality_tier(quality)
+    if tier_set:
+        tier = replace(tier, **tier_set)
+    with tempfile.TemporaryDirectory() as tmp:
+        clip, ref = make_clip(tmp)
+        t0 = time.perf_counter()
+        result = pipeline.process_video(clip, calib, ref_point=ref, quality=tier)
+        return result, time.perf_counter() - t0
+
+
+# ============================================================
+#                   SNAPSHOT / COMPARAÇÃO
+# ============================================================
+
+def _flatten(x: Any, path: str, out: Dict[str, Any]) -> None:
+    if isinstance(x, dict):
+        for k, v in x.items():
+            sub = f"{path}.{k}" if path else str(k)
+            if (not path and k in _SKIP) or sub in SERIES_RMS:
+                continue
+            _flatten(v, sub, out)
+    elif isinstance(x, (list, tuple, np.ndarray)):
+        out[f"{path}.count"] = len(x)
+        for i, v in enumerate(x):
+            _flatten(v, f"{path}[{i}]", out)
+    elif isinstance(x, (bool, np.bool_)):
+        out[path] = bool(x)
+    elif isinstance(x, (int, float, np.integer, np.floating)):
+        v = float(x)
+        out[path] = None if math.isnan(v) else (int(x) if isinstance(x, (int, np.integer)) else round(v, 9))
+    elif x is None or isinstance(x, str):
+        out[path] = x
+
+
+def snapshot(result: Dict[str, Any], seconds: float = 0.0) -> Dict[str, Any]:
+    """Campos achatados + séries escolhidas + custo de um resultado do process_video."""
+    fields: Dict[str, Any] = {}
+    _flatten(result, "", fields)
+    series = {}
+    for name in SERIES_RMS:
+        block, _, key = name.partition(".")
+        values = (result.get(block) or {}).get(key)
+        if values is not None:
+            series[name] = [None if v is None or not np.isfinite(v) else round(float(v), 6) for v in values]
+    measured = result.get("quality", {}).get("cost", {}).get("measured", {})
+    cost = {
+        "seconds": round(seconds, 3),
+        **{k: measured.get(k) for k in ("frames_analyzed", "detector_calls", "pose_calls", "reid_encoder_calls")},
+    }
+    return {"fields": fields, "series": series, "cost": cost}
+
+
+def metric_of(path: str) -> str:
+    """Campo -> métrica (sem índices de lista)."""
+    return re.sub(r"\[\d+\]", "", path)
+
+
+def tolerance_for(path: str) -> Tuple[float, float]:
+    metric = metric_of(path)
+    for pattern, abs_tol, rel_tol in TOLERANCES:
+        if fnmatch.fnmatchcase(metric, pattern):
+            return abs_tol, rel_tol
+    return 0.0, 0.0
+
+
+def per_metric(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Agrega as mudanças por métrica: nº de campos que mudaram, maior |delta|
+    e maior fração da tolerância usada (> 1 = fora).
+    """
+    out: Dict[str, Dict[str, Any]] = {}
+    for r in rows:
+        m = out.setdefault(metric_of(r["field"]), {
+            "metric": metric_of(r["field"]), "changed": 0, "max_delta": 0.0, "tol_used": 0.0, "ok": True,
+        })
+        m["changed"] += 1
+        m["ok"] &= r["ok"]
+        if r["delta"] is not None:
+            m["max_delta"] = max(m["max_delta"], abs(r["delta"]))
+            used = abs(r["delta"]) / r["tol"] if r["tol"] else (0.0 if r["delta"] == 0 else math.inf)
+            m["tol_used"] = max(m["tol_used"], used)
+        else:
+            m["tol_used"] = math.inf
+    return sorted(out.values(), key=lambda m: (m["ok"], -m["tol_used"], m["metric"]))
+
+
+def compare(golden: Dict[str, Any], current: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Um registro por campo / série que MUDOU: {"field", "golden", "current",
+    "delta", "tol", "ok"}. Campo que some ou aparece conta como mudança
+    fora da tolerância.
+    """
+    rows: List[Dict[str, Any]] = []
+    g_fields, c_fields = golden["fields"], current["fields"]
+    for path in sorted(set(g_fields) | set(c_fields)):
+        g, c = g_fields.get(path, "<ausente>"), c_fields.get(path, "<ausente>")
+        if g == c:
+            continue
+        row = {"field": path, "golden": g, "current": c, "delta": None, "tol": None, "ok": False}
+        numeric = all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in (g, c))
+        if numeric:
+            abs_tol, rel_tol = tolerance_for(path)
+            tol = abs_tol + rel_tol * abs(g)
+            row.update(delta=c - g, tol=tol, ok=abs(c - g) <= tol)
+        rows.append(row)
+
+    for name in sorted(set(golden["series"]) | set(current["series"])):
+        g = golden["series"].get(name)
+        c = current["series"].get(name)
+        row = {"field": name, "golden": None, "current": None, "delta": None,
+               "tol": SERIES_RMS.get(name), "ok": False}
+        if g is None or c is None or len(g) != len(c):
+            row.update(golden=None if g is None else f"len {len(g)}", current=None if c is None else f"len {len(c)}")
+            rows.append(row)
+            continue
+        a = np.array([np.nan if v is None else v for v in g], dtype=float)
+        b = np.array([np.nan if v is None else v for v in c], dtype=float)
+        same_nan = np.isnan(a) == np.isnan(b)
+        both = ~np.isnan(a) & ~np.isnan(b)
+        rms = float(np.sqrt(np.mean((a[both] - b[both]) ** 2))) if both.any() else 0.0
+        if rms == 0.0 and same_nan.all():
+            continue
+        row.update(golden="rms", current=round(rms, 6), delta=rms, ok=bool(same_nan.all() and rms <= row["tol"]))
+        rows.append(row)
+    return rows
+
+
+def golden_path(name: str) -> str:
+    return os.path.join(GOLDEN_DIR, f"{name}.json")
+
+
+def _parse_sets(items: List[str]) -> Dict[str, Any]:
+    out = {}
+    for item in items:
+        key, _, raw = item.partition("=")
+        try:
+            out[key] = json.loads(raw)
+        except json.JSONDecodeError:
+            out[key] = raw
+    return out
+
+
+def _fmt(v: Any) -> str:
+    if isinstance(v, float):
+        return f"{v:.6g}"
+    return str(v)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), default=None)
+    parser.add_argument("--record", action="store_true", help="grava / atualiza as goldens")
+    parser.add_argument("--tier-set", action="append", default=[], metavar="CHAVE=VALOR",
+                        help="troca campos do nível (ex.: detect_stride=2)")
+    parser.add_argument("--max-slowdown", type=float, default=None,
+                        help="reprova se segundos > golden * isto")
+    parser.add_argument("--verbose", action="store_true", help="lista cada campo que mudou")
+    args = parser.parse_args()
+
+    tier_set = _parse_sets(args.tier_set)
+    names = args.scenario or sorted(SCENARIOS)
+    ok = True
+
+    for name in names:
+        result, seconds = run_scenario(name, tier_set)
+        snap = snapshot(result, seconds)
+        path = golden_path(name)
+
+        if args.record:
+            if tier_set:
+                print("--record com --tier-set grava a golden de uma configuração que não é a padrão; recusado.")
+                sys.exit(2)
+            os.makedirs(GOLDEN_DIR, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"scenario": name, **snap}, f, indent=1, sort_keys=True, ensure_ascii=False)
+                f.write("\n")
+            print(f"{name}: golden gravada ({len(snap['fields'])} campos, {len(snap['series'])} séries)")
+            continue
+
+        if not os.path.exists(path):
+            print(f"{name}: sem golden em {path} (rode com --record)")
+            ok = False
+            continue
+        with open(path, encoding="utf-8") as f:
+            golden = json.load(f)
+
+        rows = compare(golden, snap)
+        bad = [r for r in rows if not r["ok"]]
+        g_cost, c_cost = golden["cost"], snap["cost"]
+        speedup = g_cost["seconds"] / max(1e-9, c_cost["seconds"])
+        calls = "  ".join(
+            f"{k.replace('_calls', '')} {g_cost.get(k)}->{c_cost.get(k)}"
+            for k in ("detector_calls", "pose_calls", "reid_encoder_calls")
+        )
+        print(f"{name}: {len(golden['fields'])} campos, {len(rows)} mudaram, {len(bad)} fora da tolerância; "
+              f"{g_cost['seconds']:.2f}s -> {c_cost['seconds']:.2f}s (speedup {speedup:.2f}x)  {calls}")
+        if rows:
+            print(f"   {'métrica':48s} {'campos':>6s} {'|delta| máx':>12s} {'% da tol':>9s}")
+            for m in per_metric(rows):
+                used = "-" if math.isinf(m["tol_used"]) else f"{100.0 * m['tol_used']:.0f}%"
+                print(f"   {m['metric'][:48]:48s} {m['changed']:6d} {_fmt(m['max_delta']):>12s} {used:>9s}"
+                      f" {'' if m['ok'] else '<-- FALHOU'}")
+        shown = rows if args.verbose else bad
+        if shown:
+            print(f"   {'campo':52s} {'golden':>12s} {'atual':>12s} {'delta':>11s} {'tol':>9s}")
+            for r in shown:
+                print(f"   {r['field'][:52]:52s} {_fmt(r['golden']):>12s} {_fmt(r['current']):>12s} "
+                      f"{_fmt(r['delta']) if r['delta'] is not None else '-':>11s} "
+                      f"{_fmt(r['tol']) if r['tol'] is not None else '-':>9s} {'' if r['ok'] else '<-- FALHOU'}")
+        ok &= not bad
+        if args.max_slowdown is not None:
+            ok &= c_cost["seconds"] <= g_cost["seconds"] * args.max_slowdown
+
+    if args.record:
+        return
+    if not ok:
+        print("REGRESSÃO")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# benchmarks/bench_homography.py
+"""
+Calibração por homografia vs escala única de 2 pontos.
+
+Cena sintética com perspectiva forte: o atleta corre a velocidade
+constante ao longo da pista (X) e a câmera vê a pista em ângulo, então o
+m/px muda ao longo do caminho. Compara:
+
+  - erro de distância total e de velocidade média (escalar vs homografia);
+  - custo por frame da projeção em lote (`ground_trajectory`) contra o
+    caminho escalar (multiplicar por m/px).
+
+Uso (de dentro de AthleteAnalysis-RunPod/):
+    python -m benchmarks.bench_homography --frames 600
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from app.calibration import ground_trajectory, homography_from_calib, project_points
+from app.metrics import compute_scale_m_per_px, compute_speed_distance_from_hip
+
+FPS = 60.0
+
+
+def _scene(n, speed=8.0):
+    # mundo (m) -> imagem (px): pista de 0..40 m vista em ângulo
+    world = np.float32([[0, 0], [40, 0], [40, 1.2], [0, 1.2]])
+    image = np.float32([[100, 620], [1800, 470], [1820, 500], [60, 680]])
+    calib = {"image_points": image.tolist(), "world_points_m": world.tolist()}
+    H_inv = np.linalg.inv(homography_from_calib(calib))
+
+    t = np.arange(n) / FPS
+    X = 2.0 + speed * t
+    foot_world = np.stack([X, np.full(n, 0.6)], axis=-1)
+    foot_px = project_points(H_inv, foot_world)
+    # quadril ~1 m acima do pé, na escala local
+    m_per_px = np.hypot(*np.gradient(foot_world, axis=0).T) / np.hypot(*np.gradient(foot_px, axis=0).T)
+    hip_px = foot_px - np.stack([np.zeros(n), 1.0 / m_per_px], axis=-1)
+
+    # 2 pontos: o usuário marcou 10 m perto do início da pista
+    p1 = project_points(H_inv, np.array([2.0, 0.6]))
+    p2 = project_points(H_inv, np.array([12.0, 0.6]))
+    calib_2pt = {"point1": p1.tolist(), "point2": p2.tolist(), "real_distance_m": 10.0}
+    return calib, calib_2pt, hip_px, foot_px, speed * t[-1], speed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=240)
+    parser.add_argument("--repeats", type=int, default=200)
+    args = parser.parse_args()
+
+    calib, calib_2pt, hip, foot, true_dist, true_speed = _scene(args.frames)
+    H = homography_from_calib(calib)
+    hx, hy = hip[:, 0], hip[:, 1]
+    fx, fy = foot[:, 0], foot[:, 1]
+
+    scale = compute_scale_m_per_px(calib_2pt)
+    sc = compute_speed_distance_from_hip(hx, hy, scale, FPS)
+
+    geo = ground_trajectory(H, FPS, hx, hy, hx, hy, fx, fy, fx, fy)
+    hg = compute_speed_distance_from_hip(geo["hip_filt_x"], geo["hip_filt_y"], 1.0, FPS)
+
+    print(f"real:       distância={true_dist:6.2f} m  vel. média={true_speed:5.2f} m/s")
+    for name, r in (("2 pontos", sc), ("homografia", hg)):
+        err = 100.0 * (r["distance_m"] - true_dist) / true_dist
+        print(f"{name:10s}: distância={r['distance_m']:6.2f} m ({err:+5.1f}%)  "
+              f"vel. média={r['velocity_mean_m_s']:5.2f} m/s")
+
+    t0 = time.perf_counter()
+    for _ in range(args.repeats):
+        _ = hx * scale, hy * scale
+    t_scalar = (time.perf_counter() - t0) / args.repeats
+    t0 = time.perf_counter()
+    for _ in range(args.repeats):
+        ground_trajectory(H, FPS, hx, hy, hx, hy, fx, fy, fx, fy)
+    t_h = (time.perf_counter() - t0) / args.repeats
+    print(f"custo por frame: escalar {1e6 * t_scalar / args.frames:.3f} µs  "
+          f"homografia {1e6 * t_h / args.frames:.3f} µs")
+
+
+if __name__ == "__main__":
+    main()
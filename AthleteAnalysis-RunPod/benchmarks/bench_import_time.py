@@ -0,0 +1,106 @@
+# benchmarks/bench_import_time.py
+"""
+Perfil de import (startup) do servidor e do pipeline, estilo -X importtime.
+
+Para cada módulo sobe um processo novo com `python -X importtime`, lê o
+relatório do stderr e mostra:
+
+  - tempo total do import do módulo;
+  - os pacotes mais caros (custo acumulado por pacote raiz);
+  - quais módulos pesados (torch, ultralytics, rtmlib, ...) ficaram
+    carregados depois do import.
+
+`app.main` e `app.models` NÃO podem puxar nenhum pesado (o /health tem
+que responder antes dos modelos); `app.pipeline` pode puxar scipy / cv2,
+mas não os frameworks dos modelos (esses só nos loaders).
+
+Módulo que não importa aqui (ex.: fastapi fora do ambiente) é pulado.
+
+Uso (de dentro de AthleteAnalysis-RunPod/):
+    python -m benchmarks.bench_import_time --top 8
+"""
+
+import argparse
+import json
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+HEAVY_FRAMEWORKS = ("torch", "torchvision", "ultralytics", "rtmlib", "onnxruntime")
+HEAVY_NUMERIC = ("scipy", "cv2")
+
+# módulo -> pesados proibidos depois do import
+TARGETS = {
+    "app.models": HEAVY_FRAMEWORKS + HEAVY_NUMERIC,
+    "app.main": HEAVY_FRAMEWORKS + HEAVY_NUMERIC,
+    "app.pipeline": HEAVY_FRAMEWORKS,
+}
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\| +(\S+)$")
+
+
+def profile_import(module: str):
+    """(total_us, {pacote raiz: acumulado_us}, pesados carregados) ou erro."""
+    heavy = HEAVY_FRAMEWORKS + HEAVY_NUMERIC
+    code = (
+        f"import sys, json; import {module}; "
+        f"print(json.dumps([m for m in {heavy!r} if m in sys.modules]))"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        last = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "?"
+        return None, last
+
+    per_root = defaultdict(int)
+    total = 0
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if not m:
+            continue
+        cum, name = int(m.group(2)), m.group(3)
+        root = name.split(".")[0]
+        # o import do pacote raiz já inclui os submódulos dele
+        per_root[root] = max(per_root[root], cum)
+        if name == module:
+            total = cum
+    loaded = json.loads(proc.stdout.strip().splitlines()[-1])
+    return (total, dict(per_root), loaded), None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--top", type=int, default=8)
+    parser.add_argument("--modules", nargs="+", default=list(TARGETS))
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.modules:
+        res, err = profile_import(module)
+        if res is None:
+            print(f"{module}: pulado ({err})")
+            continue
+        total, per_root, loaded = res
+        print(f"{module}: {total / 1000.0:8.1f} ms  pesados carregados: {loaded or 'nenhum'}")
+        top = sorted(
+            ((r, us) for r, us in per_root.items() if r not in ("app", module.split(".")[0])),
+            key=lambda kv: -kv[1],
+        )[: args.top]
+        for root, us in top:
+            print(f"    {root:24s} {us / 1000.0:8.1f} ms")
+        bad = [m for m in loaded if m in TARGETS.get(module, ())]
+        if bad:
+            print(f"    REGRESSÃO: {module} importa {bad} no startup")
+            failed = True
+
+    if failed:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# benchmarks/bench_jump_segmentation.py
+"""
+Segmentação de vários saltos: acerto e escala com o tamanho do clipe.
+
+Gera a trajetória vertical do quadril (e dos tornozelos) de uma corrida
+com K saltos parabólicos (tipo saltos repetidos / triplo) e confere:
+
+  - quantos voos `detect_jumps` encontra vs K (o detector antigo, um
+    argmin global, acha no máximo 1);
+  - erro de takeoff / ápice / landing em frames;
+  - tempo por 1000 frames em clipes de tamanhos diferentes (deve ficar
+    ~constante = custo linear).
+
+Uso (de dentro de AthleteAnalysis-RunPod/):
+    python -m benchmarks.bench_jump_segmentation --jumps 3
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from app.metrics import detect_jumps
+
+FPS = 60.0
+SCALE = 0.005   # m/px
+G = 9.81
+
+
+def synthetic_bounds(n, n_jumps, flight_s=0.45, seed=0):
+    """Quadril + tornozelos com `n_jumps` voos espalhados; devolve eventos reais."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(n) / FPS
+    hip_y = 500.0 + 4.0 * np.sin(2 * np.pi * 3.2 * t)       # oscilação da corrida
+    ankle_y = 700.0 - 25.0 * np.clip(np.sin(2 * np.pi * 1.6 * t), 0, None)
+
+    flight = int(round(flight_s * FPS))
+    starts = np.linspace(0.15 * n, 0.85 * n, n_jumps).astype(int)
+    truth = []
+    for s in starts:
+        tt = np.arange(flight + 1) / FPS
+        # parábola: sobe e desce em flight_s (y da imagem cresce pra baixo)
+        h_m = 0.5 * G * tt * (flight_s - tt)
+        hip_y[s:s + flight + 1] = 500.0 - h_m / SCALE
+        ankle_y[s:s + flight + 1] = 700.0 - 1.3 * h_m / SCALE
+        ankle_y[s - 3:s] = 700.0          # apoio antes
+        ankle_y[s + flight + 1:s + flight + 4] = 700.0
+        truth.append((s, s + flight // 2, s + flight))
+
+    hip_y += rng.normal(0, 0.5, n)
+    ankle_y += rng.normal(0, 0.5, n)
+    return hip_y, ankle_y, truth
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jumps", type=int, default=3)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[3_000, 30_000, 300_000])
+    args = parser.parse_args()
+
+    failed = False
+    for n in args.sizes:
+        n_jumps = max(args.jumps, args.jumps * n // 3_000)
+        hip_y, ankle_y, truth = synthetic_bounds(n, n_jumps)
+
+        t0 = time.perf_counter()
+        seg = detect_jumps(hip_y, SCALE, FPS, ankle_ys=[ankle_y, ankle_y])
+        elapsed = time.perf_counter() - t0
+
+        found = seg["jumps"]
+        errs = []
+        for (tk, ap, ld) in truth:
+            best = min(found, key=lambda j: abs(j["jump_apex_frame"] - ap), default=None)
+            if best is None:
+                continue
+            errs.append((
+                abs(best["jump_takeoff_frame"] - tk),
+                abs(best["jump_apex_frame"] - ap),
+                abs(best["jump_landing_frame"] - ld),
+            ))
+        errs = np.asarray(errs, dtype=float).reshape(-1, 3)
+        print(
+            f"frames={n:7d}  saltos reais={len(truth):4d} achados={len(found):4d}  "
+            f"erro médio (frames) takeoff={errs[:, 0].mean():.1f} "
+            f"ápice={errs[:, 1].mean():.1f} landing={errs[:, 2].mean():.1f}  "
+            f"{1000.0 * elapsed / (n / 1000.0):.3f} ms/1000 frames"
+        )
+        if len(found) != len(truth):
+            failed = True
+
+    if failed:
+        print("REGRESSÃO: nº de saltos diferente do real")
+        sys.exit(1)
+    print("OK: todos os voos encontrados")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+# benchmarks/bench_keyframes.py
+"""
+Miniaturas nos eventos (saltos + contatos de passo) com buffer limitado.
+
+Clipe sintético de um atleta que corre e salta: corpo = retângulo, pés =
+dois quadrados de cores próprias que fazem a "tesoura" (passos) e sobem
+junto no voo. Detector stub pela cor do corpo; pose stub com o layout
+fixo de bench_quality_tiers, mas tornozelos lidos dos quadrados dos pés.
+
+Por teto do buffer (MB): candidatos guardados / descartados, passo, pico
+de bytes, erro do frame usado vs o frame do evento e custo (captura +
+sprite). Confere:
+
+  - o vídeo é decodificado UMA vez (read_video_frames chamado 1x);
+  - pico do buffer <= teto (+ 1 JPEG) e erro <= metade do passo;
+  - a miniatura é do atleta (cor do corpo no centro) e o sprite abre;
+  - as métricas não mudam com / sem miniaturas.
+
+Uso (de dentro de AthleteAnalysis-RunPod/):
+    python -m benchmarks.bench_keyframes --frames 300
+"""
+
+import argparse
+import base64
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+import app.pipeline as pipeline
+from app.models import MODEL_REGISTRY, detector_key, pose_key
+from app.quality import get_quality_tier
+from benchmarks.bench_quality_tiers import StubDetector, StubPose, _color_boxes
+from benchmarks.synthetic import SYNTHETIC_CALIB, StubReIDEncoder
+
+FPS = 60.0
+BODY = np.array([40, 40, 220], dtype=np.uint8)
+LEFT_FOOT = np.array([220, 220, 40], dtype=np.uint8)
+RIGHT_FOOT = np.array([220, 40, 220], dtype=np.uint8)
+OTHER = np.array([40, 200, 40], dtype=np.uint8)
+
+
+class JumpScene:
+    """Atleta correndo (passo a cada `step_period` frames) com um salto."""
+
+    def __init__(self, n_frames, img_w=1280, img_h=720, jump=(180, 216), jump_px=90.0, step_period=12):
+        self.n_frames = n_frames
+        self.img_w, self.img_h = img_w, img_h
+        self.jump = jump
+        self.jump_px = jump_px
+        self.step_period = step_period
+        self.colors = np.stack([BODY, OTHER])
+
+    def body(self, t):
+        a, z = self.jump
+        lift = 0.0
+        if a <= t < z:
+            u = (t - a) / float(z - a)
+            lift = 4.0 * self.jump_px * u * (1.0 - u)
+        x = 80.0 + 4.0 * t
+        y = 0.62 * self.img_h - lift
+        return np.array([x, y - 150.0, x + 64.0, y])
+
+    def feet(self, t):
+        x1, _, x2, y2 = self.body(t)
+        cx = 0.5 * (x1 + x2)
+        a, z = self.jump
+        # tesoura: meio ciclo por passo; no voo os pés ficam juntos
+        s = 0.0 if a <= t < z else np.sin(np.pi * t / self.step_period)
+        return (cx + 22.0 * s, y2 - 6.0), (cx - 22.0 * s, y2 - 6.0)
+
+    def frame(self, t):
+        img = np.full((self.img_h, self.img_w, 3), 30, dtype=np.uint8)
+        ox = 900.0 - 2.0 * t
+        img[200:360, int(ox):int(ox) + 64] = OTHER
+        x1, y1, x2, y2 = self.body(t).astype(int)
+        img[y1:y2, x1:x2] = BODY
+        for (fx, fy), c in zip(self.feet(t), (LEFT_FOOT, RIGHT_FOOT)):
+            img[int(fy) - 6:int(fy) + 6, int(fx) - 6:int(fx) + 6] = c
+        return img
+
+
+class FootPose(StubPose):
+    """Pose stub com os tornozelos nos quadrados dos pés."""
+
+    def __call__(self, frame, bboxes):
+        kpts, scores = super().__call__(frame, bboxes)
+        x1, y1, x2, y2 = map(int, bboxes[0])
+        region = frame[max(0, y1):y2, max(0, x1):x2]
+        for j, c in ((15, LEFT_FOOT), (16, RIGHT_FOOT)):
+            (b,) = _color_boxes(region, [c], max(0, x1), max(0, y1))
+            if b is not None:
+                kpts[0, j] = 0.5 * (b[:2] + b[2:])
+        return kpts, scores
+
+
+def _write_clip(path, scene):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), FPS, (scene.img_w, scene.img_h))
+    try:
+        for t in range(scene.n_frames):
+            writer.write(scene.frame(t))
+    finally:
+        writer.release()
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--gflops-per-s", type=float, default=20000.0)
+    args = parser.parse_args()
+
+    scene = JumpScene(args.frames)
+    tier = get_quality_tier("standard")
+    MODEL_REGISTRY.get(
+        detector_key(tier.detector_weights),
+        lambda: StubDetector(scene.colors, 28.6, args.gflops_per_s),
+        sizer=lambda _: 0,
+    )
+    MODEL_REGISTRY.get(
+        pose_key(tier.pose_variant),
+        lambda: FootPose(BODY, 2.2, args.gflops_per_s),
+        sizer=lambda _: 0,
+    )
+    pipeline.compute_reid_embeddings = StubReIDEncoder()
+
+    # conta quantas vezes o vídeo é decodificado
+    decodes = []
+    read_video_frames = pipeline.read_video_frames
+
+    def _counting(*a, **kw):
+        decodes.append(a[0])
+        return read_video_frames(*a, **kw)
+
+    pipeline.read_video_frames = _counting
+
+    b0 = scene.body(0)
+    ref = (float(0.5 * (b0[0] + b0[2])), float(0.5 * (b0[1] + b0[3])))
+    ok = True
+
+    with tempfile.TemporaryDirectory() as tmp:
+        clip = _write_clip(os.path.join(tmp, "jump.mp4"), scene)
+        base = pipeline.process_video(clip, SYNTHETIC_CALIB, ref_point=ref, quality=tier)
+        n_jumps = len(base["jumps"])
+        n_steps = len(base["stride"].get("step_events") or [])
+        print(f"eventos: {n_jumps} salto(s), {n_steps} contatos de passo")
+        ok &= n_jumps >= 1 and n_steps >= 4
+
+        print(f"{'teto MB':>8s} {'guardados':>9s} {'descart.':>8s} {'passo':>5s} {'pico KB':>8s} "
+              f"{'erro máx':>8s} {'miniat.':>7s} {'captura ms/f':>12s} {'sprite ms':>9s}")
+        for cap_mb in (16.0, 0.25, 0.05):
+            decodes.clear()
+            t0 = time.perf_counter()
+            res = pipeline.process_video(
+                clip, SYNTHETIC_CALIB, ref_point=ref, quality=tier,
+                keyframes={"max_buffer_mb": cap_mb, "thumb_width": 96, "thumb_height": 128},
+            )
+            dt = time.perf_counter() - t0
+            kf = res["keyframes"]
+            buf = kf["buffer"]
+            thumbs = kf["thumbnails"]
+            err = max((abs(t["frame"] - t["event_frame"]) for t in thumbs), default=0)
+            print(f"{cap_mb:8.2f} {buf['frames']:9d} {buf['dropped_frames']:8d} {buf['stride']:5d} "
+                  f"{buf['peak_bytes'] / 1024:8.1f} {err:8d} {len(thumbs):7d} "
+                  f"{1000.0 * kf['capture_s'] / max(1, len(base['series']['frames'])):12.3f} "
+                  f"{1000.0 * kf['extract_s']:9.1f}   (total {dt:.2f}s)")
+
+            ok &= len(decodes) == 1
+            ok &= len(thumbs) == 3 * n_jumps + n_steps
+            ok &= err <= buf["stride"] // 2
+            largest = max(len(base64.b64decode(t["jpeg_base64"])) for t in thumbs)
+            ok &= buf["peak_bytes"] <= buf["max_bytes"] + 2 * largest
+            for key in ("distance_m", "velocity_mean_m_s"):
+                ok &= res["speed"][key] == base["speed"][key]
+            ok &= res["step_count_total"] == base["step_count_total"]
+
+            # miniatura = atleta no centro; sprite abre no tamanho da grade
+            for t in thumbs:
+                img = cv2.imdecode(np.frombuffer(base64.b64decode(t["jpeg_base64"]), np.uint8), cv2.IMREAD_COLOR)
+                center = img[img.shape[0] // 3: 2 * img.shape[0] // 3, img.shape[1] // 3: 2 * img.shape[1] // 3]
+                ok &= bool(np.all(np.abs(center.reshape(-1, 3).mean(0) - BODY) < 50))
+            sp = kf["sprite"]
+            sheet = cv2.imdecode(np.frombuffer(base64.b64decode(sp["jpeg_base64"]), np.uint8), cv2.IMREAD_COLOR)
+            ok &= sheet.shape[:2] == (sp["rows"] * sp["tile_height"], sp["columns"] * sp["tile_width"])
+
+    if not ok:
+        print("REGRESSÃO")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# benchmarks/bench_kinematics.py
+"""
+Cinemática do quadril: precisão das parciais e custo.
+
+Sprint sintético com perfil exponencial clássico
+    v(t) = vmax * (1 - exp(-t / tau))
+    d(t) = vmax * (t - tau * (1 - exp(-t / tau)))
+amostrado no fps do vídeo, com ruído de pixel e um pequeno balanço
+vertical do quadril. Compara os tempos de passagem de 10 m e o instante
+da velocidade máxima com os analíticos e mede ms por 1000 frames.
+
+Uso (de dentro de AthleteAnalysis-RunPod/):
+    python -m benchmarks.bench_kinematics --fps 60 --seconds 12
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+from scipy.optimize import brentq
+
+from app.kinematics import compute_kinematics
+
+SCALE = 0.01  # m/px
+
+
+def _sprint(fps, seconds, vmax=10.5, tau=1.3, noise_px=0.5, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(fps * seconds)) / fps
+    d = vmax * (t - tau * (1.0 - np.exp(-t / tau)))
+    x_px = d / SCALE + rng.normal(0, noise_px, len(t))
+    y_px = 400.0 + 3.0 * np.sin(2 * np.pi * 2.2 * t) + rng.normal(0, noise_px, len(t))
+
+    def dist(tt):
+        return vmax * (tt - tau * (1.0 - np.exp(-tt / tau)))
+
+    splits = []
+    target = 10.0
+    while target < dist(t[-1]):
+        splits.append(brentq(lambda tt: dist(tt) - target, 0.0, t[-1]))
+        target += 10.0
+    return x_px, y_px, np.asarray(splits)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fps", type=float, default=60.0)
+    parser.add_argument("--seconds", type=float, default=12.0)
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--max-split-err-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    x, y, true_splits = _sprint(args.fps, args.seconds)
+    res = compute_kinematics(x, y, SCALE, args.fps)
+
+    got = np.array([s["time_s"] for s in res["splits"]])
+    k = min(len(got), len(true_splits))
+    err_ms = 1000.0 * np.abs(got[:k] - true_splits[:k])
+    print(f"parciais: {k}  erro médio={err_ms.mean():.1f} ms  máx={err_ms.max():.1f} ms")
+    print("  " + "  ".join(f"{10 * (i + 1)}m={got[i]:.3f}s" for i in range(k)))
+    print(f"vel. máx={res['peak_speed_m_s']:.2f} m/s  "
+          f"acel. máx={res['peak_acceleration_m_s2']:.2f} m/s²")
+
+    # custo (clipe longo pra medir por 1000 frames)
+    xl = np.tile(x, 20)
+    yl = np.tile(y, 20)
+    t0 = time.perf_counter()
+    for _ in range(args.repeats):
+        compute_kinematics(xl, yl, SCALE, args.fps)
+    ms = 1000.0 * (time.perf_counter() - t0) / args.repeats
+    per_k = ms / (len(xl) / 1000.0)
+    print(f"custo: {per_k:.3f} ms por 1000 frames ({len(xl)} frames)")
+
+    if k != len(true_splits) or err_ms.max() > args.max_split_err_ms:
+        print("REGRESSÃO: parciais fora da tolerância")
+        sys.exit(1)
+    if per_k >= 1.0:
+        print("AVISO: acima de 1 ms por 1000 frames")
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# benchmarks/bench_lazy_reid.py
+"""
+Regressão + custo do ReID lazy.
+
+Roda o `TargetSelector` em modo eager (comportamento antigo: embedding de
+todos os candidatos em todo frame) e em modo lazy sobre a MESMA sequência
+de detecções sintéticas, e confere que a pessoa escolhida é idêntica em
+todos os frames. Reporta quantos embeddings cada modo calculou.
+
+Uso (de dentro de AthleteAnalysis-RunPod/):
+    python -m benchmarks.bench_lazy_reid --frames 600 --people 4
+"""
+
+import argparse
+import sys
+import time
+
+from app.crops import FrameCrops
+from app.target_selection import REID_REFRESH_INTERVAL, TargetSelector
+from benchmarks.synthetic import StubReIDEncoder, SyntheticScene
+
+
+def _run(scene_kwargs, lazy, refresh_interval):
+    scene = SyntheticScene(**scene_kwargs)
+    encoder = StubReIDEncoder()
+    b0 = scene.true_boxes(0)[0]
+    ref_point = (0.5 * (b0[0] + b0[2]), 0.5 * (b0[1] + b0[3]))
+    selector = TargetSelector(
+        encoder, ref_point=ref_point, lazy=lazy, refresh_interval=refresh_interval
+    )
+    crops = FrameCrops()
+
+    chosen = []
+    t0 = time.perf_counter()
+    for t in range(scene.n_frames):
+        boxes, scores, ids = scene.detections(t)
+        if len(boxes) == 0:
+            chosen.append(None)
+            continue
+        crops.set_frame(scene.frame(t))
+        idx = selector.select(crops, boxes, scores)
+        chosen.append(ids[idx] if idx >= 0 else None)
+    elapsed = time.perf_counter() - t0
+    return chosen, selector.stats, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=400)
+    parser.add_argument("--people", type=int, default=3)
+    parser.add_argument("--refresh", type=int, default=REID_REFRESH_INTERVAL)
+    parser.add_argument("--seeds", type=int, default=5)
+    args = parser.parse_args()
+
+    total_eager = total_lazy = 0
+    failed = False
+    for seed in range(args.seeds):
+        scene_kwargs = dict(n_frames=args.frames, n_people=args.people, seed=seed)
+
+        eager_ids, eager_stats, eager_t = _run(scene_kwargs, lazy=False, refresh_interval=1)
+        lazy_ids, lazy_stats, lazy_t = _run(scene_kwargs, lazy=True, refresh_interval=args.refresh)
+
+        mismatches = [t for t, (a, b) in enumerate(zip(eager_ids, lazy_ids)) if a != b]
+        on_target = sum(1 for i in eager_ids if i == 0) / float(args.frames)
+        total_eager += eager_stats.embeddings_computed
+        total_lazy += lazy_stats.embeddings_computed
+
+        print(
+            f"seed {seed}: embeddings eager={eager_stats.embeddings_computed:6d} "
+            f"lazy={lazy_stats.embeddings_computed:6d}  "
+            f"encoder_calls lazy={lazy_stats.encoder_calls:5d}  "
+            f"ms/frame eager={1000.0 * eager_t / args.frames:6.3f} "
+            f"lazy={1000.0 * lazy_t / args.frames:6.3f}  "
+            f"no alvo={100.0 * on_target:5.1f}%  divergências={len(mismatches)}"
+        )
+        if mismatches:
+            failed = True
+            print(f"  REGRESSÃO: escolha diferente nos frames {mismatches[:10]}...")
+
+    saved = 1.0 - total_lazy / max(1, total_eager)
+    print(f"embeddings evitados: {100.0 * saved:.1f}% (refresh a cada {args.refresh} frames)")
+
+    if failed:
+        sys.exit(1)
+    print("OK: mesma escolha de atleta em todos os frames")
+
+
+if __name__ == "__main__":
+    main()
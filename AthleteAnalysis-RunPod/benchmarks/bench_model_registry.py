@@ -0,0 +1,129 @@
+# benchmarks/bench_model_registry.py
+"""
+Registro de modelos: custo do acesso, load único sob concorrência e
+descarte LRU sob orçamento de memória.
+
+"Modelos" stub (arrays NumPy de N MB com load artificialmente lento), sem
+YOLO / RTMPose / torch:
+
+  - 16 threads pedindo o MESMO modelo ao mesmo tempo -> 1 load só;
+  - threads pedindo modelos DIFERENTES -> loads em paralelo (tempo total
+    ~ um load, não a soma);
+  - sequência preview / full alternada com orçamento pra 2 modelos ->
+    nunca passa do orçamento e o mais recente nunca sai;
+  - custo de um acesso já carregado (o que todo frame / request paga);
+  - memória medida pela variação de RSS quando não há `sizer`.
+
+Uso (de dentro de AthleteAnalysis-RunPod/):
+    python -m benchmarks.bench_model_registry --model-mb 64
+"""
+
+import argparse
+import sys
+import threading
+import time
+
+import numpy as np
+
+from app.registry import ModelKey, ModelRegistry
+
+LOAD_S = 0.2
+
+
+def _stub_loader(mb: float, counter: list):
+    def _load():
+        counter.append(1)
+        time.sleep(LOAD_S)
+        return np.ones(int(mb * 1024 * 1024) // 8)   # toca as páginas (RSS real)
+    return _load
+
+
+def _nbytes(model) -> int:
+    return model.nbytes
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model-mb", type=float, default=64.0)
+    parser.add_argument("--threads", type=int, default=16)
+    args = parser.parse_args()
+    mb = args.model_mb
+    ok = True
+
+    # 1) mesmo modelo, várias threads
+    reg = ModelRegistry()
+    loads: list = []
+    key = ModelKey("detector", "yolo11n.pt", "cpu")
+    got = []
+    ths = [
+        threading.Thread(target=lambda: got.append(id(reg.get(key, _stub_loader(mb, loads), _nbytes))))
+        for _ in range(args.threads)
+    ]
+    t0 = time.perf_counter()
+    for t in ths:
+        t.start()
+    for t in ths:
+        t.join()
+    dt = time.perf_counter() - t0
+    print(f"mesmo modelo x{args.threads} threads: loads={len(loads)}  objetos distintos={len(set(got))}  {dt:.2f}s")
+    ok &= len(loads) == 1 and len(set(got)) == 1
+
+    # 2) modelos diferentes em paralelo
+    reg = ModelRegistry()
+    loads = []
+    keys = [ModelKey("pose", f"v{i}", "cpu") for i in range(4)]
+    ths = [threading.Thread(target=reg.get, args=(k, _stub_loader(mb / 4, loads), _nbytes)) for k in keys]
+    t0 = time.perf_counter()
+    for t in ths:
+        t.start()
+    for t in ths:
+        t.join()
+    dt = time.perf_counter() - t0
+    print(f"4 modelos diferentes em paralelo: {dt:.2f}s (serial seria {4 * LOAD_S:.2f}s)")
+    ok &= dt < 2.5 * LOAD_S
+
+    # 3) LRU sob orçamento (cabem 2)
+    reg = ModelRegistry(budget_mb=2.5 * mb)
+    loads = []
+    tiers = [
+        ModelKey("detector", "yolo11n.pt", "cpu"),
+        ModelKey("detector", "yolo11x.pt", "cpu"),
+        ModelKey("pose", "rtmpose-m", "cpu"),
+    ]
+    seq = [0, 1, 0, 2, 0, 1, 2, 2, 0]
+    peak = 0.0
+    for i in seq:
+        reg.get(tiers[i], _stub_loader(mb, loads), _nbytes)
+        st = reg.stats()
+        peak = max(peak, st["memory_mb"])
+        ok &= tiers[i] in reg
+    st = reg.stats()
+    print(f"LRU: {len(seq)} pedidos, loads={len(loads)} evictions={st['evictions']} "
+          f"pico={peak:.0f} MB orçamento={st['budget_mb']:.0f} MB")
+    print("   carregados:", ", ".join(m["key"] for m in st["models"]))
+    ok &= peak <= st["budget_mb"] + 1e-6
+
+    # 4) custo do acesso quente
+    n = 200_000
+    t0 = time.perf_counter()
+    for _ in range(n):
+        reg.get(tiers[0], _stub_loader(mb, loads), _nbytes)
+    hit_us = 1e6 * (time.perf_counter() - t0) / n
+    print(f"acesso a modelo carregado: {hit_us:.2f} µs")
+
+    # 5) memória pela variação de RSS (sem sizer)
+    reg = ModelRegistry()
+    reg.get(ModelKey("reid", "resnet18", "cpu"), _stub_loader(mb, []))
+    rss_mb = reg.stats()["models"][0]["memory_mb"]
+    print(f"memória medida por RSS: {rss_mb:.1f} MB (real {mb:.1f} MB)")
+    if rss_mb > 0:
+        ok &= abs(rss_mb - mb) < 0.25 * mb
+
+    if not ok:
+        print("REGRESSÃO")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
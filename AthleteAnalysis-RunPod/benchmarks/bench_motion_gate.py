@@ -0,0 +1,120 @@
+# benchmarks/bench_motion_gate.py
+"""
+Gate de movimento: frames pulados, tempo economizado e efeito nas métricas.
+
+Clipe sintético (retângulos de benchmarks/synthetic.py) em que o ALVO fica
+parado no começo e no fim (os outros continuam andando) e modelos stub do
+bench_quality_tiers. Roda o `process_video` no nível "precise" com e sem
+o gate:
+
+  - frames pulados (interpolados) e onde caíram;
+  - tempo medido com / sem gate e a economia estimada pelo próprio
+    pipeline (pulados x custo médio de frame processado - custo do gate);
+  - diferença de distância / velocidade e erro do quadril nos frames
+    interpolados contra a bbox real.
+
+Uso (de dentro de AthleteAnalysis-RunPod/):
+    python -m benchmarks.bench_motion_gate --frames 480 --hold 120
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, replace
+
+import numpy as np
+
+import app.pipeline as pipeline
+from app.quality import get_quality_tier
+from benchmarks.bench_quality_tiers import FPS, StubPose, _install_stubs
+from benchmarks.synthetic import (
+    SYNTHETIC_CALIB,
+    StubReIDEncoder,
+    SyntheticScene,
+    write_synthetic_clip,
+)
+
+
+@dataclass
+class HoldScene(SyntheticScene):
+    """Alvo parado nos `hold` primeiros e últimos frames."""
+    hold: int = 120
+
+    def true_boxes(self, t: int) -> np.ndarray:
+        boxes = super().true_boxes(t)
+        t_eff = min(max(t - self.hold, 0), self.n_frames - 2 * self.hold)
+        boxes[0] = super().true_boxes(t_eff)[0]
+        return boxes
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=480)
+    parser.add_argument("--hold", type=int, default=120)
+    parser.add_argument("--gflops-per-s", type=float, default=20000.0)
+    args = parser.parse_args()
+
+    scene = HoldScene(n_frames=args.frames, occlusions=[], hold=args.hold)
+    _install_stubs(scene, args.gflops_per_s)
+    pipeline.compute_reid_embeddings = StubReIDEncoder()
+
+    b0 = scene.true_boxes(0)[0]
+    ref = (float(0.5 * (b0[0] + b0[2])), float(0.5 * (b0[1] + b0[3])))
+    true = np.array([scene.true_boxes(t)[0] for t in range(args.frames)])
+    true_hip = true[:, :2] + StubPose.LAYOUT[11:13].mean(0) * (true[:, 2:] - true[:, :2])
+
+    precise = get_quality_tier("precise")
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        clip = write_synthetic_clip(os.path.join(tmp, "clip.mp4"), scene, fps=FPS)
+
+        runs = {}
+        for name, tier in (("sem gate", replace(precise, motion_gate=False)), ("com gate", precise)):
+            t0 = time.perf_counter()
+            res = pipeline.process_video(clip, SYNTHETIC_CALIB, ref_point=ref, quality=tier)
+            runs[name] = (res, time.perf_counter() - t0)
+
+        base, t_base = runs["sem gate"]
+        gated, t_gated = runs["com gate"]
+        mg = gated["quality"]["cost"]["measured"]
+        interp = np.asarray(gated["series"]["interpolated"], dtype=bool)
+        n = len(interp)
+        static = np.zeros(n, dtype=bool)
+        static[: args.hold] = True
+        static[n - args.hold:] = True
+
+        print(f"clipe: {n} frames, alvo parado em {static.sum()} ({args.hold} no início e no fim)")
+        print(f"pulados: {mg['motion_skipped_frames']} "
+              f"(nos trechos parados {int((interp & static).sum())}, andando {int((interp & ~static).sum())})")
+        print(f"tempo: sem gate {t_base:.2f}s  com gate {t_gated:.2f}s  "
+              f"(medido {t_base - t_gated:.2f}s, estimado pelo pipeline {mg['motion_saved_s']:.2f}s)")
+        print(f"detector {base['quality']['cost']['measured']['detector_calls']} -> {mg['detector_calls']}, "
+              f"pose {base['quality']['cost']['measured']['pose_calls']} -> {mg['pose_calls']}")
+
+        for key in ("distance_m", "velocity_mean_m_s", "velocity_max_m_s"):
+            a, b = base["speed"][key], gated["speed"][key]
+            print(f"   {key:20s} sem gate {a:7.3f}  com gate {b:7.3f}")
+        d_rel = abs(gated["speed"]["distance_m"] - base["speed"]["distance_m"]) / max(1e-6, base["speed"]["distance_m"])
+
+        hx = np.asarray(gated["series"]["hip_x_raw"], dtype=float)
+        hy = np.asarray(gated["series"]["hip_y_raw"], dtype=float)
+        err = np.hypot(hx - true_hip[:n, 0], hy - true_hip[:n, 1])
+        err_i = float(np.nanmax(err[interp])) if interp.any() else 0.0
+        print(f"erro do quadril nos interpolados: máx {err_i:.1f} px")
+
+        ok &= (interp & static).sum() > 0.7 * static.sum()
+        ok &= (interp & ~static).sum() <= 0.05 * (~static).sum()
+        ok &= d_rel < 0.02
+        ok &= err_i < 5.0
+        ok &= t_gated < t_base
+
+    if not ok:
+        print("REGRESSÃO")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+# benchmarks/bench_overlay.py
+"""
+Vídeo anotado (overlay) em streaming: custo do estágio, memória e saída.
+
+Clipe sintético + modelos stub (como bench_quality_tiers), o
+`process_video` rodando sem overlay e com overlay em algumas saídas
+(resolução nativa, 640 px a 30 fps, encoder OpenCV e ffmpeg se existir):
+
+  - custo: ms por frame escrito (desenho / encode) e overlay_s separado
+    do perception_s;
+  - memória: pico do tracemalloc com overlay - sem overlay, tem que
+    ficar abaixo de alguns frames (nada de guardar o vídeo);
+  - saída: o mp4 abre, tem o nº de frames e o tamanho pedidos e a bbox
+    desenhada aparece;
+  - as métricas do JSON não mudam e a velocidade média ao vivo fica
+    perto da final.
+
+Uso (de dentro de AthleteAnalysis-RunPod/):
+    python -m benchmarks.bench_overlay --frames 240
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+import app.pipeline as pipeline
+from app.overlay import COLOR_BOX
+from benchmarks.bench_quality_tiers import _install_stubs
+from benchmarks.synthetic import (
+    SYNTHETIC_CALIB,
+    StubReIDEncoder,
+    SyntheticScene,
+    write_synthetic_clip,
+)
+
+FPS = 60.0
+
+
+def _run(clip, ref, overlay):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    res = pipeline.process_video(clip, SYNTHETIC_CALIB, ref_point=ref, quality="standard", overlay=overlay)
+    dt = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return res, dt, peak
+
+
+def _read_back(path):
+    """(nº de frames, (w, h), pixels da cor da bbox no frame do meio)."""
+    cap = cv2.VideoCapture(path)
+    n, size, box_px = 0, None, 0
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+    while True:
+        ok, img = cap.read()
+        if not ok:
+            break
+        size = (img.shape[1], img.shape[0])
+        if n == total // 2:
+            diff = np.abs(img.astype(np.int16) - np.array(COLOR_BOX, dtype=np.int16))
+            box_px = int(np.all(diff < 60, axis=-1).sum())
+        n += 1
+    cap.release()
+    return n, size, box_px
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=240)
+    parser.add_argument("--gflops-per-s", type=float, default=20000.0)
+    args = parser.parse_args()
+
+    scene = SyntheticScene(n_frames=args.frames, occlusions=[(90, 100)])
+    _install_stubs(scene, args.gflops_per_s)
+    pipeline.compute_reid_embeddings = StubReIDEncoder()
+    b0 = scene.true_boxes(0)[0]
+    ref = (float(0.5 * (b0[0] + b0[2])), float(0.5 * (b0[1] + b0[3])))
+    frame_bytes = scene.img_w * scene.img_h * 3
+    ok = True
+
+    with tempfile.TemporaryDirectory() as tmp:
+        clip = write_synthetic_clip(os.path.join(tmp, "clip.mp4"), scene, fps=FPS)
+        base, dt_base, peak_base = _run(clip, ref, None)
+        m = base["quality"]["cost"]["measured"]
+        print(f"sem overlay: {dt_base:.2f}s (percepção {m['perception_s']:.2f}s), "
+              f"pico {peak_base / 2**20:.1f} MiB")
+
+        cases = [
+            ("nativo / opencv", {"writer": "opencv"}, (scene.img_w, scene.img_h), FPS),
+            ("640 px 30 fps / opencv", {"width": 640, "fps": 30, "writer": "opencv"}, (640, 360), 30.0),
+        ]
+        if shutil.which("ffmpeg"):
+            cases.append(("640 px 30 fps / ffmpeg", {"width": 640, "fps": 30, "writer": "ffmpeg"}, (640, 360), 30.0))
+        else:
+            print("(ffmpeg não está no PATH: só o encoder OpenCV)")
+
+        print(f"{'saída':24s} {'frames':>7s} {'ms/frame':>9s} {'desenho':>8s} {'encode':>7s} "
+              f"{'+pico MiB':>9s} {'v ao vivo':>9s}")
+        for k, (label, spec, size, fps) in enumerate(cases):
+            spec = dict(spec, path=os.path.join(tmp, f"overlay_{k}.mp4"))
+            res, dt, peak = _run(clip, ref, spec)
+            ov = res["overlay"]
+            extra = peak - peak_base
+            live = ov["live"]["speed_mean_m_s"]
+            print(f"{label:24s} {ov['frames_written']:7d} {ov['ms_per_frame']:9.2f} {ov['draw_s']:7.2f}s "
+                  f"{ov['encode_s']:6.2f}s {extra / 2**20:9.1f} {live:8.2f}")
+
+            n, got_size, box_px = _read_back(spec["path"])
+            expected = int(np.ceil(args.frames * fps / FPS))
+            ok &= abs(n - expected) <= 1 and ov["frames_written"] == n
+            ok &= got_size == size and box_px > 0
+            ok &= res["quality"]["cost"]["measured"]["overlay_s"] > 0
+            # streaming: no máximo uns poucos frames a mais de memória
+            ok &= extra < 4 * frame_bytes
+            for key in ("distance_m", "velocity_mean_m_s", "velocity_max_m_s"):
+                ok &= res["speed"][key] == base["speed"][key]
+            ok &= res["step_count_total"] == base["step_count_total"]
+            ok &= abs(live - base["speed"]["velocity_mean_m_s"]) < 0.1 * base["speed"]["velocity_mean_m_s"]
+
+        print(f"velocidade média final: {base['speed']['velocity_mean_m_s']:.2f} m/s")
+
+    if not ok:
+        print("REGRESSÃO")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
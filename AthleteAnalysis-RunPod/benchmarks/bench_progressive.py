@@ -0,0 +1,280 @@
+# benchmarks/bench_progressive.py
+"""
+Resultado progressivo: latência da prévia, custo da passada completa com
+e sem o prior da prévia, e a ordem das etapas na fila de jobs.
+
+Mesmo clipe sintético e mesmos modelos stub do bench_quality_tiers (custo
+do detector proporcional a imgsz², então detectar só na região do prior
+sai mais barato como sairia no YOLO de verdade):
+
+  - "precise" direto (referência, sem prior);
+  - iter_progressive: prévia ("preview") + completa ("precise") com prior
+    -> latência de cada etapa, chamadas do detector na região / fallbacks,
+    diferença das métricas pra referência;
+  - JobStore com dois jobs enviados juntos: a prévia do segundo tem que
+    sair antes da completa do primeiro;
+  - POST /analyze-video/progressive (TestClient do FastAPI) com overlay,
+    overlay_width, overlay_fps e keyframes_json, no clipe com salto do
+    bench_keyframes: vídeo anotado (baixado pela URL) e uma miniatura por
+    evento só na etapa final; parâmetro inválido -> 400;
+  - job progressivo + POST /analyze-video ao mesmo tempo: a percepção dos
+    dois nunca roda junta (os modelos do registro não são thread-safe), e
+    o /health continua respondendo enquanto o /analyze-video roda.
+
+Uso (de dentro de AthleteAnalysis-RunPod/):
+    python -m benchmarks.bench_progressive --frames 480 --gflops-per-s 20000
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import cv2
+import numpy as np
+
+import app.pipeline as pipeline
+from app.jobs import COMPLETED, JobStore
+from app.keyframes import event_frames
+from app.progressive import iter_progressive
+from benchmarks.bench_golden import GFLOPS_PER_S, _install
+from benchmarks.bench_keyframes import BODY, FootPose, JumpScene, _write_clip
+from benchmarks.bench_quality_tiers import FPS, _install_stubs
+from benchmarks.synthetic import (
+    SYNTHETIC_CALIB,
+    StubReIDEncoder,
+    SyntheticScene,
+    write_synthetic_clip,
+)
+
+
+def _summary(res):
+    return {
+        "distance_m": res["speed"]["distance_m"],
+        "velocity_mean_m_s": res["speed"]["velocity_mean_m_s"],
+        "velocity_max_m_s": res["speed"]["velocity_max_m_s"],
+        "step_count_total": res["step_count_total"],
+    }
+
+
+OVERLAY_WIDTH = 320
+OVERLAY_FPS = 30.0
+KEYFRAMES = {"thumb_width": 96, "thumb_height": 128}
+
+
+def _check_endpoint(tmp) -> bool:
+    """Overlay + keyframes pelo endpoint progressivo, até baixar o vídeo."""
+    try:
+        from fastapi.testclient import TestClient
+    except ImportError:
+        print("(fastapi não instalado: endpoint não testado)")
+        return True
+    import app.main as main_mod
+
+    # clipe com salto + passos: tem evento pra miniatura
+    scene = JumpScene(300)
+    _install(scene.colors, lambda g: FootPose(BODY, g, GFLOPS_PER_S))
+    clip = _write_clip(os.path.join(tmp, "jump.mp4"), scene)
+    b0 = scene.body(0)
+    ref = (float(0.5 * (b0[0] + b0[2])), float(0.5 * (b0[1] + b0[3])))
+
+    main_mod.OVERLAY_DIR = os.path.join(tmp, "overlays")
+    client = TestClient(main_mod.app)  # sem `with`: não sobe o warmup dos modelos
+    form = {
+        "calib_json": json.dumps(SYNTHETIC_CALIB),
+        "ref_point_json": json.dumps(list(ref)),
+        "quality": "precise",
+        "overlay": "true",
+        "overlay_width": str(OVERLAY_WIDTH),
+        "overlay_fps": str(OVERLAY_FPS),
+        "keyframes_json": json.dumps(KEYFRAMES),
+    }
+
+    def _post(data):
+        with open(clip, "rb") as f:
+            return client.post("/analyze-video/progressive", data=data, files={"video": ("clip.mp4", f, "video/mp4")})
+
+    ok = _post(dict(form, overlay_width="8")).status_code == 400
+    ok &= _post(dict(form, keyframes_json="{")).status_code == 400
+
+    r = _post(form)
+    ok &= r.status_code == 202
+    job_id = r.json()["id"]
+    while (state := client.get(f"/jobs/{job_id}").json())["status"] not in (COMPLETED, "FAILED"):
+        time.sleep(0.05)
+    if state["status"] != COMPLETED:
+        print(f"endpoint: job falhou: {state.get('error')}")
+        return False
+    prev, full = state["stages"]["preview"]["result"], state["stages"]["full"]["result"]
+    ov, kf = full.get("overlay") or {}, full.get("keyframes") or {}
+
+    video = client.get(ov.get("url", "/overlays/-"))
+    size = (0, 0)
+    if video.status_code == 200:
+        path = os.path.join(tmp, "overlay_download.mp4")
+        with open(path, "wb") as f:
+            f.write(video.content)
+        cap = cv2.VideoCapture(path)
+        size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        cap.release()
+    thumbs = kf.get("thumbnails", [])
+    n_events = len(event_frames(full))
+    print(f"endpoint: overlay {ov.get('frames_written', 0)} frames {size[0]}x{size[1]} "
+          f"via {ov.get('url')}  miniaturas={len(thumbs)}/{n_events} eventos "
+          f"(prévia sem overlay/keyframes: {'overlay' not in prev and 'keyframes' not in prev})")
+    ok &= "overlay" not in prev and "keyframes" not in prev
+    ok &= "path" not in ov and ov.get("frames_written", 0) > 0 and size[0] == OVERLAY_WIDTH
+    ok &= n_events > 0 and len(thumbs) == n_events and all(t["sprite_cell"][2] == KEYFRAMES["thumb_width"] for t in thumbs)
+    return bool(ok)
+
+
+MAX_HEALTH_S = 0.5   # latência máxima do /health com análise rodando
+
+
+@contextlib.contextmanager
+def _serve(app):
+    """Servidor uvicorn de verdade numa thread (um event loop só, sem lifespan/warmup)."""
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, lifespan="off", log_level="warning"))
+    t = threading.Thread(target=server.run, daemon=True)
+    t.start()
+    while not server.started:
+        time.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        t.join()
+
+
+def _check_serialized(clip, ref) -> bool:
+    """Job progressivo (thread do JobStore) e /analyze-video juntos: percepção uma por vez."""
+    try:
+        import httpx
+        import app.main as main_mod
+    except ImportError:
+        print("(fastapi não instalado: concorrência não testada)")
+        return True
+
+    run_perception = pipeline.run_perception
+    lock = threading.Lock()
+    state = {"now": 0, "max": 0, "calls": 0}
+
+    def _counting(*a, **kw):
+        with lock:
+            state["now"] += 1
+            state["calls"] += 1
+            state["max"] = max(state["max"], state["now"])
+        try:
+            return run_perception(*a, **kw)
+        finally:
+            with lock:
+                state["now"] -= 1
+
+    form = {"calib_json": json.dumps(SYNTHETIC_CALIB), "ref_point_json": json.dumps(list(ref)), "quality": "precise"}
+    pipeline.run_perception = _counting
+    try:
+        with _serve(main_mod.app) as url, httpx.Client(base_url=url, timeout=120.0) as client:
+
+            def _post(path, out):
+                with open(clip, "rb") as f:
+                    out.append(client.post(path, data=form, files={"video": ("clip.mp4", f, "video/mp4")}))
+
+            job, direct = [], []
+            _post("/analyze-video/progressive", job)
+            t = threading.Thread(target=_post, args=("/analyze-video", direct))
+            t.start()
+            job_id = job[0].json()["id"]
+            # liveness durante a análise direta (event loop livre)
+            health = []
+            while t.is_alive():
+                t0 = time.perf_counter()
+                ok_health = client.get("/health").status_code == 200
+                health.append(time.perf_counter() - t0 if ok_health else float("inf"))
+                time.sleep(0.05)
+            t.join()
+            while (status := client.get(f"/jobs/{job_id}").json()["status"]) not in (COMPLETED, "FAILED"):
+                time.sleep(0.05)
+    finally:
+        pipeline.run_perception = run_perception
+    print(f"job progressivo + /analyze-video juntos: {state['calls']} percepções, "
+          f"no máximo {state['max']} ao mesmo tempo  (job {status}, direto HTTP {direct[0].status_code})")
+    worst = max(health, default=0.0)
+    print(f"/health durante o /analyze-video: {len(health)} chamadas, pior {1000 * worst:.0f} ms")
+    ok = state["max"] == 1 and state["calls"] == 3 and status == COMPLETED and direct[0].status_code == 200
+    return ok and len(health) > 0 and worst < MAX_HEALTH_S
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=480)
+    parser.add_argument("--gflops-per-s", type=float, default=20000.0)
+    args = parser.parse_args()
+
+    scene = SyntheticScene(n_frames=args.frames, occlusions=[])
+    _install_stubs(scene, args.gflops_per_s)
+    pipeline.compute_reid_embeddings = StubReIDEncoder()
+
+    b0 = scene.true_boxes(0)[0]
+    ref = (float(0.5 * (b0[0] + b0[2])), float(0.5 * (b0[1] + b0[3])))
+    ok = True
+
+    with tempfile.TemporaryDirectory() as tmp:
+        clip = write_synthetic_clip(os.path.join(tmp, "clip.mp4"), scene, fps=FPS)
+
+        # referência: precise direto
+        t0 = time.perf_counter()
+        base = pipeline.process_video(clip, SYNTHETIC_CALIB, ref_point=ref, quality="precise")
+        t_base = time.perf_counter() - t0
+        mb = base["quality"]["cost"]["measured"]
+        print(f"precise direto:  {t_base:6.2f}s  det={mb['detector_calls']}")
+
+        stages = {}
+        for st in iter_progressive(clip, SYNTHETIC_CALIB, ref_point=ref, quality="precise"):
+            stages[st["stage"]] = st
+            print(f"etapa {st['stage']:8s} passada={st['pass_s']:6.2f}s  latência={st['latency_s']:6.2f}s")
+        prev, full = stages["preview"]["result"], stages["full"]["result"]
+        ok &= "series" not in prev and "series" in full
+        mf = full["quality"]["cost"]["measured"]
+        print(f"completa c/ prior: det={mf['detector_calls']} na região={mf['region_detections']} "
+              f"fallbacks={mf['region_fallbacks']}  "
+              f"percepção {mf['perception_s']:.2f}s vs {mb['perception_s']:.2f}s sem prior")
+
+        print(f"{'métrica':20s} {'prévia':>9s} {'completa':>9s} {'referência':>10s}")
+        sp, sf, sb = _summary(prev), _summary(full), _summary(base)
+        for k in sb:
+            print(f"{k:20s} {sp[k]:9.3f} {sf[k]:9.3f} {sb[k]:10.3f}")
+        # o prior só corta custo: mesmas métricas da referência
+        ok &= abs(sf["distance_m"] - sb["distance_m"]) < 0.02 * max(1e-6, sb["distance_m"])
+        ok &= sf["step_count_total"] == sb["step_count_total"]
+        ok &= stages["preview"]["latency_s"] < 0.5 * stages["full"]["pass_s"]
+        ok &= mf["perception_s"] < mb["perception_s"]
+
+        # fila de jobs: a prévia do job B passa na frente da completa do A
+        store = JobStore()
+        make = lambda: iter_progressive(clip, SYNTHETIC_CALIB, ref_point=ref, quality="precise")
+        a, b = store.submit(make), store.submit(make)
+        while any(store.get(j)["status"] != COMPLETED for j in (a, b)):
+            time.sleep(0.05)
+        ja, jb = store.get(a), store.get(b)
+        print(f"job A: prévia {ja['stages']['preview']['latency_s']:.2f}s completa {ja['stages']['full']['latency_s']:.2f}s")
+        print(f"job B: prévia {jb['stages']['preview']['latency_s']:.2f}s completa {jb['stages']['full']['latency_s']:.2f}s")
+        ok &= jb["stages"]["preview"]["latency_s"] < ja["stages"]["full"]["latency_s"]
+
+        ok &= _check_serialized(clip, ref)
+        ok &= _check_endpoint(tmp)
+
+    if not ok:
+        print("REGRESSÃO")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+# benchmarks/bench_quality_tiers.py
+"""
+Níveis de qualidade (preview / standard / precise): custo estimado vs
+medido e quanto o rastreio do atleta piora nos níveis baratos.
+
+Roda o `process_video` de verdade num clipe sintético de 120 fps
+(retângulos de benchmarks/synthetic.py) com modelos STUB colocados no
+registro de modelos (nenhum YOLO / RTMPose é carregado):
+
+  - detector stub: acha os retângulos pela cor no frame e "custa" os
+    GFLOPs da variante / imgsz pedida (sleep por uma vazão fixa);
+  - pose stub: keypoints num layout fixo dentro do atleta achado na
+    região, com o custo da variante de pose;
+  - ReID: encoder stub (cor média).
+
+Por nível: frames analisados, chamadas de detector / pose / ReID, tempo
+medido vs estimado e erro do centro do quadril contra a bbox real do alvo.
+A estimativa usa o perfil de custo calibrado NESTA máquina com medidas
+unitárias, fora do pipeline: decode (grab / read do clipe), uma chamada
+de cada stub com 0 GFLOPs (o pré/pós-processamento), a vazão dos stubs.
+Falha se medido / estimado sair de [1 / MAX_COST_FACTOR, MAX_COST_FACTOR].
+
+Uso (de dentro de AthleteAnalysis-RunPod/):
+    python -m benchmarks.bench_quality_tiers --frames 480 --gflops-per-s 20000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from dataclasses import replace
+
+import cv2
+import numpy as np
+
+import app.pipeline as pipeline
+from app.models import MODEL_REGISTRY, detector_key, pose_key
+from app.quality import (
+    DETECTOR_GFLOPS,
+    DEVICE_COSTS,
+    POSE_GFLOPS,
+    QUALITY_TIERS,
+    _YOLO_SIZES,
+    _yolo_rank,
+    estimate_cost,
+    get_quality_tier,
+)
+from benchmarks.synthetic import (
+    SYNTHETIC_CALIB,
+    StubReIDEncoder,
+    SyntheticScene,
+    write_synthetic_clip,
+)
+
+FPS = 120.0
+MAX_COST_FACTOR = 1.5   # medido / estimado aceito (nos dois sentidos)
+
+
+class _Boxes:
+    def __init__(self, xyxy, conf):
+        self.xyxy = _Arr(xyxy)
+        self.conf = _Arr(conf)
+
+    def __len__(self):
+        return len(self.xyxy.a)
+
+
+class _Arr:
+    def __init__(self, a):
+        self.a = a
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self.a
+
+
+class _Result:
+    def __init__(self, boxes):
+        self.boxes = boxes
+
+
+def _color_boxes(frame, colors, x0=0, y0=0):
+    """Bbox de cada cor presente (amostrando 1 a cada 4 pixels; frame BGR)."""
+    sub = frame[::4, ::4].astype(np.int16)
+    out = []
+    for c in colors:
+        # o mp4 mexe um pouco nas cores
+        ys, xs = np.nonzero(np.all(np.abs(sub - c.astype(np.int16)) < 40, axis=-1))
+        if len(xs) < 4:
+            out.append(None)
+            continue
+        out.append(np.array([x0 + 4 * xs.min(), y0 + 4 * ys.min(), x0 + 4 * xs.max() + 4, y0 + 4 * ys.max() + 4], float))
+    return out
+
+
+class StubDetector:
+    def __init__(self, colors, gflops, gflops_per_s):
+        self.colors = colors
+        self.gflops = gflops
+        self.rate = gflops_per_s
+
+    def predict(self, frame, imgsz=640, **_):
+        time.sleep(self.gflops * (imgsz / 640.0) ** 2 / self.rate)
+        boxes = [b for b in _color_boxes(frame, self.colors) if b is not None]
+        if not boxes:
+            return [_Result(None)]
+        xyxy = np.asarray(boxes)
+        return [_Result(_Boxes(xyxy, np.full(len(xyxy), 0.9)))]
+
+
+class StubPose:
+    # (fração x, fração y) dentro da bbox, COCO-17
+    LAYOUT = np.array(
+        [[.5, .05], [.45, .04], [.55, .04], [.4, .06], [.6, .06],
+         [.3, .2], [.7, .2], [.25, .35], [.75, .35], [.2, .5], [.8, .5],
+         [.4, .5], [.6, .5], [.4, .75], [.6, .75], [.4, .98], [.6, .98]]
+    )
+
+    def __init__(self, color, gflops, gflops_per_s):
+        self.color = color
+        self.gflops = gflops
+        self.rate = gflops_per_s
+
+    def __call__(self, frame, bboxes):
+        time.sleep(self.gflops / self.rate)
+        x1, y1, x2, y2 = map(int, bboxes[0])
+        (b,) = _color_boxes(frame[y1:y2, x1:x2], [self.color], x1, y1)
+        if b is None:
+            return np.zeros((1, 17, 2)), np.zeros((1, 17))
+        k = b[:2] + self.LAYOUT * (b[2:] - b[:2])
+        return k[None], np.full((1, 17), 0.9)
+
+
+def _install_stubs(scene, gflops_per_s):
+    """Põe detector / pose stub no registro pra todas as variantes dos níveis."""
+    for name in QUALITY_TIERS:
+        tier = get_quality_tier(name)
+        g = DETECTOR_GFLOPS[_YOLO_SIZES[max(0, _yolo_rank(tier.detector_weights))]]
+        MODEL_REGISTRY.get(
+            detector_key(tier.detector_weights),
+            lambda g=g: StubDetector(scene.colors, g, gflops_per_s),
+            sizer=lambda _: 0,
+        )
+        MODEL_REGISTRY.get(
+            pose_key(tier.pose_variant),
+            lambda v=tier.pose_variant: StubPose(scene.colors[0], POSE_GFLOPS[v], gflops_per_s),
+            sizer=lambda _: 0,
+        )
+
+
+def _per_call_ms(fn, repeats=30):
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return 1000.0 * (time.perf_counter() - t0) / repeats
+
+
+def _calibrate(clip, scene, gflops_per_s):
+    """Perfil de custo desta máquina: decode medido + pré/pós dos stubs."""
+    cap = cv2.VideoCapture(clip)
+    w, h = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    t0 = time.perf_counter()
+    n_grab = 0
+    while cap.grab():
+        n_grab += 1
+    grab_ms = 1000.0 * (time.perf_counter() - t0) / max(1, n_grab)
+    cap.release()
+    cap = cv2.VideoCapture(clip)
+    t0 = time.perf_counter()
+    n_read = 0
+    while cap.read()[0]:
+        n_read += 1
+    read_ms = 1000.0 * (time.perf_counter() - t0) / max(1, n_read)
+    cap.release()
+
+    mpx = w * h / 1e6
+    frame = scene.frame(0)
+    box = scene.true_boxes(0)[0]
+    crop = frame[int(box[1]):int(box[3]), int(box[0]):int(box[2])][None]
+    encoder = StubReIDEncoder()
+    return replace(
+        DEVICE_COSTS["cpu"],
+        gflops_per_s=gflops_per_s,
+        decode_ms_per_mpx=grab_ms / mpx,
+        convert_ms_per_mpx=max(0.0, read_ms - grab_ms) / mpx,
+        detector_call_ms=_per_call_ms(lambda: StubDetector(scene.colors, 0.0, 1.0).predict(frame)),
+        pose_call_ms=_per_call_ms(lambda: StubPose(scene.colors[0], 0.0, 1.0)(frame, [box])),
+        reid_crop_ms=_per_call_ms(lambda: encoder(crop)),
+    ), (w, h)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=480)
+    parser.add_argument("--gflops-per-s", type=float, default=20000.0)
+    args = parser.parse_args()
+
+    scene = SyntheticScene(n_frames=args.frames, occlusions=[])
+    _install_stubs(scene, args.gflops_per_s)
+    encoder = StubReIDEncoder()
+    pipeline.compute_reid_embeddings = encoder
+
+    b0 = scene.true_boxes(0)[0]
+    ref = (float(0.5 * (b0[0] + b0[2])), float(0.5 * (b0[1] + b0[3])))
+    true_hip = np.array([scene.true_boxes(t)[0] for t in range(args.frames)])
+    true_hip = true_hip[:, :2] + StubPose.LAYOUT[11:13].mean(0) * (true_hip[:, 2:] - true_hip[:, :2])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        clip = write_synthetic_clip(os.path.join(tmp, "clip.mp4"), scene, fps=FPS)
+
+        costs, size = _calibrate(clip, scene, args.gflops_per_s)
+        ok = True
+        wall = {}
+        print(f"clipe: {args.frames} frames a {FPS:.0f} fps, vazão dos stubs {args.gflops_per_s:.0f} GFLOP/s")
+        print(f"perfil calibrado: decode {costs.decode_ms_per_mpx:.2f} + {costs.convert_ms_per_mpx:.2f} ms/Mpx, "
+              f"detector {costs.detector_call_ms:.2f} ms/chamada, pose {costs.pose_call_ms:.2f} ms/chamada")
+        for name in ("preview", "standard", "precise"):
+            t0 = time.perf_counter()
+            res = pipeline.process_video(clip, SYNTHETIC_CALIB, ref_point=ref, quality=name)
+            wall[name] = time.perf_counter() - t0
+            q = res["quality"]
+            est, meas = q["cost"]["estimated"], q["cost"]["measured"]
+            # modelo de custo com o perfil desta máquina (o padrão é o do device real)
+            calibrated = estimate_cost(get_quality_tier(name), args.frames, FPS, frame_size=size, costs=costs)
+            est_s = calibrated["seconds"]
+            factor = meas["seconds"] / max(est_s, 1e-9)
+
+            step = q["frame_step"]
+            hx = np.asarray(res["series"]["hip_x_raw"], dtype=float)
+            hy = np.asarray(res["series"]["hip_y_raw"], dtype=float)
+            ref_xy = true_hip[::step][: len(hx)]
+            err = np.hypot(hx - ref_xy[:, 0], hy - ref_xy[:, 1])
+            print(
+                f"{name:9s} passo={step} frames={meas['frames_analyzed']:4d} "
+                f"det={meas['detector_calls']:4d} pose={meas['pose_calls']:4d} "
+                f"reid={meas['reid_encoder_calls']:3d}  "
+                f"medido={meas['seconds']:6.2f}s (percepção {meas['perception_s']:.2f}s) "
+                f"estimado={est_s:6.2f}s (x{factor:.2f})  erro quadril={np.nanmedian(err):5.1f} px"
+            )
+            print("          estágios estimados: " + "  ".join(
+                f"{k[:-2]}={v:.2f}s" for k, v in calibrated["stages"].items()))
+            ok &= meas["frames_analyzed"] == est["frames_analyzed"]
+            ok &= 1.0 / MAX_COST_FACTOR <= factor <= MAX_COST_FACTOR
+            ok &= bool(np.nanmedian(err) < 10.0)
+
+        print(f"preview {wall['precise'] / wall['preview']:.1f}x mais rápido que precise, "
+              f"standard {wall['precise'] / wall['standard']:.1f}x")
+        ok &= wall["preview"] < wall["standard"] < wall["precise"]
+
+    if not ok:
+        print("REGRESSÃO")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
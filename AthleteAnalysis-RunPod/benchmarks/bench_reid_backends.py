@@ -0,0 +1,143 @@
+# benchmarks/bench_reid_backends.py
+"""
+Paridade e latência dos backends de ReID em CPU.
+
+Para cada backend ("torch", "onnx", "onnx-int8") calcula embeddings dos
+mesmos crops de pessoas sintéticas e reporta:
+  - cosseno contra o caminho torch (média / mínimo),
+  - latência média por batch e por imagem;
+e o gate que decide se o int8 pedido (opt-in, ATHLETE_REID_BACKEND=onnx-int8)
+vale mesmo (`int8_parity`: paridade e latência, melhor de N, int8 vs fp32
+no batch de calibração de app/reid.py).
+
+Falha (REGRESSÃO) se o onnx fp32 se afastar do torch (cosseno mínimo <
+MIN_FP32_COSINE) ou se o int8 ficar abaixo de REID_INT8_MIN_COSINE contra
+o fp32 nos crops de pessoa ou na calibração.
+
+Precisa de torch, torchvision, onnx e onnxruntime instalados (baixa os
+pesos do ResNet-18 e exporta os .onnx na primeira execução). Sem acesso
+aos pesos ImageNet, --random-weights exporta a mesma arquitetura com pesos
+aleatórios num diretório temporário: a latência vale, a paridade é só
+indicativa (a distribuição dos pesos treinados é outra).
+
+Uso (de dentro de AthleteAnalysis-RunPod/):
+    python -m benchmarks.bench_reid_backends --batch 1 8 --repeats 20
+    python -m benchmarks.bench_reid_backends --random-weights
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from app.config import MODEL_CFG
+from app.crops import FrameCrops
+from app.models import MODEL_REGISTRY
+from app.registry import ModelKey
+from app.reid import (
+    REID_BACKENDS,
+    REID_INT8_MAX_SLOWDOWN,
+    REID_INT8_MIN_COSINE,
+    compute_reid_embeddings,
+    export_reid_onnx,
+    int8_parity,
+)
+from benchmarks.synthetic import SyntheticScene
+
+MIN_FP32_COSINE = 0.999   # onnx fp32 vs torch: só arredondamento
+
+
+def _person_batch(n: int) -> np.ndarray:
+    """n crops de pessoas sintéticas (com textura) já em REID_INPUT_HW."""
+    scene = SyntheticScene(n_people=min(n, 6), seed=0)
+    rng = np.random.default_rng(0)
+    crops = FrameCrops()
+    out = []
+    t = 0
+    while len(out) < n:
+        frame = scene.frame(t)
+        noise = rng.integers(-25, 25, size=frame.shape, dtype=np.int16)
+        frame = np.clip(frame.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+        crops.set_frame(frame)
+        batch, _ = crops.reid_batch(scene.true_boxes(t))
+        out.extend(batch.copy())
+        t += 7
+    return np.stack(out[:n])
+
+
+def _use_random_weights(tmp: str) -> None:
+    """ResNet-18 sem pesos treinados no registro (torch) e exportado em `tmp` (onnx)."""
+    import torch.nn as nn
+    from torchvision import models
+
+    encoder = nn.Sequential(*list(models.resnet18().children())[:-1]).eval()
+    MODEL_REGISTRY.get(ModelKey("reid", "resnet18", "cpu", "fp32"), lambda: encoder, sizer=lambda _: 0)
+    MODEL_CFG.reid_onnx_dir = tmp
+    export_reid_onnx(encoder=encoder)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--random-weights", action="store_true",
+                        help="sem pesos ImageNet: mesma arquitetura, pesos aleatórios")
+    args = parser.parse_args()
+
+    MODEL_CFG.device = "cpu"
+    tmp = tempfile.TemporaryDirectory()
+    if args.random_weights:
+        _use_random_weights(tmp.name)
+        print("pesos ALEATÓRIOS: latência representativa, paridade só indicativa")
+
+    ok = True
+    for bs in args.batch:
+        batch = _person_batch(bs)
+        feats_by = {}
+        print(f"batch={bs}")
+        for backend in REID_BACKENDS:
+            # warm-up (carrega / exporta o modelo)
+            feats = compute_reid_embeddings(batch, backend=backend)
+            if feats is None:
+                print(f"  {backend:10s} FALHOU (dependência ausente?)")
+                ok = False
+                continue
+
+            t0 = time.perf_counter()
+            for _ in range(args.repeats):
+                compute_reid_embeddings(batch, backend=backend)
+            ms = 1000.0 * (time.perf_counter() - t0) / args.repeats
+            feats_by[backend] = feats
+
+            line = f"  {backend:10s} {ms:8.2f} ms/batch  {ms / bs:7.2f} ms/img"
+            for ref_name in ("torch", "onnx"):
+                ref = feats_by.get(ref_name)
+                if ref is not None and ref_name != backend:
+                    cos = np.sum(feats * ref, axis=1)
+                    line += f"  cos vs {ref_name}: média {cos.mean():.4f} mín {cos.min():.4f}"
+            print(line)
+
+        if "torch" in feats_by and "onnx" in feats_by:
+            ok &= bool(np.sum(feats_by["onnx"] * feats_by["torch"], axis=1).min() >= MIN_FP32_COSINE)
+        if "onnx" in feats_by and "onnx-int8" in feats_by:
+            ok &= bool(np.sum(feats_by["onnx-int8"] * feats_by["onnx"], axis=1).min() >= REID_INT8_MIN_COSINE)
+
+    # o gate do padrão: paridade + latência; int8 reprovado só por ser mais
+    # lento é decisão certa do gate (cai pro fp32), não regressão
+    parity = int8_parity(force=True)
+    print(f"gate int8 (calibração): cos média {parity['mean_cosine']}  mín {parity['min_cosine']} "
+          f"(limiar {REID_INT8_MIN_COSINE})  tempo int8/fp32 {parity['int8_vs_fp32_time']} "
+          f"(máx {REID_INT8_MAX_SLOWDOWN}) -> {'onnx-int8' if parity['ok'] else 'onnx (fp32)'} quando o int8 é pedido")
+    ok &= parity["min_cosine"] is not None and parity["min_cosine"] >= REID_INT8_MIN_COSINE
+    tmp.cleanup()
+
+    if not ok:
+        print("REGRESSÃO: backend falhou ou int8 / onnx fora da paridade")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
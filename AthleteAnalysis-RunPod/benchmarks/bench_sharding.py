@@ -0,0 +1,147 @@
+# benchmarks/bench_sharding.py
+"""
+Percepção em shards: trechos semeados com o atleta + pool longo de workers.
+
+Roda o `process_video` de verdade num clipe sintético (retângulos de
+benchmarks/synthetic.py) com modelos STUB instalados em cada worker pelo
+`setup` do pool (nenhum YOLO / RTMPose é carregado). O detector stub
+devolve o atleta por ÚLTIMO com o mesmo score dos outros: um trecho que
+começasse sem semente pegaria outra pessoa.
+
+Confere:
+  - nenhum reprocesso de trecho (a costura bate de primeira) e todo trecho
+    depois do primeiro semeado;
+  - mesma trilha do quadril que o caminho sequencial;
+  - o pool sobrevive entre requests: mesmos workers (pids), sem custo de
+    subida no segundo request e o mesmo pool quando o request pede mais
+    trechos que workers (os de sobra esperam na fila);
+  - shards fora de [1, MAX_SHARDS] no endpoint -> 400 (sem subir worker).
+
+Uso (de dentro de AthleteAnalysis-RunPod/):
+    python -m benchmarks.bench_sharding --frames 600 --shards 3
+"""
+
+import argparse
+import functools
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import app.pipeline as pipeline
+from app.config import MAX_SHARDS, MODEL_CFG
+from app.sharding import get_shard_pool, shutdown_shard_pool
+from benchmarks.bench_golden import GFLOPS_PER_S, _install
+from benchmarks.bench_quality_tiers import StubPose
+from benchmarks.synthetic import SYNTHETIC_CALIB, SyntheticScene, write_synthetic_clip
+
+FPS = 60.0
+QUALITY = "standard"
+MAX_HIP_DIFF_PX = 1.0   # diferença mediana do quadril vs sequencial
+
+
+def _scene(n_frames: int) -> SyntheticScene:
+    return SyntheticScene(n_frames=n_frames, n_people=3, occlusions=[(150, 165)])
+
+
+def _worker_setup(n_frames: int) -> None:
+    """Stubs no registro (roda em cada worker e no processo principal)."""
+    scene = _scene(n_frames)
+    _install(scene.colors[::-1], lambda g: StubPose(scene.colors[0], g, GFLOPS_PER_S))
+
+
+def _hip(result) -> np.ndarray:
+    s = result["series"]
+    return np.stack([np.asarray(s["hip_x_raw"], float), np.asarray(s["hip_y_raw"], float)], axis=1)
+
+
+def _check_endpoint(clip) -> bool:
+    """shards acima do teto é recusado antes de qualquer processamento."""
+    try:
+        from fastapi.testclient import TestClient
+    except ImportError:
+        print("(fastapi não instalado: endpoint não testado)")
+        return True
+    import app.main as main_mod
+
+    client = TestClient(main_mod.app)
+    codes = []
+    for shards in (0, MAX_SHARDS + 1):
+        with open(clip, "rb") as f:
+            r = client.post(
+                "/analyze-video",
+                data={"calib_json": json.dumps(SYNTHETIC_CALIB), "shards": str(shards)},
+                files={"video": ("clip.mp4", f, "video/mp4")},
+            )
+        codes.append(r.status_code)
+    print(f"endpoint: shards=0 / {MAX_SHARDS + 1} -> HTTP {codes}")
+    return codes == [400, 400]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--shards", type=int, default=3)
+    args = parser.parse_args()
+
+    scene = _scene(args.frames)
+    b0 = scene.true_boxes(0)[0]
+    ref = (float(0.5 * (b0[0] + b0[2])), float(0.5 * (b0[1] + b0[3])))
+    setup = functools.partial(_worker_setup, args.frames)
+    ok = True
+
+    with tempfile.TemporaryDirectory() as tmp:
+        clip = write_synthetic_clip(os.path.join(tmp, "clip.mp4"), scene, fps=FPS)
+
+        setup()
+        t0 = time.perf_counter()
+        seq = pipeline.process_video(clip, SYNTHETIC_CALIB, ref_point=ref, quality=QUALITY)
+        t_seq = time.perf_counter() - t0
+        print(f"sequencial: {t_seq:.2f}s")
+
+        # tamanho fixo do pool (ATHLETE_SHARD_WORKERS em produção)
+        MODEL_CFG.shard_workers = args.shards
+        t0 = time.perf_counter()
+        pool = get_shard_pool(setup=setup)
+        print(f"pool: {pool.n_workers} workers aquecidos em {time.perf_counter() - t0:.2f}s")
+        seen = []
+
+        # o terceiro pede mais trechos que workers: fila, mesmo pool
+        for run, n_shards in ((1, args.shards), (2, args.shards), (3, args.shards + 1)):
+            t0 = time.perf_counter()
+            res = pipeline.process_video(clip, SYNTHETIC_CALIB, ref_point=ref, quality=QUALITY, shards=n_shards)
+            wall = time.perf_counter() - t0
+            rep = res["sharding"]
+            diff = np.nanmedian(np.hypot(*(_hip(res) - _hip(seq)).T))
+            seeded = [b["seeded"] for b in rep["boundaries"]]
+            same = [b["same_athlete"] for b in rep["boundaries"]]
+            print(
+                f"request {run}: {wall:.2f}s (pool {rep['pool_seconds']:.3f}s)  trechos={rep['shards']} "
+                f"workers={rep['workers']} "
+                f"semeados={sum(seeded)}/{len(seeded)} costura ok={sum(same)}/{len(same)} "
+                f"reprocessos={rep['reruns']}  quadril vs sequencial: {diff:.2f} px"
+            )
+            ok &= rep["reruns"] == 0 and all(seeded) and all(same)
+            seen.append(set(rep["worker_pids"]))
+            ok &= bool(diff <= MAX_HIP_DIFF_PX)
+
+        # pool recriado = pids novos nos requests seguintes
+        live = set(pool.pids())
+        reused = get_shard_pool() is pool and all(s <= seen[0] | live for s in seen[1:])
+        print(f"workers reaproveitados entre requests: {reused}  (pids {sorted(set().union(*seen))})")
+        ok &= reused
+        shutdown_shard_pool()
+
+        ok &= _check_endpoint(clip)
+
+    if not ok:
+        print("REGRESSÃO")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+# benchmarks/bench_single_pass.py
+"""
+Percepção em um passe (YOLO-pose + ReID do mapa de features) vs o caminho
+de três modelos (YOLO + ResNet-18 + RTMPose), no perfil CPU.
+
+Dois modos:
+
+  - padrão (sem modelos): clipe sintético e stubs com o custo dos modelos
+    do perfil CPU (YOLO11n 6.5 + RTMPose-m 2.2 + ReID 1.2 GFLOPs por crop
+    vs YOLO11n-pose 7.6) numa vazão de CPU; mede ms/frame, chamadas e a
+    paridade das métricas entre os dois caminhos;
+  - `--video clip.mp4`: modelos DE VERDADE (precisa ultralytics + rtmlib;
+    rode com ATHLETE_PROFILE=cpu) no vídeo dado, mesmas medidas.
+
+Paridade: distância / velocidade média e máxima / passos / saltos e
+diferença média do quadril por frame (px).
+
+Uso (de dentro de AthleteAnalysis-RunPod/):
+    python -m benchmarks.bench_single_pass --frames 180
+    ATHLETE_PROFILE=cpu python -m benchmarks.bench_single_pass --video clip.mp4 --ref 640 360
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import app.pipeline as pipeline
+from app.config import cpu_model_config
+from app.models import MODEL_REGISTRY, detector_key, pose_key
+from app.quality import DEVICE_GFLOPS_PER_S, POSE_DETECTOR_GFLOPS, REID_GFLOPS, get_quality_tier
+from app.single_pass import PoseDetections, single_pass_key
+from benchmarks.bench_quality_tiers import StubDetector, StubPose, _color_boxes
+from benchmarks.synthetic import (
+    SYNTHETIC_CALIB,
+    StubReIDEncoder,
+    SyntheticScene,
+    write_synthetic_clip,
+)
+
+FPS = 60.0
+
+
+class StubSinglePass:
+    """Mesma interface do SinglePassPerception: bbox + pose + embedding de todos."""
+
+    def __init__(self, colors, gflops, gflops_per_s, dim=256, seed=0):
+        self.colors = colors
+        self.gflops = gflops
+        self.rate = gflops_per_s
+        self.proj = np.random.default_rng(seed).normal(size=(3, dim)).astype(np.float32)
+
+    def __call__(self, frame, imgsz, region=None):
+        time.sleep(self.gflops * (imgsz / 640.0) ** 2 / self.rate)
+        x0 = y0 = 0
+        img = frame
+        if region is not None:
+            x0, y0 = region[:2]
+            img = frame[region[1]:region[3], region[0]:region[2]]
+        found = [
+            (b, c) for b, c in zip(_color_boxes(img, self.colors, x0, y0), self.colors)
+            if b is not None
+        ]
+        if not found:
+            return None
+        boxes = np.array([b for b, _ in found])
+        kpts = boxes[:, None, :2] + StubPose.LAYOUT[None] * (boxes[:, None, 2:] - boxes[:, None, :2])
+        # "feature map": cor do uniforme projetada (como o encoder stub)
+        emb = (np.array([c for _, c in found], dtype=np.float32) / 255.0 - 0.5) @ self.proj
+        emb /= np.linalg.norm(emb, axis=1, keepdims=True) + 1e-12
+        return PoseDetections(
+            boxes=boxes,
+            scores=np.full(len(boxes), 0.9),
+            keypoints=kpts,
+            keypoint_scores=np.full(kpts.shape[:2], 0.9),
+            embeddings=emb,
+        )
+
+
+class CostlyReID(StubReIDEncoder):
+    """Encoder stub com o custo do ResNet-18 por crop."""
+
+    def __init__(self, gflops_per_s):
+        super().__init__()
+        self.rate = gflops_per_s
+
+    def __call__(self, batch_rgb):
+        if batch_rgb is not None and len(batch_rgb):
+            time.sleep(REID_GFLOPS * len(batch_rgb) / self.rate)
+        return super().__call__(batch_rgb)
+
+
+def _install_stubs(scene, tier, gflops_per_s):
+    from app.quality import DETECTOR_GFLOPS, POSE_GFLOPS
+
+    MODEL_REGISTRY.get(
+        detector_key(tier.detector_weights),
+        lambda: StubDetector(scene.colors, DETECTOR_GFLOPS["n"], gflops_per_s),
+        sizer=lambda _: 0,
+    )
+    MODEL_REGISTRY.get(
+        pose_key(tier.pose_variant),
+        lambda: StubPose(scene.colors[0], POSE_GFLOPS[tier.pose_variant], gflops_per_s),
+        sizer=lambda _: 0,
+    )
+    MODEL_REGISTRY.get(
+        single_pass_key(tier.detector_weights),
+        lambda: StubSinglePass(scene.colors, POSE_DETECTOR_GFLOPS["n"], gflops_per_s),
+        sizer=lambda _: 0,
+    )
+    pipeline.compute_reid_embeddings = CostlyReID(gflops_per_s)
+
+
+def _parity(a, b):
+    out = {}
+    for key in ("distance_m", "velocity_mean_m_s", "velocity_max_m_s"):
+        out[key] = (a["speed"][key], b["speed"][key])
+    out["step_count_total"] = (a["step_count_total"], b["step_count_total"])
+    out["jumps"] = (len(a["jumps"]), len(b["jumps"]))
+    ha = np.stack([a["series"]["hip_x_raw"], a["series"]["hip_y_raw"]], axis=1).astype(float)
+    hb = np.stack([b["series"]["hip_x_raw"], b["series"]["hip_y_raw"]], axis=1).astype(float)
+    n = min(len(ha), len(hb))
+    hip_px = float(np.nanmean(np.hypot(*(ha[:n] - hb[:n]).T)))
+    return out, hip_px
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=180)
+    parser.add_argument("--gflops-per-s", type=float, default=DEVICE_GFLOPS_PER_S["cpu"])
+    parser.add_argument("--video", default=None)
+    parser.add_argument("--ref", type=float, nargs=2, default=None)
+    args = parser.parse_args()
+
+    # perfil CPU nos dois caminhos (YOLO11n / RTMPose-m / ReID)
+    tier = get_quality_tier("precise", cfg=cpu_model_config())
+    ok = True
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.video:
+            clip = args.video
+            ref = tuple(args.ref) if args.ref else None
+            print(f"modelos reais em {clip}")
+        else:
+            scene = SyntheticScene(n_frames=args.frames, occlusions=[(60, 75)])
+            _install_stubs(scene, tier, args.gflops_per_s)
+            b0 = scene.true_boxes(0)[0]
+            ref = (float(0.5 * (b0[0] + b0[2])), float(0.5 * (b0[1] + b0[3])))
+            clip = write_synthetic_clip(os.path.join(tmp, "clip.mp4"), scene, fps=FPS)
+            print(f"stubs a {args.gflops_per_s:.0f} GFLOP/s, clipe sintético de {args.frames} frames")
+
+        runs = {}
+        for backend in ("topdown", "yolo-pose"):
+            t0 = time.perf_counter()
+            res = pipeline.process_video(
+                clip, SYNTHETIC_CALIB, ref_point=ref, quality=tier, perception=backend
+            )
+            dt = time.perf_counter() - t0
+            m = res["quality"]["cost"]["measured"]
+            runs[backend] = res
+            print(f"{backend:10s} {1000.0 * m['perception_s'] / max(1, m['frames_analyzed']):7.1f} ms/frame "
+                  f"(total {dt:.2f}s)  det={m['detector_calls']} pose={m['pose_calls']} "
+                  f"reid_encoder={m['reid_encoder_calls']}  "
+                  f"estimado {1000.0 * res['quality']['cost']['estimated']['gflops_per_frame'] / args.gflops_per_s:.1f} ms/frame")
+
+        td, sp = runs["topdown"], runs["yolo-pose"]
+        parity, hip_px = _parity(td, sp)
+        print(f"{'métrica':20s} {'topdown':>10s} {'yolo-pose':>10s}")
+        for key, (a, b) in parity.items():
+            print(f"{key:20s} {a:10.3f} {b:10.3f}")
+        print(f"quadril: diferença média {hip_px:.1f} px/frame")
+
+        if not args.video:
+            d_td, d_sp = parity["distance_m"]
+            ok &= abs(d_td - d_sp) < 0.02 * max(1e-6, d_td)
+            ok &= hip_px < 3.0
+            ok &= sp["quality"]["cost"]["measured"]["pose_calls"] == 0
+            ok &= sp["quality"]["cost"]["measured"]["reid_encoder_calls"] == 0
+            ok &= sp["quality"]["cost"]["measured"]["perception_s"] < td["quality"]["cost"]["measured"]["perception_s"]
+
+    if not ok:
+        print("REGRESSÃO")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+# benchmarks/bench_smoothing.py
+"""
+Suavização ponderada por confiança vs Savitzky-Golay fixo.
+
+Tornozelos sintéticos em "tesoura" com passos CONHECIDOS, estragados como
+na pose de verdade:
+
+  - falhas de detecção em trechos (3-10 frames) preenchidas com o último
+    valor (platôs, como o assemble_series faz);
+  - amostras de score baixo com erro grande;
+  - trocas esquerda/direita isoladas (score baixo).
+
+Compara, em 30 / 60 / 120 fps:
+
+  - legado: série preenchida + Savitzky-Golay de janela fixa (11 frames)
+    + find_peaks (o código antigo, de benchmarks/bench_step_stats.py);
+  - novo:   `compute_stride_from_ankles_scissoring` com os pesos (score,
+    0 nos frames repetidos), janela em segundos e iterações robustas.
+
+Mede recall / precisão dos passos (±2 frames), erro médio de tempo e o
+custo da suavização por 1000 frames. Em 1M amostras, por janela: savgol
+vs caminho sem pesos (núcleo fixo, tem que dar o mesmo no miolo; teto
+MAX_UNWEIGHTED_VS_SAVGOL) vs ponderado (teto MAX_WEIGHTED_VS_SAVGOL) e
+robusto. Os quatro rodam intercalados a cada rodada e o gate usa a MEDIANA
+das razões por rodada (carga da máquina afeta os dois lados igual).
+
+Uso (de dentro de AthleteAnalysis-RunPod/):
+    python -m benchmarks.bench_smoothing --seconds 120
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+from scipy.signal import savgol_filter
+
+from app.config import METRICS_CFG
+from app.metrics import compute_stride_from_ankles_scissoring
+from app.smoothing import local_poly_smooth, window_for_fps
+from benchmarks.bench_step_stats import legacy_scissoring
+
+SCALE = 0.005  # m/px
+# teto do ajuste ponderado (8 correlações + sistema 3x3 por frame) vs savgol
+MAX_WEIGHTED_VS_SAVGOL = 8.0
+# teto do caminho sem pesos (uma convolução + bordas, ~1x o savgol; folga
+# pra ruído de medição)
+MAX_UNWEIGHTED_VS_SAVGOL = 2.0
+
+
+def _ffill(y):
+    idx = np.where(np.isnan(y), 0, np.arange(len(y)))
+    return y[np.maximum.accumulate(idx)]
+
+
+def _synthetic_ankles(fps, seconds, seed=0):
+    rng = np.random.default_rng(seed)
+    n = int(fps * seconds)
+    t = np.arange(n) / fps
+    cadence_hz = 1.5 + 0.15 * np.sin(2 * np.pi * t / 30.0)      # passadas/s
+    phase = 2 * np.pi * np.cumsum(cadence_hz) / fps
+    hip_x = 200.0 + (6.0 / SCALE) * t / 60.0                      # lento na imagem
+    amp = 110.0
+    la = hip_x + amp * np.sin(phase)
+    ra = hip_x - amp * np.sin(phase)
+
+    # passos verdadeiros: extremos de sin(phase) (fase = pi/2 + k pi)
+    k = np.arange(np.ceil((phase[0] - np.pi / 2) / np.pi), np.floor((phase[-1] - np.pi / 2) / np.pi) + 1)
+    truth = np.interp(np.pi / 2 + k * np.pi, phase, np.arange(n))
+
+    scores = {}
+    obs = {}
+    for name, x in (("L", la), ("R", ra)):
+        s = rng.uniform(0.6, 0.95, n)
+        y = x + rng.normal(0, 2.0, n)
+        # score baixo = erro grande
+        bad = rng.random(n) < 0.06
+        s[bad] = rng.uniform(0.2, 0.35, bad.sum())
+        y[bad] += rng.normal(0, 25.0, bad.sum())
+        # falhas em trechos
+        starts = np.flatnonzero(rng.random(n) < 0.012)
+        for a in starts:
+            y[a: a + rng.integers(3, 11)] = np.nan
+        obs[name] = y
+        scores[name] = s
+
+    # trocas esquerda/direita isoladas
+    swap = rng.random(n) < 0.01
+    obs["L"][swap], obs["R"][swap] = obs["R"][swap].copy(), obs["L"][swap].copy()
+    for name in ("L", "R"):
+        scores[name][swap] = 0.25
+        scores[name][np.isnan(obs[name])] = 0.0
+    return obs, scores, truth
+
+
+def _score(events, truth, tol):
+    events = np.sort(np.asarray(events, dtype=float))
+    if len(events) == 0:
+        return 0.0, 0.0, np.nan
+    j = np.clip(np.searchsorted(truth, events), 1, len(truth) - 1)
+    nearest = np.where(np.abs(truth[j - 1] - events) < np.abs(truth[j] - events), j - 1, j)
+    err = np.abs(truth[nearest] - events)
+    hit = err <= tol
+    recall = len(np.unique(nearest[hit])) / len(truth)
+    precision = hit.mean()
+    return recall, precision, err[hit].mean() if hit.any() else np.nan
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=120.0)
+    parser.add_argument("--repeats", type=int, default=7)
+    args = parser.parse_args()
+
+    ok = True
+    for fps in (30.0, 60.0, 120.0):
+        obs, scores, truth = _synthetic_ankles(fps, args.seconds)
+        n = len(obs["L"])
+        la_f, ra_f = _ffill(obs["L"]), _ffill(obs["R"])
+        # tira as bordas (passo cortado no começo / fim)
+        truth = truth[(truth > 5) & (truth < n - 5)]
+
+        t0 = time.perf_counter()
+        ev_old, _, _ = legacy_scissoring(la_f, ra_f, SCALE, fps)
+        t_old = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        res = compute_stride_from_ankles_scissoring(
+            la_f, None, ra_f, None, SCALE, fps, LA_w=scores["L"], RA_w=scores["R"]
+        )
+        t_new = time.perf_counter() - t0
+        ev_new = res["step_events"] if res else []
+
+        r_old, p_old, e_old = _score(ev_old, truth, 2)
+        r_new, p_new, e_new = _score(ev_new, truth, 2)
+        window = window_for_fps(fps, METRICS_CFG.stride_smoothing_s)
+        print(f"fps={fps:5.0f}  passos={len(truth)}  janela nova={window} frames")
+        print(f"   legado: recall={r_old:.3f} precisão={p_old:.3f} erro={e_old:.2f} fr  "
+              f"({1000.0 * t_old * 1000 / n:.3f} ms/1000 frames)")
+        print(f"   novo:   recall={r_new:.3f} precisão={p_new:.3f} erro={e_new:.2f} fr  "
+              f"({1000.0 * t_new * 1000 / n:.3f} ms/1000 frames)")
+        if (r_new + p_new) < (r_old + p_old):
+            print("   REGRESSÃO: suavização nova acha passos pior que o legado")
+            ok = False
+
+    # custo puro da suavização numa série longa: `repeats` rodadas com os
+    # quatro intercalados, mediana dos tempos e das razões por rodada
+    rng = np.random.default_rng(1)
+    y = np.cumsum(rng.normal(size=1_000_000))
+    w = rng.random(len(y))
+
+    def _timed(fn):
+        t0 = time.perf_counter()
+        fn()
+        return time.perf_counter() - t0
+
+    print(f"1M amostras ({'janela':>6s}): {'savgol':>7s} {'sem pesos':>9s} {'ponderado':>9s} {'+robusto':>9s}")
+    for window in (11, 13, 25):
+        fns = (
+            lambda: savgol_filter(y, window, 2),
+            lambda: local_poly_smooth(y, None, window=window, polyorder=2),
+            lambda: local_poly_smooth(y, w, window=window, polyorder=2),
+            lambda: local_poly_smooth(y, w, window=window, polyorder=2, robust_iters=2),
+        )
+        for fn in fns:
+            fn()  # aquece (alocações, cache)
+        rounds = np.array([[_timed(fn) for fn in fns] for _ in range(max(1, args.repeats))])
+        t_sg, t_un, t_lp, t_rb = np.median(rounds, axis=0)
+        r_un = float(np.median(rounds[:, 1] / rounds[:, 0]))
+        r_lp = float(np.median(rounds[:, 2] / rounds[:, 0]))
+        print(f"1M amostras ({window:6d}): {1000 * t_sg:5.0f}ms {1000 * t_un:7.0f}ms {1000 * t_lp:7.0f}ms "
+              f"{1000 * t_rb:7.0f}ms   (sem pesos = {r_un:.2f}x, ponderado = {r_lp:.1f}x savgol)")
+        # sem pesos = núcleo fixo: ~o custo do savgol; com pesos, o sistema
+        # por frame custa até MAX_WEIGHTED_VS_SAVGOL savgols
+        speed_ok = r_un <= MAX_UNWEIGHTED_VS_SAVGOL and r_lp <= MAX_WEIGHTED_VS_SAVGOL
+        if not speed_ok:
+            print(f"   REGRESSÃO: sem pesos > {MAX_UNWEIGHTED_VS_SAVGOL:.1f}x ou "
+                  f"ponderado > {MAX_WEIGHTED_VS_SAVGOL:.0f}x o savgol")
+        ok &= speed_ok
+
+    # sem pesos e sem buracos = Savitzky-Golay no miolo
+    h = 6
+    same = np.allclose(local_poly_smooth(y[:5000], None, window=13, polyorder=2)[h:-h],
+                       savgol_filter(y[:5000], 13, 2)[h:-h], rtol=0, atol=1e-9)
+    print(f"sem pesos == savgol no miolo: {same}")
+    ok &= same
+
+    if not ok:
+        print("REGRESSÃO")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
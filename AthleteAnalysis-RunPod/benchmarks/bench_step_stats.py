@@ -0,0 +1,208 @@
+# benchmarks/bench_step_stats.py
+"""
+Passos / passada em séries longas: loops antigos vs engine vetorizada.
+
+Gera sinais sintéticos de corrida (tornozelos em "tesoura" + quadril
+oscilando, com ruído e falhas de detecção) com N frames e mede:
+
+  - legado:  loop por pico em compute_stride_from_ankles_scissoring +
+             filtro por takeoff evento a evento + step_mask em loop
+             (cópia fiel do código antigo, abaixo);
+  - novo:    compute_stride_hybrid + compute_step_stats (só arrays), sem
+             pesos (mesma entrada do legado) e com a confiança por
+             tornozelo que o pipeline passa (ajuste ponderado + robusto).
+
+Confere que eventos, comprimentos e a série de contagem batem, e reprova
+se o caminho novo ou a engine pós-picos ficarem mais lentos que o código
+antigo (ou o caminho com confiança passar de MAX_WEIGHTED_VS_LEGACY).
+
+Uso (de dentro de AthleteAnalysis-RunPod/):
+    python -m benchmarks.bench_step_stats --frames 100000
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+from scipy.signal import find_peaks, savgol_filter
+
+from app.config import METRICS_CFG
+from app.metrics import _interp_nans, compute_step_stats, compute_stride_hybrid
+
+FPS = 60.0
+SCALE = 0.005  # m/px
+# teto do caminho com confiança vs legado: 3 passadas ponderadas por
+# tornozelo (ajuste + 2 robustas), ~1.2x o legado inteiro cada
+MAX_WEIGHTED_VS_LEGACY = 5.0
+
+
+def _synthetic_run(n, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(n) / FPS
+    cadence_hz = 1.6 + 0.2 * np.sin(2 * np.pi * t / 40.0)
+    phase = 2 * np.pi * np.cumsum(cadence_hz) / FPS
+    hip_x = 200.0 + 1.2 * np.arange(n)
+    hip_y = 400.0 + 6.0 * np.sin(2 * phase) + rng.normal(0, 0.8, n)
+    amp = 90.0 + 10.0 * rng.standard_normal(n).cumsum() / np.sqrt(n)
+    la_x = hip_x + amp * np.sin(phase) + rng.normal(0, 2.0, n)
+    ra_x = hip_x - amp * np.sin(phase) + rng.normal(0, 2.0, n)
+    la_y = np.full(n, 600.0)
+    ra_y = np.full(n, 600.0)
+    # falhas de detecção do tornozelo
+    drop = rng.random(n) < 0.02
+    la_x[drop] = np.nan
+    ra_x[rng.random(n) < 0.02] = np.nan
+    return hip_x, hip_y, la_x, la_y, ra_x, ra_y
+
+
+# ------------------------------------------------------------
+# LEGADO (cópia do código antigo)
+# ------------------------------------------------------------
+def _smooth_series(x, window):
+    """Suavização antiga: interpola NaN + Savitzky-Golay de janela fixa."""
+    return savgol_filter(_interp_nans(np.asarray(x, dtype=float)), window, 2)
+
+
+def legacy_scissoring(LA_x, RA_x, scale_m_per_px, fps):
+    LA_x = _interp_nans(np.asarray(LA_x, dtype=float))
+    RA_x = _interp_nans(np.asarray(RA_x, dtype=float))
+    window_stride = min(11, getattr(METRICS_CFG, "smoothing_window", 9) + 2)
+    delta_x_m = (_smooth_series(LA_x, window=window_stride)
+                 - _smooth_series(RA_x, window=window_stride)) * scale_m_per_px
+    min_dist_frames = int(max(1, fps * 0.25))
+    peaks_left, _ = find_peaks(delta_x_m, distance=min_dist_frames, height=0.15)
+    peaks_right, _ = find_peaks(-delta_x_m, distance=min_dist_frames, height=0.15)
+    all_steps = np.sort(np.concatenate([peaks_left, peaks_right])).astype(int)
+
+    stride_lengths = []
+    step_times = []
+    for i in range(len(all_steps)):
+        idx = all_steps[i]
+        stride_lengths.append(abs(delta_x_m[idx]))
+        if i > 0:
+            step_times.append((all_steps[i] - all_steps[i - 1]) / fps)
+    return all_steps.tolist(), stride_lengths, step_times
+
+
+def legacy_steps_block(step_events_raw, takeoff, n):
+    filtered = []
+    for ev in step_events_raw:
+        if ev <= takeoff:
+            filtered.append(ev)
+    step_mask = np.zeros(n, dtype=int)
+    for idx in filtered:
+        if 0 <= idx < n:
+            step_mask[idx] += 1
+    return filtered, np.cumsum(step_mask).tolist()
+
+
+def _best(fn, repeats):
+    """Menor tempo de `repeats` execuções (s) + o resultado da última."""
+    best, out = np.inf, None
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=100_000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    n = args.frames
+    hip_x, hip_y, la_x, la_y, ra_x, ra_y = _synthetic_run(n)
+    takeoff = int(0.9 * n)
+    # confiança como o assemble_series entrega: score onde viu, 0 na falha
+    rng = np.random.default_rng(2)
+    la_w = np.where(np.isnan(la_x), 0.0, rng.uniform(0.5, 0.95, n))
+    ra_w = np.where(np.isnan(ra_x), 0.0, rng.uniform(0.5, 0.95, n))
+
+    def _legacy():
+        ev, lens, _ = legacy_scissoring(la_x, ra_x, SCALE, FPS)
+        return ev, lens, legacy_steps_block(ev, takeoff, n)
+
+    def _new(LA_w=None, RA_w=None):
+        stride = compute_stride_hybrid(hip_x, hip_y, la_x, la_y, ra_x, ra_y, SCALE, FPS, LA_w=LA_w, RA_w=RA_w)
+        events = np.asarray(stride["step_events"], dtype=int)
+        keep = events <= takeoff
+        stats = compute_step_stats(
+            events[keep],
+            FPS,
+            n,
+            step_lengths_m=np.asarray(stride["step_lengths_m"], dtype=float)[keep],
+            step_sides=np.asarray(stride["step_sides"], dtype=object)[keep],
+        )
+        stats["step_count_series"].tolist()
+        return stats
+
+    t_old, (ev_old, len_old, (filt_old, count_old)) = _best(_legacy, args.repeats)
+    t_new, stats = _best(_new, args.repeats)
+    t_weighted, stats_w = _best(lambda: _new(la_w, ra_w), args.repeats)
+
+    # só o trecho pós-picos (o que era loop): picos prontos entram, estatísticas saem
+    delta = np.abs(np.random.default_rng(1).normal(0.4, 0.05, n))
+    ev = np.asarray(ev_old, dtype=int)
+
+    def _legacy_post():
+        lens, times = [], []
+        for i in range(len(ev_old)):
+            lens.append(abs(delta[ev_old[i]]))
+            if i > 0:
+                times.append((ev_old[i] - ev_old[i - 1]) / FPS)
+        return legacy_steps_block(ev_old, takeoff, n)
+
+    def _new_post():
+        keep = ev <= takeoff
+        st = compute_step_stats(ev[keep], FPS, n, step_lengths_m=delta[ev][keep])
+        st["step_count_series"].tolist()
+        return st
+
+    t_old_post, _ = _best(_legacy_post, args.repeats)
+    t_new_post, _ = _best(_new_post, args.repeats)
+
+    # paridade da engine pós-picos (a suavização nova muda os picos de
+    # propósito; ver benchmarks/bench_smoothing.py)
+    keep = ev <= takeoff
+    st = compute_step_stats(ev[keep], FPS, n, step_lengths_m=np.asarray(len_old)[keep])
+    same = (
+        st["step_events"] == filt_old
+        and np.allclose(st["step_lengths_m"], np.asarray(len_old)[: len(filt_old)])
+        and st["step_count_series"].tolist() == count_old
+    )
+    speedup = t_old / max(t_new, 1e-9)
+    speedup_post = t_old_post / max(t_new_post, 1e-9)
+    print(f"frames={n}  passos={len(stats['step_events'])}  (melhor de {args.repeats})")
+    print(f"caminho todo: legado {1000.0 * t_old:8.2f} ms   novo {1000.0 * t_new:8.2f} ms  "
+          f"({speedup:.1f}x, suavização + find_peaks + engine)")
+    print(f"  com confiança (pipeline: ponderado + robusto): {1000.0 * t_weighted:8.2f} ms  "
+          f"({t_weighted / max(t_old, 1e-9):.1f}x o legado; {len(stats_w['step_events'])} passos)")
+    print(f"pós-picos:    legado {1000.0 * t_old_post:8.2f} ms   engine {1000.0 * t_new_post:8.2f} ms  "
+          f"({speedup_post:.1f}x)")
+    print(
+        f"cadência média={np.nanmean(np.asarray(stats['step_cadence_spm'], dtype=float)):.1f} passos/min  "
+        f"assimetria comprimento={stats['step_length_asymmetry_pct']:.2f}%  "
+        f"duração={stats['step_duration_asymmetry_pct']:.2f}%"
+    )
+
+    ok = True
+    if not same:
+        print("REGRESSÃO: engine pós-picos diferente do legado")
+        ok = False
+    if speedup < 1.0 or speedup_post < 1.0:
+        print("REGRESSÃO: mais lento que o código antigo")
+        ok = False
+    if t_weighted > MAX_WEIGHTED_VS_LEGACY * t_old:
+        print(f"REGRESSÃO: caminho com confiança > {MAX_WEIGHTED_VS_LEGACY:.0f}x o legado")
+        ok = False
+    if not ok:
+        sys.exit(1)
+    print(f"OK: engine pós-picos igual ao código antigo e mais rápida "
+          f"(suavização nova: {len(stats['step_events'])} passos vs {len(filt_old)} no legado)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+# benchmarks/bench_subframe.py
+"""
+Instantes sub-frame de eventos vs frames inteiros em vídeo de fps baixo.
+
+Eventos com instante REAL contínuo (fase aleatória dentro do frame),
+amostrados a 30 / 60 fps:
+
+  - saltos balísticos (quadril + tornozelos): ápice, decolagem, aterrissagem
+    e tempo de voo; compara `jump_*_frame / fps` e `jump_duration_s` com
+    `jump_*_time_s` e `jump_flight_time_s`;
+  - passos na tesoura dos tornozelos (gerador de bench_smoothing): tempo
+    de cada impacto e duração dos passos; compara `step_events / fps` com
+    `step_times_s` do `compute_step_stats` com os deslocamentos.
+
+Decolagem / aterrissagem / voo: o frame inteiro vem de limiares (o
+"chão" do critério não é o instante físico), então a quantização é
+comparada pelo DESVIO PADRÃO do erro e, à parte, o sub-frame tem de sair
+SEM viés: |erro médio| < meio frame (o cruzamento do limiar suavizado
+errava cada ponta em ~0.8 frame), com e sem tornozelos. Ápice e passos
+pelo erro médio absoluto.
+
+Uso (de dentro de AthleteAnalysis-RunPod/):
+    python -m benchmarks.bench_subframe --jumps 60
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from app.metrics import compute_step_stats, compute_stride_from_ankles_scissoring, detect_jumps
+from benchmarks.bench_smoothing import SCALE, _ffill, _synthetic_ankles
+
+G = 9.81
+MAX_BIAS_FRAMES = 0.5   # |erro médio| máximo do instante sub-frame
+
+
+def _synthetic_jumps(fps, n_jumps, flight_s=0.42, seed=0):
+    """Quadril + tornozelos com voos em instantes contínuos; devolve os reais."""
+    rng = np.random.default_rng(seed)
+    gap_s = 2.5
+    n = int(fps * gap_s * (n_jumps + 1))
+    t = np.arange(n) / fps
+    hip_y = 500.0 + 3.0 * np.sin(2 * np.pi * 3.0 * t)
+    ankle_y = 700.0 - 25.0 * np.clip(np.sin(2 * np.pi * 1.5 * t), 0, None)
+
+    truth = []
+    for k in range(n_jumps):
+        t0 = gap_s * (k + 0.7) + rng.uniform(0, 1.0 / fps)   # fase sub-frame
+        f = flight_s * rng.uniform(0.9, 1.1)
+        u = t - t0
+        air = (u >= 0) & (u <= f)
+        h_m = np.where(air, 0.5 * G * u * (f - u), 0.0)
+        hip_y = np.where(air, 500.0 - h_m / SCALE, hip_y)
+        # apoio parado 0.2 s antes e depois
+        still = ((u > -0.2) & (u < 0)) | ((u > f) & (u < f + 0.2))
+        ankle_y = np.where(still, 700.0, ankle_y)
+        ankle_y = np.where(air, 700.0 - 1.3 * h_m / SCALE, ankle_y)
+        truth.append((t0, t0 + 0.5 * f, t0 + f))
+
+    hip_y = hip_y + rng.normal(0, 0.3, n)
+    ankle_y = ankle_y + rng.normal(0, 0.3, n)
+    return hip_y, ankle_y, np.asarray(truth)
+
+
+def _match(found_apex_s, truth_apex_s):
+    j = np.abs(found_apex_s[:, None] - truth_apex_s[None, :]).argmin(axis=0)
+    return j
+
+
+def _bench_jumps(fps, n_jumps, with_ankles=True):
+    hip_y, ankle_y, truth = _synthetic_jumps(fps, n_jumps)
+    ankle_ys = [ankle_y, ankle_y] if with_ankles else None
+    label = "quadril+tornozelos" if with_ankles else "só quadril"
+    t0 = time.perf_counter()
+    jumps = detect_jumps(hip_y, SCALE, fps, ankle_ys=ankle_ys)["jumps"]
+    elapsed = time.perf_counter() - t0
+    if len(jumps) != len(truth):
+        print(f"fps={fps:5.0f}  {label}: {len(jumps)} saltos achados vs {len(truth)} reais")
+        return False
+
+    def col(key, div=1.0):
+        return np.array([j[key] for j in jumps], dtype=float) / div
+
+    j = _match(col("jump_apex_time_s"), truth[:, 1])
+    rows = [
+        ("ápice", col("jump_apex_frame", fps)[j], col("jump_apex_time_s")[j], truth[:, 1], "mae"),
+        ("decolagem", col("jump_takeoff_frame", fps)[j], col("jump_takeoff_time_s")[j], truth[:, 0], "std"),
+        ("aterrissagem", col("jump_landing_frame", fps)[j], col("jump_landing_time_s")[j], truth[:, 2], "std"),
+        ("voo", col("jump_duration_s")[j], col("jump_flight_time_s")[j], truth[:, 2] - truth[:, 0], "std"),
+    ]
+    print(f"fps={fps:5.0f}  {label}  saltos={len(truth)}  ({1000.0 * elapsed:.2f} ms)")
+    ok = True
+    for name, old, new, ref, stat in rows:
+        e_old, e_new = old - ref, new - ref
+        if stat == "mae":
+            s_old, s_new = np.abs(e_old).mean(), np.abs(e_new).mean()
+        else:
+            s_old, s_new = e_old.std(), e_new.std()
+        print(f"   {name:13s} {stat}: inteiro={1000 * s_old:6.2f} ms  sub-frame={1000 * s_new:6.2f} ms"
+              f"  (viés sub-frame {1000 * e_new.mean():+6.1f} ms)")
+        ok &= s_new < s_old
+        if abs(e_new.mean()) >= MAX_BIAS_FRAMES / fps:
+            print(f"   {name}: viés sub-frame acima de {MAX_BIAS_FRAMES} frame")
+            ok = False
+    return ok
+
+
+def _bench_steps(fps, seconds):
+    obs, scores, truth = _synthetic_ankles(fps, seconds, seed=3)
+    n = len(obs["L"])
+    res = compute_stride_from_ankles_scissoring(
+        _ffill(obs["L"]), None, _ffill(obs["R"]), None, SCALE, fps,
+        LA_w=scores["L"], RA_w=scores["R"],
+    )
+    stats = compute_step_stats(res["step_events"], fps, n, step_offsets=res["step_offsets"])
+    ev = np.asarray(stats["step_events"], dtype=float)
+    sub = np.asarray(stats["step_frames_subframe"])
+    # casa cada passo achado com o real mais próximo (±1 frame)
+    j = np.abs(ev[:, None] - truth[None, :]).argmin(axis=1)
+    hit = np.abs(ev - truth[j]) <= 1.5
+    e_old = np.abs(ev[hit] - truth[j][hit]).mean() / fps
+    e_new = np.abs(sub[hit] - truth[j][hit]).mean() / fps
+
+    # durações: pares consecutivos casados com reais consecutivos
+    pair = hit[1:] & hit[:-1] & (np.diff(j) == 1)
+    d_ref = np.diff(truth[j])[pair]
+    d_old = np.abs(np.diff(ev)[pair] - d_ref).mean() / fps
+    d_new = np.abs(np.diff(sub)[pair] - d_ref).mean() / fps
+    print(f"fps={fps:5.0f}  passos={int(hit.sum())}")
+    print(f"   impacto       mae: inteiro={1000 * e_old:6.2f} ms  sub-frame={1000 * e_new:6.2f} ms")
+    print(f"   duração       mae: inteiro={1000 * d_old:6.2f} ms  sub-frame={1000 * d_new:6.2f} ms")
+    return e_new < e_old and d_new < d_old
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jumps", type=int, default=60)
+    parser.add_argument("--seconds", type=float, default=120.0)
+    args = parser.parse_args()
+
+    ok = True
+    for fps in (30.0, 60.0):
+        ok &= _bench_jumps(fps, args.jumps)
+        ok &= _bench_jumps(fps, args.jumps, with_ankles=False)
+        ok &= _bench_steps(fps, args.seconds)
+
+    if not ok:
+        print("REGRESSÃO: sub-frame não reduziu o erro de quantização ou ficou com viés")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
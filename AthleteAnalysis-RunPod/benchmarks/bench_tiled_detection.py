@@ -0,0 +1,137 @@
+# benchmarks/bench_tiled_detection.py
+"""
+Detecção em tiles: recall vs latência com atleta pequeno em plano aberto.
+
+Clipe sintético 1920x1080 com pessoas (retângulos) de 40 px de altura e
+um detector stub que imita o limite do YOLO: só acha caixa com altura
+>= MIN_INPUT_PX na ENTRADA do modelo (frame inteiro 1920 -> 640 reduz 3x,
+então 40 px viram ~13 px e somem; num tile 640 em 640 continuam 40 px).
+Custo do stub ~ imgsz² como nos outros benchmarks.
+
+Por orçamento de tiles (0 = desligado ... todos): recall do alvo (bbox
+escolhida com IOU >= 0.3 contra a real), chamadas do detector, tiles
+rodados e ms por frame. Controle: atleta grande (160 px) não pode
+disparar tiles fora do primeiro frame. A estimativa de custo tem que
+cobrir os tiles: chamadas medidas <= teto estimado ("detector_max"), e o
+teto bate (±10%) com o atleta pequeno o clipe inteiro.
+
+Uso (de dentro de AthleteAnalysis-RunPod/):
+    python -m benchmarks.bench_tiled_detection --frames 240 --person-h 40
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from dataclasses import replace
+
+import numpy as np
+
+import app.pipeline as pipeline
+from app.models import MODEL_REGISTRY, detector_key
+from app.quality import get_quality_tier
+from app.target_selection import _iou
+from app.tiling import plan_tiles
+from benchmarks.bench_quality_tiers import StubDetector, _install_stubs
+from benchmarks.synthetic import (
+    SYNTHETIC_CALIB,
+    StubReIDEncoder,
+    SyntheticScene,
+    write_synthetic_clip,
+)
+
+FPS = 30.0
+# menor altura (px na entrada do modelo) que o detector stub enxerga
+MIN_INPUT_PX = 16.0
+
+
+class SmallBlindDetector(StubDetector):
+    """Stub que perde pessoas pequenas na entrada do modelo."""
+
+    def predict(self, frame, imgsz=640, **kw):
+        res = super().predict(frame, imgsz=imgsz, **kw)
+        boxes = res[0].boxes
+        if boxes is None:
+            return res
+        scale = min(1.0, imgsz / float(max(frame.shape[:2])))
+        xyxy = boxes.xyxy.a
+        keep = (xyxy[:, 3] - xyxy[:, 1]) * scale >= MIN_INPUT_PX
+        if not keep.any():
+            return [type(res[0])(None)]
+        return [type(res[0])(type(boxes)(xyxy[keep], boxes.conf.a[keep]))]
+
+
+def _run(clip, scene, tier, ref):
+    t0 = time.perf_counter()
+    res = pipeline.process_video(clip, SYNTHETIC_CALIB, ref_point=ref, quality=tier)
+    dt = time.perf_counter() - t0
+    boxes = res["series"]["bbox"]
+    hits = sum(
+        b is not None and _iou(np.asarray(b), scene.true_boxes(t)[0]) >= 0.3
+        for t, b in enumerate(boxes)
+    )
+    m = res["quality"]["cost"]["measured"]
+    return hits / max(1, len(boxes)), dt, m, res["quality"]["cost"]["estimated"]["calls"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=240)
+    parser.add_argument("--person-h", type=float, default=40.0)
+    parser.add_argument("--gflops-per-s", type=float, default=20000.0)
+    args = parser.parse_args()
+
+    precise = replace(get_quality_tier("precise"), motion_gate=False)
+    n_tiles = len(plan_tiles(1920, 1080, precise.detector_imgsz))
+    ok = True
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, person_h, budgets in (
+            ("pequeno", args.person_h, (0, 1, 2, 4, n_tiles)),
+            ("grande (controle)", 160.0, (0, 4)),
+        ):
+            scene = SyntheticScene(
+                n_frames=args.frames, img_w=1920, img_h=1080, person_h=person_h, occlusions=[]
+            )
+            _install_stubs(scene, args.gflops_per_s)
+            MODEL_REGISTRY.evict(detector_key(precise.detector_weights))
+            MODEL_REGISTRY.get(
+                detector_key(precise.detector_weights),
+                lambda: SmallBlindDetector(scene.colors, 194.9, args.gflops_per_s),
+                sizer=lambda _: 0,
+            )
+            pipeline.compute_reid_embeddings = StubReIDEncoder()
+
+            b0 = scene.true_boxes(0)[0]
+            ref = (float(0.5 * (b0[0] + b0[2])), float(0.5 * (b0[1] + b0[3])))
+            clip = write_synthetic_clip(os.path.join(tmp, f"clip_{int(person_h)}.mp4"), scene, fps=FPS)
+
+            print(f"atleta {label}: {person_h:.0f} px em 1920x1080, {args.frames} frames, grade de {n_tiles} tiles")
+            print(f"   {'tiles/frame':>11s} {'recall':>7s} {'det':>5s} {'tiles':>6s} {'ms/frame':>9s} "
+                  f"{'det est.':>8s} {'det teto':>8s}")
+            recalls = {}
+            for b in budgets:
+                recall, dt, m, est = _run(clip, scene, replace(precise, tile_budget=b), ref)
+                recalls[b] = recall
+                print(f"   {b:11d} {recall:7.1%} {m['detector_calls']:5d} {m['tile_calls']:6d} "
+                      f"{1000.0 * dt / args.frames:9.1f} {est['detector']:8.0f} {est['detector_max']:8d}")
+                ok &= m["detector_calls"] <= est["detector_max"]
+                if person_h < 80.0 and b > 0:
+                    ok &= m["detector_calls"] >= 0.9 * est["detector_max"]
+                if person_h >= 80.0 and b > 0:
+                    # atleta grande: tiles só antes do primeiro rastreio
+                    ok &= m["tiled_frames"] <= 2
+            if person_h < 80.0:
+                ok &= recalls[0] < 0.2 and recalls[4] > 0.9
+            else:
+                ok &= recalls[4] >= recalls[0] - 0.01
+
+    if not ok:
+        print("REGRESSÃO")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
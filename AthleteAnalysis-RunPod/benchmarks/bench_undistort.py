@@ -0,0 +1,121 @@
+# benchmarks/bench_undistort.py
+"""
+Correção de distorção de lente nos pontos: erro de distância e custo.
+
+Atleta correndo em linha reta a velocidade constante, filmado por uma
+câmera com distorção de barril (tipo celular / action cam). Os pontos
+"medidos" são os verdadeiros passados pelo modelo de distorção do OpenCV.
+Mede:
+
+  - erro da distância total (2 pontos de calibração) sem correção vs com
+    `undistort_points`;
+  - diferença da tabela cacheada pro cv2.undistortPoints exato (px);
+  - tempo por frame: cv2.undistortPoints a cada chamada vs tabela pronta
+    (o custo de montar a tabela aparece separado, é pago uma vez).
+
+Não precisa de modelos.
+
+Uso (de dentro de AthleteAnalysis-RunPod/):
+    python -m benchmarks.bench_undistort --frames 100000
+"""
+
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from app.metrics import compute_scale_m_per_px
+from app.undistort import CameraIntrinsics, undistort_calib, undistort_points, undistort_table
+
+FPS = 60.0
+W, H = 1920, 1080
+INTRINSICS = {
+    "fx": 1100.0, "fy": 1100.0, "cx": 960.0, "cy": 540.0,
+    "dist": [-0.32, 0.12, 0.0, 0.0, -0.02],
+    "width": W, "height": H,
+}
+
+
+def _distort(intr: CameraIntrinsics, pts: np.ndarray) -> np.ndarray:
+    """px sem distorção -> px como a lente entrega."""
+    K = intr.K
+    norm = np.stack(
+        [(pts[:, 0] - K[0, 2]) / K[0, 0], (pts[:, 1] - K[1, 2]) / K[1, 1], np.ones(len(pts))],
+        axis=-1,
+    )
+    out, _ = cv2.projectPoints(
+        norm.reshape(-1, 1, 3), np.zeros(3), np.zeros(3), K, np.asarray(intr.dist)
+    )
+    return out.reshape(-1, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=100_000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    intr = CameraIntrinsics.from_request(INTRINSICS, (W, H))
+    n = args.frames
+
+    # trajetória verdadeira: 1.5 m de altura de quadril perto da borda de cima,
+    # atravessando o quadro inteiro (onde a distorção é maior)
+    px_per_m = 120.0
+    x_true = np.linspace(60.0, W - 60.0, n)
+    y_true = np.full(n, 260.0)
+    true_dist_m = (x_true[-1] - x_true[0]) / px_per_m
+
+    calib_true = {
+        "point1": [60.0, 900.0], "point2": [60.0 + 10 * px_per_m, 900.0],
+        "real_distance_m": 10.0,
+    }
+    calib_img = dict(calib_true)
+    calib_img["point1"], calib_img["point2"] = _distort(
+        intr, np.asarray([calib_true["point1"], calib_true["point2"]])
+    ).tolist()
+    meas = _distort(intr, np.stack([x_true, y_true], axis=-1))
+
+    def _dist(pts, calib):
+        scale = compute_scale_m_per_px(calib)
+        return float(np.sum(np.hypot(*np.diff(pts, axis=0).T)) * scale)
+
+    d_raw = _dist(meas, calib_img)
+    d_und = _dist(undistort_points(intr, meas), undistort_calib(intr, calib_img))
+
+    # precisão da tabela vs undistortPoints exato
+    exact = cv2.undistortPoints(
+        meas.reshape(-1, 1, 2), intr.K, np.asarray(intr.dist), P=intr.K
+    ).reshape(-1, 2)
+    table_err = np.abs(undistort_points(intr, meas) - exact).max()
+
+    # custo
+    undistort_table.cache_clear()
+    t0 = time.perf_counter()
+    undistort_table(intr)
+    t_build = time.perf_counter() - t0
+
+    t_exact = t_table = 0.0
+    for _ in range(args.repeats):
+        t0 = time.perf_counter()
+        cv2.undistortPoints(meas.reshape(-1, 1, 2), intr.K, np.asarray(intr.dist), P=intr.K)
+        t_exact += time.perf_counter() - t0
+        t0 = time.perf_counter()
+        undistort_points(intr, meas)
+        t_table += time.perf_counter() - t0
+    t_exact /= args.repeats
+    t_table /= args.repeats
+
+    print(f"frames={n}  distância real={true_dist_m:.2f} m")
+    print(f"sem correção: {d_raw:7.2f} m  ({100.0 * (d_raw - true_dist_m) / true_dist_m:+.1f}%)")
+    print(f"corrigido:    {d_und:7.2f} m  ({100.0 * (d_und - true_dist_m) / true_dist_m:+.2f}%)")
+    print(f"tabela vs undistortPoints exato: erro máx {table_err:.3f} px")
+    print(f"montar tabela (1x por câmera/resolução): {1000.0 * t_build:.1f} ms")
+    print(
+        f"por frame: undistortPoints {1e6 * t_exact / n:.2f} µs   "
+        f"tabela {1e6 * t_table / n:.2f} µs  ({t_exact / max(t_table, 1e-9):.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
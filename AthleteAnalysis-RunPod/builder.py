@@ -6,11 +6,19 @@ from rtmlib import RTMPose
 
 print("🏗️  INICIANDO O PROCESSO DE DOWNLOAD (BAKING) DOS MODELOS...")
 
+# ATHLETE_PROFILE=cpu -> variantes menores (mesmas de app/config.py: cpu_model_config)
+PROFILE = os.environ.get("ATHLETE_PROFILE", "gpu").lower()
+print(f"--> Perfil: {PROFILE}")
+
 # ---------------------------------------------------------------------------
 # 1. YOLOv8 (Baixando do link específico que você pediu)
 # ---------------------------------------------------------------------------
-YOLO_URL = "https://huggingface.co/Ultralytics/YOLO11/resolve/a01aaa06caeff788b052e193acb76b3f21571b3a/yolo11x.pt"
-YOLO_FILENAME = "yolo11x.pt"
+if PROFILE == "cpu":
+    YOLO_URL = "https://github.com/ultralytics/assets/releases/download/v8.3.0/yolo11n.pt"
+    YOLO_FILENAME = "yolo11n.pt"
+else:
+    YOLO_URL = "https://huggingface.co/Ultralytics/YOLO11/resolve/a01aaa06caeff788b052e193acb76b3f21571b3a/yolo11x.pt"
+    YOLO_FILENAME = "yolo11x.pt"
 
 print(f"--> Baixando YOLO customizado de: {YOLO_URL}")
 
@@ -44,7 +52,12 @@ except Exception as e:
 # 3. RTMPose (RTMLib)
 # ---------------------------------------------------------------------------
 print("--> Baixando modelo RTMPose...")
-POSE_URL = "https://download.openmmlab.com/mmpose/v1/projects/rtmposev1/onnx_sdk/rtmpose-x_simcc-body7_pt-body7_700e-384x288-71d7b7e9_20230629.zip"
+if PROFILE == "cpu":
+    POSE_URL = "https://download.openmmlab.com/mmpose/v1/projects/rtmposev1/onnx_sdk/rtmpose-m_simcc-body7_pt-body7_700e-256x192-e48f03d0_20230504.zip"
+    POSE_INPUT_SIZE = (192, 256)
+else:
+    POSE_URL = "https://download.openmmlab.com/mmpose/v1/projects/rtmposev1/onnx_sdk/rtmpose-x_simcc-body7_pt-body7_700e-384x288-71d7b7e9_20230629.zip"
+    POSE_INPUT_SIZE = (288, 384)
 
 # Instanciar o RTMPose força o download e cache automático da biblioteca
 try:
@@ -52,6 +65,7 @@ try:
     # O arquivo baixado é o mesmo.
     RTMPose(
         onnx_model=POSE_URL,
+        model_input_size=POSE_INPUT_SIZE,
         backend="onnxruntime", 
         device="cpu" 
     )
@@ -62,4 +76,37 @@ except Exception as e:
     # mas o download geralmente acontece antes do erro.
     pass
 
+# ---------------------------------------------------------------------------
+# 4. ReID em ONNX (fp32 + int8 dinâmico) pro backend onnxruntime
+# ---------------------------------------------------------------------------
+# Mesmos caminhos de app/reid.py (reid_onnx_path). O builder roda antes do
+# COPY do código, então exportamos aqui sem importar o pacote app.
+print("--> Exportando ReID (ResNet18) para ONNX...")
+REID_ONNX_DIR = os.path.expanduser("~/.cache/athlete_reid")
+REID_ONNX_FP32 = os.path.join(REID_ONNX_DIR, "reid_resnet18.onnx")
+REID_ONNX_INT8 = os.path.join(REID_ONNX_DIR, "reid_resnet18_int8.onnx")
+
+try:
+    os.makedirs(REID_ONNX_DIR, exist_ok=True)
+    backbone = models.resnet18(weights=models.ResNet18_Weights.IMAGENET1K_V1)
+    encoder = torch.nn.Sequential(*list(backbone.children())[:-1]).eval()
+    with torch.no_grad():
+        torch.onnx.export(
+            encoder,
+            torch.zeros(1, 3, 256, 128),
+            REID_ONNX_FP32,
+            input_names=["input"],
+            output_names=["embedding"],
+            dynamic_axes={"input": {0: "batch"}, "embedding": {0: "batch"}},
+            opset_version=17,
+        )
+
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    quantize_dynamic(REID_ONNX_FP32, REID_ONNX_INT8, weight_type=QuantType.QInt8)
+    print("✅ ReID ONNX (fp32 + int8) exportado com sucesso!")
+except Exception as e:
+    # Não é fatal: app/reid.py exporta sob demanda se o arquivo não existir.
+    print(f"❌ Erro ao exportar ReID ONNX: {e}")
+    pass
+
 print("🎉 TODOS OS MODELOS FORAM ASSADOS NA IMAGEM!")
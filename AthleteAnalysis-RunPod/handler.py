@@ -1,3 +1,9 @@
+# threads de OpenMP / BLAS ANTES de qualquer import numérico (app.runtime e
+# app.config são leves; ver set_thread_env)
+from app.runtime import set_thread_env
+
+set_thread_env()
+
 import runpod
 import os
 import tempfile
@@ -6,19 +12,25 @@ import json
 import numpy as np
 import requests
 import shutil
-import gc
-import torch
 
-from app.pipeline import process_video
-from app.models import get_yolo_detector, get_rtmpose_model
+from app.config import MAX_SHARDS, MODEL_CFG
+from app.models import warmup_models
+from app.sharding import get_shard_pool
+from app.quality import PERCEPTION_BACKENDS, QUALITY_TIERS
+from app.runtime import release_device_memory
 
 # ---------------------------------------------------------
 # 1. Inicialização (Cold Start)
 # ---------------------------------------------------------
+# O worker só entra na fila (serverless.start, lá embaixo) DEPOIS dos
+# modelos carregados: é a readiness do RunPod.
 print("--> Inicializando modelos...")
-yolo = get_yolo_detector()
-rtmpose = get_rtmpose_model()
-print("--> Modelos carregados na GPU!")
+state = warmup_models()
+print(f"--> Modelos carregados ({state['device']}) em {state['load_s']:.1f}s!")
+if MODEL_CFG.shard_workers > 1:
+    # workers dos shards com os modelos já carregados (vivem entre jobs)
+    pids = get_shard_pool().warm()
+    print(f"--> Pool de shards aquecido ({len(pids)} workers)")
 
 # ---------------------------------------------------------
 # Helpers de Vídeo
@@ -69,6 +81,7 @@ def handler(job):
     """
     job_input = job['input']
     video_path = None
+    overlay_path = None
 
     try:
         # Validação de Calibração
@@ -77,6 +90,43 @@ def handler(job):
         
         calib = job_input['calib']
         ref_point = job_input.get('ref_point', None)
+        # nº de trechos paralelos (processos) - 1 = sequencial
+        shards = int(job_input.get('shards', 1) or 1)
+        if not 1 <= shards <= MAX_SHARDS:
+            return {"error": f"Campo 'shards' deve estar entre 1 e {MAX_SHARDS}."}
+        # intrínsecos da câmera (opcional) pra corrigir distorção de lente
+        intrinsics = job_input.get('intrinsics', None)
+        # nível de qualidade: preview | standard | precise (padrão)
+        quality = job_input.get('quality', None)
+        if quality and str(quality).strip().lower() not in QUALITY_TIERS:
+            return {"error": f"Campo 'quality' inválido (use {', '.join(QUALITY_TIERS)})."}
+        # backend de percepção: topdown (padrão) | yolo-pose (um modelo só)
+        perception = job_input.get('perception', None)
+        if perception and str(perception).strip().lower() not in PERCEPTION_BACKENDS:
+            return {"error": f"Campo 'perception' inválido (use {', '.join(PERCEPTION_BACKENDS)})."}
+        # prévia rápida primeiro (vai pro /status via progress_update)
+        progressive = bool(job_input.get('progressive', False))
+        # vídeo anotado: true ou {"width", "fps", "writer"}; volta em base64
+        overlay = job_input.get('overlay', None)
+        if overlay:
+            from app.overlay import OverlayOptions
+
+            try:
+                OverlayOptions.from_request(overlay)
+            except (TypeError, ValueError) as e:
+                return {"error": f"Campo 'overlay' inválido: {e}"}
+            if isinstance(overlay, dict):
+                # o arquivo é sempre temporário do worker
+                overlay = {k: v for k, v in overlay.items() if k != 'path'}
+        # miniaturas nos eventos + sprite sheet: true ou {thumb_width, ...}
+        keyframes = job_input.get('keyframes', None)
+        if keyframes:
+            from app.keyframes import KeyframeOptions
+
+            try:
+                keyframes = KeyframeOptions.from_request(keyframes)
+            except (TypeError, ValueError) as e:
+                return {"error": f"Campo 'keyframes' inválido: {e}"}
 
         # -----------------------------------------------------
         # 1. Obter o Vídeo (URL ou Base64)
@@ -96,11 +146,52 @@ def handler(job):
         # 2. Processar
         # -----------------------------------------------------
         print(f"--> Iniciando pipeline no arquivo: {video_path}")
-        result = process_video(
-            video_path=video_path,
-            calib=calib,
-            ref_point=ref_point
-        )
+        if progressive:
+            from app.progressive import iter_progressive
+
+            # enquanto o job está IN_PROGRESS, o /status mostra a prévia
+            # (sem séries) com a latência dela; o retorno é a completa
+            stages = {}
+            for stage in iter_progressive(
+                video_path,
+                calib,
+                ref_point=ref_point,
+                shards=shards,
+                intrinsics=intrinsics,
+                quality=quality,
+                perception=perception,
+                overlay=overlay,
+                keyframes=keyframes,
+            ):
+                stages[stage["stage"]] = stage
+                if not stage["final"]:
+                    runpod.serverless.progress_update(job, to_jsonable(stage))
+            result = stage["result"]
+            result["stages"] = {
+                name: {"pass_s": st["pass_s"], "latency_s": st["latency_s"]}
+                for name, st in stages.items()
+            }
+        else:
+            from app.pipeline import process_video
+
+            result = process_video(
+                video_path=video_path,
+                calib=calib,
+                ref_point=ref_point,
+                shards=shards,
+                intrinsics=intrinsics,
+                quality=quality,
+                perception=perception,
+                overlay=overlay,
+                keyframes=keyframes,
+            )
+
+        # vídeo anotado vai junto na resposta (mesmo formato da entrada)
+        info = result.get("overlay")
+        if info and info.get("path"):
+            overlay_path = info.pop("path")
+            with open(overlay_path, "rb") as f:
+                info["video_base64"] = base64.b64encode(f.read()).decode("ascii")
 
         # -----------------------------------------------------
         # 3. Retornar resultado limpo
@@ -115,15 +206,16 @@ def handler(job):
         # -----------------------------------------------------
         # 4. Limpeza Crítica (Arquivos e GPU)
         # -----------------------------------------------------
-        if video_path and os.path.exists(video_path):
-            try:
-                os.remove(video_path)
-            except:
-                pass
+        for path in (video_path, overlay_path):
+            if path and os.path.exists(path):
+                try:
+                    os.remove(path)
+                except:
+                    pass
         
         # Limpa memória da GPU para não travar o próximo job
-        gc.collect()
-        torch.cuda.empty_cache()
+        # (no perfil CPU nem importa torch.cuda)
+        release_device_memory()
 
 # ---------------------------------------------------------
 # 3. Iniciar o Worker